@@ -6,6 +6,8 @@ Multi-agent communication framework for AI-Driven Compiler Optimization System
 
 from .message_protocol import Message, MessageType, MessagePriority, MessageValidator
 from .context_manager import ContextManager
+from .blob_store import BlobStore
+from .mailbox import Mailbox, MailboxFull, MailboxClosed
 from .base_agent import BaseAgent, AgentState
 from .agent_registry import AgentRegistry
 
@@ -15,6 +17,10 @@ __all__ = [
     'MessagePriority',
     'MessageValidator',
     'ContextManager',
+    'BlobStore',
+    'Mailbox',
+    'MailboxFull',
+    'MailboxClosed',
     'BaseAgent',
     'AgentState',
     'AgentRegistry'
@@ -119,21 +119,30 @@ class AgentRegistry:
         """
         Route a message to the appropriate agent
         
+        Delivery happens outside the registry lock: the receiver's queue
+        may be full, and the sender then waits for room (backpressure)
+        without holding up routing between other agents.
+        
         Args:
             message: Message to route
             
         Returns:
             True if message delivered, False if receiver not found
+            
+        Raises:
+            MailboxFull: the receiver's queue stayed full for its send_timeout
+            MailboxClosed: the receiver has been stopped
         """
         with self._lock:
             receiver = self._agents.get(message.receiver_id)
-            
-            if receiver is None:
-                self.logger.error(f"Receiver {message.receiver_id} not found for message {message.message_id}")
-                return False
-            
-            receiver.receive_message(message)
-            
+        
+        if receiver is None:
+            self.logger.error(f"Receiver {message.receiver_id} not found for message {message.message_id}")
+            return False
+        
+        receiver.receive_message(message)
+        
+        with self._lock:
             # Update statistics
             self._message_count += 1
             route_key = f"{message.sender_id}->{message.receiver_id}"
@@ -173,7 +182,11 @@ class AgentRegistry:
                 "total_agents": len(self._agents),
                 "agents_by_type": self._get_agent_type_counts(),
                 "total_messages": self._message_count,
-                "message_routes": dict(self._message_stats)
+                "message_routes": dict(self._message_stats),
+                "mailboxes": {
+                    agent_id: agent.get_statistics()
+                    for agent_id, agent in self._agents.items()
+                }
             }
     
     def _get_agent_type_counts(self) -> Dict[str, int]:
@@ -3,17 +3,35 @@ Base Agent Class for Multi-Agent System
 
 This module provides the abstract base class that all agents inherit from.
 It handles message passing, state management, and lifecycle operations.
+
+Each agent owns a Mailbox (see mailbox.py) drained by its processing
+thread.  The thread blocks until a message arrives and handles it under
+the sender's contextvars, so a run's context namespace follows requests
+into agent threads.  A sender delivering to a full mailbox waits up to
+`send_timeout` seconds and then gets MailboxFull; nothing is dropped.
+submit() sends a request and returns a Future for the result, which is
+how CompilerOptimizationPipeline(message_passing=True) drives agents.
 """
 
 from abc import ABC, abstractmethod
+import asyncio
+from concurrent.futures import Future
 from typing import Dict, Any, Optional, List
-import queue
 import threading
 import logging
+import time
 from datetime import datetime
 
 from .message_protocol import Message, MessageType, MessagePriority
 from .context_manager import ContextManager
+from .mailbox import Mailbox
+
+# Lower number = taken first
+_PRIORITY_ORDER = {
+    MessagePriority.HIGH: 0,
+    MessagePriority.MEDIUM: 1,
+    MessagePriority.LOW: 2,
+}
 
 
 class AgentState:
@@ -40,7 +58,8 @@ class BaseAgent(ABC):
                  agent_id: str, 
                  agent_type: str,
                  context_manager: ContextManager,
-                 max_queue_size: int = 100):
+                 max_queue_size: int = 100,
+                 send_timeout: Optional[float] = 5.0):
         """
         Initialize base agent
         
@@ -49,13 +68,20 @@ class BaseAgent(ABC):
             agent_type: Type of agent (e.g., "analysis", "optimization")
             context_manager: Shared context manager
             max_queue_size: Maximum size of message queue
+            send_timeout: Seconds a sender waits for room in a full queue
+                          before MailboxFull (None = wait indefinitely)
         """
         self.agent_id = agent_id
         self.agent_type = agent_type
         self.context = context_manager
+        self.send_timeout = send_timeout
         
-        # Message queue for incoming messages
-        self._message_queue = queue.PriorityQueue(maxsize=max_queue_size)
+        # Mailbox for incoming messages
+        self._mailbox = Mailbox(maxsize=max_queue_size)
+        
+        # Futures of submit()ted requests, by message_id
+        self._pending: Dict[str, Future] = {}
+        self._pending_lock = threading.Lock()
         
         # State management
         self._state = AgentState.INITIALIZED
@@ -63,7 +89,10 @@ class BaseAgent(ABC):
         
         # Message processing thread
         self._processing_thread: Optional[threading.Thread] = None
-        self._stop_event = threading.Event()
+        
+        # Throughput counters (updated by the processing thread only)
+        self._processed = 0
+        self._busy_seconds = 0.0
         
         # Agent registry reference (set by registry)
         self._registry = None
@@ -105,6 +134,15 @@ class BaseAgent(ABC):
         """
         pass
     
+    async def aprocess(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async variant of process() used by asyncio pipelines
+        
+        The default runs process() on the loop's default executor; agents
+        with blocking I/O override it to await that I/O instead.
+        """
+        return await asyncio.to_thread(self.process, input_data)
+    
     def send_message(self, 
                      receiver_id: str, 
                      payload: Dict[str, Any],
@@ -143,73 +181,120 @@ class BaseAgent(ABC):
         
         return message
     
+    def submit(self,
+               payload: Dict[str, Any],
+               sender_id: str = "client",
+               priority: MessagePriority = MessagePriority.MEDIUM) -> Future:
+        """
+        Send this agent a request and return a Future for its result
+        
+        The request is routed through the registry when there is one (so
+        it is counted and observed like any other message) and handled by
+        the agent's processing thread; the Future resolves to process()'s
+        return value or raises its exception.  Raises MailboxFull if the
+        queue stays full for `send_timeout` seconds.
+        
+        Args:
+            payload: Input data for process()
+            sender_id: Reported sender of the request
+            priority: Message priority
+            
+        Returns:
+            Future of the processing result
+        """
+        message = Message.create(
+            sender_id=sender_id,
+            receiver_id=self.agent_id,
+            message_type=MessageType.REQUEST,
+            payload=payload,
+            priority=priority
+        )
+        future: Future = Future()
+        with self._pending_lock:
+            self._pending[message.message_id] = future
+        try:
+            if self._registry:
+                self._registry.route_message(message)
+            else:
+                self.receive_message(message)
+        except BaseException:
+            with self._pending_lock:
+                self._pending.pop(message.message_id, None)
+            raise
+        return future
+    
     def receive_message(self, message: Message):
         """
         Receive a message (called by registry)
         
+        Blocks while the queue is full, for up to `send_timeout` seconds.
+        
         Args:
             message: Message to receive
+            
+        Raises:
+            MailboxFull: the queue stayed full for `send_timeout` seconds
+            MailboxClosed: the agent has been stopped
         """
-        # Priority: HIGH=0, MEDIUM=1, LOW=2 (lower number = higher priority)
-        priority_map = {
-            MessagePriority.HIGH: 0,
-            MessagePriority.MEDIUM: 1,
-            MessagePriority.LOW: 2
-        }
-        
-        try:
-            self._message_queue.put(
-                (priority_map[message.priority], message),
-                block=False
-            )
-            self.logger.debug(f"Received {message.message_type.value} from {message.sender_id}")
-        except queue.Full:
-            self.logger.error(f"Message queue full, dropping message {message.message_id}")
+        self._mailbox.put(message, _PRIORITY_ORDER[message.priority],
+                          timeout=self.send_timeout)
+        self.logger.debug(f"Received {message.message_type.value} from {message.sender_id}")
     
     def _process_messages(self):
-        """Internal method to process messages from queue"""
-        while not self._stop_event.is_set():
+        """Internal method to process messages from the mailbox until stop()"""
+        while True:
+            envelope = self._mailbox.get()
+            if envelope is None:                    # mailbox closed by stop()
+                break
+            started = time.perf_counter()
             try:
-                # Wait for message with timeout
-                priority, message = self._message_queue.get(timeout=0.1)
-                
-                self.logger.info(f"Processing message {message.message_id} from {message.sender_id}")
-                
-                # Handle message based on type
-                if message.message_type == MessageType.REQUEST:
-                    self._handle_request(message)
-                elif message.message_type == MessageType.RESPONSE:
-                    self._handle_response(message)
-                elif message.message_type == MessageType.NOTIFICATION:
-                    self._handle_notification(message)
-                
-                self._message_queue.task_done()
-                
-            except queue.Empty:
-                continue
+                envelope.context.run(self._dispatch, envelope.message)
             except Exception as e:
                 self.logger.error(f"Error processing message: {e}", exc_info=True)
+            self._busy_seconds += time.perf_counter() - started
+            self._processed += 1
+    
+    def _dispatch(self, message: Message):
+        """Handle one message according to its type"""
+        self.logger.debug(f"Processing message {message.message_id} from {message.sender_id}")
+        if message.message_type == MessageType.REQUEST:
+            self._handle_request(message)
+        elif message.message_type == MessageType.RESPONSE:
+            self._handle_response(message)
+        elif message.message_type == MessageType.NOTIFICATION:
+            self._handle_notification(message)
     
     def _handle_request(self, message: Message):
         """Handle incoming request message"""
+        with self._pending_lock:
+            future = self._pending.pop(message.message_id, None)
+        if future is not None and not future.set_running_or_notify_cancel():
+            return
         try:
             # Process the request
             result = self.process(message.payload)
-            
-            # Send response
+        except Exception as e:
+            if future is not None:
+                future.set_exception(e)
+                return
+            self.logger.error(f"Error handling request: {e}", exc_info=True)
+            # Send error response
             self.send_message(
                 receiver_id=message.sender_id,
-                payload={"status": "success", "result": result},
+                payload={"status": "error", "error": str(e)},
                 message_type=MessageType.RESPONSE,
                 priority=message.priority,
                 correlation_id=message.message_id
             )
-        except Exception as e:
-            self.logger.error(f"Error handling request: {e}", exc_info=True)
-            # Send error response
+            return
+        
+        if future is not None:
+            future.set_result(result)
+        else:
+            # Send response
             self.send_message(
                 receiver_id=message.sender_id,
-                payload={"status": "error", "error": str(e)},
+                payload={"status": "success", "result": result},
                 message_type=MessageType.RESPONSE,
                 priority=message.priority,
                 correlation_id=message.message_id
@@ -220,8 +305,9 @@ class BaseAgent(ABC):
         self.logger.info(f"Received response: {message.payload.get('status')}")
     
     def _handle_notification(self, message: Message):
-        """Handle incoming notification - can be overridden"""
-        self.logger.info(f"Received notification: {message.payload}")
+        """Handle incoming notification (processed, never answered) - can be overridden"""
+        self.logger.debug(f"Received notification: {message.payload}")
+        self.process(message.payload)
     
     def start(self):
         """Start the agent (begin processing messages)"""
@@ -230,7 +316,7 @@ class BaseAgent(ABC):
                 self.logger.warning("Agent already running")
                 return
             
-            self._stop_event.clear()
+            self._mailbox.reopen()
             self._processing_thread = threading.Thread(
                 target=self._process_messages,
                 name=f"{self.agent_id}_processor",
@@ -253,7 +339,7 @@ class BaseAgent(ABC):
                 return
             
             self.logger.info(f"Stopping agent {self.agent_id}")
-            self._stop_event.set()
+            self._mailbox.close()       # wakes the processing thread
             
             if self._processing_thread:
                 self._processing_thread.join(timeout=timeout)
@@ -272,16 +358,34 @@ class BaseAgent(ABC):
             if self._state == AgentState.RUNNING:
                 self.stop()
             
-            # Clear message queue
-            while not self._message_queue.empty():
-                try:
-                    self._message_queue.get_nowait()
-                except queue.Empty:
-                    break
+            # Clear message queue; submitted requests will never be answered
+            self._mailbox.clear()
+            with self._pending_lock:
+                pending, self._pending = self._pending, {}
+            for future in pending.values():
+                future.cancel()
             
             self._state = AgentState.INITIALIZED
             self.logger.info(f"Agent {self.agent_id} reset")
     
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Message-processing statistics
+        
+        Returns:
+            Dictionary with queue depth, messages processed, time spent
+            handling them and the resulting throughput (messages/s busy),
+            and how often senders had to wait for room
+        """
+        busy = self._busy_seconds
+        return {
+            "queued": len(self._mailbox),
+            "processed": self._processed,
+            "busy_seconds": round(busy, 6),
+            "throughput": round(self._processed / busy, 1) if busy else 0.0,
+            "send_waits": self._mailbox.waits,
+        }
+    
     def set_registry(self, registry):
         """Set the agent registry (called by registry)"""
         self._registry = registry
@@ -0,0 +1,245 @@
+"""
+Blob Store — content-addressed spill area for large context values
+
+Whole sources, optimized code and unified diffs of amalgamated or generated
+C++ files run to several MB.  ContextManager hands every string of at least
+`threshold` characters to a BlobStore, which writes it once to a file named
+by its SHA-256 and returns a BlobRef handle; the context tree, its version
+deltas and checkpoints then hold only the handle.  The same text stored
+twice (the original code in every run, say) is one file.
+
+A BlobRef is materialised lazily: load() maps the file and decodes it, and a
+small byte-bounded LRU keeps recently loaded strings so repeated reads of
+the same value do not go back to disk.
+
+Disk use is bounded by `max_bytes`.  The store hands out one BlobRef per
+digest and tracks it weakly, so a blob is referenced exactly while some
+context tree, version delta or checkpoint still holds its handle.  Once a
+dropped run scope or trimmed history releases the last handle, the blob
+becomes evictable, and the least recently used evictable blobs are
+unlinked whenever the store grows past max_bytes.  Referenced blobs are
+never evicted.
+
+The default store (get_blob_store()) lives in a private temporary directory,
+created on the first spill and removed when the process exits.
+
+Usage
+-----
+store = BlobStore(threshold=64 * 1024, max_bytes=256 * 1024 * 1024)
+ref = store.put(source_code)        # BlobRef (content-addressed)
+text = ref.load()                   # mmap + decode, LRU-cached
+"""
+
+import atexit
+import hashlib
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Optional
+
+DEFAULT_THRESHOLD = 64 * 1024               # characters
+DEFAULT_CACHE_BYTES = 32 * 1024 * 1024      # materialised strings kept in memory
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024       # on disk, before unreferenced blobs go
+
+
+class BlobRef:
+    """Handle on a string held by a BlobStore."""
+
+    __slots__ = ("store", "digest", "length", "__weakref__")
+
+    def __init__(self, store: "BlobStore", digest: str, length: int):
+        self.store = store
+        self.digest = digest
+        self.length = length        # characters
+
+    def load(self) -> str:
+        return self.store.read(self.digest)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, BlobRef) and other.digest == self.digest
+
+    def __hash__(self) -> int:
+        return hash(self.digest)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (str, (self.load(),))    # pickles as the text itself
+
+    def __repr__(self) -> str:
+        return f"<blob {self.digest[:12]} {self.length} chars>"
+
+
+class BlobStore:
+    """Content-addressed, write-once store of large strings on disk."""
+
+    def __init__(self, directory: Optional[str] = None,
+                 threshold: int = DEFAULT_THRESHOLD,
+                 cache_bytes: int = DEFAULT_CACHE_BYTES,
+                 max_bytes: Optional[int] = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            directory: Where blobs go (default: a temporary directory,
+                       created on first use and removed by close())
+            threshold: Strings at least this long are spilled
+            cache_bytes: Budget for materialised strings kept in memory
+            max_bytes: Disk budget above which unreferenced blobs are
+                       unlinked, least recently used first (None: unbounded)
+        """
+        self.threshold = threshold
+        self.cache_bytes = cache_bytes
+        self.max_bytes = max_bytes
+        self._directory = directory
+        self._owns_directory = directory is None
+        self._lock = threading.RLock()
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._cached_bytes = 0
+        self._refs: "weakref.WeakValueDictionary[str, BlobRef]" = weakref.WeakValueDictionary()
+        self._stored: "OrderedDict[str, int]" = OrderedDict()   # digest -> bytes, LRU order
+        self._stored_bytes = 0
+        self.writes = 0
+        self.reads = 0
+        self.evictions = 0
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    @property
+    def directory(self) -> str:
+        with self._lock:
+            if self._directory is None:
+                self._directory = tempfile.mkdtemp(prefix="ctx_blobs_")
+            return self._directory
+
+    @property
+    def stored_bytes(self) -> int:
+        """Bytes of blobs this store has on disk."""
+        return self._stored_bytes
+
+    def put(self, text: str) -> BlobRef:
+        """Store text (once per distinct content) and return its handle."""
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        # Under the lock, so eviction cannot unlink the file between the
+        # existence check and the handle that pins it.
+        with self._lock:
+            ref = self._refs.get(digest)
+            if ref is None:
+                if not os.path.exists(path):
+                    self._write(path, data)
+                ref = self._refs[digest] = BlobRef(self, digest, len(text))
+            self._touch(digest, len(data))
+            self._evict()
+        self._remember(digest, text)
+        return ref
+
+    def read(self, digest: str) -> str:
+        """The text stored under digest."""
+        with self._lock:
+            if digest in self._stored:
+                self._stored.move_to_end(digest)
+            text = self._cache.get(digest)
+            if text is not None:
+                self._cache.move_to_end(digest)
+                return text
+        with open(self._path(digest), "rb") as fh:
+            if os.fstat(fh.fileno()).st_size == 0:
+                text = ""
+            else:
+                with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    text = str(mapped, "utf-8")
+        self.reads += 1
+        self._remember(digest, text)
+        return text
+
+    def close(self) -> None:
+        """Drop cached strings; remove the directory if the store created it."""
+        with self._lock:
+            self._cache.clear()
+            self._cached_bytes = 0
+            self._stored.clear()
+            self._stored_bytes = 0
+            directory, self._directory = self._directory, None
+        if self._owns_directory and directory:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def _write(self, path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, path)           # atomic: readers never see a partial blob
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        self.writes += 1
+
+    def _touch(self, digest: str, size: int) -> None:
+        """Account for digest on disk and mark it most recently used (caller holds _lock)."""
+        if digest in self._stored:
+            self._stored.move_to_end(digest)
+        else:
+            self._stored[digest] = size
+            self._stored_bytes += size
+
+    def _evict(self) -> None:
+        """Unlink unreferenced blobs, oldest first, while over max_bytes (caller holds _lock)."""
+        if self.max_bytes is None or self._stored_bytes <= self.max_bytes:
+            return
+        for digest in [d for d in self._stored if d not in self._refs]:
+            if self._stored_bytes <= self.max_bytes:
+                break
+            self._stored_bytes -= self._stored.pop(digest)
+            text = self._cache.pop(digest, None)
+            if text is not None:
+                self._cached_bytes -= len(text)
+            try:
+                os.unlink(self._path(digest))
+            except OSError:
+                pass
+            self.evictions += 1
+
+    def _remember(self, digest: str, text: str) -> None:
+        size = len(text)
+        if size > self.cache_bytes:
+            return
+        with self._lock:
+            if digest in self._cache:
+                self._cache.move_to_end(digest)
+                return
+            self._cache[digest] = text
+            self._cached_bytes += size
+            while self._cached_bytes > self.cache_bytes:
+                _, old = self._cache.popitem(last=False)
+                self._cached_bytes -= len(old)
+
+
+# ── Shared instance ───────────────────────────────────────────────────────────
+
+_default_store: Optional[BlobStore] = None
+_default_lock = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    """Process-wide BlobStore in a temporary directory removed at exit."""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = BlobStore()
+            atexit.register(_default_store.close)
+        return _default_store
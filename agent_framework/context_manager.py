@@ -3,76 +3,407 @@ Shared Context Manager for Multi-Agent System
 
 This module provides thread-safe shared context storage for agents to share
 analysis results, code transformations, and other data.
+
+The context is a persistent tree: every value is frozen into FrozenDict /
+FrozenList nodes when it is written, and a write replaces only the nodes on
+the path to the key it changes.  Unchanged subtrees are shared, a read
+hands out the stored node itself as a read-only view, and the cost of a
+set() is proportional to the value written, not to the size of the context
+(which holds full sources, optimized code, diffs and findings).
+
+Version history is delta-encoded: a version records only the key paths it
+changed, with the values before and after, and every checkpoint_interval
+versions also keeps a full checkpoint (a root reference).  Rolling back
+replays the fewest deltas from the nearest checkpoint or from the latest
+version, each in O(depth).  tag() names a point in the history that
+rollback_to_tag() can return to even after it ages out of max_versions.
+
+Each run gets a namespace of its own: a ContextNamespace with its own tree,
+history and lock.  Inside `with ctx.run_scope():` every ContextManager call
+made by that task (and the tasks and threads it spawns through asyncio)
+goes to the run's namespace, so one pipeline can serve concurrent runs.
+
+Reads take no lock: the live root is an immutable snapshot, swapped in by
+one reference assignment, so a reader always sees a whole version.  Writes
+build their new subtree first and take the namespace lock only to publish
+it; with sharded=True, writers to different top-level keys do even that
+build under separate per-key locks.  append() and modify() are atomic
+read-modify-write operations.
+
+Strings of blob_store.DEFAULT_THRESHOLD characters or more (whole sources, optimized
+code, diffs) are spilled to a content-addressed BlobStore on write; the
+tree, its deltas and checkpoints hold only BlobRef handles, and reads load
+the text back lazily.  to_json() / write_json() stream through
+JSONEncoder.iterencode, loading each spilled string only as it is reached.
 """
 
 import threading
-from typing import Dict, Any, Optional, List
+from collections import OrderedDict
+from typing import IO, Callable, Dict, Any, Iterator, Optional, List, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
 from copy import deepcopy
 import json
+import uuid
+
+from .blob_store import BlobRef, BlobStore, get_blob_store
+
+
+# ── Immutable nodes ──────────────────────────────────────────────────────────
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} is read-only; use thaw() for a mutable copy")
+
+
+class FrozenDict(dict):
+    """A dict that cannot be modified; compares and serialises like a dict."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+
+class FrozenList(list):
+    """A list that cannot be modified; compares and serialises like a list."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = remove = pop = clear = sort = reverse = _read_only
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (type(self), (list(self),))
+
+
+# Nodes with a BlobRef somewhere below them, so reads know what to resolve
+# without walking blob-free subtrees.
+class _BlobDict(FrozenDict):
+    __slots__ = ()
+
+
+class _BlobList(FrozenList):
+    __slots__ = ()
+
+
+def _has_blobs(value: Any) -> bool:
+    if isinstance(value, (BlobRef, _BlobDict, _BlobList)):
+        return True
+    return type(value) is tuple and any(map(_has_blobs, value))
+
+
+def _dict_node(items: Dict[str, Any]) -> FrozenDict:
+    return (_BlobDict if any(map(_has_blobs, items.values())) else FrozenDict)(items)
+
+
+def _list_node(items: List[Any]) -> FrozenList:
+    return (_BlobList if any(map(_has_blobs, items)) else FrozenList)(items)
+
+
+_ATOMIC = (str, bytes, int, float, complex, type(None), frozenset)
+_EMPTY = FrozenDict()
+_EMPTY_LIST = FrozenList()
+_MISSING = object()     # an absent key (in lookups, and on either side of a delta)
+
+
+def freeze(value: Any, blobs: Optional[BlobStore] = None) -> Any:
+    """
+    Immutable equivalent of value.  Frozen nodes and scalars are returned
+    as-is (so already-stored subtrees are shared, never copied); dicts and
+    lists are rebuilt as FrozenDict / FrozenList; any other object is
+    deep-copied once so later changes by the caller cannot leak in.  With a
+    BlobStore, strings of at least blobs.threshold characters are spilled
+    to it and replaced by their BlobRef.
+    """
+    if isinstance(value, str):
+        if blobs is not None and len(value) >= blobs.threshold:
+            return blobs.put(value)
+        return value
+    if isinstance(value, (FrozenDict, FrozenList, BlobRef, _ATOMIC)):
+        return value
+    if isinstance(value, dict):
+        return _dict_node({k: freeze(v, blobs) for k, v in value.items()})
+    if isinstance(value, list):
+        return _list_node([freeze(v, blobs) for v in value])
+    if type(value) is tuple:
+        return tuple(freeze(v, blobs) for v in value)
+    return deepcopy(value)
+
+
+def resolve(value: Any) -> Any:
+    """value with every BlobRef below it loaded; blob-free nodes are returned as-is."""
+    if isinstance(value, BlobRef):
+        return value.load()
+    if isinstance(value, _BlobDict):
+        return FrozenDict((k, resolve(v)) for k, v in value.items())
+    if isinstance(value, _BlobList):
+        return FrozenList(resolve(v) for v in value)
+    if type(value) is tuple and _has_blobs(value):
+        return tuple(resolve(v) for v in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Plain, mutable deep copy of a (possibly frozen) value; blobs are loaded."""
+    if isinstance(value, BlobRef):
+        return value.load()
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [thaw(v) for v in value]
+    if type(value) is tuple:
+        return tuple(thaw(v) for v in value)
+    return deepcopy(value)
+
+
+def _assoc(node: FrozenDict, keys: List[str], value: Any) -> FrozenDict:
+    """Copy of node with keys (a path) set to value; only the path is copied."""
+    head = keys[0]
+    updated = dict(node)
+    if len(keys) == 1:
+        updated[head] = value
+    else:
+        child = node[head] if head in node else _EMPTY
+        if not isinstance(child, dict):
+            raise TypeError(f"Context key '{head}' does not hold a mapping")
+        updated[head] = _assoc(child, keys[1:], value)
+    return _dict_node(updated)
+
+
+def _lookup(node: Any, keys: List[str], default: Any) -> Any:
+    try:
+        for k in keys:
+            node = node[k]
+    except (KeyError, TypeError):
+        return default
+    return default if node is _MISSING else node
+
+
+def _put(node: Any, keys: List[str], value: Any) -> Any:
+    """node (a top-level value, or _MISSING) with keys set to value."""
+    if not keys:
+        return value
+    if node is _MISSING:
+        node = _EMPTY
+    if not isinstance(node, dict):
+        raise TypeError("Context key does not hold a mapping")
+    return _assoc(node, keys, value)
+
+
+def _load_blob(value: Any) -> Any:
+    """json default hook: BlobRefs serialise as their text."""
+    if isinstance(value, BlobRef):
+        return value.load()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _initial_context() -> FrozenDict:
+    return freeze({
+        "original_code": None,
+        "source_file": None,
+        "analysis_results": {},
+        "optimization_suggestions": [],
+        "verification_status": {},
+        "security_findings": [],
+        "metadata": {}
+    })
+
+
+Path = Tuple[str, ...]
+
+
+def _dissoc(node: FrozenDict, keys: Path) -> FrozenDict:
+    """Copy of node with the key at path keys removed; only the path is copied."""
+    updated = dict(node)
+    if len(keys) == 1:
+        updated.pop(keys[0], None)
+    else:
+        updated[keys[0]] = _dissoc(node[keys[0]], keys[1:])
+    return _dict_node(updated)
+
+
+def _apply(root: FrozenDict, keys: Path, value: Any) -> FrozenDict:
+    return _dissoc(root, keys) if value is _MISSING else _assoc(root, list(keys), value)
+
+
+def _diff(path: Path, before: Any, after: Any,
+          out: List[Tuple[Path, Any, Any]]) -> None:
+    """
+    Append (path, before, after) for every changed subtree.  Unchanged
+    subtrees are the same object on both sides, so the walk only descends
+    along changed paths.
+    """
+    if before is after:
+        return
+    if isinstance(before, FrozenDict) and isinstance(after, FrozenDict):
+        for key in before.keys() | after.keys():
+            _diff(path + (key,), before.get(key, _MISSING), after.get(key, _MISSING), out)
+    else:
+        out.append((path, before, after))
 
 
 class ContextVersion:
-    """Represents a version of the context for rollback capability"""
+    """
+    Represents a version of the context for rollback capability
+    
+    A version stores only its delta from the previous version, as
+    (key path, value before, value after) triples, with _MISSING for an
+    absent key.  Every few versions also keep a full checkpoint: a root
+    reference, sharing structure with the live context.
+    """
     
-    def __init__(self, version_id: int, data: Dict[str, Any], timestamp: str):
+    def __init__(self, version_id: int, timestamp: str,
+                 changes: Tuple[Tuple[Path, Any, Any], ...] = (),
+                 checkpoint: Optional[FrozenDict] = None,
+                 tag: Optional[str] = None):
         self.version_id = version_id
-        self.data = deepcopy(data)
         self.timestamp = timestamp
+        self.changes = changes
+        self.checkpoint = checkpoint
+        self.tag = tag
 
 
-class ContextManager:
+class ContextNamespace:
     """
-    Thread-safe shared context storage for multi-agent system
+    One versioned context tree: the state of a single run
     
-    Features:
-    - Thread-safe read/write operations
-    - Context versioning for rollback
-    - Query and update APIs
-    - Support for nested data structures
+    Holds the live root, its delta-encoded version history and tags, with
+    a lock of its own, so runs in different namespaces never contend.
     """
     
-    def __init__(self, max_versions: int = 10):
+    def __init__(self, max_versions: int = 10, checkpoint_interval: int = 8,
+                 sharded: bool = False, blobs: Optional[BlobStore] = None):
         """
-        Initialize context manager
+        Initialize an empty namespace
         
         Args:
             max_versions: Maximum number of versions to keep for rollback
+            checkpoint_interval: Versions between full checkpoints
+            sharded: Serialise writers per top-level key rather than all together
+            blobs: Store that large strings are spilled to (None: keep in memory)
         """
-        self._context: Dict[str, Any] = {}
-        self._lock = threading.RLock()
+        self._blobs = blobs
+        self._lock = threading.RLock()      # publishes roots, guards history
+        self._shard_locks: Optional[Dict[str, threading.Lock]] = {} if sharded else None
         self._versions: List[ContextVersion] = []
         self._current_version = 0
         self._max_versions = max_versions
+        self._checkpoint_interval = max(1, checkpoint_interval)
+        self._saved: FrozenDict = _EMPTY    # root as of the latest version
+        self._tags: Dict[str, Tuple[int, FrozenDict]] = {}
         
         # Initialize with empty structure
-        self._context = {
-            "original_code": None,
-            "source_file": None,
-            "analysis_results": {},
-            "optimization_suggestions": [],
-            "verification_status": {},
-            "security_findings": [],
-            "metadata": {}
-        }
+        self._context: FrozenDict = _initial_context()
         
         self._save_version()
     
-    def _save_version(self):
-        """Save current context as a version"""
+    def _save_version(self, tag: Optional[str] = None) -> ContextVersion:
+        """Save current context as a version (its delta from the last one)"""
         with self._lock:
+            changes: List[Tuple[Path, Any, Any]] = []
+            _diff((), self._saved, self._context, changes)
+            checkpoint = None
+            if not self._versions or self._current_version % self._checkpoint_interval == 0:
+                checkpoint = self._context
             version = ContextVersion(
                 version_id=self._current_version,
-                data=self._context,
-                timestamp=datetime.utcnow().isoformat() + "Z"
+                timestamp=datetime.utcnow().isoformat() + "Z",
+                changes=tuple(changes),
+                checkpoint=checkpoint,
+                tag=tag,
             )
             self._versions.append(version)
+            self._saved = self._context
             
             # Keep only max_versions
             if len(self._versions) > self._max_versions:
                 self._versions.pop(0)
             
             self._current_version += 1
+            return version
+    
+    def _reconstruct(self, index: int) -> FrozenDict:
+        """
+        Context as of self._versions[index]: replayed forward from the
+        nearest checkpoint at or before it, or backward from the latest
+        version, whichever applies fewer deltas.
+        """
+        last = len(self._versions) - 1
+        base = index
+        while base >= 0 and self._versions[base].checkpoint is None:
+            base -= 1
+        if base >= 0 and index - base <= last - index:
+            root = self._versions[base].checkpoint
+            for version in self._versions[base + 1:index + 1]:
+                for path, _, after in version.changes:
+                    root = _apply(root, path, after)
+            return root
+        root = self._saved
+        for version in reversed(self._versions[index + 1:]):
+            for path, before, _ in version.changes:
+                root = _apply(root, path, before)
+        return root
+    
+    def get_version(self, version_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Read-only view of the context as of a retained version
+        
+        Args:
+            version_id: Version to reconstruct
+            
+        Returns:
+            The context at that version, or None if it is no longer kept
+        """
+        with self._lock:
+            if not self._versions:
+                return None
+            index = version_id - self._versions[0].version_id
+            if not 0 <= index < len(self._versions):
+                return None
+            root = self._reconstruct(index)
+        return resolve(root)
+    
+    def _shard(self, top: str):
+        """Lock serialising writers of top-level key top"""
+        if self._shard_locks is None:
+            return self._lock
+        lock = self._shard_locks.get(top)
+        if lock is None:
+            lock = self._shard_locks.setdefault(top, threading.Lock())
+        return lock
+    
+    def _write(self, top: str, build: Callable[[Any], Any], save_version: bool):
+        """
+        Replace top-level key top with build(its current value or _MISSING).
+        build runs under the key's shard lock; the root lock is held only
+        to publish.  If a root-level write (update, rollback, clear) replaced
+        the key meanwhile, build is re-run on the new value while publishing.
+        """
+        with self._shard(top):
+            child = self._context.get(top, _MISSING)
+            new_child = build(child)
+            with self._lock:
+                current = self._context.get(top, _MISSING)
+                if current is not child:
+                    new_child = build(current)
+                self._context = _assoc(self._context, [top], new_child)
+                
+                if save_version:
+                    self._save_version()
     
     def set(self, key: str, value: Any, save_version: bool = True):
         """
@@ -82,44 +413,61 @@ class ContextManager:
             key: Key to set (supports dot notation for nested keys)
             value: Value to set
             save_version: Whether to save a new version after this update
+        
+        The value is frozen on the way in, so later changes the caller makes
+        to it do not reach the context.
         """
-        with self._lock:
-            keys = key.split('.')
-            current = self._context
-            
-            # Navigate to the nested location
-            for k in keys[:-1]:
-                if k not in current:
-                    current[k] = {}
-                current = current[k]
-            
-            # Set the value
-            current[keys[-1]] = value
+        value = freeze(value, self._blobs)
+        keys = key.split('.')
+        self._write(keys[0], lambda child: _put(child, keys[1:], value), save_version)
+    
+    def modify(self, key: str, fn: Callable[[Any], Any], default: Any = None,
+               save_version: bool = True) -> Any:
+        """
+        Atomically replace the value at key with fn(value)
+        
+        fn receives the current value (read-only) or default, and may be
+        called more than once if a concurrent root-level write intervenes,
+        so it must not have side effects.
+        
+        Args:
+            key: Key to modify (supports dot notation for nested keys)
+            fn: Function from the current value to the new one
+            default: Value passed to fn if key is not found
+            save_version: Whether to save a new version after this update
             
-            if save_version:
-                self._save_version()
+        Returns:
+            The new (read-only) value
+        """
+        keys = key.split('.')
+        written: List[Any] = []
+        
+        def build(child: Any) -> Any:
+            value = freeze(fn(resolve(_lookup(child, keys[1:], default))), self._blobs)
+            written[:] = [value]
+            return _put(child, keys[1:], value)
+        
+        self._write(keys[0], build, save_version)
+        return resolve(written[0])
     
-    def get(self, key: str, default: Any = None) -> Any:
+    def get(self, key: str, default: Any = None, copy: bool = False) -> Any:
         """
         Get a value from the context
         
         Args:
             key: Key to get (supports dot notation for nested keys)
             default: Default value if key not found
+            copy: Return a mutable deep copy instead of the read-only view
             
         Returns:
-            Value at the key, or default if not found
+            Value at the key (a read-only FrozenDict / FrozenList view for
+            containers, unless copy=True), or default if not found.  Spilled
+            strings below it are loaded from the blob store now.
         """
-        with self._lock:
-            keys = key.split('.')
-            current = self._context
-            
-            try:
-                for k in keys:
-                    current = current[k]
-                return deepcopy(current)
-            except (KeyError, TypeError):
-                return default
+        current = _lookup(self._context, key.split('.'), _MISSING)     # no lock
+        if current is _MISSING:
+            return default
+        return thaw(current) if copy else resolve(current)
     
     def update(self, updates: Dict[str, Any], save_version: bool = True):
         """
@@ -129,9 +477,13 @@ class ContextManager:
             updates: Dictionary of key-value pairs to update
             save_version: Whether to save a new version after updates
         """
+        frozen = [(key.split('.'), freeze(value, self._blobs))
+                  for key, value in updates.items()]
         with self._lock:
-            for key, value in updates.items():
-                self.set(key, value, save_version=False)
+            root = self._context
+            for keys, value in frozen:
+                root = _assoc(root, keys, value)
+            self._context = root
             
             if save_version:
                 self._save_version()
@@ -145,23 +497,29 @@ class ContextManager:
             value: Value to append
             save_version: Whether to save a new version
         """
-        with self._lock:
-            current_list = self.get(key, [])
+        value = freeze(value, self._blobs)
+        keys = key.split('.')
+        
+        def build(child: Any) -> Any:       # spilled items stay handles
+            current_list = _lookup(child, keys[1:], _EMPTY_LIST)
             if not isinstance(current_list, list):
                 raise ValueError(f"Key '{key}' is not a list")
-            
-            current_list.append(value)
-            self.set(key, current_list, save_version=save_version)
+            return _put(child, keys[1:], _list_node(current_list + [value]))
+        
+        self._write(keys[0], build, save_version)
     
-    def get_all(self) -> Dict[str, Any]:
+    def get_all(self, copy: bool = False) -> Dict[str, Any]:
         """
         Get the entire context
         
+        Args:
+            copy: Return a mutable deep copy instead of the read-only view
+            
         Returns:
-            Deep copy of the entire context
+            The entire context (read-only unless copy=True)
         """
-        with self._lock:
-            return deepcopy(self._context)
+        root = self._context        # an immutable snapshot: no lock needed
+        return thaw(root) if copy else resolve(root)
     
     def rollback(self, version_id: Optional[int] = None) -> bool:
         """
@@ -181,22 +539,58 @@ class ContextManager:
                 # Rollback to previous version
                 if len(self._versions) < 2:
                     return False
-                target_version = self._versions[-2]
+                index = len(self._versions) - 2
             else:
                 # Find specific version
-                target_version = None
-                for v in self._versions:
-                    if v.version_id == version_id:
-                        target_version = v
-                        break
-                
-                if target_version is None:
+                index = version_id - self._versions[0].version_id
+                if not 0 <= index < len(self._versions):
                     return False
             
-            self._context = deepcopy(target_version.data)
+            self._context = self._reconstruct(index)
+            self._save_version()
+            return True
+    
+    def tag(self, name: str) -> int:
+        """
+        Save a version named name, to return to with rollback_to_tag()
+        
+        Agents tag the context before an expensive stage.  The tag keeps
+        its own checkpoint, so it outlives the max_versions window; tagging
+        again with the same name moves the tag.
+        
+        Args:
+            name: Tag name
+            
+        Returns:
+            The tagged version id
+        """
+        with self._lock:
+            version = self._save_version(tag=name)
+            self._tags[name] = (version.version_id, self._context)
+            return version.version_id
+    
+    def rollback_to_tag(self, name: str) -> bool:
+        """
+        Rollback to the version saved by tag(name)
+        
+        Args:
+            name: Tag name
+            
+        Returns:
+            True if rollback successful, False if there is no such tag
+        """
+        with self._lock:
+            if name not in self._tags:
+                return False
+            self._context = self._tags[name][1]
             self._save_version()
             return True
     
+    def get_tags(self) -> Dict[str, int]:
+        """Tag names mapped to the version ids they mark"""
+        with self._lock:
+            return {name: version_id for name, (version_id, _) in self._tags.items()}
+    
     def get_version_history(self) -> List[Dict[str, Any]]:
         """
         Get version history
@@ -208,7 +602,8 @@ class ContextManager:
             return [
                 {
                     "version_id": v.version_id,
-                    "timestamp": v.timestamp
+                    "timestamp": v.timestamp,
+                    "tag": v.tag
                 }
                 for v in self._versions
             ]
@@ -216,29 +611,265 @@ class ContextManager:
     def clear(self):
         """Clear all context data"""
         with self._lock:
-            self._context = {
-                "original_code": None,
-                "source_file": None,
-                "analysis_results": {},
-                "optimization_suggestions": [],
-                "verification_status": {},
-                "security_findings": [],
-                "metadata": {}
-            }
+            self._context = _initial_context()
             self._versions.clear()
+            self._tags.clear()
+            self._saved = _EMPTY
             self._current_version = 0
             self._save_version()
     
+    def iter_json(self) -> Iterator[str]:
+        """
+        The context as JSON, in chunks; each spilled string is loaded only
+        when the encoder reaches it
+        """
+        encoder = json.JSONEncoder(indent=2, default=_load_blob)
+        return encoder.iterencode(self._context)
+    
+    def write_json(self, fp: IO[str]) -> None:
+        """Stream the context as JSON to a text file object"""
+        for chunk in self.iter_json():
+            fp.write(chunk)
+    
     def to_json(self) -> str:
         """Export context to JSON string"""
-        with self._lock:
-            return json.dumps(self._context, indent=2)
+        return "".join(self.iter_json())
+
+
+# ── Run namespaces ───────────────────────────────────────────────────────────
+
+# Run whose namespace ContextManager calls resolve to in this task/thread
+# (None: the default namespace).  asyncio tasks and asyncio.to_thread()
+# inherit it, so everything a run awaits sees the run's namespace.
+_current_run: ContextVar[Optional[str]] = ContextVar("context_run", default=None)
+
+
+def current_run() -> Optional[str]:
+    """Id of the run scope active in this task or thread, if any"""
+    return _current_run.get()
+
+
+class ContextManager:
+    """
+    Thread-safe shared context storage for multi-agent system
+    
+    Features:
+    - Thread-safe read/write operations; lock-free reads
+    - Copy-on-write versioning for rollback (versions share unchanged data)
+    - Zero-copy, read-only views on reads
+    - Query and update APIs
+    - Support for nested data structures
+    - Per-run namespaces, so one set of agents can serve concurrent runs
+    - Large strings spilled to a content-addressed BlobStore
+    - Memoised derived artifacts (e.g. parsed sources) shared by agents
+    
+    Every context call resolves to a ContextNamespace: the one of the
+    run_scope() active in the calling task or thread, else the default
+    namespace.  Agents keep calling ctx.set("analysis_results", ...) and
+    each run's writes land in its own namespace.
+    """
+    
+    def __init__(self, max_versions: int = 10, max_artifacts: int = 32,
+                 checkpoint_interval: int = 8, sharded: bool = False,
+                 blob_store: Optional[BlobStore] = None, spill: bool = True):
+        """
+        Initialize context manager
+        
+        Args:
+            max_versions: Maximum number of versions to keep for rollback
+            max_artifacts: Maximum number of memoised artifacts to keep
+            checkpoint_interval: Versions between full checkpoints
+            sharded: Lock writers per top-level key (see ContextNamespace)
+            blob_store: Where large strings are spilled (default: the
+                        process-wide store from get_blob_store())
+            spill: Spill large strings at all (False: keep them in memory)
+        """
+        self._max_versions = max_versions
+        self._checkpoint_interval = checkpoint_interval
+        self._sharded = sharded
+        self._blobs = (blob_store or get_blob_store()) if spill else None
+        self._default = self._new_namespace()
+        self._spaces: Dict[str, ContextNamespace] = {}
+        self._spaces_lock = threading.Lock()
+        
+        # Derived, immutable artifacts: not versioned, copied or serialised
+        self._artifacts: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._artifact_lock = threading.Lock()
+        self._max_artifacts = max_artifacts
+    
+    def _new_namespace(self) -> ContextNamespace:
+        return ContextNamespace(self._max_versions, self._checkpoint_interval,
+                                self._sharded, self._blobs)
+    
+    # ── Namespaces ───────────────────────────────────────────────────────────
+    
+    def namespace(self, run_id: Optional[str] = None) -> ContextNamespace:
+        """
+        Handle on a run's namespace, created on first use
+        
+        Args:
+            run_id: Run id (default: the run scope active here, if any)
+            
+        Returns:
+            The run's ContextNamespace, or the default one outside any run
+        """
+        if run_id is None:
+            run_id = _current_run.get()
+            if run_id is None:
+                return self._default
+        with self._spaces_lock:
+            space = self._spaces.get(run_id)
+            if space is None:
+                space = self._spaces[run_id] = self._new_namespace()
+            return space
+    
+    @contextmanager
+    def run_scope(self, run_id: Optional[str] = None, publish: bool = False):
+        """
+        Route this task's context calls to a fresh namespace for one run
+        
+        The namespace is dropped on exit.  With publish=True it becomes the
+        default namespace instead, so callers outside any run (a CLI, a
+        test) read the most recently finished run as before.
+        
+        Args:
+            run_id: Run id (default: a new unique id)
+            publish: Make the run's namespace the default one on exit
+            
+        Yields:
+            The run id
+        """
+        run_id = run_id or uuid.uuid4().hex
+        with self._spaces_lock:
+            self._spaces[run_id] = self._new_namespace()
+        token = _current_run.set(run_id)
+        try:
+            yield run_id
+        finally:
+            _current_run.reset(token)
+            with self._spaces_lock:
+                space = self._spaces.pop(run_id, None)
+            if publish and space is not None:
+                self._default = space
+    
+    def drop(self, run_id: str) -> bool:
+        """Discard a run's namespace; False if there was none"""
+        with self._spaces_lock:
+            return self._spaces.pop(run_id, None) is not None
+    
+    def active_runs(self) -> List[str]:
+        """Ids of the runs that currently have a namespace"""
+        with self._spaces_lock:
+            return list(self._spaces)
+    
+    # ── Context API (current namespace) ──────────────────────────────────────
+    
+    def set(self, key: str, value: Any, save_version: bool = True):
+        """Set a value in the current namespace (see ContextNamespace.set)"""
+        self.namespace().set(key, value, save_version=save_version)
+    
+    def get(self, key: str, default: Any = None, copy: bool = False) -> Any:
+        """Get a value from the current namespace (see ContextNamespace.get)"""
+        return self.namespace().get(key, default, copy=copy)
+    
+    def update(self, updates: Dict[str, Any], save_version: bool = True):
+        """Update multiple keys in the current namespace at once"""
+        self.namespace().update(updates, save_version=save_version)
+    
+    def append(self, key: str, value: Any, save_version: bool = True):
+        """Append a value to a list in the current namespace"""
+        self.namespace().append(key, value, save_version=save_version)
+    
+    def modify(self, key: str, fn: Callable[[Any], Any], default: Any = None,
+               save_version: bool = True) -> Any:
+        """Atomic read-modify-write in the current namespace (see ContextNamespace.modify)"""
+        return self.namespace().modify(key, fn, default, save_version=save_version)
+    
+    def get_all(self, copy: bool = False) -> Dict[str, Any]:
+        """Get the entire context of the current namespace"""
+        return self.namespace().get_all(copy=copy)
+    
+    def get_version(self, version_id: int) -> Optional[Dict[str, Any]]:
+        """Context of the current namespace as of a retained version"""
+        return self.namespace().get_version(version_id)
+    
+    def rollback(self, version_id: Optional[int] = None) -> bool:
+        """Rollback the current namespace (see ContextNamespace.rollback)"""
+        return self.namespace().rollback(version_id)
+    
+    def tag(self, name: str) -> int:
+        """Tag the current namespace's state (see ContextNamespace.tag)"""
+        return self.namespace().tag(name)
+    
+    def rollback_to_tag(self, name: str) -> bool:
+        """Rollback the current namespace to a tag"""
+        return self.namespace().rollback_to_tag(name)
+    
+    def get_tags(self) -> Dict[str, int]:
+        """Tags of the current namespace"""
+        return self.namespace().get_tags()
+    
+    def get_version_history(self) -> List[Dict[str, Any]]:
+        """Version history of the current namespace"""
+        return self.namespace().get_version_history()
+    
+    def memo(self, namespace: str, key: str, factory: Callable[[], Any]) -> Any:
+        """
+        Return the artifact stored under (namespace, key), building it with
+        factory() on first request.
+        
+        Artifacts are derived data that every agent may share (a parsed
+        source keyed by content hash, say).  They are returned as-is, not
+        deep-copied, so callers must not mutate them; they are outside the
+        versioned context, shared by every run, and are dropped by
+        clear() outside a run scope.  factory() runs under
+        the artifact lock, so concurrent requests build one artifact.
+        
+        Args:
+            namespace: Kind of artifact
+            key: Identity within the namespace (e.g. a content hash)
+            factory: Zero-argument callable building the artifact
+            
+        Returns:
+            The memoised artifact
+        """
+        with self._artifact_lock:
+            slot = (namespace, key)
+            if slot in self._artifacts:
+                self._artifacts.move_to_end(slot)
+                return self._artifacts[slot]
+            value = factory()
+            self._artifacts[slot] = value
+            while len(self._artifacts) > self._max_artifacts:
+                self._artifacts.popitem(last=False)
+            return value
+    
+    def clear(self):
+        """
+        Clear the current namespace; outside a run scope, also drop the
+        memoised artifacts
+        """
+        if _current_run.get() is None:
+            with self._artifact_lock:
+                self._artifacts.clear()
+        self.namespace().clear()
+    
+    def iter_json(self) -> Iterator[str]:
+        """The current namespace's context as streamed JSON chunks"""
+        return self.namespace().iter_json()
+    
+    def write_json(self, fp: IO[str]) -> None:
+        """Stream the current namespace's context as JSON to fp"""
+        self.namespace().write_json(fp)
+    
+    def to_json(self) -> str:
+        """Export the current namespace's context to JSON string"""
+        return self.namespace().to_json()
     
     def __str__(self) -> str:
         """String representation of context"""
         return self.to_json()
 
-
 if __name__ == "__main__":
     # Example usage
     ctx = ContextManager()
@@ -0,0 +1,156 @@
+"""
+Mailbox — bounded priority queue feeding an agent's processing thread
+
+Entries are (priority, sequence, message, context): the monotonic sequence
+number breaks priority ties, so Message objects are never compared and
+messages of equal priority come out in arrival order.  `context` is the
+sender's contextvars snapshot, under which the receiver handles the
+message (a run's context namespace follows its messages into agent
+threads).
+
+get() blocks on a condition until a message arrives or the mailbox is
+closed — there is no polling interval.  put() on a full mailbox blocks the
+sender until there is room (backpressure); if `timeout` expires first it
+raises MailboxFull rather than dropping the message.
+
+Usage
+-----
+box = Mailbox(maxsize=100)
+box.put(message, priority=0, timeout=5.0)    # MailboxFull if still full
+entry = box.get()                            # blocks; None once closed
+box.close()                                  # wakes every waiter
+"""
+
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from typing import List, NamedTuple, Optional
+
+from .message_protocol import Message
+
+
+class MailboxFull(Exception):
+    """put() timed out waiting for room in a full mailbox."""
+
+
+class MailboxClosed(Exception):
+    """put() on a mailbox that has been closed."""
+
+
+class Envelope(NamedTuple):
+    priority: int
+    sequence: int
+    message: Message
+    context: contextvars.Context
+
+
+class Mailbox:
+    """Thread-safe bounded priority queue with blocking put/get and close()."""
+
+    def __init__(self, maxsize: int = 100):
+        """
+        Args:
+            maxsize: Messages held before put() blocks (0 = unbounded)
+        """
+        self.maxsize = maxsize
+        self._heap: List[Envelope] = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._closed = False
+
+        # Statistics
+        self.delivered = 0          # messages put
+        self.taken = 0              # messages got
+        self.waits = 0              # puts that had to wait for room
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    def put(self, message: Message, priority: int,
+            timeout: Optional[float] = None) -> None:
+        """
+        Enqueue a message, waiting for room while the mailbox is full.
+
+        Args:
+            message: Message to enqueue
+            priority: Lower numbers are taken first
+            timeout: Seconds to wait for room (None = wait indefinitely)
+
+        Raises:
+            MailboxFull: still full after `timeout` seconds
+            MailboxClosed: the mailbox was closed
+        """
+        context = contextvars.copy_context()
+        with self._not_full:
+            if self._closed:
+                raise MailboxClosed(f"mailbox closed, message {message.message_id} refused")
+            if self._full():
+                self.waits += 1
+                deadline = None if timeout is None else time.monotonic() + timeout
+                while self._full() and not self._closed:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise MailboxFull(
+                            f"mailbox full ({self.maxsize}), message {message.message_id} "
+                            f"not delivered within {timeout}s"
+                        )
+                    self._not_full.wait(remaining)
+                if self._closed:
+                    raise MailboxClosed(f"mailbox closed, message {message.message_id} refused")
+            heapq.heappush(self._heap, Envelope(priority, next(self._sequence),
+                                                message, context))
+            self.delivered += 1
+            self._not_empty.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Envelope]:
+        """
+        Take the highest-priority, oldest message.
+
+        Blocks until one arrives, `timeout` expires or the mailbox is
+        closed; returns None in the last two cases.  Messages still queued
+        at close() stay queued for reopen().
+        """
+        with self._not_empty:
+            if not self._not_empty.wait_for(lambda: self._heap or self._closed, timeout):
+                return None
+            if self._closed:
+                return None
+            envelope = heapq.heappop(self._heap)
+            self.taken += 1
+            self._not_full.notify()
+            return envelope
+
+    def close(self) -> None:
+        """Refuse further puts and wake every blocked put() and get()."""
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+    def reopen(self) -> None:
+        with self._lock:
+            self._closed = False
+
+    def clear(self) -> int:
+        """Discard queued messages; returns how many were dropped."""
+        with self._lock:
+            dropped = len(self._heap)
+            self._heap.clear()
+            self._not_full.notify_all()
+            return dropped
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._heap)
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    def _full(self) -> bool:
+        return 0 < self.maxsize <= len(self._heap)
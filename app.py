@@ -11,12 +11,14 @@ import json
 import logging
 import os
 import queue
+import shutil
 import sys
 import tempfile
 import threading
 import time
+from contextvars import ContextVar
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 # ── Ensure project root is on sys.path ──────────────────────────────────────
 ROOT = os.path.dirname(os.path.abspath(__file__))
@@ -123,28 +125,71 @@ class _QueueMessageLogger:
 # LLM factory
 # ────────────────────────────────────────────────────────────────────────────
 
-def _make_llm(use_llm: bool, backend: str = "ollama"):
+def _make_llm(use_llm: bool, use_cache: bool = True, backend: str = "ollama",
+              sq: Optional[StreamQueue] = None):
     from src.llm.llm_client import make_llm_client
-    client = make_llm_client(backend)
+    from src.llm.response_cache import ResponseCache
+    client = make_llm_client(backend, response_cache=ResponseCache() if use_cache else None)
     if not use_llm:
         client._available = False
+    if sq is not None:
+        # Forward each CoT step to the UI while the completion is still streaming
+        client.on_reasoning_step = lambda step: sq.push("reasoning_step", {"step": step})
     return client
 
 
 # ────────────────────────────────────────────────────────────────────────────
-# Mode runners (each runs in a background thread)
+# Pipeline pool
 # ────────────────────────────────────────────────────────────────────────────
+# One long-lived pipeline per (use_llm, use_cache), shared by every request:
+# each run gets its own context namespace, so concurrent requests do not
+# rebuild agents, LLM clients and tool probes.  Per-request outputs travel
+# in contextvars: the message logger is passed to run(), and the stream
+# that reasoning steps go to is looked up by the pooled client's callback.
+
+_request_stream: ContextVar[Optional[StreamQueue]] = ContextVar("request_stream", default=None)
+_pipeline_pool: Dict[Tuple[bool, bool], Any] = {}
+_pipeline_pool_lock = threading.Lock()
+
+
+def _forward_reasoning_step(step: str) -> None:
+    sq = _request_stream.get()
+    if sq is not None:
+        sq.push("reasoning_step", {"step": step})
 
-def _run_full_pipeline(sq: StreamQueue, file_path: str, use_llm: bool) -> None:
+
+def _pooled_pipeline(use_llm: bool, use_cache: bool):
     from src.pipeline.pipeline import CompilerOptimizationPipeline
+    from src.pipeline.result_cache import PipelineCache
+
+    with _pipeline_pool_lock:
+        pipeline = _pipeline_pool.get((use_llm, use_cache))
+        if pipeline is None:
+            llm = _make_llm(use_llm, use_cache)
+            llm.on_reasoning_step = _forward_reasoning_step
+            pipeline = CompilerOptimizationPipeline(
+                llm_client=llm, cache=PipelineCache() if use_cache else None,
+            )
+            _pipeline_pool[(use_llm, use_cache)] = pipeline
+        return pipeline
 
+
+# ────────────────────────────────────────────────────────────────────────────
+# Mode runners (each runs in a background thread)
+# ────────────────────────────────────────────────────────────────────────────
+
+def _run_full_pipeline(sq: StreamQueue, file_path: str, use_llm: bool,
+                       use_cache: bool = True) -> None:
     sq.push("status", {"phase": "pipeline_init", "message": "Initialising full 3-agent pipeline…"})
-    msg_logger = _QueueMessageLogger(sq)
-    llm        = _make_llm(use_llm)
-    pipeline   = CompilerOptimizationPipeline(llm_client=llm, message_logger=msg_logger)
+    pipeline = _pooled_pipeline(use_llm, use_cache)
 
     sq.push("status", {"phase": "running", "message": "Running: Analysis → Optimization → Verification"})
-    result = pipeline.run(file_path)
+    token = _request_stream.set(sq)
+    try:
+        result = pipeline.run(file_path, message_logger=_QueueMessageLogger(sq),
+                              output_dir=os.path.dirname(file_path))
+    finally:
+        _request_stream.reset(token)
 
     sq.push("analysis_result",     result.analysis_report)
     sq.push("optimization_result", result.optimization_report)
@@ -156,12 +201,13 @@ def _run_full_pipeline(sq: StreamQueue, file_path: str, use_llm: bool) -> None:
     })
 
 
-def _run_analyze_only(sq: StreamQueue, source_code: str, file_path: str, use_llm: bool) -> None:
+def _run_analyze_only(sq: StreamQueue, source_code: str, file_path: str, use_llm: bool,
+                      use_cache: bool = True) -> None:
     from src.agents.analysis_agent import AnalysisAgent
     from agent_framework import ContextManager
 
     sq.push("status", {"phase": "analysis_init", "message": "Initialising Analysis Agent…"})
-    llm   = _make_llm(use_llm)
+    llm   = _make_llm(use_llm, use_cache, sq=sq)
     ctx   = ContextManager()
     agent = AnalysisAgent("analysis_1", ctx, llm)
 
@@ -174,12 +220,13 @@ def _run_analyze_only(sq: StreamQueue, source_code: str, file_path: str, use_llm
     })
 
 
-def _run_optimize_only(sq: StreamQueue, source_code: str, file_path: str, use_llm: bool) -> None:
+def _run_optimize_only(sq: StreamQueue, source_code: str, file_path: str, use_llm: bool,
+                       use_cache: bool = True) -> None:
     from src.agents.analysis_agent import AnalysisAgent
     from src.agents.optimization_agent import OptimizationAgent
     from agent_framework import ContextManager
 
-    llm = _make_llm(use_llm)
+    llm = _make_llm(use_llm, use_cache, sq=sq)
     ctx = ContextManager()
 
     sq.push("status", {"phase": "analysis_running", "message": "Step 1/2 — Running analysis…"})
@@ -191,7 +238,8 @@ def _run_optimize_only(sq: StreamQueue, source_code: str, file_path: str, use_ll
         "message": f"Step 2/2 — Initialising Optimization Agent…",
     })
 
-    opt_agent  = OptimizationAgent("optimization_1", ctx, llm)
+    opt_agent  = OptimizationAgent("optimization_1", ctx, llm,
+                                   output_dir=os.path.dirname(file_path))
     sq.push("status", {"phase": "optimization_running", "message": "Applying optimizations…"})
     opt_result = opt_agent.process({
         "source_code":     source_code,
@@ -205,13 +253,14 @@ def _run_optimize_only(sq: StreamQueue, source_code: str, file_path: str, use_ll
     })
 
 
-def _run_verify_only(sq: StreamQueue, source_code: str, file_path: str, use_llm: bool) -> None:
+def _run_verify_only(sq: StreamQueue, source_code: str, file_path: str, use_llm: bool,
+                     use_cache: bool = True) -> None:
     from src.agents.analysis_agent import AnalysisAgent
     from src.agents.optimization_agent import OptimizationAgent
     from src.agents.verification_agent import VerificationAgent
     from agent_framework import ContextManager
 
-    llm = _make_llm(use_llm)
+    llm = _make_llm(use_llm, use_cache, sq=sq)
     ctx = ContextManager()
 
     sq.push("status", {"phase": "analysis_running", "message": "Step 1/3 — Running analysis…"})
@@ -221,7 +270,8 @@ def _run_verify_only(sq: StreamQueue, source_code: str, file_path: str, use_llm:
     sq.push("analysis_result", analysis_result)
 
     sq.push("status", {"phase": "optimization_running", "message": "Step 2/3 — Running optimization…"})
-    opt_result = OptimizationAgent("optimization_1", ctx, llm).process({
+    opt_result = OptimizationAgent("optimization_1", ctx, llm,
+                                   output_dir=os.path.dirname(file_path)).process({
         "source_code":     source_code,
         "file_path":       file_path,
         "analysis_report": analysis_result,
@@ -249,7 +299,8 @@ def _run_verify_only(sq: StreamQueue, source_code: str, file_path: str, use_llm:
 # ────────────────────────────────────────────────────────────────────────────
 
 def _worker(sq: StreamQueue, source_code: str, mode: str,
-            use_llm: bool, language: str, backend: str = "ollama") -> None:
+            use_llm: bool, language: str, backend: str = "ollama",
+            use_cache: bool = True) -> None:
     """Runs the requested pipeline mode; pushes all events into sq."""
 
     # Attach a log handler so Python loggers stream to the UI
@@ -269,7 +320,7 @@ def _worker(sq: StreamQueue, source_code: str, mode: str,
     for _lg in _watched_loggers:
         _lg.addHandler(handler)
 
-    tmp_path: Optional[str] = None
+    tmp_dir: Optional[str] = None
     try:
         ext_map = {
             "cpp": ".cpp", "c": ".c",
@@ -277,11 +328,14 @@ def _worker(sq: StreamQueue, source_code: str, mode: str,
         }
         ext = ext_map.get(language, ".cpp")
 
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=ext, delete=False, encoding="utf-8", prefix="ui_"
-        ) as fh:
+        # Fixed file name inside a private temp dir: the result cache keys on
+        # the file name, so identical submissions can hit it.  The optimized
+        # OPT_ file is written to the same private dir, so concurrent
+        # requests never share an output path.
+        tmp_dir  = tempfile.mkdtemp(prefix="ui_")
+        tmp_path = os.path.join(tmp_dir, "ui_input" + ext)
+        with open(tmp_path, "w", encoding="utf-8") as fh:
             fh.write(source_code)
-            tmp_path = fh.name
 
         sq.push("status", {"phase": "init", "message": "Code written to temp file — starting…"})
 
@@ -289,8 +343,8 @@ def _worker(sq: StreamQueue, source_code: str, mode: str,
         # before the real pipeline request hits (avoids cold-start timeout)
         if use_llm:
             try:
-                from src.llm.llm_client import LLMClient
-                _warm = LLMClient()
+                from src.llm.llm_client import get_llm_client
+                _warm = get_llm_client("ollama")
                 if _warm.is_available():
                     sq.push("status", {"phase": "warmup", "message": "Warming up LLM model (first run may take 1–2 min)…"})
                     _warm.generate("hi", max_tokens=1)
@@ -299,13 +353,13 @@ def _worker(sq: StreamQueue, source_code: str, mode: str,
                 pass
 
         if mode == "pipeline":
-            _run_full_pipeline(sq, tmp_path, use_llm)
+            _run_full_pipeline(sq, tmp_path, use_llm, use_cache)
         elif mode == "analyze":
-            _run_analyze_only(sq, source_code, tmp_path, use_llm)
+            _run_analyze_only(sq, source_code, tmp_path, use_llm, use_cache)
         elif mode == "optimize":
-            _run_optimize_only(sq, source_code, tmp_path, use_llm)
+            _run_optimize_only(sq, source_code, tmp_path, use_llm, use_cache)
         elif mode == "verify":
-            _run_verify_only(sq, source_code, tmp_path, use_llm)
+            _run_verify_only(sq, source_code, tmp_path, use_llm, use_cache)
         else:
             sq.push("error", {"message": f"Unknown mode: {mode}"})
 
@@ -322,11 +376,8 @@ def _worker(sq: StreamQueue, source_code: str, mode: str,
     finally:
         for _lg in _watched_loggers:
             _lg.removeHandler(handler)
-        if tmp_path:
-            try:
-                os.unlink(tmp_path)
-            except OSError:
-                pass
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
         sq.close()
 
 
@@ -337,12 +388,12 @@ def _worker(sq: StreamQueue, source_code: str, mode: str,
 @app.route("/api/health", methods=["GET"])
 def health():
     try:
-        from src.llm.llm_client import LLMClient, GeminiLLMClient
-        ollama_info = LLMClient().health_check()
+        from src.llm.llm_client import get_llm_client
+        ollama_info = get_llm_client("ollama").health_check()
     except Exception as exc:
         ollama_info = {"available": False, "error": str(exc)}
     try:
-        gemini_info = GeminiLLMClient().health_check()
+        gemini_info = get_llm_client("gemini").health_check()
     except Exception as exc:
         gemini_info = {"available": False, "error": str(exc)}
     return jsonify({"status": "ok", "ollama": ollama_info, "gemini": gemini_info})
@@ -356,6 +407,7 @@ def stream_endpoint():
     use_llm  = bool(body.get("use_llm", True))
     language = body.get("language", "cpp")
     backend  = body.get("backend", "ollama")
+    use_cache = bool(body.get("use_cache", True))
 
     if not code:
         return jsonify({"error": "No code provided"}), 400
@@ -363,7 +415,7 @@ def stream_endpoint():
     sq = StreamQueue()
     threading.Thread(
         target=_worker,
-        args=(sq, code, mode, use_llm, language, backend),
+        args=(sq, code, mode, use_llm, language, backend, use_cache),
         daemon=True,
     ).start()
 
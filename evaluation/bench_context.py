@@ -0,0 +1,152 @@
+"""
+evaluation/bench_context.py — ContextManager contention benchmark
+
+N threads hammer one context the way agents in threaded mode do: mostly
+reads of the large shared reports, plus writes to their own top-level key
+and appends to a shared list.  The context is preloaded with a realistic
+payload (source, optimized code, diff, a few hundred findings).
+
+Three implementations are compared:
+
+  locked    the previous design, reproduced below: one RLock around every
+            call, deepcopy on every read and a full deepcopy per version;
+  cow       ContextManager: lock-free snapshot reads, copy-on-write writes;
+  sharded   ContextManager(sharded=True): writers locked per top-level key.
+
+Throughput is total operations per second across all threads.
+
+Usage:
+    python evaluation/bench_context.py
+    python evaluation/bench_context.py --threads 1 4 16 --ops 2000 --reads 0.8
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from copy import deepcopy
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from agent_framework.context_manager import ContextManager
+
+DEFAULT_THREADS = [1, 2, 4, 8]
+
+
+class LockedContext:
+    """The pre-redesign ContextManager: one RLock, deepcopy everywhere."""
+
+    def __init__(self, max_versions: int = 10):
+        self._context: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+        self._versions: List[Dict[str, Any]] = []
+        self._max_versions = max_versions
+
+    def _save_version(self):
+        with self._lock:
+            self._versions.append(deepcopy(self._context))
+            if len(self._versions) > self._max_versions:
+                self._versions.pop(0)
+
+    def set(self, key: str, value: Any, save_version: bool = True):
+        with self._lock:
+            keys = key.split('.')
+            current = self._context
+            for k in keys[:-1]:
+                current = current.setdefault(k, {})
+            current[keys[-1]] = value
+            if save_version:
+                self._save_version()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            current = self._context
+            try:
+                for k in key.split('.'):
+                    current = current[k]
+                return deepcopy(current)
+            except (KeyError, TypeError):
+                return default
+
+    def append(self, key: str, value: Any, save_version: bool = True):
+        with self._lock:
+            current_list = self.get(key, [])
+            current_list.append(value)
+            self.set(key, current_list, save_version=save_version)
+
+
+def payload(findings: int = 300) -> Dict[str, Any]:
+    code = "int work(int *p, int n) {\n    return p[n];\n}\n" * 400
+    return {
+        "analysis_results": {
+            "all_findings": [{"type": "loop", "line": i, "severity": "low",
+                              "description": "x" * 80} for i in range(findings)],
+            "conclusion": "ok",
+        },
+        "optimization_suggestions": {
+            "optimized_code": code,
+            "unified_diff": code[: len(code) // 2],
+            "transformations": [{"kind": "unroll", "line": i} for i in range(50)],
+        },
+        "original_code": code,
+        "security_findings": [],
+    }
+
+
+def hammer(ctx, threads: int, ops: int, reads: float, seed: int = 0) -> float:
+    """Ops per second over `threads` threads doing `ops` operations each."""
+    for key, value in payload().items():
+        ctx.set(key, value)
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(n: int) -> None:
+        rng = random.Random(seed + n)
+        barrier.wait()
+        for i in range(ops):
+            roll = rng.random()
+            if roll < reads:
+                ctx.get("analysis_results" if i % 2 else "optimization_suggestions")
+            elif roll < reads + (1 - reads) / 2:
+                ctx.set(f"metadata_{n}.step", i)
+            else:
+                ctx.append("security_findings", {"thread": n, "op": i},
+                           save_version=False)
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    barrier.wait()
+    t0 = time.perf_counter()
+    for t in pool:
+        t.join()
+    return threads * ops / (time.perf_counter() - t0)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="ContextManager contention benchmark")
+    parser.add_argument("--threads", type=int, nargs="+", default=DEFAULT_THREADS,
+                        help="Thread counts (default: %(default)s)")
+    parser.add_argument("--ops", type=int, default=300, help="Operations per thread")
+    parser.add_argument("--reads", type=float, default=0.9, help="Fraction of reads")
+    args = parser.parse_args()
+
+    impls: Dict[str, Callable[[], Any]] = {
+        "locked":  LockedContext,
+        "cow":     ContextManager,
+        "sharded": lambda: ContextManager(sharded=True),
+    }
+    print(f"{'threads':>8} " + " ".join(f"{name + ' ops/s':>15}" for name in impls)
+          + f" {'cow speedup':>12}")
+    for threads in sorted(args.threads):
+        rates = {name: hammer(make(), threads, args.ops, args.reads)
+                 for name, make in impls.items()}
+        print(f"{threads:>8} " + " ".join(f"{rates[name]:>15,.0f}" for name in impls)
+              + f" {rates['cow'] / rates['locked']:>11.0f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+evaluation/bench_messages.py — agent message-bus benchmark
+
+P producer threads each send M messages to one consumer agent whose queue
+holds Q; the consumer spends `--work` microseconds per message.  Bursts
+larger than the queue are the interesting case.
+
+Two buses are compared:
+
+  polling   the previous design, reproduced below: PriorityQueue polled
+            with get(timeout=0.1), put(block=False) dropping the message
+            when the queue is full (entries given a sequence tiebreak so
+            the comparison no longer crashes);
+  mailbox   BaseAgent's Mailbox: blocking get, backpressure on put.
+
+Reported per bus: messages handled per second, messages lost, and how long
+stop() takes for an idle consumer.
+
+Usage:
+    python evaluation/bench_messages.py
+    python evaluation/bench_messages.py --producers 1 4 --messages 5000 --queue 100
+"""
+
+import argparse
+import itertools
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from agent_framework import Mailbox, MailboxFull
+from agent_framework.message_protocol import Message, MessageType
+
+DEFAULT_PRODUCERS = [1, 2, 4]
+
+
+class PollingConsumer:
+    """The pre-redesign agent loop: polled PriorityQueue, drop when full."""
+
+    def __init__(self, maxsize: int, work: float):
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue(maxsize=maxsize)
+        self._sequence = itertools.count()
+        self._stop = threading.Event()
+        self._work = work
+        self.handled = 0
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def send(self, message: Message) -> None:
+        try:
+            self._queue.put((1, next(self._sequence), message), block=False)
+        except queue.Full:
+            self.dropped += 1
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            _spin(self._work)
+            self.handled += 1
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+class MailboxConsumer:
+    """BaseAgent's loop: blocking Mailbox get, senders wait for room."""
+
+    def __init__(self, maxsize: int, work: float):
+        self._mailbox = Mailbox(maxsize=maxsize)
+        self._work = work
+        self.handled = 0
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def send(self, message: Message) -> None:
+        try:
+            self._mailbox.put(message, 1, timeout=5.0)
+        except MailboxFull:
+            self.dropped += 1
+
+    def _loop(self) -> None:
+        while self._mailbox.get() is not None:
+            _spin(self._work)
+            self.handled += 1
+
+    def stop(self) -> None:
+        self._mailbox.close()
+        self._thread.join()
+
+
+def _spin(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def flood(make, producers: int, messages: int, queue_size: int,
+          work: float) -> Dict[str, float]:
+    """Handled/s and losses for `producers` threads sending `messages` each."""
+    consumer = make(queue_size, work)
+    message = Message.create("producer", "consumer", MessageType.NOTIFICATION, {"n": 0})
+    barrier = threading.Barrier(producers + 1)
+    total = producers * messages
+
+    def produce() -> None:
+        barrier.wait()
+        for _ in range(messages):
+            consumer.send(message)
+
+    pool = [threading.Thread(target=produce) for _ in range(producers)]
+    for t in pool:
+        t.start()
+    barrier.wait()
+    t0 = time.perf_counter()
+    for t in pool:
+        t.join()
+    while consumer.handled + consumer.dropped < total:
+        time.sleep(0.0005)
+    elapsed = time.perf_counter() - t0
+    consumer.stop()
+    return {"rate": consumer.handled / elapsed, "lost": consumer.dropped}
+
+
+def stop_latency(make, rounds: int = 5) -> float:
+    """Mean seconds for stop() on an idle consumer."""
+    total = 0.0
+    for _ in range(rounds):
+        consumer = make(10, 0.0)
+        time.sleep(0.02)
+        t0 = time.perf_counter()
+        consumer.stop()
+        total += time.perf_counter() - t0
+    return total / rounds
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Agent message-bus benchmark")
+    parser.add_argument("--producers", type=int, nargs="+", default=DEFAULT_PRODUCERS,
+                        help="Producer thread counts (default: %(default)s)")
+    parser.add_argument("--messages", type=int, default=2000, help="Messages per producer")
+    parser.add_argument("--queue", type=int, default=100, help="Consumer queue size")
+    parser.add_argument("--work", type=float, default=20.0,
+                        help="Consumer work per message, microseconds")
+    args = parser.parse_args()
+
+    buses = {"polling": PollingConsumer, "mailbox": MailboxConsumer}
+    work = args.work / 1e6
+    print(f"{'producers':>9} " + " ".join(f"{name + ' msg/s':>15} {'lost':>7}" for name in buses))
+    for producers in sorted(args.producers):
+        rows: List[str] = []
+        for make in buses.values():
+            r = flood(make, producers, args.messages, args.queue, work)
+            rows.append(f"{r['rate']:>15,.0f} {r['lost']:>7,.0f}")
+        print(f"{producers:>9} " + " ".join(rows))
+    print("\nidle stop():  " + "   ".join(
+        f"{name} {stop_latency(make) * 1000:.1f} ms" for name, make in buses.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
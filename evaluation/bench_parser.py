@@ -0,0 +1,113 @@
+"""
+evaluation/bench_parser.py — CodeParser scaling benchmark
+
+Parses synthetic C++ sources of growing size (many small functions, each
+with a nested loop, array indexing, pointer dereferences and an
+uninitialised local) and reports the time per 1 000 lines.  Linear scaling
+shows up as a flat ms/kLOC column; the fitted exponent of time vs. size
+should stay close to 1.
+
+Usage:
+    python evaluation/bench_parser.py
+    python evaluation/bench_parser.py --sizes 5000 20000 80000 --repeat 5
+    python evaluation/bench_parser.py --check      # exit 1 if exponent > 1.3
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.parser.code_parser import CodeParser
+from src.parser.lexer import clear_lex_cache
+
+DEFAULT_SIZES = [2_000, 8_000, 32_000]
+
+_FUNCTION = """\
+int work_{n}(int *p, int len) {{
+    int acc;
+    int buf[16];
+    acc = 0;
+    for (int i = 0; i < len; i++) {{
+        for (int j = 0; j < 16; j++) {{
+            buf[j] = *p + i * j;
+        }}
+        acc += buf[i % 16];
+    }}
+    while (len > 0) {{
+        len--;
+    }}
+    return acc;
+}}
+
+"""
+_LINES_PER_FUNCTION = _FUNCTION.count("\n")
+
+
+def synthetic_source(lines: int) -> str:
+    """A translation unit of roughly `lines` lines."""
+    parts = ["#include <cstdio>\n#include <cstdlib>\n\n"]
+    for n in range(max(1, lines // _LINES_PER_FUNCTION)):
+        parts.append(_FUNCTION.format(n=n))
+    parts.append("int main() {\n    int *p = (int *)malloc(4);\n"
+                 "    *p = 1;\n    free(p);\n    return 0;\n}\n")
+    return "".join(parts)
+
+
+def time_parse(source: str, repeat: int) -> float:
+    """Best-of-repeat wall time in seconds."""
+    parser = CodeParser()
+    best = math.inf
+    for _ in range(repeat):
+        clear_lex_cache()           # time the scan too, not a memo hit
+        t0 = time.perf_counter()
+        parser.parse_string(source, "synthetic.cpp")
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def scaling_exponent(samples: List[Tuple[int, float]]) -> float:
+    """Least-squares slope of log(time) against log(lines)."""
+    xs = [math.log(n) for n, _ in samples]
+    ys = [math.log(max(t, 1e-9)) for _, t in samples]
+    mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+    num = sum((x - mx) * (y - my) for x, y in zip(xs, ys))
+    den = sum((x - mx) ** 2 for x in xs)
+    return num / den if den else 0.0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="CodeParser scaling benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Source sizes in lines (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size (best is kept)")
+    parser.add_argument("--check", action="store_true",
+                        help="Exit non-zero if the fitted exponent exceeds 1.3")
+    args = parser.parse_args()
+
+    print(f"{'lines':>10} {'functions':>10} {'loops':>8} {'time (ms)':>11} {'ms/kLOC':>9}")
+    samples = []
+    for size in sorted(args.sizes):
+        source = synthetic_source(size)
+        result = CodeParser().parse_string(source, "synthetic.cpp")
+        elapsed = time_parse(source, args.repeat)
+        samples.append((result.line_count, elapsed))
+        print(f"{result.line_count:>10} {len(result.functions):>10} {len(result.loops):>8} "
+              f"{elapsed * 1000:>11.1f} {elapsed * 1e6 / result.line_count:>9.2f}")
+
+    if len(samples) < 2:
+        return 0
+    exponent = scaling_exponent(samples)
+    print(f"\nFitted exponent: time ∝ lines^{exponent:.2f}  (1.0 = linear)")
+    if args.check and exponent > 1.3:
+        print("FAIL: parser scaling is super-linear")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
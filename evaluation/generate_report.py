@@ -9,6 +9,7 @@ Usage:
     python evaluation/generate_report.py --no-llm
     python evaluation/generate_report.py --out custom_report.md
     python evaluation/generate_report.py --cases TC01 TC11 TC16
+    python evaluation/generate_report.py --no-llm --jobs 4
 """
 
 import argparse
@@ -22,6 +23,7 @@ from typing import Any, Dict, List, Optional
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 from src.pipeline.pipeline import CompilerOptimizationPipeline, PipelineResult
+from src.pipeline.batch import BatchConfig, run_batch
 from src.llm.llm_client import LLMClient
 from src.logger_config import setup_logging
 
@@ -95,7 +97,15 @@ def run_case(
     t0 = time.time()
     result: PipelineResult = pipeline.run(tc_path)
     elapsed = round(time.time() - t0, 2)
+    return metrics_from_result(result, filename, description, elapsed)
 
+
+def metrics_from_result(
+    result: PipelineResult,
+    filename: str,
+    description: str,
+    elapsed: float,
+) -> RunMetrics:
     # Analysis metrics
     a = result.analysis_report
     n_findings  = len(a.get("all_findings", []))
@@ -367,22 +377,16 @@ def main():
         "--cases", nargs="+", default=None,
         help="Filter test cases by filename prefix e.g. TC01 TC11",
     )
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=1, metavar="N",
+        help="Run test cases on N worker processes (default: 1, sequential)",
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=None, metavar="SECONDS",
+        help="Per-case timeout when --jobs > 1",
+    )
     args = parser.parse_args()
 
-    # Build pipeline
-    llm = LLMClient()
-    if args.no_llm:
-        llm._available = False
-    pipeline = CompilerOptimizationPipeline(llm_client=llm)
-    if args.no_llm:
-        for ag in (
-            pipeline.analysis_agent,
-            pipeline.optimization_agent,
-            pipeline.verification_agent,
-            pipeline.security_agent,
-        ):
-            ag.llm._available = False
-
     # Select test cases
     cases = DEFAULT_CASES
     if args.cases:
@@ -399,14 +403,35 @@ def main():
     metrics: List[RunMetrics] = []
     t_total = time.time()
 
-    for fn, desc in cases:
-        tc_path = os.path.join(TESTCASES_DIR, fn)
-        print(f"  [{cases.index((fn, desc)) + 1}/{len(cases)}] {fn} … ", end="", flush=True)
-        m = run_case(pipeline, tc_path, desc)
-        metrics.append(m)
-        status_icon = {"success": "✓", "rollback": "↩", "partial": "~",
-                       "failed": "✗", "skipped": "SKIP"}.get(m.status, "?")
-        print(f"{status_icon} ({m.elapsed_s}s)")
+    status_icons = {"success": "✓", "rollback": "↩", "partial": "~",
+                    "failed": "✗", "skipped": "SKIP"}
+    if args.jobs > 1:
+        config = BatchConfig(use_llm=not args.no_llm)
+        paths = [os.path.join(TESTCASES_DIR, fn) for fn, _ in cases]
+        by_index: Dict[int, RunMetrics] = {}
+        for item in run_batch(paths, workers=args.jobs, timeout=args.timeout,
+                              config=config):
+            fn, desc = cases[item.index]
+            if not os.path.isfile(item.file_path):
+                m = run_case(None, item.file_path, desc)
+            else:
+                m = metrics_from_result(item.result, fn, desc,
+                                        round(item.elapsed_s, 2))
+            by_index[item.index] = m
+            print(f"  [{len(by_index)}/{len(cases)}] {fn} … "
+                  f"{status_icons.get(m.status, '?')} ({m.elapsed_s}s)")
+        metrics = [by_index[i] for i in sorted(by_index)]
+    else:
+        llm = LLMClient()
+        if args.no_llm:
+            llm._available = False
+        pipeline = CompilerOptimizationPipeline(llm_client=llm)
+        for fn, desc in cases:
+            tc_path = os.path.join(TESTCASES_DIR, fn)
+            print(f"  [{cases.index((fn, desc)) + 1}/{len(cases)}] {fn} … ", end="", flush=True)
+            m = run_case(pipeline, tc_path, desc)
+            metrics.append(m)
+            print(f"{status_icons.get(m.status, '?')} ({m.elapsed_s}s)")
 
     elapsed_total = time.time() - t_total
     llm_mode = "offline (rule-based)" if args.no_llm else "online (Qwen 2.5 Coder)"
@@ -77,7 +77,7 @@ export default function App() {
     const { type, data, ts } = event
 
     /* Forward display-worthy events to the terminal */
-    if (['status', 'log', 'agent_message', 'error', 'complete'].includes(type)) {
+    if (['status', 'log', 'agent_message', 'reasoning_step', 'error', 'complete'].includes(type)) {
       setMessages(prev => [...prev, { type, data, ts }])
     }
 
@@ -61,6 +61,18 @@ function LogLine({ data, ts }) {
   )
 }
 
+function ReasoningLine({ data, ts }) {
+  return (
+    <div className="term-line">
+      <span className="term-ts">{formatTime(ts)}</span>
+      <span className="term-tag tag-log">COT</span>
+      <span className="term-body" style={{ color: 'var(--agent-log)', fontStyle: 'italic' }}>
+        {data?.step ?? ''}
+      </span>
+    </div>
+  )
+}
+
 function AgentMessageLine({ data, ts }) {
   const key       = agentKey(data?.sender)
   const tagClass  = `term-tag tag-${key}`
@@ -190,6 +202,7 @@ export default function OutputTerminal({ messages, isRunning }) {
       case 'status':        return <StatusLine       key={idx} data={data} ts={ts} />
       case 'log':           return <LogLine          key={idx} data={data} ts={ts} />
       case 'agent_message': return <AgentMessageLine key={idx} data={data} ts={ts} />
+      case 'reasoning_step': return <ReasoningLine   key={idx} data={data} ts={ts} />
       case 'error':         return <ErrorLine        key={idx} data={data} ts={ts} />
       case 'complete':      return <CompleteLine     key={idx} data={data} ts={ts} />
       default:              return null
@@ -8,6 +8,9 @@ Usage:
     python run_pipeline.py --no-llm MicroBenchmarks/Testcases/TC07_div_by_zero_var.cpp
     python run_pipeline.py --quiet MicroBenchmarks/Testcases/TC01_uninit_arithmetic.cpp
     python run_pipeline.py --no-security MicroBenchmarks/Testcases/TC01_uninit_arithmetic.cpp
+    python run_pipeline.py --jobs 4 --no-llm MicroBenchmarks/Testcases/
+    python run_pipeline.py --no-cache MicroBenchmarks/Testcases/TC01_uninit_arithmetic.cpp
+    python run_pipeline.py --concurrent MicroBenchmarks/Testcases/TC01_uninit_arithmetic.cpp
 """
 
 import argparse
@@ -21,7 +24,10 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from src.logger_config import setup_logging
 from src.message_logger import MessageLogger
 from src.pipeline.pipeline import CompilerOptimizationPipeline
+from src.pipeline.batch import BatchConfig, run_batch
+from src.pipeline.result_cache import DEFAULT_CACHE_DIR, PipelineCache
 from src.llm.llm_client import make_llm_client
+from src.llm.response_cache import DEFAULT_RESPONSE_CACHE_DIR, ResponseCache
 
 logger = logging.getLogger(__name__)
 
@@ -55,6 +61,68 @@ def _banner(msg: str, width: int = 60):
     print(_c("─" * width, _CYAN))
 
 
+_SOURCE_EXTS = (".c", ".cc", ".cpp", ".cxx")
+
+_STATUS_COLOURS = {
+    "success":  _GREEN,
+    "partial":  _YELLOW,
+    "rollback": _RED,
+    "failed":   _RED,
+}
+
+
+def _collect_sources(directory: str):
+    """Return every C/C++ source directly inside directory, sorted by name."""
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(_SOURCE_EXTS)
+        and os.path.isfile(os.path.join(directory, name))
+    )
+
+
+def _run_batch_mode(args, directory: str):
+    """--jobs / directory mode: spread every source file over a process pool."""
+    paths = _collect_sources(directory)
+    if not paths:
+        print(_c(f"\n  [ERROR] No C/C++ sources found in {directory}", _RED))
+        sys.exit(1)
+
+    jobs = max(1, args.jobs)
+    print(f"  Batch  : {len(paths)} file(s) on {jobs} worker process(es)"
+          + (f", {args.timeout:g}s per-file timeout" if args.timeout else "") + "\n")
+    if args.show_messages or args.save_messages:
+        print(_c("  [Messages] Not available in batch mode — ignored", _YELLOW))
+
+    config = BatchConfig(
+        llm_backend=args.llm,
+        use_llm=not args.no_llm,
+        security=not args.no_security,
+        cache_dir=None if args.no_cache else DEFAULT_CACHE_DIR,
+        concurrent_verification=args.concurrent,
+        concurrent_security=args.concurrent,
+        llm_cache_dir=None if args.no_cache else DEFAULT_RESPONSE_CACHE_DIR,
+        llm_cache_readonly=args.llm_cache_readonly,
+    )
+    counts = {}
+    done = 0
+    for item in run_batch(paths, workers=jobs, timeout=args.timeout, config=config):
+        done += 1
+        status = item.result.status
+        counts[status] = counts.get(status, 0) + 1
+        detail = f" — {item.result.error}" if item.result.error else ""
+        print(
+            f"  [{done}/{len(paths)}] "
+            + _c(f"{status.upper():<8}", _STATUS_COLOURS.get(status, "") + _BOLD)
+            + f" {os.path.basename(item.file_path)}  ({item.elapsed_s:.1f}s){detail}"
+        )
+
+    print()
+    _banner("BATCH RESULT")
+    for status, n in sorted(counts.items()):
+        print(_c(f"  {status.upper():<8} : {n}", _STATUS_COLOURS.get(status, "")))
+    print()
+
+
 def _step(n: int, total: int, name: str):
     """Print a big step header so it's easy to see where we are."""
     bar = _c(f"[{n}/{total}]", _CYAN)
@@ -75,18 +143,26 @@ Logging levels (default: INFO — shows every step):
   --quiet  / -q   WARNING  only warnings and errors
 
 Log file: logs/pipeline.log  (always DEBUG level, regardless of console setting)
+Cache   : .cache/pipeline/    (results reused for unchanged sources; --no-cache to bypass)
+          .cache/llm/         (LLM completions reused for identical prompts, 7-day TTL)
 
 Examples:
   python run_pipeline.py MicroBenchmarks/Testcases/TC01_uninit_arithmetic.cpp
   python run_pipeline.py --verbose MicroBenchmarks/Testcases/TC11_buffer_overflow_loop.cpp
   python run_pipeline.py --no-llm MicroBenchmarks/Testcases/TC07_div_by_zero_var.cpp
+  python run_pipeline.py --jobs 4 --timeout 600 MicroBenchmarks/Testcases/
         """,
     )
-    parser.add_argument("file",      help="Path to C/C++ source file to analyse and optimise")
+    parser.add_argument("file",      help="Path to C/C++ source file (or a directory of them) to analyse and optimise")
     parser.add_argument("--verbose", "-v", action="store_true", help="Enable DEBUG logging")
     parser.add_argument("--quiet",   "-q", action="store_true", help="Only show warnings/errors")
     parser.add_argument("--no-llm",      action="store_true", help="Skip LLM (rule-based only)")
     parser.add_argument("--no-security", action="store_true", help="Skip security audit (Step 4)")
+    parser.add_argument("--no-cache",    action="store_true", help="Ignore and do not update the result cache")
+    parser.add_argument("--concurrent",  action="store_true", help="Overlap Step 3 compiles, Z3 and benchmark runs, "
+                                                                   "and the Step 4 security layers")
+    parser.add_argument("--llm-cache-readonly", action="store_true",
+                        help="Serve cached LLM responses but never write new ones")
     parser.add_argument(
         "--llm", choices=["ollama", "gemini"], default="ollama",
         metavar="BACKEND",
@@ -101,6 +177,14 @@ Examples:
         default=None,
         help="Save all inter-agent messages as JSON to FILE (e.g. logs/messages.json)"
     )
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=1, metavar="N",
+        help="Worker processes for directory (batch) mode (default: 1)",
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=None, metavar="SECONDS",
+        help="Per-file timeout in batch mode; a hung file is reported as failed",
+    )
     args = parser.parse_args()
 
     # ── Logging setup ──────────────────────────────────────────────────────────
@@ -121,6 +205,11 @@ Examples:
     print(f"  Log    : {_c(log_path, _DIM)}")
     print(f"  Level  : {_c(console_level, _YELLOW)}\n")
 
+    if os.path.isdir(file_path):
+        _run_batch_mode(args, file_path)
+        print(f"  Full log: {_c(log_path, _DIM)}\n")
+        return
+
     if not os.path.isfile(file_path):
         logger.error(f"File not found: {file_path}")
         print(_c(f"\n  [ERROR] File not found: {file_path}", _RED))
@@ -135,8 +224,14 @@ Examples:
         _need_msg_logger = False
 
     logger.info("Initialising pipeline agents …")
-    llm_client = make_llm_client(args.llm)
-    pipeline = CompilerOptimizationPipeline(llm_client=llm_client)
+    response_cache = None if args.no_cache else ResponseCache(read_only=args.llm_cache_readonly)
+    llm_client = make_llm_client(args.llm, response_cache=response_cache)
+    cache = None if args.no_cache else PipelineCache()
+    pipeline = CompilerOptimizationPipeline(
+        llm_client=llm_client, cache=cache,
+        concurrent_verification=args.concurrent,
+        concurrent_security=args.concurrent,
+    )
 
     if args.no_llm:
         for agent in (pipeline.analysis_agent,
@@ -202,12 +297,7 @@ Examples:
         _step(4, total_steps, "Security Agent     — vulnerability audit")
 
     # ── Result ─────────────────────────────────────────────────────────────────
-    status_colour = {
-        "success":  _GREEN,
-        "partial":  _YELLOW,
-        "rollback": _RED,
-        "failed":   _RED,
-    }.get(result.status, "")
+    status_colour = _STATUS_COLOURS.get(result.status, "")
 
     print()
     _banner("PIPELINE RESULT")
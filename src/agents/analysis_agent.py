@@ -19,9 +19,12 @@ if _root not in sys.path:
     sys.path.insert(0, _root)
 
 from agent_framework import BaseAgent, ContextManager
+from src.llm.async_client import AsyncLLMClient
 from src.llm.llm_client import LLMClient
 from src.llm.prompt_templates import AnalysisPromptTemplate
-from src.parser.code_parser import CodeParser
+from src.llm.scheduler import submit_llm
+from src.parser.lexer import lex
+from src.parser.parsed_source import parsed_source
 from src.reasoning.cot_validator import CoTValidator
 
 logger = logging.getLogger(__name__)
@@ -54,7 +57,6 @@ class AnalysisAgent(BaseAgent):
                  llm_client: LLMClient = None):
         super().__init__(agent_id, "analysis", context_manager)
         self.llm     = llm_client or LLMClient()
-        self.parser  = CodeParser()
         self.cot_val = CoTValidator()
 
     # ── BaseAgent interface ────────────────────────────────────────────────────
@@ -73,34 +75,70 @@ class AnalysisAgent(BaseAgent):
         """Main entry point called by the base agent framework."""
         source_code = input_data.get("source_code", "")
         file_path   = input_data.get("file_path", "<unknown>")
+        if not source_code:
+            return self._no_source()
+
+        parse_result = self._parse(source_code, file_path)
+        # Queue the LLM request so inference overlaps the rule-based checks
+        llm_future = submit_llm(
+            self.llm, self._llm_prompt(source_code, file_path, parse_result),
+            system_prompt=AnalysisPromptTemplate.SYSTEM, priority="analysis",
+        )
+        rule_findings = self._run_rules(parse_result, source_code)
+        logger.info("AnalysisAgent: waiting for LLM enrichment …")
+        return self._finish(source_code, file_path, parse_result, rule_findings,
+                            llm_future.result())
 
+    async def aprocess(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """process() for asyncio pipelines: awaits the LLM instead of blocking."""
+        source_code = input_data.get("source_code", "")
+        file_path   = input_data.get("file_path", "<unknown>")
         if not source_code:
-            logger.error("AnalysisAgent: no source_code provided")
-            return {"error": "No source_code provided", "all_findings": []}
+            return self._no_source()
+
+        parse_result = self._parse(source_code, file_path)
+        pending = AsyncLLMClient(self.llm).submit(
+            self._llm_prompt(source_code, file_path, parse_result),
+            system_prompt=AnalysisPromptTemplate.SYSTEM, priority="analysis",
+        )
+        rule_findings = self._run_rules(parse_result, source_code)
+        logger.info("AnalysisAgent: waiting for LLM enrichment …")
+        return self._finish(source_code, file_path, parse_result, rule_findings,
+                            await pending)
 
+    # ── Processing steps ──────────────────────────────────────────────────────
+
+    @staticmethod
+    def _no_source() -> Dict[str, Any]:
+        logger.error("AnalysisAgent: no source_code provided")
+        return {"error": "No source_code provided", "all_findings": []}
+
+    def _parse(self, source_code: str, file_path: str):
         logger.info(f"AnalysisAgent: parsing '{os.path.basename(file_path)}' "
                     f"({len(source_code)} chars)")
-        # 1. Parse
-        parse_result = self.parser.parse_string(source_code, file_path)
-
+        # shared with the other agents of this run through the context
+        parse_result = parsed_source(source_code, self.context).parse(file_path)
         logger.debug(f"AnalysisAgent: parse done — {parse_result.line_count} lines, "
                      f"{len(parse_result.functions)} function(s), "
                      f"max loop depth={parse_result.max_loop_depth}")
+        return parse_result
 
-        # 2. Rule-based findings (offline-capable)
+    def _run_rules(self, parse_result, source_code: str) -> List[Dict]:
+        """Rule-based findings (offline-capable)."""
         logger.info("AnalysisAgent: running rule-based checks …")
         rule_findings = self._rule_based_analysis(parse_result, source_code)
         logger.info(f"AnalysisAgent: rule-based → {len(rule_findings)} finding(s)")
+        return rule_findings
 
-        # 3. LLM-based findings (enriches when online)
-        logger.info("AnalysisAgent: calling LLM for enrichment …")
+    def _finish(self, source_code: str, file_path: str, parse_result,
+                rule_findings: List[Dict], raw: str) -> Dict[str, Any]:
+        """Fold the LLM response into the report and publish it to the context."""
         llm_findings, reasoning_steps, conclusion, confidence = \
-            self._llm_analysis(source_code, file_path, parse_result, rule_findings)
+            self._llm_analysis(raw, rule_findings)
 
         logger.info(f"AnalysisAgent: LLM returned {len(llm_findings)} additional finding(s) "
                      f"(confidence={confidence:.2f})")
 
-        # 4. Merge
         all_findings = self._merge_findings(rule_findings, llm_findings)
         logger.info(f"AnalysisAgent: merged total = {len(all_findings)} finding(s)")
 
@@ -163,12 +201,17 @@ class AnalysisAgent(BaseAgent):
                         "source":      "rule",
                     })
 
+        # The parser's token stream already knows where the comments are;
+        # the text heuristics below run on the source with them blanked out.
+        tokens = parse_result.tokens or lex(source_code)
+        _src_nc = tokens.code_text()
+
         # Off-by-one in for-loop array access: i <= N instead of i < N
         off_by_one = re.findall(
-            r'for\s*\([^;]*;\s*\w+\s*<=\s*(\d+)', source_code
+            r'for\s*\([^;]*;\s*\w+\s*<=\s*(\d+)', _src_nc
         )
         if off_by_one:
-            for ln_no, ln in enumerate(source_code.splitlines(), 1):
+            for ln_no, ln in enumerate(_src_nc.splitlines(), 1):
                 if re.search(r'for\s*\([^;]*;\s*\w+\s*<=\s*\d+', ln):
                     findings.append({
                         "type":        "off_by_one_error",
@@ -207,9 +250,7 @@ class AnalysisAgent(BaseAgent):
                 "source":      "rule",
             })
 
-        # Division by zero heuristic — strip comments first to avoid false positives
-        _src_nc = re.sub(r'//[^\n]*', '', source_code)                       # remove // comments
-        _src_nc = re.sub(r'/\*.*?\*/', '', _src_nc, flags=re.DOTALL)         # remove /* */ blocks
+        # Division by zero heuristic — comment-free text avoids false positives
         _CPP_KW = frozenset({
             'int', 'char', 'float', 'double', 'long', 'short', 'unsigned',
             'bool', 'void', 'return', 'if', 'else', 'for', 'while', 'do',
@@ -237,16 +278,14 @@ class AnalysisAgent(BaseAgent):
 
     # ── LLM-based analysis ────────────────────────────────────────────────────
 
-    def _llm_analysis(self, source_code, file_path, parse_result, rule_findings):
-        prompt = AnalysisPromptTemplate.build(
+    def _llm_prompt(self, source_code, file_path, parse_result) -> str:
+        return AnalysisPromptTemplate.build(
             source_code,
             file_path,
             parse_result.to_summary(),
         )
-        raw = self.llm.generate(
-            prompt,
-            system_prompt=AnalysisPromptTemplate.SYSTEM,
-        )
+
+    def _llm_analysis(self, raw, rule_findings):
         cot = self.cot_val.validate(raw)
         if cot.is_valid:
             return cot.findings, cot.reasoning_steps, cot.conclusion, cot.confidence
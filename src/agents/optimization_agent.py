@@ -6,7 +6,8 @@ Uses a hybrid approach:
   1. Rule-based auto-fixes (always work offline)
   2. LLM-generated optimizations (when Ollama is available)
 
-Saves output to MicroBenchmarks/Generated_optimisation/
+Saves output to MicroBenchmarks/Generated_optimisation/ unless the agent
+or the request names another output_dir.
 """
 
 import difflib
@@ -21,8 +22,11 @@ if _root not in sys.path:
     sys.path.insert(0, _root)
 
 from agent_framework import BaseAgent, ContextManager
+from src.llm.async_client import AsyncLLMClient
 from src.llm.llm_client import LLMClient
 from src.llm.prompt_templates import OptimizationPromptTemplate
+from src.llm.scheduler import submit_llm
+from src.parser.parsed_source import parsed_source
 from src.reasoning.cot_validator import CoTValidator
 
 logger = logging.getLogger(__name__)
@@ -43,6 +47,7 @@ class OptimizationAgent(BaseAgent):
             "source_code":     "<C++ source string>",
             "file_path":       "<optional original path>",
             "analysis_report": {<output from AnalysisAgent>}   # optional
+            "output_dir":      "<dir for OPT_<name>>"          # optional
         }
 
     Output:
@@ -61,11 +66,11 @@ class OptimizationAgent(BaseAgent):
     """
 
     def __init__(self, agent_id: str, context_manager: ContextManager,
-                 llm_client: LLMClient = None, output_dir: str = _OUTPUT_DIR):
+                 llm_client: LLMClient = None, output_dir: Optional[str] = None):
         super().__init__(agent_id, "optimization", context_manager)
         self.llm        = llm_client or LLMClient()
         self.cot_val    = CoTValidator()
-        self.output_dir = output_dir
+        self.output_dir = output_dir or _OUTPUT_DIR
         os.makedirs(self.output_dir, exist_ok=True)
 
     # ── BaseAgent interface ────────────────────────────────────────────────────
@@ -81,36 +86,72 @@ class OptimizationAgent(BaseAgent):
         ]
 
     def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        source_code     = input_data.get("source_code", "")
-        file_path       = input_data.get("file_path", "<unknown>")
-        analysis_report = input_data.get("analysis_report") or \
-                          self.context.get("analysis_results") or {}
+        source_code, file_path, analysis_report = self._inputs(input_data)
+        if not source_code:
+            return self._no_source()
 
+        # Queue the LLM request first so inference overlaps the rule-based fixes
+        llm_future = submit_llm(
+            self.llm, OptimizationPromptTemplate.build(source_code, analysis_report),
+            system_prompt=OptimizationPromptTemplate.SYSTEM, priority="optimization",
+        )
+        rule_code, rule_transforms = self._run_rules(source_code, analysis_report)
+        logger.info("OptimizationAgent: waiting for LLM transforms …")
+        return self._finish(source_code, file_path, rule_code, rule_transforms,
+                            llm_future.result(), input_data.get("output_dir"))
+
+    async def aprocess(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """process() for asyncio pipelines: awaits the LLM instead of blocking."""
+        source_code, file_path, analysis_report = self._inputs(input_data)
         if not source_code:
-            logger.error("OptimizationAgent: no source_code provided")
-            return {"error": "No source_code provided"}
+            return self._no_source()
+
+        pending = AsyncLLMClient(self.llm).submit(
+            OptimizationPromptTemplate.build(source_code, analysis_report),
+            system_prompt=OptimizationPromptTemplate.SYSTEM, priority="optimization",
+        )
+        rule_code, rule_transforms = self._run_rules(source_code, analysis_report)
+        logger.info("OptimizationAgent: waiting for LLM transforms …")
+        return self._finish(source_code, file_path, rule_code, rule_transforms,
+                            await pending, input_data.get("output_dir"))
 
-        logger.info(f"OptimizationAgent: optimising '{os.path.basename(file_path)}'")
-        n_findings = len(analysis_report.get('all_findings', []))
-        logger.info(f"OptimizationAgent: {n_findings} finding(s) from analysis to address")
+    # ── Processing steps ──────────────────────────────────────────────────────
 
-        # 1. Rule-based fixes
+    def _inputs(self, input_data: Dict[str, Any]) -> Tuple[str, str, Dict]:
+        source_code     = input_data.get("source_code", "")
+        file_path       = input_data.get("file_path", "<unknown>")
+        analysis_report = input_data.get("analysis_report") or \
+                          self.context.get("analysis_results") or {}
+        if source_code:
+            logger.info(f"OptimizationAgent: optimising '{os.path.basename(file_path)}'")
+            n_findings = len(analysis_report.get('all_findings', []))
+            logger.info(f"OptimizationAgent: {n_findings} finding(s) from analysis to address")
+        return source_code, file_path, analysis_report
+
+    @staticmethod
+    def _no_source() -> Dict[str, Any]:
+        logger.error("OptimizationAgent: no source_code provided")
+        return {"error": "No source_code provided"}
+
+    def _run_rules(self, source_code: str, analysis_report: Dict) -> Tuple[str, List[Dict]]:
         logger.info("OptimizationAgent: applying rule-based fixes …")
         rule_code, rule_transforms = self._rule_based_fix(source_code, analysis_report)
-
         logger.info(f"OptimizationAgent: {len(rule_transforms)} rule-based fix(es) applied")
         for t in rule_transforms:
             logger.debug(f"  → {t.get('type')}: {t.get('description')}")
+        return rule_code, rule_transforms
 
-        # 2. LLM transforms
-        logger.info("OptimizationAgent: calling LLM for additional transforms …")
+    def _finish(self, source_code: str, file_path: str, rule_code: str,
+                rule_transforms: List[Dict], raw: str,
+                output_dir: Optional[str] = None) -> Dict[str, Any]:
+        """Pick the final code, write it out and publish the report to the context."""
         llm_code, llm_transforms, reasoning_steps, conclusion, confidence = \
-            self._llm_optimize(source_code, analysis_report)
+            self._llm_optimize(raw)
         logger.info(f"OptimizationAgent: LLM produced "
                     f"{'new code' if (llm_code and llm_code != source_code) else 'no change'} "
                     f"+ {len(llm_transforms)} transform(s)")
 
-        # 3. Choose best code: prefer LLM if it produced different code, else rule-based
+        # Choose best code: prefer LLM if it produced different code, else rule-based
         if llm_code and llm_code != source_code:
             final_code   = llm_code
             all_transforms = rule_transforms + llm_transforms
@@ -118,11 +159,11 @@ class OptimizationAgent(BaseAgent):
             final_code   = rule_code
             all_transforms = rule_transforms
 
-        # 4. Build unified diff
+        # Build unified diff
         diff = self._make_diff(source_code, final_code, file_path)
 
-        # 5. Save to disk
-        output_file = self._save_output(final_code, file_path)
+        # Save to disk
+        output_file = self._save_output(final_code, file_path, output_dir)
 
         result = {
             "file_path":       file_path,
@@ -193,8 +234,7 @@ class OptimizationAgent(BaseAgent):
             r'(for\s*\([^;]*;\s*\w+\s*)<=(\s*\d+)',
             re.MULTILINE,
         )
-        new_src, n = pattern.subn(lambda m: m.group(1) + "<" + m.group(2), src)
-        return new_src, n > 0
+        return self._sub_in_code(pattern, lambda g: g(1) + "<" + g(2), src)
 
     def _fix_uninit_var(self, src: str, varname: str) -> Tuple[str, bool]:
         """Add `= 0` to a bare variable declaration."""
@@ -202,8 +242,25 @@ class OptimizationAgent(BaseAgent):
             r'(\b(?:int|float|double|char|long|short|unsigned|bool)\s+'
             + re.escape(varname) + r')\s*;'
         )
-        new_src, n = pattern.subn(r'\g<1> = 0;', src)
-        return new_src, n > 0
+        return self._sub_in_code(pattern, lambda g: g(1) + " = 0;", src)
+
+    def _sub_in_code(self, pattern: re.Pattern, repl, src: str) -> Tuple[str, bool]:
+        """
+        pattern.subn() that leaves comments alone: matches are found in the
+        run's comment-blanked text of src (same offsets) and replaced in src.
+        repl receives a group(i) function returning the group's source text.
+        """
+        code = parsed_source(src, self.context).code_text
+        parts, pos = [], 0
+        for m in pattern.finditer(code):
+            group = lambda i, m=m: src[m.start(i):m.end(i)]
+            parts.append(src[pos:m.start()])
+            parts.append(repl(group))
+            pos = m.end()
+        if not parts:
+            return src, False
+        parts.append(src[pos:])
+        return "".join(parts), True
 
     def _extract_varname(self, description: str) -> Optional[str]:
         m = re.search(r"Variable '(\w+)'", description)
@@ -212,12 +269,8 @@ class OptimizationAgent(BaseAgent):
     # ── LLM optimization ──────────────────────────────────────────────────────
 
     def _llm_optimize(
-        self, src: str, analysis_report: Dict
+        self, raw: str
     ) -> Tuple[Optional[str], List[Dict], List[str], str, float]:
-        prompt = OptimizationPromptTemplate.build(src, analysis_report)
-        raw    = self.llm.generate(
-            prompt, system_prompt=OptimizationPromptTemplate.SYSTEM
-        )
         cot = self.cot_val.validate(raw)
         if cot.is_valid and cot.optimized_code:
             return (
@@ -243,11 +296,13 @@ class OptimizationAgent(BaseAgent):
         )
         return "".join(diff)
 
-    def _save_output(self, code: str, file_path: str) -> str:
+    def _save_output(self, code: str, file_path: str,
+                     output_dir: Optional[str] = None) -> str:
         base     = os.path.basename(file_path) if file_path != "<unknown>" else "output.cpp"
         out_name = "OPT_" + base
-        out_path = os.path.join(self.output_dir, out_name)
+        out_path = os.path.join(output_dir or self.output_dir, out_name)
         try:
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
             with open(out_path, "w", encoding="utf-8") as fh:
                 fh.write(code)
             logger.info(f"Saved optimized code to {out_path}")
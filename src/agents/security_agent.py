@@ -9,14 +9,29 @@ Detects security vulnerabilities in C/C++ code using four layers:
 
 Compares original vs optimized code internally.
 Only NEW HIGH-severity findings from Layer 1 or Layer 2 (score >= 0.8) trigger rollback.
+
+Scan results are memoised by content hash (src.security.finding_cache), so
+re-auditing candidates against the same original never rescans it, and
+Layer 1 rescans only the functions a candidate actually changed.
+
+With concurrent=True, cppcheck is dispatched to a worker thread before any
+scanning starts and the LLM as soon as the baseline types are known; the
+rules and heuristics run meanwhile on the calling thread.  Each of the two
+slow layers has a deadline measured from the start of the audit: a layer
+that misses it is abandoned (listed in "timed_out_layers") and the report
+is built from the layers that finished.
 """
 
+import asyncio
+import dataclasses
 import logging
 import os
 import re
-import subprocess
 import sys
-import xml.etree.ElementTree as ET
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
 from typing import Any, Dict, List, Optional, Tuple
 
 _root = os.path.join(os.path.dirname(__file__), "..", "..")
@@ -24,8 +39,19 @@ if _root not in sys.path:
     sys.path.insert(0, _root)
 
 from agent_framework import BaseAgent, ContextManager
+from src.llm.async_client import AsyncLLMClient
 from src.llm.llm_client import LLMClient
 from src.llm.prompt_templates import SecurityPromptTemplate
+from src.llm.scheduler import submit_llm
+from src.cache.keys import content_hash
+from src.parser.lexer import IDENT, NUMBER, LineIndex
+from src.parser.parsed_source import ParsedSource, parsed_source
+from src.security.cppcheck import cppcheck_available, get_cppcheck_runner, suffix_for
+from src.security.dataflow import (
+    DANGLING_POINTER, DOUBLE_FREE, USE_AFTER_FREE, analyze_pointers,
+)
+from src.security.finding_cache import get_finding_cache
+from src.security.rule_engine import DEFAULT_RULES_PATH, RuleHit, get_rule_engine
 from src.reasoning.cot_validator import CoTValidator
 
 logger = logging.getLogger(__name__)
@@ -54,56 +80,32 @@ class SecurityAgent(BaseAgent):
             "llm_reasoning":       [...],
             "llm_conclusion":      str,
             "sources":             [...],
+            "timed_out_layers":    [...],   # layers abandoned at their deadline
             "summary":             str,
         }
     """
 
-    # ── Layer 1: Unsafe function patterns ─────────────────────────────────────
-    # (regex, type, severity, cwe_id, description)
-    _UNSAFE_FUNCTIONS = [
-        (
-            r"\bgets\s*\(",
-            "unsafe_gets", "high", "CWE-242",
-            "gets() is unconditionally unsafe — no bound checking on input length.",
-            "Replace gets() with fgets(buf, sizeof(buf), stdin).",
-        ),
-        (
-            r'\bscanf\s*\(\s*"[^"]*%s',
-            "unsafe_scanf_s", "high", "CWE-134",
-            "scanf %s reads an unbounded string — add a field width limit e.g. %127s.",
-            "Add field width to format: scanf(\"%127s\", buf).",
-        ),
-        (
-            r"\bstrcpy\s*\(",
-            "unsafe_strcpy", "medium", "CWE-676",
-            "strcpy() copies without bound checking — destination may overflow.",
-            "Replace with strncpy(dst, src, sizeof(dst) - 1) or strlcpy().",
-        ),
-        (
-            r"\bstrcat\s*\(",
-            "unsafe_strcat", "medium", "CWE-676",
-            "strcat() appends without bound checking — destination may overflow.",
-            "Replace with strncat(dst, src, sizeof(dst) - strlen(dst) - 1).",
-        ),
-        (
-            r"\bsprintf\s*\(",
-            "unsafe_sprintf", "medium", "CWE-676",
-            "sprintf() writes unbounded output — use snprintf() with explicit size.",
-            "Replace with snprintf(buf, sizeof(buf), fmt, ...).",
-        ),
-    ]
+    # ── Layer 1: signatures (unsafe functions, format strings) ────────────────
+    # Declared in a JSON rule file and compiled into one anchored scanner.
+    RULES_PATH = DEFAULT_RULES_PATH
 
-    # ── Layer 1: Format string pattern ────────────────────────────────────────
-    _FORMAT_STRING_RE = re.compile(
-        r"\b(printf|fprintf|sprintf|snprintf|vprintf|vsprintf)\s*\(\s*(\w+)\s*[,)]",
-        re.MULTILINE,
-    )
+    # Seconds from the start of an audit after which a layer is abandoned
+    # (concurrent mode; None waits indefinitely).
+    DEFAULT_DEADLINES: Dict[str, Optional[float]] = {"llm": 180.0, "cppcheck": 60.0}
 
     def __init__(self, agent_id: str, context_manager: ContextManager,
-                 llm_client: LLMClient = None):
+                 llm_client: LLMClient = None, rules_path: Optional[str] = None,
+                 concurrent: bool = False,
+                 deadlines: Optional[Dict[str, Optional[float]]] = None):
         # Set instance attributes BEFORE super().__init__() because BaseAgent
         # calls get_capabilities() during initialisation.
+        self.concurrent = concurrent
+        self.deadlines = dict(self.DEFAULT_DEADLINES if concurrent else {},
+                              **(deadlines or {}))
+        self.rules = get_rule_engine(rules_path or self.RULES_PATH)
+        self.findings_cache = get_finding_cache()
         self._cppcheck_available = self._check_cppcheck()
+        self.cppcheck = get_cppcheck_runner()
         self.llm = llm_client or LLMClient()
         self.cot_val = CoTValidator()
         super().__init__(agent_id, "security", context_manager)
@@ -119,6 +121,8 @@ class SecurityAgent(BaseAgent):
             "buffer_overflow_detection",
             "format_string_detection",
             "use_after_free_detection",
+            "double_free_detection",
+            "dangling_pointer_detection",
             "integer_overflow_detection",
             "null_dereference_detection",
             "taint_flow_heuristics",
@@ -131,65 +135,179 @@ class SecurityAgent(BaseAgent):
 
     def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Main entry point called by the pipeline."""
-        original_code  = input_data.get("original_code", "")
-        optimized_code = input_data.get("optimized_code", original_code)
-        file_path      = input_data.get("file_path", "<unknown>")
-
+        original_code, optimized_code, file_path = self._inputs(input_data)
         if not optimized_code.strip():
-            logger.error("SecurityAgent: no code provided")
-            return {"error": "No code provided", "status": "PASS",
-                    "new_vulnerabilities": [], "all_vulnerabilities": []}
+            return self._no_code()
+
+        started, timed_out = time.monotonic(), []
+        cppcheck_future: Optional[Future] = None
+        if self.concurrent:
+            cppcheck_future = _layer_pool().submit(self._run_cppcheck,
+                                                   optimized_code, file_path)
+
+        orig_all, baseline_types = self._scan_original(original_code)
+        # Queue Layer 3 now so inference overlaps the optimized-code scans
+        llm_future = submit_llm(
+            self.llm,
+            SecurityPromptTemplate.build(optimized_code, original_code, baseline_types),
+            system_prompt=SecurityPromptTemplate.SYSTEM, priority="security",
+        )
+        opt_all, opt_scores = self._scan_optimized(optimized_code, orig_all)
+        if cppcheck_future is None:
+            cppcheck_findings = self._run_cppcheck(optimized_code, file_path)
+        else:
+            cppcheck_findings = self._await_layer("cppcheck", cppcheck_future,
+                                                  started, timed_out, [])
+        raw = self._await_layer("llm", llm_future, started, timed_out, None)
+        return self._finish(file_path, orig_all, opt_all, opt_scores,
+                            cppcheck_findings, raw, timed_out)
+
+    async def aprocess(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """process() for asyncio pipelines: awaits the LLM and cppcheck."""
+        original_code, optimized_code, file_path = self._inputs(input_data)
+        if not optimized_code.strip():
+            return self._no_code()
 
-        logger.info(
-            f"SecurityAgent: auditing '{os.path.basename(file_path)}' "
-            f"({len(optimized_code)} chars)"
+        started, timed_out = time.monotonic(), []
+        cppcheck_task = None
+        if self.concurrent:
+            cppcheck_task = asyncio.wrap_future(
+                _layer_pool().submit(self._run_cppcheck, optimized_code, file_path)
+            )
+
+        orig_all, baseline_types = self._scan_original(original_code)
+        pending = AsyncLLMClient(self.llm).submit(
+            SecurityPromptTemplate.build(optimized_code, original_code, baseline_types),
+            system_prompt=SecurityPromptTemplate.SYSTEM, priority="security",
         )
+        opt_all, opt_scores = self._scan_optimized(optimized_code, orig_all)
+        if cppcheck_task is None:
+            cppcheck_findings = await asyncio.to_thread(
+                self._run_cppcheck, optimized_code, file_path
+            )
+        else:
+            cppcheck_findings = await self._await_layer_async(
+                "cppcheck", cppcheck_task, started, timed_out, [])
+        raw = await self._await_layer_async("llm", pending, started, timed_out, None)
+        return self._finish(file_path, orig_all, opt_all, opt_scores,
+                            cppcheck_findings, raw, timed_out)
+
+    async def aprepare(self, original_code: str) -> None:
+        """
+        Scan the original ahead of the audit (it is known before optimization
+        finishes); the results land in the finding cache, so the audit's
+        baseline scan is a lookup.
+        """
+        if original_code.strip():
+            await asyncio.to_thread(self._scan_original, original_code)
 
-        sources: List[str] = []
+    # ── Processing steps ──────────────────────────────────────────────────────
 
-        # ── Layer 1: Rule-based ───────────────────────────────────────────────
+    @staticmethod
+    def _inputs(input_data: Dict[str, Any]) -> Tuple[str, str, str]:
+        original_code  = input_data.get("original_code", "")
+        optimized_code = input_data.get("optimized_code", original_code)
+        file_path      = input_data.get("file_path", "<unknown>")
+        if optimized_code.strip():
+            logger.info(
+                f"SecurityAgent: auditing '{os.path.basename(file_path)}' "
+                f"({len(optimized_code)} chars)"
+            )
+        return original_code, optimized_code, file_path
+
+    @staticmethod
+    def _no_code() -> Dict[str, Any]:
+        logger.error("SecurityAgent: no code provided")
+        return {"error": "No code provided", "status": "PASS",
+                "new_vulnerabilities": [], "all_vulnerabilities": []}
+
+    def _scan_original(self, original_code: str) -> Tuple[List[Dict], List[str]]:
+        """Layers 1+2 on the original; the LLM prompt needs its finding types."""
         logger.info("SecurityAgent: Layer 1 — rule-based scan …")
-        orig_rule = self._rule_scan(original_code)
-        opt_rule  = self._rule_scan(optimized_code)
-        sources.append("rules")
+        orig_all = self._rule_scan(original_code)
+        orig_heuristic, _ = self._heuristic_scan(original_code)
         logger.info(
-            f"SecurityAgent: rules → original={len(orig_rule)}, "
-            f"optimized={len(opt_rule)}"
+            f"SecurityAgent: original → rules={len(orig_all)}, "
+            f"heuristics={len(orig_heuristic)}"
         )
-
-        # ── Layer 2: Heuristic ────────────────────────────────────────────────
+        orig_all += orig_heuristic
+        return orig_all, [f["type"] for f in orig_all]
+
+    def _scan_optimized(self, optimized_code: str, orig_all: List[Dict]
+                        ) -> Tuple[List[Dict], Dict[str, float]]:
+        """Layers 1+2 on the optimized code."""
+        opt_rule = self._rule_scan(optimized_code)
+        logger.info(f"SecurityAgent: rules → optimized={len(opt_rule)}")
         logger.info("SecurityAgent: Layer 2 — heuristic scan …")
-        orig_heuristic, _           = self._heuristic_scan(original_code)
-        opt_heuristic,  opt_scores  = self._heuristic_scan(optimized_code)
-        sources.append("heuristics")
-        logger.info(
-            f"SecurityAgent: heuristics → original={len(orig_heuristic)}, "
-            f"optimized={len(opt_heuristic)}"
-        )
-
-        # Merge all findings per code version
-        orig_all = orig_rule + orig_heuristic
-        opt_all  = opt_rule  + opt_heuristic
+        opt_heuristic, opt_scores = self._heuristic_scan(optimized_code)
+        logger.info(f"SecurityAgent: heuristics → optimized={len(opt_heuristic)}")
+        return opt_rule + opt_heuristic, opt_scores
+
+    def _run_cppcheck(self, optimized_code: str, file_path: str) -> List[Dict]:
+        """Layer 4 (independent of the LLM, so it runs while Layer 3 generates)."""
+        if not self._cppcheck_available:
+            return []
+        logger.info("SecurityAgent: Layer 4 — cppcheck …")
+        cppcheck_findings = self._cppcheck_scan(optimized_code, file_path)
+        logger.info(f"SecurityAgent: cppcheck → {len(cppcheck_findings)} finding(s)")
+        return cppcheck_findings
+
+    # ── Layer deadlines ───────────────────────────────────────────────────────
+
+    def _remaining(self, layer: str, started: float) -> Optional[float]:
+        deadline = self.deadlines.get(layer)
+        if deadline is None:
+            return None
+        return max(0.0, started + deadline - time.monotonic())
+
+    def _abandon(self, layer: str, timed_out: List[str]) -> None:
+        logger.warning(f"SecurityAgent: {layer} missed its "
+                       f"{self.deadlines[layer]:g}s deadline — abandoned")
+        timed_out.append(layer)
+
+    def _await_layer(self, layer: str, future: Future, started: float,
+                     timed_out: List[str], default: Any) -> Any:
+        """future's result, or default once the layer's deadline has passed."""
+        try:
+            return future.result(timeout=self._remaining(layer, started))
+        except FutureTimeout:
+            future.cancel()                 # dequeues it if it has not started
+            self._abandon(layer, timed_out)
+            return default
+
+    async def _await_layer_async(self, layer: str, awaitable, started: float,
+                                 timed_out: List[str], default: Any) -> Any:
+        try:
+            return await asyncio.wait_for(awaitable, self._remaining(layer, started))
+        except asyncio.TimeoutError:
+            self._abandon(layer, timed_out)
+            return default
+
+    def _finish(self, file_path: str, orig_all: List[Dict], opt_all: List[Dict],
+                opt_scores: Dict[str, float], cppcheck_findings: List[Dict],
+                raw: Optional[str], timed_out: Optional[List[str]] = None
+                ) -> Dict[str, Any]:
+        """Merge all layers, decide on rollback and publish to the context."""
+        sources: List[str] = ["rules", "heuristics"]
 
         # ── Layer 3: LLM ──────────────────────────────────────────────────────
         logger.info("SecurityAgent: Layer 3 — LLM semantic scan …")
-        baseline_types = [f["type"] for f in orig_all]
-        llm_findings, llm_reasoning, llm_conclusion, llm_conf = \
-            self._llm_scan(optimized_code, original_code, baseline_types)
+        if raw is None:
+            llm_findings, llm_reasoning, llm_conclusion = (
+                [], ["LLM missed its deadline — rule+heuristic analysis only."],
+                "LLM analysis abandoned.",
+            )
+        else:
+            llm_findings, llm_reasoning, llm_conclusion, _ = self._llm_scan(raw)
         if llm_findings:
             opt_all.extend(llm_findings)
             sources.append("llm")
         logger.info(f"SecurityAgent: LLM → {len(llm_findings)} finding(s)")
 
         # ── Layer 4: cppcheck ─────────────────────────────────────────────────
-        cppcheck_findings: List[Dict] = []
-        if self._cppcheck_available:
-            logger.info("SecurityAgent: Layer 4 — cppcheck …")
-            cppcheck_findings = self._cppcheck_scan(optimized_code, file_path)
-            if cppcheck_findings:
-                opt_all.extend(cppcheck_findings)
-                sources.append("cppcheck")
-            logger.info(f"SecurityAgent: cppcheck → {len(cppcheck_findings)} finding(s)")
+        if cppcheck_findings:
+            opt_all.extend(cppcheck_findings)
+            sources.append("cppcheck")
 
         # ── New vulnerability detection ───────────────────────────────────────
         new_vulns = self._find_new_vulnerabilities(orig_all, opt_all)
@@ -229,6 +347,7 @@ class SecurityAgent(BaseAgent):
             "llm_reasoning":       llm_reasoning,
             "llm_conclusion":      llm_conclusion,
             "sources":             sources,
+            "timed_out_layers":    list(timed_out or []),
             "summary":             self._build_summary(
                 file_path, opt_all, new_vulns, overall_risk, status
             ),
@@ -248,113 +367,107 @@ class SecurityAgent(BaseAgent):
         if not code.strip():
             return findings
 
-        lines = code.splitlines()
-
-        # Unsafe function patterns
-        for pattern, vtype, severity, cwe, desc, fix in self._UNSAFE_FUNCTIONS:
-            for ln_no, line in enumerate(lines, 1):
-                if re.search(pattern, line):
-                    findings.append({
-                        "type":           vtype,
-                        "severity":       severity,
-                        "line":           ln_no,
-                        "description":    desc,
-                        "cwe_id":         cwe,
-                        "recommendation": fix,
-                        "confidence":     0.9,
-                        "source":         "rule",
-                    })
-
-        # Format string: printf/fprintf with a variable as first arg (not a literal)
-        for m in self._FORMAT_STRING_RE.finditer(code):
-            fn_name, arg = m.group(1), m.group(2)
-            if not arg.startswith('"'):
-                ln_no = code[: m.start()].count("\n") + 1
-                findings.append({
-                    "type":           "format_string_bug",
-                    "severity":       "high",
-                    "line":           ln_no,
-                    "description":    (
-                        f"{fn_name}() called with variable '{arg}' as format string "
-                        "— potential format string attack (CWE-134)."
-                    ),
-                    "cwe_id":         "CWE-134",
-                    "recommendation": (
-                        f"Always use a literal format string: "
-                        f'{fn_name}("%s", {arg}).'
-                    ),
-                    "confidence":     0.9,
-                    "source":         "rule",
-                })
-
-        # Use-after-free
-        findings.extend(self._detect_use_after_free(code, lines))
+        # the run's shared parse: comments blanked, offsets and lines unchanged
+        parsed = parsed_source(code, self.context)
 
-        return findings
+        # Unsafe functions and format strings: per function, cached
+        findings.extend(hit.finding() for hit in self._rule_hits(parsed))
 
-    def _detect_use_after_free(self, code: str, lines: List[str]) -> List[Dict]:
-        """
-        Detect use-after-free for both C (free()) and C++ (delete / delete[]).
-        Pattern: deallocation followed by dereference of the same variable.
-        """
-        findings: List[Dict] = []
-
-        # Match both C free() and C++ delete / delete[]
-        dealloc_re = re.compile(
-            r"\bfree\s*\(\s*(\w+)\s*\)"    # free(ptr)
-            r"|\bdelete\s*\[\s*\]\s*(\w+)" # delete[] ptr
-            r"|\bdelete\s+(\w+)",           # delete ptr
-            re.MULTILINE,
+        # Use-after-free, double free, dangling pointers
+        pointer = self.findings_cache.get_or_compute(
+            content_hash("pointer_dataflow", parsed.digest),
+            lambda: tuple(self._detect_pointer_errors(parsed)),
         )
+        findings.extend(dict(f) for f in pointer)
 
-        freed_vars: Dict[str, int] = {}
-        for m in dealloc_re.finditer(code):
-            var = m.group(1) or m.group(2) or m.group(3)
-            freed_vars[var] = code[: m.start()].count("\n") + 1
+        return findings
 
-        for var, free_line in freed_vars.items():
-            deref_re = re.compile(
-                rf"\*\s*{re.escape(var)}\b"
-                rf"|{re.escape(var)}\s*->\s*\w+"
-                rf"|{re.escape(var)}\s*\["
-            )
-            # Direct reassignment: "ptr = ..." but NOT "*ptr = ..." or "ptr[i] = ..."
-            direct_assign_re = re.compile(
-                rf"(?<![*\[])\b{re.escape(var)}\s*=\s*(?!=)"
+    def _rule_hits(self, parsed: ParsedSource) -> List[RuleHit]:
+        """
+        Layer-1 hits for a source, scanned region by region: each top-level
+        function, and the text between them.  Hits are cached by region
+        text, so a function already seen (in the original, or in an earlier
+        candidate) costs a hash instead of a scan; only its offsets and
+        lines are shifted to where it sits now.
+        """
+        text, line_of = parsed.code_text, parsed.tokens.line_of
+        hits: List[RuleHit] = []
+        for start, end in self._regions(parsed):
+            region = text[start:end]
+            cached = self.findings_cache.get_or_compute(
+                content_hash("rules", self.rules.fingerprint, region),
+                lambda: tuple(self.rules.scan(region, LineIndex(region).line_of)),
             )
-            for ln_no, line in enumerate(lines, 1):
-                if ln_no <= free_line:
-                    continue
-                # Another deallocation of same var — stop looking
-                if re.search(
-                    rf"\bfree\s*\(\s*{re.escape(var)}\s*\)"
-                    rf"|\bdelete(?:\s*\[\s*\])?\s+{re.escape(var)}",
-                    line,
-                ):
-                    break
-                # Direct reassignment of the pointer itself — it's no longer freed
-                if direct_assign_re.search(line) and "->" not in line and \
-                        not re.search(rf"\*\s*{re.escape(var)}", line):
-                    break
-                if deref_re.search(line):
-                    findings.append({
-                        "type":           "use_after_free",
-                        "severity":       "high",
-                        "line":           ln_no,
-                        "description":    (
-                            f"Variable '{var}' dereferenced at line {ln_no} "
-                            f"after being deallocated at line {free_line}."
-                        ),
-                        "cwe_id":         "CWE-416",
-                        "recommendation": (
-                            f"Set '{var} = NULL/nullptr' immediately after "
-                            "deallocation, and NULL-check before use."
-                        ),
-                        "confidence":     0.9,
-                        "source":         "rule",
-                    })
-                    break
+            if not cached:
+                continue
+            shift = line_of(start) - 1
+            hits.extend(dataclasses.replace(h, start=h.start + start, end=h.end + start,
+                                            line=h.line + shift)
+                        for h in cached)
+        return self.rules.rank(hits)
 
+    @staticmethod
+    def _regions(parsed: ParsedSource) -> List[Tuple[int, int]]:
+        """Character spans of the outermost functions and of the gaps between them."""
+        ts, size = parsed.tokens, len(parsed.code_text)
+        regions: List[Tuple[int, int]] = []
+        pos = 0
+        for fn in parsed.scopes.of_kind("function"):
+            start = ts.starts[fn.start]
+            if start < pos:                     # nested in a function already cut
+                continue
+            if start > pos:
+                regions.append((pos, start))
+            pos = ts.ends[fn.end]
+            regions.append((start, pos))
+        if pos < size:
+            regions.append((pos, size))
+        return regions
+
+    _POINTER_ISSUES = {
+        USE_AFTER_FREE: (
+            "high", "CWE-416",
+            "Variable '{var}' dereferenced at line {line} "
+            "after being deallocated at line {freed}.",
+            "Set '{var} = NULL/nullptr' immediately after "
+            "deallocation, and NULL-check before use.",
+        ),
+        DOUBLE_FREE: (
+            "high", "CWE-415",
+            "Variable '{var}' deallocated again at line {line} "
+            "after being deallocated at line {freed}.",
+            "Set '{var} = NULL/nullptr' after the first deallocation "
+            "so a second free/delete is a no-op.",
+        ),
+        DANGLING_POINTER: (
+            "medium", "CWE-825",
+            "Dangling pointer '{var}' (deallocated at line {freed}) is "
+            "returned, copied or passed on at line {line}.",
+            "Do not let a freed pointer escape; reassign it or return "
+            "a live allocation instead.",
+        ),
+    }
+
+    def _detect_pointer_errors(self, parsed: ParsedSource) -> List[Dict]:
+        """
+        Use-after-free, double free and dangling pointers for both C
+        (free()) and C++ (delete / delete[]), from one def-use sweep over
+        the token stream (src.security.dataflow).
+        """
+        findings: List[Dict] = []
+        for issue in analyze_pointers(parsed):
+            severity, cwe, description, recommendation = self._POINTER_ISSUES[issue.kind]
+            fields = {"var": issue.var, "line": issue.line, "freed": issue.freed_line}
+            findings.append({
+                "type":           issue.kind,
+                "severity":       severity,
+                "line":           issue.line,
+                "description":    description.format(**fields),
+                "cwe_id":         cwe,
+                "recommendation": recommendation.format(**fields),
+                "confidence":     0.9,
+                "source":         "rule",
+            })
         return findings
 
     # ── Layer 2: Heuristic scan ────────────────────────────────────────────────
@@ -364,15 +477,22 @@ class SecurityAgent(BaseAgent):
         Run all heuristic checks. Returns (findings, scores_dict).
         Each heuristic returns a score in [0, 1]; threshold to emit a finding
         is documented per check. Multi-signal: severity elevates only when
-        score >= 0.8.
+        score >= 0.8.  Results are cached per source.
         """
-        findings: List[Dict] = []
-        scores: Dict[str, float] = {}
-
         if not code.strip():
-            return findings, scores
+            return [], {}
 
-        lines = code.splitlines()
+        parsed = parsed_source(code, self.context)
+        findings, scores = self.findings_cache.get_or_compute(
+            content_hash("heuristics", parsed.digest),
+            lambda: self._heuristics(parsed),
+        )
+        return [dict(f) for f in findings], dict(scores)
+
+    def _heuristics(self, parsed: ParsedSource) -> Tuple[Tuple[Dict, ...], Dict[str, float]]:
+        findings: List[Dict] = []
+        scores: Dict[str, float] = {}
+        code, lines = parsed.code_text, parsed.code_lines
 
         # H1: Taint flow — user input → buffer write without size check
         h1 = self._h_taint_flow(code)
@@ -476,7 +596,7 @@ class SecurityAgent(BaseAgent):
             })
 
         # H6: Recursive function with large local buffer
-        h6 = self._h_recursive_large_buffer(code)
+        h6 = self._h_recursive_large_buffer(parsed)
         scores["recursive_buffer"] = h6
         if h6 >= 0.6:
             findings.append({
@@ -516,7 +636,7 @@ class SecurityAgent(BaseAgent):
                 "source":         "heuristic",
             })
 
-        return findings, scores
+        return tuple(findings), scores
 
     # ── Heuristic implementations ──────────────────────────────────────────────
 
@@ -581,16 +701,19 @@ class SecurityAgent(BaseAgent):
                     return 0.8, ln
         return 0.0, None
 
-    def _h_recursive_large_buffer(self, code: str) -> float:
-        fn_re  = re.compile(r"\w+\s+(\w+)\s*\([^)]*\)\s*\{", re.MULTILINE)
-        buf_re = re.compile(r"char\s+\w+\s*\[(\d+)\]")
-        for fn_m in fn_re.finditer(code):
-            fn_name = fn_m.group(1)
-            body = code[fn_m.start(): fn_m.start() + 1000]
-            if re.search(rf"\b{re.escape(fn_name)}\s*\(", code[fn_m.end(): fn_m.end() + 500]):
-                for buf_m in buf_re.finditer(body):
-                    if int(buf_m.group(1)) >= 1024:
-                        return 0.75
+    def _h_recursive_large_buffer(self, parsed: ParsedSource) -> float:
+        # function bodies come from the parser's scope tree (brace-matched)
+        texts, kinds = parsed.tokens.texts, parsed.tokens.kinds
+        for fn in parsed.scopes.of_kind("function"):
+            calls = [j for j in range(fn.start, fn.end)
+                     if texts[j] == fn.name and texts[j + 1] == "("]
+            if len(calls) < 2:                  # the first one is the definition
+                continue
+            for j in range(fn.start, fn.end - 3):
+                if (texts[j] == "char" and kinds[j + 1] == IDENT and texts[j + 2] == "["
+                        and kinds[j + 3] == NUMBER and texts[j + 3].isdigit()
+                        and int(texts[j + 3]) >= 1024):
+                    return 0.75
         return 0.0
 
     def _h_global_thread_write(self, code: str) -> float:
@@ -616,13 +739,7 @@ class SecurityAgent(BaseAgent):
 
     # ── Layer 3: LLM scan ─────────────────────────────────────────────────────
 
-    def _llm_scan(self, optimized_code: str, original_code: str,
-                  baseline_types: List[str]
-                  ) -> Tuple[List[Dict], List[str], str, float]:
-        prompt = SecurityPromptTemplate.build(
-            optimized_code, original_code, baseline_types
-        )
-        raw = self.llm.generate(prompt, system_prompt=SecurityPromptTemplate.SYSTEM)
+    def _llm_scan(self, raw: str) -> Tuple[List[Dict], List[str], str, float]:
         cot = self.cot_val.validate(raw)
         if cot.is_valid:
             for f in cot.findings:
@@ -643,83 +760,13 @@ class SecurityAgent(BaseAgent):
     # ── Layer 4: cppcheck ─────────────────────────────────────────────────────
 
     def _cppcheck_scan(self, code: str, file_path: str) -> List[Dict]:
-        """Write code to a temp file, run cppcheck --xml, parse XML output."""
-        import tempfile
-        findings: List[Dict] = []
-        tmp_path: Optional[str] = None
-        try:
-            suffix = ".cpp" if str(file_path).endswith(".cpp") else ".c"
-            with tempfile.NamedTemporaryFile(
-                mode="w", suffix=suffix, delete=False, encoding="utf-8"
-            ) as tmp:
-                tmp.write(code)
-                tmp_path = tmp.name
-
-            result = subprocess.run(
-                [
-                    "cppcheck",
-                    "--xml", "--xml-version=2",
-                    "--enable=warning,error",
-                    "--quiet",
-                    tmp_path,
-                ],
-                capture_output=True,
-                text=True,
-                timeout=30,
-            )
-            if result.stderr.strip():
-                findings = self._parse_cppcheck_xml(result.stderr)
-
-        except subprocess.TimeoutExpired:
-            logger.warning("SecurityAgent: cppcheck timed out (30 s)")
-        except FileNotFoundError:
-            logger.warning("SecurityAgent: cppcheck binary not found")
-        except Exception as exc:
-            logger.warning(f"SecurityAgent: cppcheck error — {exc}")
-        finally:
-            if tmp_path:
-                try:
-                    os.unlink(tmp_path)
-                except OSError:
-                    pass
-
-        return findings
-
-    def _parse_cppcheck_xml(self, xml_text: str) -> List[Dict]:
-        findings: List[Dict] = []
-        _sev_map = {
-            "error": "high", "warning": "medium",
-            "style": "low", "performance": "low",
-            "portability": "low", "information": "low",
-        }
-        try:
-            root = ET.fromstring(xml_text)
-            for error in root.iter("error"):
-                raw_sev  = error.get("severity", "warning")
-                severity = _sev_map.get(raw_sev, "low")
-                cwe      = error.get("cwe")
-                msg      = error.get("msg", "cppcheck finding")
-                eid      = error.get("id", "unknown")
-                ln: Optional[int] = None
-                loc = error.find("location")
-                if loc is not None:
-                    try:
-                        ln = int(loc.get("line", 0)) or None
-                    except (ValueError, TypeError):
-                        ln = None
-                findings.append({
-                    "type":           f"cppcheck_{eid}",
-                    "severity":       severity,
-                    "line":           ln,
-                    "description":    msg,
-                    "cwe_id":         f"CWE-{cwe}" if cwe else None,
-                    "recommendation": "Review and fix per cppcheck guidance.",
-                    "confidence":     0.85,
-                    "source":         "cppcheck",
-                })
-        except ET.ParseError as exc:
-            logger.warning(f"SecurityAgent: cppcheck XML parse error — {exc}")
-        return findings
+        """
+        cppcheck findings for code via the shared CppcheckRunner: cached by
+        content hash (memory and .cache/cppcheck/), so an unchanged source,
+        e.g. one prefetched by a batch run, never re-invokes the tool.
+        """
+        findings = self.cppcheck.scan(code, suffix_for(file_path))
+        return findings if findings is not None else []
 
     # ── New vulnerability comparison ───────────────────────────────────────────
 
@@ -777,11 +824,20 @@ class SecurityAgent(BaseAgent):
 
     @staticmethod
     def _check_cppcheck() -> bool:
-        try:
-            subprocess.run(
-                ["cppcheck", "--version"],
-                capture_output=True, timeout=5,
-            )
-            return True
-        except (FileNotFoundError, subprocess.TimeoutExpired):
-            return False
+        # discovered once per process, not per agent (app.py builds one per request)
+        return cppcheck_available()
+
+
+# ── Shared layer pool ─────────────────────────────────────────────────────────
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _layer_pool() -> ThreadPoolExecutor:
+    """Threads for slow layers (cppcheck) in concurrent mode, shared by all agents."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="security-layer")
+        return _pool
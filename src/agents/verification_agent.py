@@ -8,11 +8,19 @@ Orchestrates multi-layer verification of optimized C++ code:
   Layer 4: LLM Reasoning        (VerificationPromptTemplate)
 
 If any layer fails, the agent triggers a context rollback.
+
+With concurrent=True, Layers 1–3 overlap: all four g++ builds and the Z3
+check run at once on a thread pool, the two differential-test binaries run
+side by side, and the benchmark runs (interleaved original/optimized) start
+once everything else has finished so they time an otherwise idle machine.
 """
 
+import asyncio
 import logging
 import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional
 
@@ -21,8 +29,10 @@ if _root not in sys.path:
     sys.path.insert(0, _root)
 
 from agent_framework import BaseAgent, ContextManager
+from src.llm.async_client import AsyncLLMClient
 from src.llm.llm_client import LLMClient
 from src.llm.prompt_templates import VerificationPromptTemplate
+from src.llm.scheduler import submit_llm
 from src.reasoning.cot_validator import CoTValidator
 from src.verification.diff_tester import DifferentialTester, DiffTestResult
 from src.verification.z3_verifier import Z3Verifier, Z3Result
@@ -67,8 +77,12 @@ class VerificationAgent(BaseAgent):
         agent_id: str,
         context_manager: ContextManager,
         llm_client: LLMClient = None,
+        concurrent: bool = False,
+        max_workers: int = 4,
     ):
         super().__init__(agent_id, "verification", context_manager)
+        self.concurrent  = concurrent
+        self.max_workers = max_workers
         self.llm      = llm_client or LLMClient()
         self.cot_val  = CoTValidator()
         self.diff_tester = DifferentialTester()
@@ -87,6 +101,79 @@ class VerificationAgent(BaseAgent):
         ]
 
     def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        original, optimized, file_path = self._inputs(input_data)
+        if not original or not optimized:
+            return {"status": "FAIL", "error": "Missing original or optimized code."}
+
+        if self.concurrent:
+            logger.info("VerificationAgent [Layers 1–3]: running concurrently …")
+            diff_result, z3_result, perf_result = self._run_layers_concurrent(
+                original, optimized
+            )
+        else:
+            logger.info("VerificationAgent [Layer 1/4]: Differential Testing …")
+            diff_result = self.diff_tester.test(original, optimized)
+            logger.info("VerificationAgent [Layer 2/4]: Z3 SMT Verification …")
+            z3_result = self.z3.verify(original, optimized)
+            logger.info("VerificationAgent [Layer 3/4]: Performance Benchmark …")
+            perf_result = self.perf.benchmark(original, optimized)
+        self._log_layers(diff_result, z3_result, perf_result)
+
+        logger.info("VerificationAgent [Layer 4/4]: LLM Reasoning …")
+        raw = submit_llm(
+            self.llm, self._llm_prompt(original, optimized, diff_result),
+            system_prompt=VerificationPromptTemplate.SYSTEM, priority="verification",
+        ).result()
+        return self._finish(file_path, diff_result, z3_result, perf_result, raw)
+
+    async def aprocess(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        process() for asyncio pipelines.  The differential test runs as async
+        subprocesses alongside Z3 (on a worker thread); the benchmark follows
+        once both are done so it times an otherwise idle machine.
+        """
+        original, optimized, file_path = self._inputs(input_data)
+        if not original or not optimized:
+            return {"status": "FAIL", "error": "Missing original or optimized code."}
+
+        if self.concurrent:
+            logger.info("VerificationAgent [Layers 1–3]: running concurrently …")
+            diff_result, z3_result, perf_result = await asyncio.to_thread(
+                self._run_layers_concurrent, original, optimized
+            )
+        else:
+            logger.info("VerificationAgent [Layers 1–2]: Differential Testing + Z3 …")
+            diff_result, z3_result = await asyncio.gather(
+                self.diff_tester.atest(original, optimized),
+                asyncio.to_thread(self.z3.verify, original, optimized),
+            )
+            logger.info("VerificationAgent [Layer 3/4]: Performance Benchmark …")
+            perf_result = await asyncio.to_thread(self.perf.benchmark, original, optimized)
+        self._log_layers(diff_result, z3_result, perf_result)
+
+        logger.info("VerificationAgent [Layer 4/4]: LLM Reasoning …")
+        raw = await AsyncLLMClient(self.llm).generate(
+            self._llm_prompt(original, optimized, diff_result),
+            system_prompt=VerificationPromptTemplate.SYSTEM, priority="verification",
+        )
+        return self._finish(file_path, diff_result, z3_result, perf_result, raw)
+
+    async def aprepare(self, original: str) -> None:
+        """
+        Original-side work that does not need the optimized code: build the
+        original's differential-test and timing-harness binaries into the
+        compile cache, so aprocess() only compiles the optimized side.
+        """
+        if not original.strip():
+            return
+        await asyncio.gather(
+            self.diff_tester.aprebuild(original),
+            asyncio.to_thread(self.perf.prebuild, original),
+        )
+
+    # ── Processing steps ──────────────────────────────────────────────────────
+
+    def _inputs(self, input_data: Dict[str, Any]):
         original  = input_data.get("original_code")  or \
                     self.context.get("original_code") or ""
         optimized = input_data.get("optimized_code")
@@ -94,38 +181,23 @@ class VerificationAgent(BaseAgent):
             opt_report = self.context.get("optimization_suggestions") or {}
             optimized  = opt_report.get("optimized_code", original)
         file_path = input_data.get("file_path", self.context.get("source_file", "<unknown>"))
+        return original, optimized, file_path
 
-        if not original or not optimized:
-            return {"status": "FAIL", "error": "Missing original or optimized code."}
-
-        # ── Layer 1: Differential Testing ─────────────────────────────────────
-        logger.info("VerificationAgent [Layer 1/4]: Differential Testing …")
-        diff_result = self.diff_tester.test(original, optimized)
+    @staticmethod
+    def _log_layers(diff_result, z3_result, perf_result) -> None:
         _dt_status = "PASS" if diff_result.passed else f"FAIL ({diff_result.error or 'outputs differ'})"
         logger.info(f"VerificationAgent [Layer 1/4]: Differential Test → {_dt_status}")
         if diff_result.error:
             logger.debug(f"  diff error detail: {diff_result.error}")
-
-        # ── Layer 2: Z3 Verification ───────────────────────────────────────────
-        logger.info("VerificationAgent [Layer 2/4]: Z3 SMT Verification …")
-        z3_result = self.z3.verify(original, optimized)
         logger.info(f"VerificationAgent [Layer 2/4]: Z3 → {z3_result.status}")
         if z3_result.explanation:
             logger.debug(f"  Z3 detail: {z3_result.explanation}")
-
-        # ── Layer 3: Performance Benchmark ────────────────────────────────────
-        logger.info("VerificationAgent [Layer 3/4]: Performance Benchmark …")
-        perf_result = self.perf.benchmark(original, optimized)
         logger.info(f"VerificationAgent [Layer 3/4]: Perf → {perf_result.summary()}")
 
-        # ── Layer 4: LLM Reasoning ─────────────────────────────────────────────
-        logger.info("VerificationAgent [Layer 4/4]: LLM Reasoning …")
-        # pass True (neutral) when the diff test was skipped so the LLM prompt
-        # doesn't say "test FAILED" for a test that was never run
-        _diff_passed_for_llm = True if diff_result.skipped else diff_result.passed
-        llm_verdict, reasoning_steps = self._llm_verify(
-            original, optimized, _diff_passed_for_llm
-        )
+    def _finish(self, file_path, diff_result, z3_result, perf_result,
+                raw: str) -> Dict[str, Any]:
+        """Combine all four layers into the report; roll back on failure."""
+        llm_verdict, reasoning_steps = self._llm_verify(raw)
         logger.info(f"VerificationAgent [Layer 4/4]: LLM verdict → {llm_verdict}")
 
         # ── Decide overall status ──────────────────────────────────────────────
@@ -177,11 +249,42 @@ class VerificationAgent(BaseAgent):
         logger.info(f"Verification complete: {status}")
         return result_dict
 
+    # ── Concurrent layers ─────────────────────────────────────────────────────
+
+    def _run_layers_concurrent(self, original: str, optimized: str):
+        """
+        Run Layers 1–3 together; return (diff_result, z3_result, perf_result).
+
+        Builds and Z3 share one pool.  The two layer drivers get their own
+        small pool so they never occupy a worker their own compiles need.
+        """
+        quiet = threading.Event()    # set once diff + Z3 are off the CPU
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix="verify") as pool, \
+             ThreadPoolExecutor(max_workers=2,
+                                thread_name_prefix="verify-layer") as layers:
+            z3_future   = pool.submit(self.z3.verify, original, optimized)
+            diff_future = layers.submit(self.diff_tester.test, original, optimized, pool)
+            perf_future = layers.submit(self.perf.benchmark, original, optimized,
+                                        pool, quiet)
+            try:
+                diff_result = diff_future.result()
+                z3_result   = z3_future.result()
+            finally:
+                quiet.set()
+            perf_result = perf_future.result()
+        return diff_result, z3_result, perf_result
+
     # ── LLM verification ──────────────────────────────────────────────────────
 
-    def _llm_verify(self, orig, opt, diff_passed):
-        prompt = VerificationPromptTemplate.build(orig, opt, diff_passed)
-        raw    = self.llm.generate(prompt, system_prompt=VerificationPromptTemplate.SYSTEM)
+    @staticmethod
+    def _llm_prompt(orig, opt, diff_result) -> str:
+        # pass True (neutral) when the diff test was skipped so the LLM prompt
+        # doesn't say "test FAILED" for a test that was never run
+        diff_passed = True if diff_result.skipped else diff_result.passed
+        return VerificationPromptTemplate.build(orig, opt, diff_passed)
+
+    def _llm_verify(self, raw):
         cot    = self.cot_val.validate(raw)
         if cot.is_valid:
             return cot.verdict or "UNCERTAIN", cot.reasoning_steps
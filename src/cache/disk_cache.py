@@ -0,0 +1,242 @@
+"""
+Disk Cache — content-addressed on-disk key/value store
+
+Values are pickled into one file per key under a cache directory (sharded
+by the first two hex digits of the key).  Whole files (e.g. compiled
+binaries) can be stored verbatim with set_file() / get_file().  Writes are
+atomic (temp file + os.replace), so several pipeline processes can share
+one directory.
+
+Eviction is least-recently-used: every hit refreshes the entry's mtime, and
+when the directory grows past max_bytes / max_entries the oldest entries
+are deleted until it is back under 90 % of the limit.
+
+Usage
+-----
+cache = DiskCache(".cache/pipeline", max_bytes=256 * 1024 * 1024)
+value = cache.get(key)
+if value is None:
+    value = expensive()
+    cache.set(key, value)
+"""
+
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+from typing import Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024     # 512 MB
+_SUFFIX      = ".pkl"      # pickled values
+_FILE_SUFFIX = ".bin"      # raw files stored with set_file()
+
+
+class DiskCache:
+    """
+    LRU/size-bounded store of pickled values and raw files, keyed by hex digests.
+
+    Any error reading or writing an entry is logged and treated as a miss —
+    the cache can never make a caller fail.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_entries: Optional[int] = None,
+    ):
+        self.directory   = directory
+        self.max_bytes   = max_bytes
+        self.max_entries = max_entries
+        self.hits        = 0
+        self.misses      = 0
+        self._lock       = threading.Lock()
+        self._size: Optional[Tuple[int, int]] = None   # (bytes, entries), lazy
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    def get(self, key: str, default: Any = None, touch: bool = True) -> Any:
+        """
+        Return the cached value for key, or default on a miss.
+
+        With touch=False the directory is left exactly as it was: a hit does
+        not refresh the entry's LRU position and an unreadable entry is not
+        deleted (for read-only callers).
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as fh:
+                value = pickle.load(fh)
+        except FileNotFoundError:
+            self.misses += 1
+            return default
+        except Exception as exc:
+            if touch:
+                logger.warning(f"DiskCache: dropping unreadable entry {key[:12]}: {exc}")
+                self._remove(path)
+            self.misses += 1
+            return default
+        if touch:
+            try:
+                os.utime(path)      # LRU: a hit makes the entry most recent
+            except OSError:
+                pass
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store value under key, evicting old entries if over the limits."""
+        path = self._path(key)
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            replaced = _size_of(path)
+            os.replace(tmp, path)
+        except Exception as exc:
+            logger.warning(f"DiskCache: could not store {key[:12]}: {exc}")
+            return
+        self._account(len(data), replaced)
+
+    def get_file(self, key: str) -> Optional[str]:
+        """Path of the raw file stored under key, or None on a miss."""
+        path = self._path(key, _FILE_SUFFIX)
+        try:
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def set_file(self, key: str, src_path: str) -> Optional[str]:
+        """Copy src_path into the cache under key; return the stored path."""
+        path = self._path(key, _FILE_SUFFIX)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            os.close(fd)
+            shutil.copy2(src_path, tmp)            # keeps the executable bit
+            replaced = _size_of(path)
+            os.replace(tmp, path)
+            size = os.path.getsize(path)
+        except Exception as exc:
+            logger.warning(f"DiskCache: could not store file {key[:12]}: {exc}")
+            return None
+        self._account(size, replaced)
+        return path
+
+    def __contains__(self, key: str) -> bool:
+        return any(os.path.isfile(self._path(key, sfx))
+                   for sfx in (_SUFFIX, _FILE_SUFFIX))
+
+    def delete(self, key: str) -> None:
+        self._remove(self._path(key))
+        self._remove(self._path(key, _FILE_SUFFIX))
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        for path, _, _ in self._entries():
+            self._remove(path)
+        with self._lock:
+            self._size = (0, 0)
+
+    def stats(self) -> dict:
+        nbytes, entries = self._measure()
+        return {
+            "directory": self.directory,
+            "entries":   entries,
+            "bytes":     nbytes,
+            "hits":      self.hits,
+            "misses":    self.misses,
+        }
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    def _path(self, key: str, suffix: str = _SUFFIX) -> str:
+        return os.path.join(self.directory, key[:2], key + suffix)
+
+    def _account(self, nbytes: int, replaced: Optional[int] = None) -> None:
+        """
+        Track the size of a stored entry and evict if over the limits.
+
+        replaced is the size of the file it overwrote (None for a new key):
+        an overwrite changes the byte total by the difference and leaves the
+        entry count alone.
+        """
+        with self._lock:
+            if self._size is None:
+                self._size = self._measure()
+            elif replaced is None:
+                self._size = (self._size[0] + nbytes, self._size[1] + 1)
+            else:
+                self._size = (self._size[0] + nbytes - replaced, self._size[1])
+            if self._over_limit(*self._size):
+                self._evict()
+
+    def _entries(self) -> List[Tuple[str, float, int]]:
+        """(path, mtime, size) for every entry currently on disk."""
+        out = []
+        if not os.path.isdir(self.directory):
+            return out
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.name.endswith((_SUFFIX, _FILE_SUFFIX)):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                out.append((entry.path, st.st_mtime, st.st_size))
+        return out
+
+    def _measure(self) -> Tuple[int, int]:
+        entries = self._entries()
+        return sum(e[2] for e in entries), len(entries)
+
+    def _over_limit(self, nbytes: int, entries: int) -> bool:
+        if self.max_bytes is not None and nbytes > self.max_bytes:
+            return True
+        return self.max_entries is not None and entries > self.max_entries
+
+    def _evict(self) -> None:
+        """Delete least-recently-used entries until under 90 % of the limits."""
+        entries = sorted(self._entries(), key=lambda e: e[1])
+        nbytes  = sum(e[2] for e in entries)
+        count   = len(entries)
+        byte_goal  = None if self.max_bytes is None else int(self.max_bytes * 0.9)
+        count_goal = None if self.max_entries is None else int(self.max_entries * 0.9)
+        removed = 0
+        for path, _, size in entries:
+            if (byte_goal is None or nbytes <= byte_goal) and \
+               (count_goal is None or count <= count_goal):
+                break
+            self._remove(path)
+            nbytes -= size
+            count  -= 1
+            removed += 1
+        self._size = (nbytes, count)
+        logger.debug(f"DiskCache: evicted {removed} entr(y/ies) from {self.directory}")
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _size_of(path: str) -> Optional[int]:
+    """Size of the file at path, or None if there is none."""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
@@ -0,0 +1,67 @@
+"""
+Cache Keys — stable SHA-256 fingerprints for cache entries
+
+content_hash() hashes any mix of strings / JSON-able values into a hex
+digest.  tool_version() and llm_fingerprint() describe the environment a
+result was produced in, so upgrading g++ or switching model changes the key
+instead of serving a stale entry.
+"""
+
+import functools
+import hashlib
+import json
+import shutil
+import subprocess
+from typing import Any
+
+
+def content_hash(*parts: Any) -> str:
+    """SHA-256 over parts; dicts/lists are serialised with sorted keys."""
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, bytes):
+            data = part
+        elif isinstance(part, str):
+            data = part.encode("utf-8")
+        else:
+            data = json.dumps(part, sort_keys=True, default=str).encode("utf-8")
+        # length prefix keeps ("ab", "c") and ("a", "bc") apart
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+    return h.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def tool_version(binary: str) -> str:
+    """First line of `binary --version`, or "missing" if it is not installed."""
+    if shutil.which(binary) is None:
+        return "missing"
+    try:
+        proc = subprocess.run(
+            [binary, "--version"], capture_output=True, text=True, timeout=5
+        )
+        lines = (proc.stdout or proc.stderr).strip().splitlines()
+        return lines[0] if lines else "unknown"
+    except Exception:
+        return "unknown"
+
+
+@functools.lru_cache(maxsize=None)
+def z3_version() -> str:
+    try:
+        import z3  # type: ignore
+        return z3.get_version_string()
+    except ImportError:
+        return "missing"
+
+
+def llm_fingerprint(llm: Any) -> str:
+    """
+    Identify what an LLM client would answer with.
+
+    An unavailable client always returns the deterministic offline stub, so
+    every offline client shares one fingerprint regardless of backend.
+    """
+    if llm is None or not getattr(llm, "_available", False):
+        return "offline-stub"
+    return f"{type(llm).__name__}:{getattr(llm, 'model', '?')}"
@@ -0,0 +1,72 @@
+"""
+Async LLM Client
+
+asyncio front end for an existing LLMClient / GeminiLLMClient, used by the
+agents' aprocess() and CompilerOptimizationPipeline.arun().  The wrapped
+sync client still owns the configuration, the availability probe, the
+response cache and the offline stub, so both APIs behave identically.
+
+Every request goes through the shared LLMScheduler and its Future is
+awaited, so priorities, coalescing of identical prompts and the
+process-wide in-flight window (OLLAMA_NUM_PARALLEL) hold for async callers
+exactly as for threaded ones — across every event loop in the process,
+including the fresh loop run_sync() makes per run.  At most max_in_flight
+worker threads block on HTTP, however many coroutines wait.
+
+Usage
+-----
+allm = AsyncLLMClient(make_llm_client("ollama"))
+raw  = await allm.generate(prompt, system_prompt=SYSTEM, priority="analysis")
+
+pending = allm.submit(prompt, system_prompt=SYSTEM)    # starts immediately
+...                                                    # other work
+raw = await pending
+"""
+
+import asyncio
+from typing import Callable, Optional, Union
+
+from src.llm.llm_client import LLMClient
+from src.llm.scheduler import DEFAULT_PRIORITY, submit_llm
+
+
+class AsyncLLMClient:
+    """Awaitable generate() over a sync LLM client."""
+
+    def __init__(self, llm: Optional[LLMClient] = None):
+        self.llm = llm or LLMClient()
+
+    async def generate(
+        self,
+        prompt: str,
+        system_prompt: str = "",
+        max_tokens: int = 2048,
+        temperature: float = 0.1,
+        priority: Union[str, int] = DEFAULT_PRIORITY,
+        on_reasoning_step: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """Same contract as LLMClient.generate(): never raises, stub on failure."""
+        return await self.submit(prompt, system_prompt, max_tokens, temperature,
+                                 priority, on_reasoning_step)
+
+    def submit(
+        self,
+        prompt: str,
+        system_prompt: str = "",
+        max_tokens: int = 2048,
+        temperature: float = 0.1,
+        priority: Union[str, int] = DEFAULT_PRIORITY,
+        on_reasoning_step: Optional[Callable[[str], None]] = None,
+    ) -> "asyncio.Future[str]":
+        """
+        Start the request now and return an awaitable for its text, so the
+        caller can do other work while the model generates.
+        """
+        kwargs = {}
+        if (max_tokens, temperature) != (2048, 0.1):
+            kwargs.update(max_tokens=max_tokens, temperature=temperature)
+        if on_reasoning_step is not None:
+            kwargs["on_reasoning_step"] = on_reasoning_step
+        return asyncio.wrap_future(
+            submit_llm(self.llm, prompt, system_prompt, priority, **kwargs)
+        )
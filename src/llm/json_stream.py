@@ -0,0 +1,156 @@
+"""
+Incremental JSON scanner for streamed LLM output
+
+Fed one chunk at a time, JSONStreamScanner tracks just enough JSON syntax
+(object/array nesting, strings and escapes) to tell:
+  • where the first top-level JSON object closes — so generation can be cut
+    off before the rambling tail the 7B model tends to append;
+  • each element of the top-level "reasoning_steps" array as soon as its
+    closing quote arrives — so a UI can show the CoT while it is written.
+
+Anything before the object (prose, a ```json fence) is ignored, including
+braces that do not start one: a '{' counts only if the next non-blank
+character is '"' (the model's object is never empty), and a candidate that closes but does not parse
+with json.loads is dropped and scanning resumes after it.  So a code
+snippet or "{...}" in the preamble never ends the stream early.  The
+scanner never builds the full parse tree; CoTValidator still does the real
+parsing once the text is complete.
+
+Usage
+-----
+scanner = JSONStreamScanner(on_reasoning_step=print)
+for chunk in chunks:
+    end = scanner.feed(chunk)
+    if end is not None:        # object closed at chunk[:end]
+        break
+"""
+
+import json
+import logging
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STEPS_KEY = "reasoning_steps"
+
+
+class JSONStreamScanner:
+    """Character-level scanner for the first top-level JSON object in a stream."""
+
+    def __init__(self, on_reasoning_step: Optional[Callable[[str], None]] = None):
+        self.on_reasoning_step = on_reasoning_step
+        self.reasoning_steps: List[str] = []
+        self.complete = False
+        self._stack: List[str] = []        # open containers: "{" or "["
+        self._in_string = False
+        self._escape    = False
+        self._string: List[str] = []       # raw chars of the current string
+        self._expect_key = False           # next string in the object is a key
+        self._last_key: Optional[str] = None
+        self._top_key:  Optional[str] = None   # key currently open at depth 1
+        self._text: List[str] = []         # the candidate object so far
+        self._opening = False              # top-level '{' just seen, no content yet
+
+    def feed(self, chunk: str) -> Optional[int]:
+        """
+        Consume chunk.  Return the offset just past the closing brace of the
+        top-level object if it closed inside this chunk, else None.
+        """
+        if self.complete:
+            return 0
+        for i, ch in enumerate(chunk):
+            if self._stack:
+                self._text.append(ch)
+            if self._in_string:
+                self._string_char(ch)
+                continue
+            if not self._stack:
+                if ch == "{":
+                    self._open("{")
+                    self._text = ["{"]
+                    self._opening = True
+                continue
+            if self._opening:
+                if ch.isspace():
+                    continue
+                self._opening = False
+                if ch != '"':
+                    self._reset()          # "{ x++; }", "{}": not the model's object
+                    continue
+            if ch == '"':
+                self._in_string = True
+                self._string = []
+            elif ch in "{[":
+                self._open(ch)
+            elif ch in "}]":
+                self._stack.pop()
+                if len(self._stack) == 1:
+                    self._top_key = None
+                if not self._stack:
+                    if self._is_json("".join(self._text)):
+                        self.complete = True
+                        return i + 1
+                    self._reset()
+            elif ch == ":":
+                self._expect_key = False
+                if len(self._stack) == 1:
+                    self._top_key = self._last_key
+            elif ch == ",":
+                if self._stack[-1] == "{":
+                    self._expect_key = True
+                    if len(self._stack) == 1:
+                        self._top_key = None
+        return None
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    def _reset(self) -> None:
+        """Abandon the current candidate and look for the next object."""
+        self._stack = []
+        self._text = []
+        self._opening = False
+        self._expect_key = False
+        self._last_key = None
+        self._top_key = None
+
+    @staticmethod
+    def _is_json(text: str) -> bool:
+        try:
+            json.loads(text)
+        except json.JSONDecodeError:
+            logger.debug("JSONStreamScanner: skipping a brace group that is not JSON")
+            return False
+        return True
+
+    def _open(self, ch: str) -> None:
+        self._stack.append(ch)
+        self._expect_key = ch == "{"
+
+    def _string_char(self, ch: str) -> None:
+        if self._escape:
+            self._escape = False
+            self._string.append(ch)
+        elif ch == "\\":
+            self._escape = True
+            self._string.append(ch)
+        elif ch == '"':
+            self._in_string = False
+            self._end_string("".join(self._string))
+        else:
+            self._string.append(ch)
+
+    def _end_string(self, raw: str) -> None:
+        try:
+            value = json.loads('"' + raw + '"')
+        except json.JSONDecodeError:
+            value = raw
+        if self._stack[-1] == "{" and self._expect_key:
+            self._last_key = value
+        elif (len(self._stack) == 2 and self._stack[-1] == "["
+              and self._top_key == STEPS_KEY):
+            self.reasoning_steps.append(value)
+            if self.on_reasoning_step is not None:
+                try:
+                    self.on_reasoning_step(value)
+                except Exception as exc:
+                    logger.debug(f"on_reasoning_step callback failed: {exc}")
@@ -10,14 +10,31 @@ Two backends are provided:
       Uses the Google Gemini API (requires `pip install google-generativeai` and
       GEMINI_API_KEY set in the environment).
 
-Use make_llm_client(backend) to get the right instance.
+Use make_llm_client(backend) to get a fresh instance, or get_llm_client(backend)
+for the process-wide shared one.
+
+All Ollama clients talking to the same base URL share one pooled keep-alive
+HTTP session and one cached health state (re-probed after HEALTH_TTL
+seconds), so constructing a client is cheap and never blocks on the network
+more than once per TTL.
+
+Completions are streamed.  generate() stops reading — which makes Ollama
+stop generating — as soon as the first top-level JSON object closes, and
+reports each CoT reasoning step to on_reasoning_step as it arrives.
+generate_stream() exposes the raw token stream.
+
+Pass response_cache=ResponseCache() (src.llm.response_cache) to reuse
+completions of identical prompts across runs.
 """
 
 import json
 import logging
 import os
+import threading
 import time
-from typing import Optional, Dict, Any
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from src.llm.json_stream import JSONStreamScanner
 
 # Load .env from project root (silently skipped if python-dotenv not installed)
 try:
@@ -31,6 +48,8 @@ logger = logging.getLogger(__name__)
 # ── Ollama configuration ────────────────────────────────────────────────────
 OLLAMA_BASE_URL = "http://localhost:11434"
 DEFAULT_MODEL   = "qwen2.5-coder:7b"
+HEALTH_TTL      = 30.0      # seconds a health probe result is trusted
+POOL_MAXSIZE    = 16        # keep-alive connections per base URL
 
 
 def _try_import_requests():
@@ -41,6 +60,41 @@ def _try_import_requests():
         return None
 
 
+# ── Shared per-base-URL state ────────────────────────────────────────────────
+
+_shared_lock = threading.Lock()
+_sessions: Dict[str, Any] = {}                      # base_url -> requests.Session
+_health:   Dict[str, Tuple[bool, float]] = {}       # base_url -> (available, checked_at)
+
+
+def _get_session(requests_mod, base_url: str):
+    """Pooled keep-alive session shared by every client of base_url."""
+    with _shared_lock:
+        session = _sessions.get(base_url)
+        if session is None:
+            session = requests_mod.Session()
+            adapter = requests_mod.adapters.HTTPAdapter(
+                pool_connections=1, pool_maxsize=POOL_MAXSIZE,
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[base_url] = session
+        return session
+
+
+def reset_shared_state() -> None:
+    """Close pooled sessions and forget cached health / shared clients."""
+    with _shared_lock:
+        for session in _sessions.values():
+            try:
+                session.close()
+            except Exception:
+                pass
+        _sessions.clear()
+        _health.clear()
+        _clients.clear()
+
+
 class LLMClient:
     """
     Client for Qwen 2.5 Coder 7B via Ollama.
@@ -49,21 +103,33 @@ class LLMClient:
     -----
     client = LLMClient()
     response = client.generate("Explain this code: ...")
+
+    for chunk in client.generate_stream("Explain this code: ..."):
+        print(chunk, end="")
     """
 
+    BACKEND = "ollama"
+    response_cache = None     # optional ResponseCache, set per instance
+
     def __init__(
         self,
         model: str = DEFAULT_MODEL,
         base_url: str = OLLAMA_BASE_URL,
         timeout: int = 360,
         max_retries: int = 2,
+        response_cache=None,
     ):
         self.model      = model
         self.base_url   = base_url.rstrip("/")
         self.timeout    = timeout
         self.max_retries = max_retries
         self._requests  = _try_import_requests()
+        self._session   = (_get_session(self._requests, self.base_url)
+                           if self._requests is not None else None)
         self._available = self._check_ollama()
+        self.response_cache = response_cache
+        # Called with each CoT reasoning step while a completion streams in
+        self.on_reasoning_step: Optional[Callable[[str], None]] = None
 
     # ── Public API ────────────────────────────────────────────────────────────
 
@@ -73,39 +139,44 @@ class LLMClient:
         system_prompt: str = "",
         max_tokens: int = 2048,
         temperature: float = 0.1,
+        on_reasoning_step: Optional[Callable[[str], None]] = None,
     ) -> str:
         """
         Generate a completion.
 
-        Returns the raw text response.  On any failure the stub is returned so
-        callers always receive a parseable string.
+        Returns the raw text response, truncated just after the first
+        complete top-level JSON object if one appears.  On any failure the
+        stub is returned so callers always receive a parseable string.
         """
         if not self._available:
             logger.warning("Ollama not available – returning stub response")
             return self._stub_response(prompt)
 
-        payload: Dict[str, Any] = {
-            "model":  self.model,
-            "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": temperature,
-                "num_predict": max_tokens,
-            },
-        }
-        if system_prompt:
-            payload["system"] = system_prompt
+        key, cached = self._cache_lookup(prompt, system_prompt, max_tokens, temperature)
+        if cached is not None:
+            return self._collect(iter([cached]), on_reasoning_step)
+
+        # A retry streams the reasoning steps again from the start; only
+        # pass on those beyond what an earlier attempt already delivered.
+        callback = on_reasoning_step or self.on_reasoning_step
+        delivered = seen = 0
+
+        def step_once(step: str) -> None:
+            nonlocal delivered, seen
+            seen += 1
+            if seen > delivered:
+                delivered = seen
+                callback(step)
 
         for attempt in range(1, self.max_retries + 2):
+            seen = 0
             try:
-                resp = self._requests.post(
-                    f"{self.base_url}/api/generate",
-                    json=payload,
-                    timeout=self.timeout,
+                text = self._collect(
+                    self._stream(prompt, system_prompt, max_tokens, temperature),
+                    step_once if callback else None,
                 )
-                resp.raise_for_status()
-                data = resp.json()
-                return data.get("response", "")
+                self._cache_store(key, text)
+                return text
             except Exception as exc:
                 logger.warning(f"LLM attempt {attempt} failed: {exc}")
                 if attempt <= self.max_retries:
@@ -114,13 +185,31 @@ class LLMClient:
         logger.error("All LLM attempts failed – returning stub response")
         return self._stub_response(prompt)
 
+    def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: str = "",
+        max_tokens: int = 2048,
+        temperature: float = 0.1,
+    ) -> Iterator[str]:
+        """
+        Yield completion text chunks as they arrive.
+
+        Closing the generator early closes the connection, which aborts the
+        generation server-side.  Yields the stub in one piece when offline.
+        """
+        if not self._available:
+            yield self._stub_response(prompt)
+            return
+        yield from self._stream(prompt, system_prompt, max_tokens, temperature)
+
     def is_available(self) -> bool:
         """Return True if Ollama is reachable."""
         return self._available
 
     def health_check(self) -> Dict[str, Any]:
-        """Return a dict describing connectivity status."""
-        available = self._check_ollama()
+        """Return a dict describing connectivity status (always re-probes)."""
+        available = self._check_ollama(force=True)
         self._available = available
         return {
             "available":  available,
@@ -130,15 +219,92 @@ class LLMClient:
 
     # ── Internals ─────────────────────────────────────────────────────────────
 
-    def _check_ollama(self) -> bool:
+    def _cache_lookup(self, prompt, system_prompt, max_tokens, temperature):
+        """Return (key, cached_text); both None when no cache is attached."""
+        if self.response_cache is None:
+            return None, None
+        key = self.response_cache.key(
+            self.BACKEND, self.model, system_prompt, prompt, temperature, max_tokens
+        )
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            logger.info(f"LLM response cache hit ({self.BACKEND}/{self.model})")
+        return key, cached
+
+    def _cache_store(self, key: Optional[str], text: str) -> None:
+        if key is not None and text:
+            self.response_cache.set(key, text)
+
+    def _payload(self, prompt, system_prompt, max_tokens, temperature) -> Dict[str, Any]:
+        """Request body for a streamed /api/generate call."""
+        payload: Dict[str, Any] = {
+            "model":  self.model,
+            "prompt": prompt,
+            "stream": True,
+            "options": {
+                "temperature": temperature,
+                "num_predict": max_tokens,
+            },
+        }
+        if system_prompt:
+            payload["system"] = system_prompt
+        return payload
+
+    def _stream(self, prompt, system_prompt, max_tokens, temperature) -> Iterator[str]:
+        """Raw Ollama token stream (newline-delimited JSON)."""
+        payload = self._payload(prompt, system_prompt, max_tokens, temperature)
+        with self._session.post(
+            f"{self.base_url}/api/generate",
+            json=payload,
+            timeout=self.timeout,
+            stream=True,
+        ) as resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                chunk = data.get("response", "")
+                if chunk:
+                    yield chunk
+                if data.get("done"):
+                    break
+
+    def _collect(self, chunks: Iterator[str],
+                 on_reasoning_step: Optional[Callable[[str], None]] = None) -> str:
+        """Join a chunk stream, stopping once the CoT JSON object has closed."""
+        scanner = JSONStreamScanner(on_reasoning_step or self.on_reasoning_step)
+        parts = []
+        try:
+            for chunk in chunks:
+                end = scanner.feed(chunk)
+                if end is not None:
+                    parts.append(chunk[:end])
+                    logger.debug("LLM stream: JSON object closed — stopping generation")
+                    break
+                parts.append(chunk)
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+        return "".join(parts)
+
+    def _check_ollama(self, force: bool = False) -> bool:
+        """Probe /api/tags, reusing a result younger than HEALTH_TTL unless forced."""
         if self._requests is None:
             logger.warning("'requests' not installed – Ollama unavailable")
             return False
+        now = time.monotonic()
+        cached = _health.get(self.base_url)
+        if not force and cached is not None and now - cached[1] < HEALTH_TTL:
+            return cached[0]
         try:
-            resp = self._requests.get(f"{self.base_url}/api/tags", timeout=3)
-            return resp.status_code == 200
+            resp = self._session.get(f"{self.base_url}/api/tags", timeout=3)
+            available = resp.status_code == 200
         except Exception:
-            return False
+            available = False
+        _health[self.base_url] = (available, now)
+        return available
 
     # ── Stub (offline / fallback) ─────────────────────────────────────────────
     # (shared by both OllamaLLMClient and ClaudeLLMClient via inheritance)
@@ -189,12 +355,17 @@ class GeminiLLMClient(LLMClient):
 
     DEFAULT_MODEL = "gemini-1.5-flash"
 
-    def __init__(self, model: str = DEFAULT_MODEL):
+    BACKEND       = "gemini"
+
+    def __init__(self, model: str = DEFAULT_MODEL, response_cache=None):
         # Do NOT call super().__init__() — we don't need Ollama at all.
         self.model      = model
+        self.response_cache = response_cache
         self._requests  = None   # unused; kept for _stub_response compat
+        self._session   = None
         self._genai     = None   # google.generativeai module reference
         self._available = self._check_gemini()
+        self.on_reasoning_step: Optional[Callable[[str], None]] = None
 
     # ── Public API ────────────────────────────────────────────────────────────
 
@@ -204,25 +375,21 @@ class GeminiLLMClient(LLMClient):
         system_prompt: str = "",
         max_tokens: int = 2048,
         temperature: float = 0.1,
+        on_reasoning_step: Optional[Callable[[str], None]] = None,
     ) -> str:
         if not self._available:
             logger.warning("Gemini API not available – returning stub response")
             return self._stub_response(prompt)
+        key, cached = self._cache_lookup(prompt, system_prompt, max_tokens, temperature)
+        if cached is not None:
+            return self._collect(iter([cached]), on_reasoning_step)
         try:
-            sys_inst = system_prompt or (
-                "You are an expert C/C++ compiler optimisation agent. "
-                "Respond only with structured JSON as instructed."
-            )
-            gemini_model = self._genai.GenerativeModel(
-                model_name=self.model,
-                system_instruction=sys_inst,
+            text = self._collect(
+                self._stream(prompt, system_prompt, max_tokens, temperature),
+                on_reasoning_step,
             )
-            gen_cfg = self._genai.types.GenerationConfig(
-                temperature=temperature,
-                max_output_tokens=max_tokens,
-            )
-            response = gemini_model.generate_content(prompt, generation_config=gen_cfg)
-            return response.text
+            self._cache_store(key, text)
+            return text
         except Exception as exc:
             logger.warning(f"Gemini API call failed: {exc}")
             return self._stub_response(prompt)
@@ -241,6 +408,26 @@ class GeminiLLMClient(LLMClient):
 
     # ── Internals ─────────────────────────────────────────────────────────────
 
+    def _stream(self, prompt, system_prompt, max_tokens, temperature) -> Iterator[str]:
+        sys_inst = system_prompt or (
+            "You are an expert C/C++ compiler optimisation agent. "
+            "Respond only with structured JSON as instructed."
+        )
+        gemini_model = self._genai.GenerativeModel(
+            model_name=self.model,
+            system_instruction=sys_inst,
+        )
+        gen_cfg = self._genai.types.GenerationConfig(
+            temperature=temperature,
+            max_output_tokens=max_tokens,
+        )
+        response = gemini_model.generate_content(
+            prompt, generation_config=gen_cfg, stream=True,
+        )
+        for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
     def _check_gemini(self) -> bool:
         try:
             import google.generativeai as genai  # type: ignore
@@ -266,7 +453,7 @@ class GeminiLLMClient(LLMClient):
 
 # ── Backend factory ───────────────────────────────────────────────────────────
 
-def make_llm_client(backend: str = "ollama") -> LLMClient:
+def make_llm_client(backend: str = "ollama", response_cache=None) -> LLMClient:
     """
     Return the appropriate LLM client for the requested backend.
 
@@ -275,6 +462,8 @@ def make_llm_client(backend: str = "ollama") -> LLMClient:
     backend : str
         "ollama"  — Qwen 2.5 Coder 7B via Ollama (default, offline-capable)
         "gemini"  — Google Gemini API (requires GEMINI_API_KEY)
+    response_cache : ResponseCache, optional
+        Disk cache of completions for identical prompts.
 
     Returns
     -------
@@ -282,6 +471,25 @@ def make_llm_client(backend: str = "ollama") -> LLMClient:
     """
     if backend == "gemini":
         logger.info("LLM backend: Google Gemini API (%s)", GeminiLLMClient.DEFAULT_MODEL)
-        return GeminiLLMClient()
+        return GeminiLLMClient(response_cache=response_cache)
     logger.info("LLM backend: Ollama / Qwen 2.5 Coder (%s)", DEFAULT_MODEL)
-    return LLMClient()
+    return LLMClient(response_cache=response_cache)
+
+
+_clients: Dict[str, LLMClient] = {}                 # backend -> shared client
+
+
+def get_llm_client(backend: str = "ollama") -> LLMClient:
+    """
+    Return the process-wide shared client for backend, creating it once.
+
+    Callers that need to flip _available (e.g. --no-llm) must use
+    make_llm_client() instead so they do not affect everyone else.
+    """
+    with _shared_lock:
+        client = _clients.get(backend)
+    if client is None:
+        client = make_llm_client(backend)
+        with _shared_lock:
+            client = _clients.setdefault(backend, client)
+    return client
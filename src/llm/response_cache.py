@@ -0,0 +1,89 @@
+"""
+LLM Response Cache
+
+Disk-backed cache of LLM completions, keyed on SHA-256 of
+(backend, model, system prompt, prompt, temperature, max_tokens).
+The prompt templates are deterministic functions of the source, so a
+repeated file re-uses the earlier completion instead of re-running minutes
+of local inference.
+
+Entries expire after ttl seconds; storage and LRU/size eviction come from
+src.cache.disk_cache.DiskCache.  A read-only cache serves hits but never
+writes or deletes anything, which keeps benchmark runs reproducible against
+a frozen cache directory.
+
+Only real completions are cached — offline stubs and failed calls never are.
+"""
+
+import logging
+import os
+import time
+from typing import Optional
+
+from src.cache.disk_cache import DiskCache
+from src.cache.keys import content_hash
+
+logger = logging.getLogger(__name__)
+
+_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DEFAULT_RESPONSE_CACHE_DIR = os.path.join(_root, ".cache", "llm")
+DEFAULT_TTL       = 7 * 24 * 3600         # one week
+DEFAULT_MAX_BYTES = 128 * 1024 * 1024     # 128 MB
+
+
+class ResponseCache:
+    """
+    Usage
+    -----
+    cache  = ResponseCache()                      # or ResponseCache(read_only=True)
+    client = LLMClient(response_cache=cache)
+    client.generate(prompt)                       # second identical call is a hit
+    print(cache.stats())
+    """
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_RESPONSE_CACHE_DIR,
+        ttl: Optional[float] = DEFAULT_TTL,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        read_only: bool = False,
+    ):
+        self.store     = DiskCache(directory, max_bytes=max_bytes)
+        self.ttl       = ttl
+        self.read_only = read_only
+        self.hits      = 0
+        self.misses    = 0
+
+    @staticmethod
+    def key(backend: str, model: str, system_prompt: str, prompt: str,
+            temperature: float, max_tokens: int) -> str:
+        return content_hash(
+            "llm", backend, model, system_prompt, prompt, temperature, max_tokens
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self.store.get(key, touch=not self.read_only)
+        if entry is not None:
+            created, text = entry
+            if self.ttl is None or time.time() - created <= self.ttl:
+                self.hits += 1
+                return text
+            if not self.read_only:
+                self.store.delete(key)
+        self.misses += 1
+        return None
+
+    def set(self, key: str, text: str) -> None:
+        if self.read_only:
+            return
+        self.store.set(key, (time.time(), text))
+
+    def clear(self) -> None:
+        if not self.read_only:
+            self.store.clear()
+
+    def stats(self) -> dict:
+        stats = self.store.stats()
+        stats.update(hits=self.hits, misses=self.misses,
+                     ttl=self.ttl, read_only=self.read_only)
+        return stats
@@ -0,0 +1,191 @@
+"""
+LLM Request Scheduler
+
+Agents submit prompts and get a concurrent.futures.Future back, so their
+rule-based work runs while the model is generating.  One scheduler per
+process sits in front of every LLM client:
+
+  • bounded in-flight window — at most max_in_flight generate() calls run at
+    once (default OLLAMA_NUM_PARALLEL, else 4), matching what the Ollama
+    server will actually serve in parallel;
+  • priority classes — queued requests start in priority order (lower value
+    first, FIFO within a class), so optimization prompts on the critical path
+    are not stuck behind verification commentary;
+  • coalescing — an identical prompt to the same client that is already
+    queued or running shares the existing future instead of being sent twice.
+
+A request runs in a copy of the submitter's contextvars, so per-run state
+(the run's context namespace, a per-request reasoning-step sink) follows it
+onto the worker thread.
+
+Calls to a client that is offline (``_available`` false) return the stub
+inline; there is nothing to overlap.
+
+Usage
+-----
+future = submit_llm(llm, prompt, system_prompt=SYSTEM, priority="optimization")
+...                                       # rule-based work
+raw = future.result()
+"""
+
+import contextvars
+import heapq
+import itertools
+import logging
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Lower value = started first
+PRIORITY: Dict[str, int] = {
+    "optimization": 0,
+    "analysis":     1,
+    "security":     2,
+    "verification": 3,
+}
+DEFAULT_PRIORITY = "analysis"
+
+
+def _default_window() -> int:
+    try:
+        return max(1, int(os.environ.get("OLLAMA_NUM_PARALLEL", "4")))
+    except ValueError:
+        return 4
+
+
+class LLMScheduler:
+    """
+    Priority queue of LLM requests drained by up to max_in_flight threads.
+
+    Worker threads are started lazily and are daemons, so an idle scheduler
+    costs nothing and never blocks interpreter exit.
+    """
+
+    def __init__(self, max_in_flight: Optional[int] = None):
+        self.max_in_flight = max_in_flight or _default_window()
+        self.submitted = 0
+        self.coalesced = 0
+        self.completed = 0
+        self._cond     = threading.Condition()
+        self._queue: List[Tuple[int, int, Tuple]] = []   # (priority, seq, key)
+        self._jobs: Dict[Tuple, Tuple[Future, Any, str, Dict, contextvars.Context]] = {}
+        self._seq      = itertools.count()
+        self._workers: List[threading.Thread] = []
+        self._running  = 0
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    def submit(
+        self,
+        llm,
+        prompt: str,
+        system_prompt: str = "",
+        priority: Union[str, int] = DEFAULT_PRIORITY,
+        **kwargs,
+    ) -> Future:
+        """Queue llm.generate(prompt, system_prompt, **kwargs); return its Future."""
+        if not getattr(llm, "_available", True):
+            return _completed(llm, prompt, system_prompt, kwargs)
+
+        rank = PRIORITY.get(priority, PRIORITY[DEFAULT_PRIORITY]) \
+            if isinstance(priority, str) else int(priority)
+        key = (id(llm), system_prompt, prompt, tuple(sorted(kwargs.items())))
+        with self._cond:
+            self.submitted += 1
+            job = self._jobs.get(key)
+            if job is not None:
+                self.coalesced += 1
+                logger.debug("LLMScheduler: coalesced identical in-flight prompt")
+                return job[0]
+            future = Future()
+            self._jobs[key] = (future, llm, system_prompt, kwargs,
+                               contextvars.copy_context())
+            heapq.heappush(self._queue, (rank, next(self._seq), key))
+            self._spawn_worker()
+            self._cond.notify()
+        return future
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "queued":        len(self._queue),
+                "running":       self._running,
+                "submitted":     self.submitted,
+                "coalesced":     self.coalesced,
+                "completed":     self.completed,
+            }
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    def _spawn_worker(self) -> None:
+        """Start another worker if the window allows it (caller holds _cond)."""
+        self._workers = [t for t in self._workers if t.is_alive()]
+        idle = len(self._workers) - self._running
+        if idle < len(self._queue) and len(self._workers) < self.max_in_flight:
+            t = threading.Thread(target=self._worker, daemon=True,
+                                 name=f"llm-sched-{len(self._workers)}")
+            self._workers.append(t)
+            t.start()
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue:
+                    # A submit() that ran while this wait was timing out counted
+                    # us as idle and spawned nobody: exit only on an empty queue.
+                    if not self._cond.wait(timeout=30) and not self._queue:
+                        self._workers.remove(threading.current_thread())
+                        return
+                _, _, key = heapq.heappop(self._queue)
+                future, llm, system_prompt, kwargs, ctx = self._jobs[key]
+                self._running += 1
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        result = ctx.run(llm.generate, key[2],
+                                         system_prompt=system_prompt, **kwargs)
+                    except BaseException as exc:
+                        future.set_exception(exc)
+                    else:
+                        future.set_result(result)
+            finally:
+                with self._cond:
+                    self._running -= 1
+                    self.completed += 1
+                    self._jobs.pop(key, None)
+
+
+def _completed(llm, prompt: str, system_prompt: str, kwargs: Dict) -> Future:
+    future = Future()
+    try:
+        future.set_result(llm.generate(prompt, system_prompt=system_prompt, **kwargs))
+    except Exception as exc:
+        future.set_exception(exc)
+    return future
+
+
+# ── Shared instance ───────────────────────────────────────────────────────────
+
+_default_scheduler: Optional[LLMScheduler] = None
+_default_pid: Optional[int] = None
+_default_lock = threading.Lock()
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """Process-wide scheduler (re-created in forked batch workers)."""
+    global _default_scheduler, _default_pid
+    with _default_lock:
+        if _default_scheduler is None or _default_pid != os.getpid():
+            _default_scheduler = LLMScheduler()
+            _default_pid = os.getpid()
+        return _default_scheduler
+
+
+def submit_llm(llm, prompt: str, system_prompt: str = "",
+               priority: Union[str, int] = DEFAULT_PRIORITY, **kwargs) -> Future:
+    """Submit a prompt to the shared scheduler."""
+    return get_llm_scheduler().submit(llm, prompt, system_prompt, priority, **kwargs)
@@ -1,15 +1,30 @@
 """
-C/C++ Code Parser — Week 5 (regex-based, no external dependencies)
+C/C++ Code Parser — Week 5 (token-based, no external dependencies)
 
 Extracts structural features from C/C++ source code to feed the
 Analysis Agent.  Uses only the Python standard library.
+
+The source is scanned once by src.parser.lexer; every extractor then works
+on that token stream (plus one index of token positions by text) instead of
+running its own regex over the raw text, so code in comments and string
+literals is never mistaken for real code and the whole parse stays linear
+in the file size.  The stream is kept on ParseResult.tokens for reuse.
+
+Block structure comes from the stream's bracket-partner table: one sweep
+nests functions, loops (braceless bodies included) and plain blocks into a
+ScopeTree (ParseResult.scopes), from which block ends, enclosing scopes and
+exact loop depths are read off directly.
 """
 
 import re
 import logging
+from bisect import bisect_right
+from collections import defaultdict
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Tuple
 
+from src.parser.lexer import IDENT, PREPROC, PUNCT, TokenStream, lex
+
 logger = logging.getLogger(__name__)
 
 
@@ -31,7 +46,50 @@ class LoopInfo:
     loop_type: str          # "for" | "while" | "do_while"
     line: int
     is_nested: bool
-    depth: int
+    depth: int              # 1 = outermost loop of its function
+    end_line: int = 0
+
+
+@dataclass(eq=False)
+class Scope:
+    """A node of the scope tree: the file, a function, a loop or a plain block."""
+    kind: str               # "file" | "function" | "loop" | "block"
+    name: str               # function name / loop type / "" for blocks
+    start: int              # first token (function return type, loop keyword, "{")
+    end: int                # last token ("}" or the ";" ending a braceless loop)
+    start_line: int
+    end_line: int
+    depth: int = 0          # 0 = file scope
+    loop_depth: int = 0     # loops from the enclosing function down, self included
+    parent: Optional["Scope"] = field(default=None, repr=False)
+    children: List["Scope"] = field(default_factory=list, repr=False)
+
+    def contains(self, token: int) -> bool:
+        return self.start <= token <= self.end
+
+
+class ScopeTree:
+    """
+    Scopes of one file, nested by token span.  Built in one sweep;
+    enclosing() is a bisect plus a walk up the (short) ancestor chain.
+    """
+
+    def __init__(self, root: Scope, scopes: List[Scope]):
+        self.root   = root
+        self.scopes = scopes                    # sorted by start, parents first
+        self._starts = [sc.start for sc in scopes]
+
+    def enclosing(self, token: int, kind: Optional[str] = None) -> Scope:
+        """Innermost scope containing token (of the given kind, if any)."""
+        k = bisect_right(self._starts, token) - 1
+        scope = self.scopes[k] if k >= 0 else self.root
+        while scope.parent is not None and (
+                not scope.contains(token) or (kind and scope.kind != kind)):
+            scope = scope.parent
+        return scope
+
+    def of_kind(self, kind: str) -> List[Scope]:
+        return [sc for sc in self.scopes if sc.kind == kind]
 
 
 @dataclass
@@ -52,6 +110,10 @@ class ParseResult:
     pointer_ops: List[Dict] = field(default_factory=list)
     max_loop_depth: int = 0
     has_nested_loops: bool = False
+    # the lexer's token stream and the scope tree built on it, for consumers
+    # that need more than the summary
+    tokens: Optional[TokenStream] = field(default=None, repr=False, compare=False)
+    scopes: Optional[ScopeTree] = field(default=None, repr=False, compare=False)
 
     def to_summary(self) -> str:
         """Return a human-readable text summary for use in prompts."""
@@ -80,35 +142,17 @@ class ParseResult:
 
 class CodeParser:
     """
-    Pure-regex C/C++ feature extractor.
+    Token-based C/C++ feature extractor.
 
     Not a full AST parser — it extracts "good-enough" heuristics
     to seed the LLM analysis prompt.
     """
 
-    # ── compiled patterns ─────────────────────────────────────────────────
-
-    _RE_INCLUDE     = re.compile(r'^\s*#include\s*[<"]([^>"]+)[>"]', re.MULTILINE)
-    _RE_FUNC_DECL   = re.compile(
-        r'^\s*([\w:*&<>\s]+?)\s+(\w+)\s*\(([^)]*)\)\s*(?:const\s*)?\{',
-        re.MULTILINE,
-    )
-    _RE_FOR         = re.compile(r'\bfor\s*\(', re.MULTILINE)
-    _RE_WHILE       = re.compile(r'\bwhile\s*\(', re.MULTILINE)
-    _RE_DO          = re.compile(r'\bdo\s*\{', re.MULTILINE)
-    _RE_ARRAY_DECL  = re.compile(r'\b(\w+)\s+(\w+)\[(\d+)\]', re.MULTILINE)
-    _RE_ARRAY_ACC   = re.compile(r'\b(\w+)\[([^\]]+)\]', re.MULTILINE)
-    _RE_MALLOC      = re.compile(r'\bmalloc\s*\(', re.MULTILINE)
-    _RE_FREE        = re.compile(r'\bfree\s*\(', re.MULTILINE)
-    _RE_DEREF       = re.compile(r'\*\s*(\w+)', re.MULTILINE)
-    _RE_VAR_DECL    = re.compile(
-        r'^\s*(?:int|float|double|char|long|short|unsigned|bool)\s+(\w+)\s*;',
-        re.MULTILINE,
-    )
-    _RE_GLOBAL_VAR  = re.compile(
-        r'^(?:int|float|double|char|long|short|unsigned|bool)\s+(\w+)\s*[=;]',
-        re.MULTILINE,
-    )
+    _RE_INCLUDE = re.compile(r'#\s*include\s*[<"]([^>"]+)[>"]')
+
+    _TYPE_KEYWORDS = frozenset({
+        'int', 'float', 'double', 'char', 'long', 'short', 'unsigned', 'bool',
+    })
 
     def parse_file(self, file_path: str) -> ParseResult:
         """Parse a C/C++ file by path."""
@@ -120,26 +164,38 @@ class CodeParser:
             return ParseResult(file_path=file_path)
         return self.parse_string(source, file_path=file_path)
 
-    def parse_string(self, source_code: str, file_path: str = "<string>") -> ParseResult:
-        """Parse C/C++ source from a string."""
+    def parse_string(self, source_code: str, file_path: str = "<string>",
+                     tokens: Optional[TokenStream] = None) -> ParseResult:
+        """Parse C/C++ source from a string (reusing its token stream if given)."""
+        if tokens is None:
+            tokens = lex(source_code)
         result = ParseResult(
             file_path=file_path,
             source_code=source_code,
             line_count=source_code.count("\n") + 1,
+            tokens=tokens,
         )
 
-        lines = source_code.splitlines()
+        # one pass over the stream: token indices by text, for every extractor
+        where: Dict[str, List[int]] = defaultdict(list)
+        for i, text in enumerate(tokens.texts):
+            where[text].append(i)
+        last_line = len(source_code.splitlines())   # for unterminated blocks
+
+        heads = self._function_heads(tokens, where)
+        loop_spans = self._loop_spans(tokens, where)
+        result.scopes = self._build_scopes(tokens, heads, loop_spans)
 
-        result.includes   = self._RE_INCLUDE.findall(source_code)
-        result.functions  = self._extract_functions(source_code, lines)
+        result.includes   = self._extract_includes(tokens)
+        result.functions  = self._extract_functions(tokens, heads, last_line)
         result.loops, result.max_loop_depth, result.has_nested_loops = \
-            self._extract_loops(source_code, lines)
-        result.array_accesses = self._extract_array_accesses(source_code, lines)
-        result.uninitialized_vars = self._find_uninitialized(source_code, lines)
-        result.malloc_calls = self._line_numbers_of(self._RE_MALLOC, lines)
-        result.free_calls   = self._line_numbers_of(self._RE_FREE, lines)
-        result.pointer_ops  = self._extract_pointer_ops(source_code, lines)
-        result.global_vars  = self._RE_GLOBAL_VAR.findall(source_code)
+            self._extract_loops(result.scopes)
+        result.array_accesses = self._extract_array_accesses(tokens, where)
+        result.uninitialized_vars = self._find_uninitialized(tokens, where)
+        result.malloc_calls = self._call_lines(tokens, where, "malloc")
+        result.free_calls   = self._call_lines(tokens, where, "free")
+        result.pointer_ops  = self._extract_pointer_ops(tokens, where)
+        result.global_vars  = self._extract_global_vars(tokens, where, result.scopes)
 
         logger.debug(f"Parsed {file_path}: {result.line_count} lines, "
                      f"{len(result.functions)} functions, {len(result.loops)} loops")
@@ -153,145 +209,289 @@ class CodeParser:
         'namespace', 'class', 'struct', 'enum', 'template', 'typedef',
     })
 
-    def _extract_functions(self, src: str, lines: List[str]) -> List[FunctionInfo]:
-        funcs = []
-        for m in self._RE_FUNC_DECL.finditer(src):
-            ret_type = m.group(1).strip()
-            fname    = m.group(2).strip()
-            params   = [p.strip() for p in m.group(3).split(",") if p.strip()]
-            start_ln = src[:m.start()].count("\n") + 1
-            # find matching closing brace
-            end_ln   = self._find_block_end(src, m.start(), lines)
-            body_start = m.start()
-            body = src[body_start:body_start + 500]  # first 500 chars
-            # skip obvious non-function matches
-            if ret_type.startswith("//") or ret_type.startswith("*"):
+    # tokens that may make up a return type ahead of the function name
+    _RET_TYPE_PUNCT = frozenset({'::', '*', '&', '&&', '<', '>', '>>', ':'})
+    _STATEMENT_END  = frozenset({';', '{', '}', ':'})
+
+    @staticmethod
+    def _is_punct(ts: TokenStream, i: int, text: str) -> bool:
+        return 0 <= i < len(ts) and ts.kinds[i] == PUNCT and ts.texts[i] == text
+
+    def _at_statement_start(self, ts: TokenStream, i: int) -> bool:
+        if i == 0 or ts.kinds[i - 1] == PREPROC:
+            return True
+        return ts.kinds[i - 1] == PUNCT and ts.texts[i - 1] in self._STATEMENT_END
+
+    def _extract_includes(self, ts: TokenStream) -> List[str]:
+        includes = []
+        for kind, text in zip(ts.kinds, ts.texts):
+            if kind == PREPROC:
+                m = self._RE_INCLUDE.match(text)
+                if m:
+                    includes.append(m.group(1))
+        return includes
+
+    def scope_tree(self, source_code: str) -> ScopeTree:
+        """Just the scope tree (functions, loops, blocks) of source_code."""
+        tokens = lex(source_code)
+        where: Dict[str, List[int]] = defaultdict(list)
+        for i, text in enumerate(tokens.texts):
+            if text in self._SCOPE_TOKENS:
+                where[text].append(i)
+        return self._build_scopes(tokens, self._function_heads(tokens, where),
+                                  self._loop_spans(tokens, where))
+
+    _SCOPE_TOKENS = frozenset({"{", "for", "while", "do"})
+
+    def _function_heads(self, ts: TokenStream,
+                        where: Dict[str, List[int]]) -> List[Tuple[int, int, int, int]]:
+        """
+        (first, name, open paren, body brace) for every definition
+        `ret-type name ( params ) [const] {`, the return type (empty for
+        constructors) starting a line, found by walking back from each brace.
+        """
+        kinds, texts, partners = ts.kinds, ts.texts, ts.partners
+        heads = []
+        for brace in where.get("{", ()):
+            if kinds[brace] != PUNCT:
+                continue
+            close = brace - 1
+            if close >= 0 and kinds[close] == IDENT and texts[close] == "const":
+                close -= 1
+            if not self._is_punct(ts, close, ")"):
+                continue
+            open_ = partners[close]
+            name = open_ - 1
+            if open_ < 0 or name < 0 or kinds[name] != IDENT:
                 continue
+            first = name
+            while first > 0 and (kinds[first - 1] == IDENT or (
+                    kinds[first - 1] == PUNCT and texts[first - 1] in self._RET_TYPE_PUNCT)):
+                first -= 1
+            if first > 0 and ts.line_of(ts.ends[first - 1] - 1) == ts.line(first):
+                continue                # return type must start its line
+            ret_type = ts.source[ts.starts[first]:ts.starts[name]].strip()
             # skip control-flow keywords mistaken for function names
-            if fname in self._CPP_KEYWORDS or ret_type in self._CPP_KEYWORDS:
+            if texts[name] in self._CPP_KEYWORDS or ret_type in self._CPP_KEYWORDS:
                 continue
+            heads.append((first, name, open_, brace))
+        return heads
+
+    def _extract_functions(self, ts: TokenStream, heads: List[Tuple[int, int, int, int]],
+                           last_line: int) -> List[FunctionInfo]:
+        src, starts = ts.source, ts.starts
+        funcs = []
+        for first, name, open_, brace in heads:
+            close = ts.partners[open_]
+            params = [p.strip() for p in src[ts.ends[open_]:starts[close]].split(",")
+                      if p.strip()]
+            end = ts.partners[brace]
             funcs.append(FunctionInfo(
-                name=fname,
-                return_type=ret_type,
+                name=ts.texts[name],
+                return_type=src[starts[first]:starts[name]].strip(),
                 params=params,
-                start_line=start_ln,
-                end_line=end_ln,
-                body=body,
+                start_line=ts.line(first),
+                end_line=ts.line(end) if end >= 0 else last_line,
+                body=src[starts[first]:starts[first] + 500],  # first 500 chars
             ))
         return funcs
 
-    def _find_block_end(self, src: str, start: int, lines: List[str]) -> int:
-        """Find the line number of the matching closing brace."""
-        depth = 0
-        for i, ch in enumerate(src[start:], start=start):
-            if ch == "{":
-                depth += 1
-            elif ch == "}":
-                depth -= 1
-                if depth == 0:
-                    return src[:i].count("\n") + 1
-        return len(lines)
-
-    def _extract_loops(
-        self, src: str, lines: List[str]
-    ) -> Tuple[List[LoopInfo], int, bool]:
-        pattern_map = [
-            (self._RE_FOR,   "for"),
-            (self._RE_WHILE, "while"),
-            (self._RE_DO,    "do_while"),
-        ]
-
-        # --- Pass 1: collect (LoopInfo, char_offset) pairs ---
-        raw: List[Tuple[LoopInfo, int]] = []
-        for pat, ltype in pattern_map:
-            for m in pat.finditer(src):
-                ln = src[:m.start()].count("\n") + 1
-                raw.append((
-                    LoopInfo(loop_type=ltype, line=ln, is_nested=False, depth=1),
-                    m.start(),
-                ))
-
-        # Sort by line, keeping offset aligned with its LoopInfo
-        raw.sort(key=lambda x: x[0].line)
-        loop_infos   = [x[0] for x in raw]
-        match_starts = [x[1] for x in raw]
-
-        # Build all_loop_lines for callers that use it
-        all_loop_lines = sorted(info.line for info in loop_infos)
-
-        # --- Pass 2: compute block-end lines via brace counting ---
-        loop_end_lines = [
-            self._find_block_end(src, ms, lines) for ms in match_starts
-        ]
-
-        # --- Pass 3: structural nesting check ---
-        max_depth = 1
-        for i, info in enumerate(loop_infos):
-            for j in range(len(loop_infos)):
-                if i == j:
+    def _loop_spans(self, ts: TokenStream,
+                    where: Dict[str, List[int]]) -> List[Tuple[int, int, str]]:
+        """(keyword token, last token, loop type) for every loop, in source order."""
+        kinds, partners = ts.kinds, ts.partners
+        spans = []
+        for i in where.get("do", ()):
+            if kinds[i] == IDENT and self._is_punct(ts, i + 1, "{"):
+                end = self._statement_end(ts, i)
+                spans.append((i, end, "do_while"))
+        # the `while (...);` closing a do-while belongs to that loop
+        do_tails = {end for _, end, _ in spans}
+        for keyword in ("for", "while"):
+            for i in where.get(keyword, ()):
+                if kinds[i] != IDENT or not self._is_punct(ts, i + 1, "("):
+                    continue
+                if partners[i + 1] >= 0 and partners[i + 1] + 1 in do_tails:
                     continue
-                outer_start = loop_infos[j].line
-                outer_end   = loop_end_lines[j]
-                # info is nested inside j if info's start is strictly inside j's span
-                if outer_start < info.line <= outer_end:
-                    info.is_nested = True
-                    max_depth = max(max_depth, 2)
-
-        has_nested = any(l.is_nested for l in loop_infos)
-        return loop_infos, max_depth, has_nested
-
-    def _extract_array_accesses(
-        self, src: str, lines: List[str]
-    ) -> List[Dict]:
+                spans.append((i, self._statement_end(ts, i), keyword))
+        spans.sort()
+        return spans
+
+    def _statement_end(self, ts: TokenStream, i: int) -> int:
+        """
+        Last token of the statement starting at token i: the matching '}'
+        of a block, the ';' of a simple statement, or the end of the body
+        of a for / while / if / do header (recursively, for braceless bodies).
+        """
+        kinds, texts, partners = ts.kinds, ts.texts, ts.partners
+        n = len(ts)
+        while i < n:
+            text = texts[i]
+            if kinds[i] == PUNCT and text == "{":
+                return partners[i] if partners[i] >= 0 else n - 1
+            if kinds[i] == IDENT and text == "do":
+                body_end = self._statement_end(ts, i + 1)
+                # do <body> while ( cond ) ;
+                j = body_end + 1
+                if j + 1 < n and texts[j] == "while" and partners[j + 1] >= 0:
+                    j = partners[j + 1] + 1
+                    return j if self._is_punct(ts, j, ";") else j - 1
+                return body_end
+            if kinds[i] == IDENT and text in self._HEADER_KEYWORDS \
+                    and self._is_punct(ts, i + 1, "(") and partners[i + 1] >= 0:
+                end = self._statement_end(ts, partners[i + 1] + 1)
+                if text == "if" and end + 1 < n and texts[end + 1] == "else":
+                    return self._statement_end(ts, end + 2)
+                return end
+            if kinds[i] == IDENT and text == "else":
+                i += 1
+                continue
+            # simple statement: up to ';', stepping over bracketed groups
+            j = i
+            while j < n:
+                if kinds[j] == PUNCT:
+                    t = texts[j]
+                    if t == ";":
+                        return j
+                    if t in "([{" and partners[j] >= 0:
+                        j = partners[j] + 1
+                        continue
+                    if t in ")]}":
+                        return max(j - 1, i)        # enclosing group closed
+                j += 1
+            return n - 1
+        return n - 1
+
+    _HEADER_KEYWORDS = frozenset({"for", "while", "if", "switch"})
+
+    def _build_scopes(self, ts: TokenStream, heads: List[Tuple[int, int, int, int]],
+                      loop_spans: List[Tuple[int, int, str]]) -> ScopeTree:
+        """One stack sweep over all spans, sorted by start, into a tree."""
+        n = len(ts)
+        last = max(n - 1, 0)
+        spans: List[Tuple[int, int, str, str]] = []
+        claimed = set()                 # braces owned by a function or a loop
+        for first, name, _, brace in heads:
+            end = ts.partners[brace]
+            spans.append((first, end if end >= 0 else last, "function", ts.texts[name]))
+            claimed.add(brace)
+        for head, end, ltype in loop_spans:
+            spans.append((head, end, "loop", ltype))
+            body = head + 1 if ltype == "do_while" else ts.partners[head + 1] + 1
+            if 0 < body < n and ts.texts[body] == "{":
+                claimed.add(body)
+        for i, (kind, text) in enumerate(zip(ts.kinds, ts.texts)):
+            if kind == PUNCT and text == "{" and i not in claimed:
+                end = ts.partners[i]
+                spans.append((i, end if end >= 0 else last, "block", ""))
+        # outer spans first when two start on the same token
+        spans.sort(key=lambda sp: (sp[0], -sp[1]))
+
+        line_count = ts.source.count("\n") + 1
+        root = Scope("file", "", 0, last, 1, line_count, depth=0)
+        stack, scopes = [root], [root]
+        for start, end, kind, name in spans:
+            while len(stack) > 1 and stack[-1].end < start:
+                stack.pop()
+            parent = stack[-1]
+            end = min(end, parent.end) if parent is not root else end
+            loop_depth = 0 if kind == "function" else parent.loop_depth
+            scope = Scope(kind, name, start, end, ts.line(start),
+                          ts.line(end) if n else 1, depth=parent.depth + 1,
+                          loop_depth=loop_depth + (kind == "loop"), parent=parent)
+            parent.children.append(scope)
+            scopes.append(scope)
+            stack.append(scope)
+        return ScopeTree(root, scopes)
+
+    def _extract_loops(self, tree: ScopeTree) -> Tuple[List[LoopInfo], int, bool]:
+        loops = [LoopInfo(loop_type=sc.name, line=sc.start_line,
+                          is_nested=sc.loop_depth > 1, depth=sc.loop_depth,
+                          end_line=sc.end_line)
+                 for sc in tree.of_kind("loop")]
+        max_depth = max((l.depth for l in loops), default=0)
+        return loops, max_depth, max_depth > 1
+
+    def _extract_array_accesses(self, ts: TokenStream,
+                                where: Dict[str, List[int]]) -> List[Dict]:
         accesses = []
-        for m in self._RE_ARRAY_ACC.finditer(src):
-            ln = src[:m.start()].count("\n") + 1
-            idx_expr = m.group(2).strip()
+        for bracket in where.get("[", ()):
+            name = bracket - 1
+            if name < 0 or ts.kinds[name] != IDENT or ts.kinds[bracket] != PUNCT:
+                continue
+            close = ts.match(bracket)
+            if close < 0 or ts.texts[close] != "]":
+                continue
+            idx_expr = ts.source[ts.ends[bracket]:ts.starts[close]].strip()
+            if not idx_expr:
+                continue
             accesses.append({
-                "array":   m.group(1),
+                "array":   ts.texts[name],
                 "index":   idx_expr,
-                "line":    ln,
+                "line":    ts.line(name),
                 "is_var_index": bool(re.search(r'[a-zA-Z]', idx_expr)),
             })
         return accesses
 
-    def _find_uninitialized(self, src: str, lines: List[str]) -> List[Dict]:
+    def _find_uninitialized(self, ts: TokenStream,
+                            where: Dict[str, List[int]]) -> List[Dict]:
         """
         Heuristic: look for declarations without initializers where the
-        next non-empty statement does NOT assign to that variable.
+        next mention of the variable is NOT an assignment to it.
         """
+        kinds, texts = ts.kinds, ts.texts
         results = []
-        for m in self._RE_VAR_DECL.finditer(src):
-            varname = m.group(1)
-            ln      = src[:m.start()].count("\n") + 1
-            # check if the rest of the file assigns the var before first use
-            after   = src[m.end():]
-            assign_pattern = re.compile(
-                r'\b' + re.escape(varname) + r'\s*=[^=]'
-            )
-            use_pattern = re.compile(
-                r'\b' + re.escape(varname) + r'\b'
-            )
-            use_m    = use_pattern.search(after)
-            assign_m = assign_pattern.search(after)
-            if use_m and (assign_m is None or use_m.start() < assign_m.start()):
-                results.append({
-                    "variable": varname,
-                    "declared_line": ln,
-                    "first_use_offset": use_m.start(),
-                })
-        return results
-
-    def _extract_pointer_ops(self, src: str, lines: List[str]) -> List[Dict]:
+        for keyword in self._TYPE_KEYWORDS:
+            for i in where.get(keyword, ()):
+                var, semi = i + 1, i + 2
+                if not (kinds[i] == IDENT and var < len(ts) and kinds[var] == IDENT
+                        and self._is_punct(ts, semi, ";")
+                        and self._at_statement_start(ts, i)):
+                    continue
+                varname = texts[var]
+                mentions = where[varname]
+                k = bisect_right(mentions, semi)
+                # every assignment is also a use, so the first use is either
+                # the first assignment or comes before it
+                if k == len(mentions):
+                    continue
+                use = mentions[k]
+                if not self._is_punct(ts, use + 1, "="):
+                    results.append((i, {
+                        "variable": varname,
+                        "declared_line": ts.line(i),
+                        "first_use_offset": ts.starts[use] - ts.ends[semi],
+                    }))
+        return [r for _, r in sorted(results, key=lambda r: r[0])]
+
+    def _extract_pointer_ops(self, ts: TokenStream,
+                             where: Dict[str, List[int]]) -> List[Dict]:
         ops = []
-        for m in self._RE_DEREF.finditer(src):
-            ln = src[:m.start()].count("\n") + 1
-            ops.append({"pointer": m.group(1), "line": ln, "op": "dereference"})
+        for star in where.get("*", ()):
+            ptr = star + 1
+            if ts.kinds[star] == PUNCT and ptr < len(ts) and ts.kinds[ptr] == IDENT:
+                ops.append({"pointer": ts.texts[ptr], "line": ts.line(star),
+                            "op": "dereference"})
         return ops
 
-    def _line_numbers_of(self, pattern: re.Pattern, lines: List[str]) -> List[int]:
-        nums = []
-        for i, ln in enumerate(lines, start=1):
-            if pattern.search(ln):
-                nums.append(i)
-        return nums
+    def _call_lines(self, ts: TokenStream, where: Dict[str, List[int]],
+                    fname: str) -> List[int]:
+        """Sorted, de-duplicated lines calling fname(...)."""
+        return sorted({ts.line(i) for i in where.get(fname, ())
+                       if ts.kinds[i] == IDENT and self._is_punct(ts, i + 1, "(")})
+
+    def _extract_global_vars(self, ts: TokenStream, where: Dict[str, List[int]],
+                             tree: ScopeTree) -> List[str]:
+        """`type name = ...;` / `type name;` statements at file scope."""
+        found = []
+        for keyword in self._TYPE_KEYWORDS:
+            for i in where.get(keyword, ()):
+                var = i + 1
+                if not (ts.kinds[i] == IDENT and var < len(ts) and ts.kinds[var] == IDENT
+                        and (self._is_punct(ts, var + 1, "=")
+                             or self._is_punct(ts, var + 1, ";"))
+                        and self._at_statement_start(ts, i)):
+                    continue
+                if tree.enclosing(i) is tree.root:
+                    found.append((i, ts.texts[var]))
+        return [name for _, name in sorted(found)]
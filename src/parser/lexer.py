@@ -0,0 +1,233 @@
+"""
+C/C++ Lexer — single-pass tokenizer shared by the parser and the agents
+
+One master regex walks the source once and yields a compact token stream:
+token kinds in an array('B') and start/end offsets in array('l'), plus the
+token texts.  Comments are not tokens (their spans are kept separately so
+callers can blank them out) and a preprocessor directive, continuation
+lines included, is a single PREPROC token.  String and character literals
+are single tokens, so nothing inside them is mistaken for code.
+
+lex() memoises the last few streams by source text, which is how
+CodeParser (AnalysisAgent) and SecurityAgent share one scan of the same
+file instead of each re-scanning the raw text.
+
+Usage
+-----
+tokens = lex(source)
+for i in range(len(tokens)):
+    if tokens.kinds[i] == IDENT and tokens.texts[i] == "malloc":
+        print(tokens.line(i))
+clean = tokens.code_text()      # source with comments blanked, offsets kept
+"""
+
+import re
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from threading import Lock
+from typing import List, Optional
+
+# ── Token kinds ───────────────────────────────────────────────────────────
+
+IDENT, NUMBER, STRING, CHAR, PUNCT, PREPROC, OTHER = range(1, 8)
+
+KIND_NAMES = {
+    IDENT: "ident", NUMBER: "number", STRING: "string", CHAR: "char",
+    PUNCT: "punct", PREPROC: "preproc", OTHER: "other",
+}
+
+_COMMENT = 0                     # matched but never emitted as a token
+
+# Leading whitespace is folded into each match, so the scan costs one
+# iteration per token; the token itself is the group that matched.
+_MASTER = re.compile(r"""
+  \s*(?:
+    (?P<COMMENT> //[^\n]* | /\*[\s\S]*?(?:\*/|\Z) )
+  | (?P<PREPROC> \#(?: \\\r?\n | /\*[\s\S]*?\*/ | [^\n] )* )
+  | (?P<STRING>  (?:u8|[uUL])?R"(?P<delim>[^\s()\\]{0,16})\([\s\S]*?\)(?P=delim)"
+               | (?:u8|[uUL])?"(?:\\[\s\S]|[^"\\\n])*"? )
+  | (?P<CHAR>    (?:u8|[uUL])?'(?:\\[\s\S]|[^'\\\n])*'? )
+  | (?P<IDENT>   [A-Za-z_]\w* )
+  | (?P<NUMBER>  \.?\d(?:[eEpP][+-]|[\w.'])* )
+  | (?P<PUNCT>   >>= | <<= | <=> | ->\* | \.\.\. | \.\* | ::
+               | -> | \+\+ | -- | << | >> | && | \|\|
+               | [-+*/%&|^!=<>]=
+               | [{}()\[\];,.?:~*/%+\-<>=&|^!] )
+  | (?P<OTHER>   . )
+  )
+""", re.VERBOSE)
+
+# kind by group number (m.lastindex names the outermost group that matched)
+_KIND_OF_GROUP = [None] * (_MASTER.groups + 1)
+for _name, _kind in (("COMMENT", _COMMENT), ("PREPROC", PREPROC), ("STRING", STRING),
+                     ("CHAR", CHAR), ("IDENT", IDENT), ("NUMBER", NUMBER),
+                     ("PUNCT", PUNCT), ("OTHER", OTHER)):
+    _KIND_OF_GROUP[_MASTER.groupindex[_name]] = _kind
+
+
+_CLOSERS = {")": "(", "]": "[", "}": "{"}
+
+
+# ── Line index ────────────────────────────────────────────────────────────
+
+
+class LineIndex:
+    """Start offset of every line; line_of() is an O(log n) lookup."""
+
+    __slots__ = ("starts",)
+
+    def __init__(self, src: str):
+        starts = [0]
+        i = src.find("\n")
+        while i != -1:
+            starts.append(i + 1)
+            i = src.find("\n", i + 1)
+        self.starts = starts
+
+    def line_of(self, offset: int) -> int:
+        """1-based line containing offset (== src[:offset].count("\n") + 1)."""
+        return bisect_right(self.starts, offset)
+
+
+# ── Token stream ──────────────────────────────────────────────────────────
+
+
+class TokenStream:
+    """
+    Tokens of one source text.  Token i is kinds[i] / texts[i] spanning
+    source[starts[i]:ends[i]]; comments are listed as (start, end) pairs in
+    comment_starts / comment_ends.
+    """
+
+    __slots__ = ("source", "kinds", "starts", "ends", "texts",
+                 "comment_starts", "comment_ends", "_lines", "_code_text", "_partners")
+
+    def __init__(self, source: str):
+        self.source = source
+        self.kinds  = array("B")
+        self.starts = array("l")
+        self.ends   = array("l")
+        self.texts: List[str] = []
+        self.comment_starts = array("l")
+        self.comment_ends   = array("l")
+        self._lines: Optional[LineIndex] = None
+        self._code_text: Optional[str] = None
+        self._partners: Optional[array] = None
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    @property
+    def lines(self) -> LineIndex:
+        if self._lines is None:
+            self._lines = LineIndex(self.source)
+        return self._lines
+
+    def line(self, i: int) -> int:
+        """1-based line of token i."""
+        return self.lines.line_of(self.starts[i])
+
+    def line_of(self, offset: int) -> int:
+        return self.lines.line_of(offset)
+
+    @property
+    def partners(self) -> array:
+        """
+        Bracket-matching table: partners[i] is the index of the token that
+        closes (or opens) the bracket at token i, -1 for other tokens and
+        unbalanced brackets.  One stack pass per stream; each kind of
+        bracket has its own stack so a stray ')' cannot unpair the braces.
+        """
+        if self._partners is None:
+            partners = array("l", [-1]) * len(self.kinds)
+            stacks = {"(": [], "[": [], "{": []}
+            for i, (kind, text) in enumerate(zip(self.kinds, self.texts)):
+                if kind != PUNCT:
+                    continue
+                if text in stacks:
+                    stacks[text].append(i)
+                elif text in _CLOSERS:
+                    stack = stacks[_CLOSERS[text]]
+                    if stack:
+                        j = stack.pop()
+                        partners[i], partners[j] = j, i
+            self._partners = partners
+        return self._partners
+
+    def match(self, i: int) -> int:
+        """Index of the bracket paired with token i, or -1 (O(1))."""
+        return self.partners[i]
+
+    def code_text(self) -> str:
+        """The source with every comment replaced by spaces (newlines kept)."""
+        if self._code_text is None:
+            src = self.source
+            parts, pos = [], 0
+            for s, e in zip(self.comment_starts, self.comment_ends):
+                parts.append(src[pos:s])
+                parts.append(re.sub(r"[^\n]", " ", src[s:e]))
+                pos = e
+            parts.append(src[pos:])
+            self._code_text = "".join(parts)
+        return self._code_text
+
+
+def tokenize(source: str) -> TokenStream:
+    """Scan source once into a TokenStream (no caching)."""
+    kinds, starts, ends, texts = [], [], [], []
+    comment_starts, comment_ends = [], []
+    kind_of = _KIND_OF_GROUP
+    for m in _MASTER.finditer(source):
+        group = m.lastindex
+        s, e = m.span(group)
+        kind = kind_of[group]
+        if kind == _COMMENT:
+            comment_starts.append(s)
+            comment_ends.append(e)
+            continue
+        kinds.append(kind)
+        starts.append(s)
+        ends.append(e)
+        texts.append(source[s:e])
+
+    stream = TokenStream(source)
+    stream.kinds.extend(kinds)
+    stream.starts.extend(starts)
+    stream.ends.extend(ends)
+    stream.texts = texts
+    stream.comment_starts.extend(comment_starts)
+    stream.comment_ends.extend(comment_ends)
+    return stream
+
+
+# ── Shared memo ───────────────────────────────────────────────────────────
+
+_MEMO_SIZE = 8
+_memo: "OrderedDict[str, TokenStream]" = OrderedDict()
+_memo_lock = Lock()
+
+
+def lex(source: str) -> TokenStream:
+    """
+    tokenize() with a small LRU keyed by the source text, so the agents
+    looking at the same file in one pipeline run share a single scan.
+    Callers must treat the returned stream as read-only.
+    """
+    with _memo_lock:
+        stream = _memo.get(source)
+        if stream is not None:
+            _memo.move_to_end(source)
+            return stream
+    stream = tokenize(source)
+    with _memo_lock:
+        _memo[source] = stream
+        while len(_memo) > _MEMO_SIZE:
+            _memo.popitem(last=False)
+    return stream
+
+
+def clear_lex_cache() -> None:
+    """Drop every memoised stream (benchmarks, tests)."""
+    with _memo_lock:
+        _memo.clear()
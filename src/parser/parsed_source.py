@@ -0,0 +1,84 @@
+"""
+Parsed Source — one lexed view of a source text, shared by every agent
+
+A ParsedSource wraps a source string and its content hash.  The token
+stream is built when the object is created; everything derived from it
+(lines, comment-free text, the CodeParser result with its function table
+and scope tree) is computed on first use and kept.
+
+parsed_source() memoises these objects by content hash in the run's
+ContextManager, so within one pipeline run AnalysisAgent,
+OptimizationAgent and SecurityAgent all read the same object and each
+distinct source (original, rule-fixed, optimized) is lexed exactly once.
+The pipeline clears the context at the start of a run, which also drops
+the previous run's parses.
+
+Usage
+-----
+parsed = parsed_source(code, self.context)
+parsed.tokens        # TokenStream
+parsed.code_lines    # lines with comments blanked (same numbering)
+parsed.parse(path)   # ParseResult: functions, loops, scopes, …
+"""
+
+import dataclasses
+import hashlib
+from functools import cached_property
+from typing import List, Optional
+
+from src.parser.code_parser import CodeParser, ParseResult, ScopeTree
+from src.parser.lexer import TokenStream, tokenize
+
+
+def content_digest(source: str) -> str:
+    return hashlib.sha256(source.encode("utf-8", errors="surrogatepass")).hexdigest()
+
+
+class ParsedSource:
+    """Lexed source text plus lazily derived views; treat as read-only."""
+
+    _parser = CodeParser()          # stateless
+
+    def __init__(self, source: str, digest: Optional[str] = None):
+        self.source = source
+        self.digest = digest or content_digest(source)
+        self.tokens: TokenStream = tokenize(source)
+
+    @cached_property
+    def lines(self) -> List[str]:
+        return self.source.splitlines()
+
+    @property
+    def code_text(self) -> str:
+        """The source with comments blanked; offsets and lines unchanged."""
+        return self.tokens.code_text()
+
+    @cached_property
+    def code_lines(self) -> List[str]:
+        return self.code_text.splitlines()
+
+    @cached_property
+    def _result(self) -> ParseResult:
+        return self._parser.parse_string(self.source, tokens=self.tokens)
+
+    def parse(self, file_path: str = "<string>") -> ParseResult:
+        """The CodeParser result, labelled with file_path."""
+        result = self._result
+        if result.file_path != file_path:
+            result = dataclasses.replace(result, file_path=file_path)
+        return result
+
+    @property
+    def scopes(self) -> ScopeTree:
+        return self._result.scopes
+
+
+def parsed_source(source: str, context=None) -> ParsedSource:
+    """
+    The ParsedSource for source, memoised by content hash in context
+    (a ContextManager) when one is given.
+    """
+    digest = content_digest(source)
+    if context is None:
+        return ParsedSource(source, digest)
+    return context.memo("parsed_source", digest, lambda: ParsedSource(source, digest))
@@ -0,0 +1,328 @@
+"""
+Batch Runner — process-pool execution of CompilerOptimizationPipeline
+
+Spreads many C/C++ files over a pool of worker processes.  Every worker
+builds its own pipeline (ContextManager, AgentRegistry, agents, LLM client)
+once and reuses it for each file it is handed, so no state is shared
+between concurrently running files.
+
+Results stream back in completion order.  A per-file timeout is enforced
+by the parent: a worker that exceeds it is terminated, a "failed" result is
+reported for its file, and a fresh worker takes its place so one hung
+binary or LLM call cannot stall the rest of the batch.
+
+The parent hands each worker one file at a time, over a queue of the
+worker's own, so it always knows which file a worker holds.  A worker that
+dies without a file (its pipeline failed to build, say) is replaced a
+bounded number of times; once no worker is left, the files not yet
+handed out are reported as failed.
+
+With security enabled, the parent first hands every input file to a single
+`cppcheck -j N` run (src.security.cppcheck); the results land in the
+on-disk cppcheck cache, so a worker auditing an unchanged file finds
+Layer 4 already done instead of spawning cppcheck itself.
+
+Usage
+-----
+for item in run_batch(paths, workers=4, timeout=600):
+    print(item.result.summary())
+"""
+
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+_root = os.path.join(os.path.dirname(__file__), "..", "..")
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+from src.pipeline.pipeline import CompilerOptimizationPipeline, PipelineResult
+
+logger = logging.getLogger(__name__)
+
+_POLL_INTERVAL = 0.2   # seconds between timeout / liveness checks
+_MAX_RESPAWNS  = 3     # replacements for workers that die without holding a file
+
+
+@dataclass
+class BatchConfig:
+    """Everything a worker process needs to rebuild an equivalent pipeline."""
+    llm_backend: str = "ollama"     # "ollama" | "gemini"
+    use_llm: bool = True
+    security: bool = True
+    cache_dir: Optional[str] = None  # PipelineCache directory; None disables caching
+    concurrent_verification: bool = False
+    concurrent_security: bool = False
+    llm_cache_dir: Optional[str] = None  # ResponseCache directory; None disables it
+    llm_cache_readonly: bool = False
+    output_dir: Optional[str] = None     # where OPT_<name> files go; None = agent default
+
+    @staticmethod
+    def from_pipeline(pipeline: CompilerOptimizationPipeline) -> "BatchConfig":
+        from src.llm.llm_client import GeminiLLMClient
+        response_cache = getattr(pipeline.llm, "response_cache", None)
+        return BatchConfig(
+            llm_backend="gemini" if isinstance(pipeline.llm, GeminiLLMClient) else "ollama",
+            use_llm=bool(getattr(pipeline.llm, "_available", True)),
+            security=pipeline.security_agent is not None,
+            cache_dir=pipeline.cache.directory if pipeline.cache is not None else None,
+            concurrent_verification=pipeline.verification_agent.concurrent,
+            concurrent_security=bool(pipeline.security_agent is not None
+                                     and pipeline.security_agent.concurrent),
+            llm_cache_dir=response_cache.store.directory if response_cache is not None else None,
+            llm_cache_readonly=bool(response_cache is not None and response_cache.read_only),
+            output_dir=pipeline.optimization_agent.output_dir,
+        )
+
+
+@dataclass
+class BatchResult:
+    """One finished file from a batch run."""
+    index: int                  # position of the file in the input list
+    file_path: str
+    result: PipelineResult
+    elapsed_s: float
+    timed_out: bool = False
+
+
+# ── Worker process ────────────────────────────────────────────────────────────
+
+def _build_pipeline(config: BatchConfig) -> CompilerOptimizationPipeline:
+    from src.llm.llm_client import make_llm_client
+    from src.llm.response_cache import ResponseCache
+    from src.pipeline.result_cache import PipelineCache
+
+    response_cache = None
+    if config.llm_cache_dir:
+        response_cache = ResponseCache(config.llm_cache_dir,
+                                       read_only=config.llm_cache_readonly)
+    llm = make_llm_client(config.llm_backend, response_cache=response_cache)
+    if not config.use_llm:
+        llm._available = False
+    cache = PipelineCache(config.cache_dir) if config.cache_dir else None
+    pipeline = CompilerOptimizationPipeline(
+        llm_client=llm, cache=cache,
+        concurrent_verification=config.concurrent_verification,
+        concurrent_security=config.concurrent_security,
+        output_dir=config.output_dir,
+    )
+    if not config.security:
+        pipeline.security_agent = None
+    return pipeline
+
+
+def _worker_main(config: BatchConfig, task_q, result_q) -> None:
+    """Worker loop: build one pipeline, then run every file handed to us."""
+    if hasattr(os, "setsid"):
+        # Own process group, so a timeout can also kill the g++ / test binary
+        # children this worker is waiting on.
+        os.setsid()
+    pid = os.getpid()
+    try:
+        pipeline = _build_pipeline(config)
+    except Exception as exc:
+        result_q.put(("init_failed", pid, f"{type(exc).__name__}: {exc}"))
+        return
+    result_q.put(("ready", pid))
+    while True:
+        task = task_q.get()
+        if task is None:
+            break
+        index, path = task
+        t0 = time.time()
+        try:
+            result = pipeline.run(path)
+        except Exception as exc:
+            result = PipelineResult(
+                file_path=path, status="failed",
+                error=f"Pipeline crashed: {exc}",
+            )
+        result_q.put(("done", pid, index, result, time.time() - t0))
+
+
+# ── Parent side ───────────────────────────────────────────────────────────────
+
+def _prefetch_cppcheck(paths: List[str], jobs: int) -> None:
+    """One batched cppcheck run over the inputs, to warm the shared cache."""
+    from src.security.cppcheck import cppcheck_available, get_cppcheck_runner, suffix_for
+
+    if not cppcheck_available():
+        return
+    sources = []
+    for path in paths:
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as fh:
+                sources.append((fh.read(), suffix_for(path)))
+        except OSError:
+            continue            # the worker reports the unreadable file
+    if sources:
+        t0 = time.time()
+        get_cppcheck_runner().scan_batch(sources, jobs=jobs)
+        logger.info(f"Batch: cppcheck over {len(sources)} file(s) "
+                    f"in {time.time() - t0:.1f}s (-j{jobs})")
+
+
+def _kill_worker(proc) -> None:
+    """Terminate a worker together with any subprocess it has spawned."""
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except OSError:
+            pass
+    if proc.is_alive():
+        proc.terminate()
+    proc.join(timeout=5)
+
+
+def run_batch(
+    paths: Iterable[str],
+    workers: Optional[int] = None,
+    timeout: Optional[float] = None,
+    config: Optional[BatchConfig] = None,
+) -> Iterator[BatchResult]:
+    """
+    Run the pipeline over many files on a process pool.
+
+    Parameters
+    ----------
+    paths : iterable of str
+        Source files to process.
+    workers : int, optional
+        Number of worker processes (default: CPU count, capped at len(paths)).
+    timeout : float, optional
+        Per-file wall-clock limit in seconds.  None disables the limit.
+    config : BatchConfig, optional
+        LLM backend / feature switches each worker should use.
+
+    Yields
+    ------
+    BatchResult, in completion order.
+    """
+    paths = list(paths)
+    if not paths:
+        return
+    config  = config or BatchConfig()
+    workers = max(1, min(workers or os.cpu_count() or 1, len(paths)))
+
+    mp       = multiprocessing.get_context()
+    result_q = mp.Queue()
+    pending  = deque(range(len(paths)))            # indices not yet handed out
+
+    procs: Dict[int, "multiprocessing.Process"] = {}
+    inboxes: Dict[int, "multiprocessing.Queue"] = {}
+    running: Dict[int, Tuple[int, float]] = {}     # pid -> (index, start time)
+
+    def _spawn() -> None:
+        inbox = mp.Queue()
+        proc = mp.Process(
+            target=_worker_main,
+            args=(config, inbox, result_q),
+            daemon=True,
+        )
+        proc.start()
+        procs[proc.pid] = proc
+        inboxes[proc.pid] = inbox
+
+    def _retire(pid: int) -> None:
+        _kill_worker(procs.pop(pid))
+        inboxes.pop(pid).close()
+
+    def _dispatch(pid: int) -> None:
+        if pending and pid in procs:
+            index = pending.popleft()
+            running[pid] = (index, time.time())
+            inboxes[pid].put((index, paths[index]))
+
+    def _failed(index: int, reason: str, started: float,
+                timed_out: bool = False) -> BatchResult:
+        logger.warning(f"Batch: {paths[index]} — {reason}")
+        return BatchResult(
+            index=index,
+            file_path=paths[index],
+            result=PipelineResult(file_path=paths[index], status="failed", error=reason),
+            elapsed_s=time.time() - started,
+            timed_out=timed_out,
+        )
+
+    def _abandon(pid: int, reason: str, timed_out: bool) -> BatchResult:
+        index, started = running.pop(pid)
+        _retire(pid)
+        if pending:
+            _spawn()
+        return _failed(index, reason, started, timed_out)
+
+    if config.security:
+        _prefetch_cppcheck(paths, jobs=workers)
+
+    logger.info(f"Batch: {len(paths)} file(s) on {workers} worker process(es)")
+    for _ in range(workers):
+        _spawn()
+
+    remaining = len(paths)
+    respawns = 0
+    init_error: Optional[str] = None
+    t_start = time.time()
+    try:
+        while remaining:
+            try:
+                msg = result_q.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                msg = None
+
+            if msg is not None and msg[0] == "ready":
+                _dispatch(msg[1])
+            elif msg is not None and msg[0] == "init_failed":
+                _, pid, init_error = msg
+                logger.warning(f"Batch: worker {pid} could not start — {init_error}")
+            elif msg is not None and msg[0] == "done":
+                _, pid, index, result, elapsed = msg
+                if running.get(pid, (None,))[0] != index:
+                    continue          # late result from a worker we already gave up on
+                running.pop(pid, None)
+                remaining -= 1
+                yield BatchResult(index=index, file_path=paths[index],
+                                  result=result, elapsed_s=elapsed)
+                _dispatch(pid)
+
+            now = time.time()
+            for pid, (index, started) in list(running.items()):
+                if timeout is not None and now - started > timeout:
+                    remaining -= 1
+                    yield _abandon(pid, f"Timed out after {timeout:g}s", timed_out=True)
+                elif not procs[pid].is_alive():
+                    remaining -= 1
+                    yield _abandon(
+                        pid, f"Worker exited with code {procs[pid].exitcode}",
+                        timed_out=False,
+                    )
+
+            # Workers that died holding no file: replace them, within limits
+            for pid in [pid for pid, proc in procs.items()
+                        if pid not in running and not proc.is_alive()]:
+                _retire(pid)
+                if pending and respawns < _MAX_RESPAWNS:
+                    respawns += 1
+                    _spawn()
+
+            if pending and not procs:
+                reason = (f"No worker could start: {init_error}" if init_error
+                          else "No worker left to run this file")
+                while pending:
+                    remaining -= 1
+                    yield _failed(pending.popleft(), reason, t_start)
+    finally:
+        for inbox in inboxes.values():
+            inbox.put(None)
+        for pid, proc in procs.items():
+            proc.join(timeout=5)
+            if proc.is_alive():
+                _kill_worker(proc)
+            inboxes[pid].close()
+        result_q.close()
@@ -0,0 +1,137 @@
+"""
+Stage DAG — dependency-driven scheduler for pipeline stages
+
+A StageGraph holds named async stages and the stages each one consumes.
+run() starts every stage as an asyncio task at once; a stage awaits the
+results of its dependencies, is then called with them as keyword
+arguments, and so begins the moment its inputs exist.  Stages with no
+path between them therefore overlap: in CompilerOptimizationPipeline the
+original-side work (security baseline, original compiles) runs while the
+optimization LLM call is in flight.
+
+A stage that raises is recorded in DagRun.errors.  Its dependents are not
+called — they fail with UpstreamFailed — unless the stage was added with
+optional=True, in which case they receive None in its place.
+
+Usage
+-----
+graph = StageGraph()
+graph.add("analysis", analyse)
+graph.add("warm", warm_caches, optional=True)
+graph.add("optimization", optimise, deps=("analysis",))
+graph.add("verify", verify, deps=("optimization", "warm"))
+run = await graph.run()
+if run.ok("verify"):
+    report = run.results["verify"]
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamFailed(Exception):
+    """A stage was not run because a required dependency failed."""
+
+    def __init__(self, stage: str, dependency: str):
+        super().__init__(f"{stage}: dependency '{dependency}' failed")
+        self.stage = stage
+        self.dependency = dependency
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable[..., Awaitable[Any]]
+    deps: Tuple[str, ...] = ()
+    optional: bool = False          # failure does not block dependents
+
+
+@dataclass
+class DagRun:
+    """Outcome of StageGraph.run()."""
+    results: Dict[str, Any] = field(default_factory=dict)
+    errors: Dict[str, BaseException] = field(default_factory=dict)
+    timings: Dict[str, Tuple[float, float]] = field(default_factory=dict)  # (start, end) s
+
+    def ok(self, name: str) -> bool:
+        return name in self.results
+
+
+class StageGraph:
+    """Named async stages with explicit data dependencies."""
+
+    def __init__(self):
+        self.stages: Dict[str, Stage] = {}
+
+    def add(self, name: str, fn: Callable[..., Awaitable[Any]],
+            deps: Tuple[str, ...] = (), optional: bool = False) -> "StageGraph":
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage '{name}'")
+        self.stages[name] = Stage(name, fn, tuple(deps), optional)
+        return self
+
+    def order(self) -> List[str]:
+        """Stages in a dependency-respecting order; ValueError on a cycle or unknown stage."""
+        for stage in self.stages.values():
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+        pending = {name: len(stage.deps) for name, stage in self.stages.items()}
+        users: Dict[str, List[str]] = {name: [] for name in self.stages}
+        for stage in self.stages.values():
+            for dep in stage.deps:
+                users[dep].append(stage.name)
+        ready = [name for name, count in pending.items() if count == 0]
+        order: List[str] = []
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            for user in users[name]:
+                pending[user] -= 1
+                if pending[user] == 0:
+                    ready.append(user)
+        if len(order) != len(self.stages):
+            cyclic = sorted(set(self.stages) - set(order))
+            raise ValueError(f"Stage graph has a cycle through {cyclic}")
+        return order
+
+    async def run(self) -> DagRun:
+        """Run every stage as soon as its dependencies have finished."""
+        order = self.order()
+        run = DagRun()
+        t0 = time.perf_counter()
+        tasks: Dict[str, "asyncio.Future"] = {}
+
+        async def execute(stage: Stage) -> Any:
+            inputs = {}
+            for dep in stage.deps:
+                try:
+                    inputs[dep] = await tasks[dep]
+                except Exception as exc:
+                    if not self.stages[dep].optional:
+                        raise UpstreamFailed(stage.name, dep) from exc
+                    inputs[dep] = None
+            start = time.perf_counter() - t0
+            logger.debug(f"StageGraph: {stage.name} started at {start:.3f}s")
+            try:
+                return await stage.fn(**inputs)
+            finally:
+                run.timings[stage.name] = (start, time.perf_counter() - t0)
+
+        for name in order:
+            tasks[name] = asyncio.ensure_future(execute(self.stages[name]))
+        outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+        for name, outcome in zip(tasks, outcomes):
+            if isinstance(outcome, BaseException):
+                run.errors[name] = outcome
+                if self.stages[name].optional and not isinstance(outcome, UpstreamFailed):
+                    logger.debug(f"StageGraph: optional stage {name} failed: {outcome}")
+            else:
+                run.results[name] = outcome
+        return run
@@ -2,12 +2,24 @@
 Compiler Optimization Pipeline — Weeks 6–8
 
 Chains: AnalysisAgent → OptimizationAgent → VerificationAgent → SecurityAgent
-All agents share a single ContextManager instance.
+All agents share a single ContextManager instance; each run works in a
+namespace of its own, so one long-lived pipeline can serve concurrent runs.
+
+The steps run as a DAG of stages (src.pipeline.dag) wired by their data
+dependencies, so original-side work — the security scan of the original
+and the original's compiles — overlaps the optimization LLM call.
+
+With message_passing=True each step is a REQUEST routed through the agent
+registry to the agent's own processing thread (BaseAgent.submit), and the
+stage awaits the reply; registry.get_statistics()["mailboxes"] then reports
+each agent's queue depth and throughput.
 """
 
+import asyncio
 import logging
 import os
 import sys
+from contextvars import ContextVar
 from dataclasses import dataclass, field
 from typing import Any, Dict, Optional
 
@@ -15,16 +27,23 @@ _root = os.path.join(os.path.dirname(__file__), "..", "..")
 if _root not in sys.path:
     sys.path.insert(0, _root)
 
-from agent_framework import AgentRegistry, ContextManager
+from agent_framework import AgentRegistry, AgentState, ContextManager
 from agent_framework.message_protocol import Message, MessageType, MessagePriority
 from src.llm.llm_client import LLMClient
 from src.agents.analysis_agent import AnalysisAgent
 from src.agents.optimization_agent import OptimizationAgent
 from src.agents.verification_agent import VerificationAgent
 from src.agents.security_agent import SecurityAgent
+from src.pipeline.dag import StageGraph
+from src.verification.async_exec import run_sync
 
 logger = logging.getLogger(__name__)
 
+# Per-run MessageLogger passed to arun(), overriding the pipeline's own
+_run_observer: ContextVar[Optional[Any]] = ContextVar("pipeline_observer", default=None)
+# Per-run directory for OPT_<name> passed to arun(), overriding the agent's own
+_run_output_dir: ContextVar[Optional[str]] = ContextVar("pipeline_output_dir", default=None)
+
 
 @dataclass
 class PipelineResult:
@@ -92,26 +111,54 @@ class CompilerOptimizationPipeline:
     pipeline = CompilerOptimizationPipeline()
     result = pipeline.run("path/to/file.cpp")
     print(result.summary())
+
+    results = await asyncio.gather(*(CompilerOptimizationPipeline(llm_client=llm).arun(p)
+                                     for p in paths))
+
+    for item in pipeline.run_batch(paths, workers=4, timeout=600):
+        print(item.result.summary())
+
+    Pass cache=PipelineCache() to reuse results for unchanged sources
+    (see src.pipeline.result_cache), concurrent_verification=True to
+    overlap the compiles, Z3 and benchmark runs of Step 3, and
+    concurrent_security=True to run Step 4's LLM and cppcheck layers
+    alongside its rules and heuristics, each under a deadline.
+
+    message_passing=True runs the agents on their own threads and hands
+    them work as messages instead of calling them in-line; call close()
+    when done to stop those threads.
+
+    output_dir sets where optimized files (OPT_<name>) are written; a run
+    given its own output_dir writes there instead, so concurrent runs of
+    same-named files through one pipeline do not overwrite each other.
     """
 
-    def __init__(self, llm_client: LLMClient = None, message_logger=None):
+    def __init__(self, llm_client: LLMClient = None, message_logger=None,
+                 cache=None, concurrent_verification: bool = False,
+                 concurrent_security: bool = False,
+                 message_passing: bool = False,
+                 output_dir: Optional[str] = None):
         self.llm      = llm_client or LLMClient()
         self.context  = ContextManager()
         self.registry = AgentRegistry()
         self._msg_logger = message_logger  # optional MessageLogger
+        self.cache    = cache               # optional PipelineCache
+        self.message_passing = message_passing
 
         # Create agents
         self.analysis_agent = AnalysisAgent(
             "analysis_1", self.context, self.llm
         )
         self.optimization_agent = OptimizationAgent(
-            "optimization_1", self.context, self.llm
+            "optimization_1", self.context, self.llm, output_dir=output_dir,
         )
         self.verification_agent = VerificationAgent(
-            "verification_1", self.context, self.llm
+            "verification_1", self.context, self.llm,
+            concurrent=concurrent_verification,
         )
         self.security_agent = SecurityAgent(
-            "security_1", self.context, self.llm
+            "security_1", self.context, self.llm,
+            concurrent=concurrent_security,
         )
 
         # Register
@@ -129,10 +176,9 @@ class CompilerOptimizationPipeline:
         """
         Create a message and log it via the MessageLogger (pure observer).
 
-        We do NOT call registry.route_message() here because agent threads
-        are not started in pipeline mode — doing so would put messages on an
-        unread PriorityQueue and cause heapq comparison errors on Message
-        objects. The MessageLogger observes messages independently.
+        These messages narrate the run (requests, hand-off notifications,
+        summarised responses) and are not routed: the work itself reaches
+        the agents through _call().
         """
         msg = Message.create(
             sender_id=sender_id,
@@ -143,16 +189,117 @@ class CompilerOptimizationPipeline:
             correlation_id=corr_id,
         )
         # Notify observer only (no queue, no thread)
-        if self._msg_logger:
-            self._msg_logger._on_message(msg)
+        observer = _run_observer.get() or self._msg_logger
+        if observer:
+            observer._on_message(msg)
         logger.debug(
             f"MSG {msg.message_type.value}: {sender_id} → {receiver_id} "
             f"payload_keys={list(payload.keys())}"
         )
         return msg.message_id
 
-    def run(self, file_path: str) -> PipelineResult:
-        """Run the full pipeline on a C++ source file."""
+    async def _call(self, agent, payload: dict) -> dict:
+        """
+        Run one agent step: aprocess() in-line, or with message_passing a
+        REQUEST through the registry, handled on the agent's thread.
+
+        The request carries this task's contextvars, so the agent writes to
+        the run's context namespace.  Delivery may wait for room in the
+        agent's queue (MailboxFull after its send_timeout).
+        """
+        if not self.message_passing:
+            return await agent.aprocess(payload)
+        if agent.get_state() != AgentState.RUNNING:
+            agent.start()
+        future = await asyncio.to_thread(
+            agent.submit, payload, "pipeline", MessagePriority.HIGH
+        )
+        return await asyncio.wrap_future(future)
+
+    def close(self) -> None:
+        """Stop the agents' processing threads (message_passing mode)."""
+        self.registry.stop_all()
+
+    # ── Result cache helpers ──────────────────────────────────────────────────
+
+    async def _cached_stage(self, stage: str, inputs: tuple, compute, replay):
+        """
+        Return the cached output of a stage, or await compute() and store it.
+
+        On a hit the agent is skipped, so replay(result) re-applies the
+        context writes (and rollback) the agent would have made.
+        """
+        if self.cache is None:
+            return await compute()
+        key = self.cache.stage_key(stage, self, *inputs)
+        cached = self.cache.get(key)
+        if cached is not None:
+            logger.info(f"{stage.capitalize()}: cache hit")
+            replay(cached)
+            return cached
+        result = await compute()
+        if isinstance(result, dict) and result.get("timed_out_layers"):
+            return result               # partial (a layer was abandoned): retry next run
+        self.cache.set(key, result)
+        return result
+
+    def _replay_analysis(self, result: dict, source_code: str, file_path: str):
+        self.context.set("analysis_results", result)
+        self.context.set("original_code", source_code)
+        self.context.set("source_file", file_path)
+
+    def _replay_optimization(self, result: dict, file_path: str):
+        # The cached entry may come from another run; make sure OPT_<name>
+        # exists on disk just as if the agent had written it.
+        if "optimized_code" in result:
+            result["output_file"] = self.optimization_agent._save_output(
+                result["optimized_code"], file_path, _run_output_dir.get()
+            )
+        self.context.set("optimization_suggestions", result)
+
+    def _replay_verification(self, result: dict):
+        if result.get("status") == "ROLLBACK":
+            self.context.rollback()
+        self.context.set("verification_status", result)
+
+    def _replay_security(self, result: dict, file_path: str):
+        if result.get("status") == "ROLLBACK":
+            self.context.rollback()
+        if "file_path" in result:
+            result["file_path"] = file_path
+        self.context.set("security_findings", result)
+
+    def _from_cache(self, cached: PipelineResult, source_code: str,
+                    file_path: str) -> PipelineResult:
+        self._replay_analysis(cached.analysis_report, source_code, file_path)
+        if cached.optimization_report:
+            self._replay_optimization(cached.optimization_report, file_path)
+        if cached.verification_report:
+            self._replay_verification(cached.verification_report)
+        if cached.security_report:
+            self._replay_security(cached.security_report, file_path)
+        cached.file_path = file_path
+        logger.info(f"Pipeline complete (cached): {cached.status}")
+        return cached
+
+    def run(self, file_path: str, message_logger=None,
+            output_dir: Optional[str] = None) -> PipelineResult:
+        """Run the full pipeline on a C++ source file (blocking wrapper of arun)."""
+        return run_sync(self.arun(file_path, message_logger, output_dir))
+
+    async def arun(self, file_path: str, message_logger=None,
+                   output_dir: Optional[str] = None) -> PipelineResult:
+        """
+        Run the full pipeline on a C++ source file without blocking the loop.
+
+        LLM calls, compiles and test runs are awaited, so one event loop can
+        drive many runs at once, through one pipeline: every run writes to a
+        context namespace of its own (ContextManager.run_scope), which
+        becomes the pipeline's default context when the run finishes.
+        message_logger, if given, observes this run's messages instead of
+        the pipeline's own logger; output_dir, if given, receives this run's
+        optimized file instead of the optimization agent's directory.
+        """
         logger.info(f"Pipeline starting: {file_path}")
 
         if not os.path.isfile(file_path):
@@ -172,242 +319,52 @@ class CompilerOptimizationPipeline:
                 error=f"Cannot read file: {exc}",
             )
 
-        # Reset shared context for this run
-        self.context.clear()
-
-        # ── Step 1: Analysis ──────────────────────────────────────────────────
-        logger.info("Step 1/4: Analysis")
-
-        # Broadcast REQUEST to analysis agent (MessageLogger sees this)
-        req1_id = self._route(
-            sender_id="pipeline",
-            receiver_id="analysis_1",
-            msg_type=MessageType.REQUEST,
-            payload={
-                "action":      "analyse",
-                "file_path":   file_path,
-                "source_code": source_code,
-                "line_count":  source_code.count("\n"),
-            },
-        )
-
+        token = _run_observer.set(message_logger)
+        dir_token = _run_output_dir.set(output_dir)
         try:
-            analysis_result = self.analysis_agent.process({
-                "source_code": source_code,
-                "file_path":   file_path,
-            })
-        except Exception as exc:
-            logger.error(f"Analysis failed: {exc}")
+            with self.context.run_scope(publish=True):
+                return await self._arun(source_code, file_path)
+        finally:
+            _run_output_dir.reset(dir_token)
+            _run_observer.reset(token)
+
+    async def _arun(self, source_code: str, file_path: str) -> PipelineResult:
+        """The run proper, inside the run's context namespace."""
+        result_key = None
+        if self.cache is not None:
+            result_key = self.cache.result_key(self, source_code, file_path)
+            cached = self.cache.get(result_key)
+            if cached is not None:
+                logger.info("Pipeline: result cache hit — skipping all stages")
+                return self._from_cache(cached, source_code, file_path)
+
+        run = await self._stage_graph(source_code, file_path).run()
+
+        if not run.ok("analysis"):
             return PipelineResult(
                 file_path=file_path, status="failed",
-                error=f"Analysis step failed: {exc}",
+                error=f"Analysis step failed: {run.errors['analysis']}",
             )
-
-        # Agent responds back to pipeline
-        self._route(
-            sender_id="analysis_1",
-            receiver_id="pipeline",
-            msg_type=MessageType.RESPONSE,
-            payload={
-                "status":       "ok",
-                "findings":     len(analysis_result.get("all_findings", [])),
-                "confidence":   analysis_result.get("confidence", 0),
-                "conclusion":   analysis_result.get("conclusion", ""),
-                "high_sev":     sum(1 for f in analysis_result.get("all_findings", [])
-                                   if f.get("severity") == "high"),
-            },
-            corr_id=req1_id,
-        )
-
-        # ── Step 2: Optimization ──────────────────────────────────────────────
-        logger.info("Step 2/4: Optimization")
-
-        # Notify optimization agent that analysis is ready
-        req2_id = self._route(
-            sender_id="analysis_1",
-            receiver_id="optimization_1",
-            msg_type=MessageType.NOTIFICATION,
-            payload={
-                "action":    "analysis_complete",
-                "findings":  len(analysis_result.get("all_findings", [])),
-                "conclusion": analysis_result.get("conclusion", ""),
-            },
-        )
-
-        # Pipeline issues the optimise REQUEST
-        req2b_id = self._route(
-            sender_id="pipeline",
-            receiver_id="optimization_1",
-            msg_type=MessageType.REQUEST,
-            payload={
-                "action":      "optimise",
-                "file_path":   file_path,
-                "source_code": source_code,
-                "n_findings":  len(analysis_result.get("all_findings", [])),
-            },
-        )
-
-        try:
-            opt_result = self.optimization_agent.process({
-                "source_code":     source_code,
-                "file_path":       file_path,
-                "analysis_report": analysis_result,
-            })
-        except Exception as exc:
-            logger.error(f"Optimization failed: {exc}")
+        analysis_result = run.results["analysis"]
+        if not run.ok("optimization"):
             return PipelineResult(
                 file_path=file_path, status="partial",
                 analysis_report=analysis_result,
-                error=f"Optimization step failed: {exc}",
+                error=f"Optimization step failed: {run.errors['optimization']}",
             )
-
-        # Optimization agent responds
-        self._route(
-            sender_id="optimization_1",
-            receiver_id="pipeline",
-            msg_type=MessageType.RESPONSE,
-            payload={
-                "status":          "ok",
-                "transformations": len(opt_result.get("transformations", [])),
-                "output_file":     opt_result.get("output_file", ""),
-                "conclusion":      opt_result.get("conclusion", ""),
-                "confidence":      opt_result.get("confidence", 0),
-                "diff_size":       len(opt_result.get("unified_diff", "")),
-            },
-            corr_id=req2b_id,
-        )
-
-        # ── Step 3: Verification ──────────────────────────────────────────────
-        logger.info("Step 3/4: Verification")
-        optimized_code = opt_result.get("optimized_code", source_code)
-
-        # Optimization notifies verification that code is ready
-        req3_id = self._route(
-            sender_id="optimization_1",
-            receiver_id="verification_1",
-            msg_type=MessageType.NOTIFICATION,
-            payload={
-                "action":          "optimization_complete",
-                "transformations": len(opt_result.get("transformations", [])),
-                "diff_size":       len(opt_result.get("unified_diff", "")),
-            },
-        )
-
-        # Pipeline issues the verify REQUEST
-        req3b_id = self._route(
-            sender_id="pipeline",
-            receiver_id="verification_1",
-            msg_type=MessageType.REQUEST,
-            payload={
-                "action":           "verify",
-                "file_path":        file_path,
-                "original_code":    source_code,
-                "optimized_code":   optimized_code,
-            },
-        )
-
-        try:
-            ver_result = self.verification_agent.process({
-                "original_code":  source_code,
-                "optimized_code": optimized_code,
-                "file_path":      file_path,
-            })
-        except Exception as exc:
-            logger.error(f"Verification failed: {exc}")
+        opt_result = run.results["optimization"]
+        if not run.ok("verification"):
             return PipelineResult(
                 file_path=file_path, status="partial",
                 analysis_report=analysis_result,
                 optimization_report=opt_result,
-                error=f"Verification step failed: {exc}",
+                error=f"Verification step failed: {run.errors['verification']}",
             )
-
-        # Verification agent sends final verdict back to pipeline
-        self._route(
-            sender_id="verification_1",
-            receiver_id="pipeline",
-            msg_type=MessageType.RESPONSE,
-            payload={
-                "status":         ver_result.get("status"),
-                "diff_passed":    ver_result.get("diff_passed"),
-                "z3_status":      ver_result.get("z3_status"),
-                "perf_summary":   ver_result.get("perf_summary", ""),
-                "llm_verdict":    ver_result.get("llm_verdict", ""),
-                "conclusion":     ver_result.get("conclusion", ""),
-            },
-            corr_id=req3b_id,
-        )
-
-        # ── Step 4: Security ──────────────────────────────────────────────────
-        logger.info("Step 4/4: Security")
-
-        # If verification already rolled back, security scans the original code
-        ver_status   = ver_result.get("status", "PASS")
-        final_code   = optimized_code if ver_status not in ("ROLLBACK", "FAIL") \
-                       else source_code
-
-        req4_id = self._route(
-            sender_id="verification_1",
-            receiver_id="security_1",
-            msg_type=MessageType.NOTIFICATION,
-            payload={
-                "action":       "verification_complete",
-                "ver_status":   ver_status,
-                "final_code_len": len(final_code),
-            },
-        )
-
-        req4b_id = self._route(
-            sender_id="pipeline",
-            receiver_id="security_1",
-            msg_type=MessageType.REQUEST,
-            payload={
-                "action":          "security_audit",
-                "file_path":       file_path,
-                "original_code":   source_code,
-                "optimized_code":  final_code,
-            },
-        )
-
-        if self.security_agent is None:
-            logger.info("Step 4/4: Security — skipped (no security agent)")
-            sec_result = {
-                "all_vulnerabilities": [], "new_vulnerabilities": [],
-                "overall_risk": "unknown", "status": "PASS",
-                "summary": "Security audit skipped.", "sources": [],
-            }
-        else:
-            try:
-                sec_result = self.security_agent.process({
-                    "original_code":  source_code,
-                    "optimized_code": final_code,
-                    "file_path":      file_path,
-                })
-            except Exception as exc:
-                logger.error(f"Security audit failed: {exc}")
-                sec_result = {
-                    "all_vulnerabilities": [],
-                    "new_vulnerabilities": [],
-                    "overall_risk": "unknown",
-                    "status": "PASS",
-                    "summary": f"Security audit failed: {exc}",
-                    "sources": [],
-                }
-
-        self._route(
-            sender_id="security_1",
-            receiver_id="pipeline",
-            msg_type=MessageType.RESPONSE,
-            payload={
-                "status":       sec_result.get("status"),
-                "overall_risk": sec_result.get("overall_risk"),
-                "total_vulns":  len(sec_result.get("all_vulnerabilities", [])),
-                "new_vulns":    len(sec_result.get("new_vulnerabilities", [])),
-                "sources":      sec_result.get("sources", []),
-            },
-            corr_id=req4b_id,
-        )
+        ver_result = run.results["verification"]
+        sec_result = run.results["security"]
 
         # ── Determine overall status ──────────────────────────────────────────
+        ver_status = ver_result.get("status", "PASS")
         if ver_status == "ROLLBACK" or sec_result.get("status") == "ROLLBACK":
             status = "rollback"
         elif ver_status == "FAIL":
@@ -416,7 +373,7 @@ class CompilerOptimizationPipeline:
             status = "success"
 
         logger.info(f"Pipeline complete: {status}")
-        return PipelineResult(
+        result = PipelineResult(
             file_path=file_path,
             status=status,
             analysis_report=analysis_result,
@@ -424,21 +381,324 @@ class CompilerOptimizationPipeline:
             verification_report=ver_result,
             security_report=sec_result,
         )
+        if (result_key is not None and not sec_result.get("timed_out_layers")
+                and not sec_result.get("error")):
+            self.cache.set(result_key, result)    # partial or failed audits are redone
+        return result
+
+    # ── Stage graph ───────────────────────────────────────────────────────────
+
+    def _stage_graph(self, source_code: str, file_path: str) -> StageGraph:
+        """
+        The four steps as a DAG over their data dependencies:
+
+            analysis ──► optimization ──► verification ──► security
+                         original_build ──┘                  │
+                         security_baseline ──────────────────┘
+
+        original_build and security_baseline need only the source, so they
+        run while analysis and the optimization LLM call are in flight; they
+        fill the compile and finding caches that verification and security
+        then hit.  Both are optional: if one fails, its consumer simply does
+        the work itself.
+        """
+        name = os.path.basename(file_path)
+
+        # ── Original-side preparation ─────────────────────────────────────────
+        async def original_build():
+            logger.info("Prep: building original binaries (overlaps optimization)")
+            await self.verification_agent.aprepare(source_code)
+
+        async def security_baseline():
+            if self.security_agent is not None:
+                logger.info("Prep: security scan of the original (overlaps optimization)")
+                await self.security_agent.aprepare(source_code)
+
+        # ── Step 1: Analysis ──────────────────────────────────────────────────
+        async def analysis():
+            logger.info("Step 1/4: Analysis")
+
+            # Broadcast REQUEST to analysis agent (MessageLogger sees this)
+            req1_id = self._route(
+                sender_id="pipeline",
+                receiver_id="analysis_1",
+                msg_type=MessageType.REQUEST,
+                payload={
+                    "action":      "analyse",
+                    "file_path":   file_path,
+                    "source_code": source_code,
+                    "line_count":  source_code.count("\n"),
+                },
+            )
+
+            try:
+                analysis_result = await self._cached_stage(
+                    "analysis", (source_code, name),
+                    lambda: self._call(self.analysis_agent, {
+                        "source_code": source_code,
+                        "file_path":   file_path,
+                    }),
+                    lambda r: self._replay_analysis(r, source_code, file_path),
+                )
+            except Exception as exc:
+                logger.error(f"Analysis failed: {exc}")
+                raise
+
+            # Agent responds back to pipeline
+            self._route(
+                sender_id="analysis_1",
+                receiver_id="pipeline",
+                msg_type=MessageType.RESPONSE,
+                payload={
+                    "status":       "ok",
+                    "findings":     len(analysis_result.get("all_findings", [])),
+                    "confidence":   analysis_result.get("confidence", 0),
+                    "conclusion":   analysis_result.get("conclusion", ""),
+                    "high_sev":     sum(1 for f in analysis_result.get("all_findings", [])
+                                       if f.get("severity") == "high"),
+                },
+                corr_id=req1_id,
+            )
+            return analysis_result
+
+        # ── Step 2: Optimization ──────────────────────────────────────────────
+        async def optimization(analysis):
+            logger.info("Step 2/4: Optimization")
+
+            # Notify optimization agent that analysis is ready
+            self._route(
+                sender_id="analysis_1",
+                receiver_id="optimization_1",
+                msg_type=MessageType.NOTIFICATION,
+                payload={
+                    "action":    "analysis_complete",
+                    "findings":  len(analysis.get("all_findings", [])),
+                    "conclusion": analysis.get("conclusion", ""),
+                },
+            )
+
+            # Pipeline issues the optimise REQUEST
+            req2b_id = self._route(
+                sender_id="pipeline",
+                receiver_id="optimization_1",
+                msg_type=MessageType.REQUEST,
+                payload={
+                    "action":      "optimise",
+                    "file_path":   file_path,
+                    "source_code": source_code,
+                    "n_findings":  len(analysis.get("all_findings", [])),
+                },
+            )
+
+            try:
+                opt_result = await self._cached_stage(
+                    "optimization", (source_code, name, analysis),
+                    lambda: self._call(self.optimization_agent, {
+                        "source_code":     source_code,
+                        "file_path":       file_path,
+                        "analysis_report": analysis,
+                        "output_dir":      _run_output_dir.get(),
+                    }),
+                    lambda r: self._replay_optimization(r, file_path),
+                )
+            except Exception as exc:
+                logger.error(f"Optimization failed: {exc}")
+                raise
+
+            # Optimization agent responds
+            self._route(
+                sender_id="optimization_1",
+                receiver_id="pipeline",
+                msg_type=MessageType.RESPONSE,
+                payload={
+                    "status":          "ok",
+                    "transformations": len(opt_result.get("transformations", [])),
+                    "output_file":     opt_result.get("output_file", ""),
+                    "conclusion":      opt_result.get("conclusion", ""),
+                    "confidence":      opt_result.get("confidence", 0),
+                    "diff_size":       len(opt_result.get("unified_diff", "")),
+                },
+                corr_id=req2b_id,
+            )
+            return opt_result
+
+        # ── Step 3: Verification ──────────────────────────────────────────────
+        async def verification(optimization, original_build):
+            logger.info("Step 3/4: Verification")
+            optimized_code = optimization.get("optimized_code", source_code)
+
+            # Optimization notifies verification that code is ready
+            self._route(
+                sender_id="optimization_1",
+                receiver_id="verification_1",
+                msg_type=MessageType.NOTIFICATION,
+                payload={
+                    "action":          "optimization_complete",
+                    "transformations": len(optimization.get("transformations", [])),
+                    "diff_size":       len(optimization.get("unified_diff", "")),
+                },
+            )
+
+            # Pipeline issues the verify REQUEST
+            req3b_id = self._route(
+                sender_id="pipeline",
+                receiver_id="verification_1",
+                msg_type=MessageType.REQUEST,
+                payload={
+                    "action":           "verify",
+                    "file_path":        file_path,
+                    "original_code":    source_code,
+                    "optimized_code":   optimized_code,
+                },
+            )
+
+            try:
+                ver_result = await self._cached_stage(
+                    "verification", (source_code, name, optimized_code),
+                    lambda: self._call(self.verification_agent, {
+                        "original_code":  source_code,
+                        "optimized_code": optimized_code,
+                        "file_path":      file_path,
+                    }),
+                    self._replay_verification,
+                )
+            except Exception as exc:
+                logger.error(f"Verification failed: {exc}")
+                raise
+
+            # Verification agent sends final verdict back to pipeline
+            self._route(
+                sender_id="verification_1",
+                receiver_id="pipeline",
+                msg_type=MessageType.RESPONSE,
+                payload={
+                    "status":         ver_result.get("status"),
+                    "diff_passed":    ver_result.get("diff_passed"),
+                    "z3_status":      ver_result.get("z3_status"),
+                    "perf_summary":   ver_result.get("perf_summary", ""),
+                    "llm_verdict":    ver_result.get("llm_verdict", ""),
+                    "conclusion":     ver_result.get("conclusion", ""),
+                },
+                corr_id=req3b_id,
+            )
+            return ver_result
+
+        # ── Step 4: Security ──────────────────────────────────────────────────
+        async def security(optimization, verification, security_baseline):
+            logger.info("Step 4/4: Security")
+
+            # If verification already rolled back, security scans the original code
+            ver_status = verification.get("status", "PASS")
+            final_code = optimization.get("optimized_code", source_code) \
+                if ver_status not in ("ROLLBACK", "FAIL") else source_code
+
+            self._route(
+                sender_id="verification_1",
+                receiver_id="security_1",
+                msg_type=MessageType.NOTIFICATION,
+                payload={
+                    "action":       "verification_complete",
+                    "ver_status":   ver_status,
+                    "final_code_len": len(final_code),
+                },
+            )
+
+            req4b_id = self._route(
+                sender_id="pipeline",
+                receiver_id="security_1",
+                msg_type=MessageType.REQUEST,
+                payload={
+                    "action":          "security_audit",
+                    "file_path":       file_path,
+                    "original_code":   source_code,
+                    "optimized_code":  final_code,
+                },
+            )
+
+            if self.security_agent is None:
+                logger.info("Step 4/4: Security — skipped (no security agent)")
+                sec_result = {
+                    "all_vulnerabilities": [], "new_vulnerabilities": [],
+                    "overall_risk": "unknown", "status": "PASS",
+                    "summary": "Security audit skipped.", "sources": [],
+                }
+            else:
+                try:
+                    sec_result = await self._cached_stage(
+                        "security", (source_code, name, final_code),
+                        lambda: self._call(self.security_agent, {
+                            "original_code":  source_code,
+                            "optimized_code": final_code,
+                            "file_path":      file_path,
+                        }),
+                        lambda r: self._replay_security(r, file_path),
+                    )
+                except Exception as exc:
+                    logger.error(f"Security audit failed: {exc}")
+                    sec_result = {
+                        "all_vulnerabilities": [],
+                        "new_vulnerabilities": [],
+                        "overall_risk": "unknown",
+                        "status": "PASS",
+                        "summary": f"Security audit failed: {exc}",
+                        "sources": [],
+                        "error": True,      # no audit ran: never cached
+                    }
+
+            self._route(
+                sender_id="security_1",
+                receiver_id="pipeline",
+                msg_type=MessageType.RESPONSE,
+                payload={
+                    "status":       sec_result.get("status"),
+                    "overall_risk": sec_result.get("overall_risk"),
+                    "total_vulns":  len(sec_result.get("all_vulnerabilities", [])),
+                    "new_vulns":    len(sec_result.get("new_vulnerabilities", [])),
+                    "sources":      sec_result.get("sources", []),
+                },
+                corr_id=req4b_id,
+            )
+            return sec_result
+
+        return (
+            StageGraph()
+            .add("original_build", original_build, optional=True)
+            .add("security_baseline", security_baseline, optional=True)
+            .add("analysis", analysis)
+            .add("optimization", optimization, deps=("analysis",))
+            .add("verification", verification, deps=("optimization", "original_build"))
+            .add("security", security,
+                 deps=("optimization", "verification", "security_baseline"))
+        )
+
+    def run_batch(self, paths, workers: int = None, timeout: float = None):
+        """
+        Run the pipeline over many files on a process pool.
+
+        Each worker process builds its own pipeline with the same LLM backend
+        and security setting as this one.  Yields BatchResult objects as files
+        finish; see src.pipeline.batch.run_batch for details.
+        """
+        from src.pipeline.batch import BatchConfig, run_batch
+        return run_batch(
+            paths, workers=workers, timeout=timeout,
+            config=BatchConfig.from_pipeline(self),
+        )
 
     def run_string(self, source_code: str, label: str = "<string>") -> PipelineResult:
         """Run the pipeline on a code string (for testing)."""
-        import tempfile, os
+        import shutil, tempfile
+        tmp_dir = tempfile.mkdtemp(prefix="pipeline_")
         with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".cpp", delete=False, encoding="utf-8"
+            mode="w", suffix=".cpp", dir=tmp_dir, delete=False, encoding="utf-8"
         ) as tmp:
             tmp.write(source_code)
             tmp_path = tmp.name
         try:
-            result = self.run(tmp_path)
+            # The optimized file goes next to the temporary source and is
+            # removed with it; the code itself is in optimization_report.
+            result = self.run(tmp_path, output_dir=tmp_dir)
             result.file_path = label
             return result
         finally:
-            try:
-                os.unlink(tmp_path)
-            except OSError:
-                pass
+            shutil.rmtree(tmp_dir, ignore_errors=True)
@@ -0,0 +1,104 @@
+"""
+Pipeline Result Cache
+
+Content-addressed cache for CompilerOptimizationPipeline, stored on disk
+through src.cache.disk_cache.DiskCache.
+
+Two levels are kept:
+  • whole results — keyed by the source text, its file name, every agent's
+    LLM fingerprint and the g++ / z3 / cppcheck versions.  A hit returns the
+    stored PipelineResult without running any agent.
+  • per stage — analysis, optimization, verification and security each get
+    a key built only from that stage's own inputs and environment.  Stages
+    downstream of a change are keyed on the upstream *output*, so switching
+    the optimization LLM re-runs optimization (and whatever its new output
+    feeds) but keeps the cached analysis.
+
+The file name (not its directory) is part of every key because the
+optimized file is saved as OPT_<name> and diff headers mention it.
+
+Bump CACHE_VERSION whenever an agent's result format changes.
+"""
+
+import os
+from typing import Any, Optional
+
+from src.cache.disk_cache import DEFAULT_MAX_BYTES, DiskCache
+from src.cache.keys import content_hash, llm_fingerprint, tool_version, z3_version
+
+CACHE_VERSION = 1
+
+_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DEFAULT_CACHE_DIR = os.path.join(_root, ".cache", "pipeline")
+
+STAGES = ("analysis", "optimization", "verification", "security")
+
+
+class PipelineCache:
+    """
+    Stage- and result-level cache for one or more pipelines.
+
+    Usage
+    -----
+    pipeline = CompilerOptimizationPipeline(cache=PipelineCache())
+    """
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_entries: Optional[int] = None,
+    ):
+        self.store = DiskCache(directory, max_bytes=max_bytes, max_entries=max_entries)
+
+    @property
+    def directory(self) -> str:
+        return self.store.directory
+
+    # ── Keys ──────────────────────────────────────────────────────────────────
+
+    def stage_env(self, stage: str, pipeline) -> Any:
+        """Everything outside the stage's inputs that can change its output."""
+        if stage == "analysis":
+            return llm_fingerprint(pipeline.analysis_agent.llm)
+        if stage == "optimization":
+            return llm_fingerprint(pipeline.optimization_agent.llm)
+        if stage == "verification":
+            agent = pipeline.verification_agent
+            return [
+                llm_fingerprint(agent.llm),
+                tool_version(agent.diff_tester.compiler),
+                tool_version(agent.perf.compiler),
+                z3_version(),
+            ]
+        if stage == "security":
+            agent = pipeline.security_agent
+            if agent is None:
+                return "disabled"
+            return [llm_fingerprint(agent.llm), tool_version("cppcheck")]
+        raise ValueError(f"Unknown pipeline stage: {stage}")
+
+    def stage_key(self, stage: str, pipeline, *inputs: Any) -> str:
+        return content_hash(
+            CACHE_VERSION, "stage", stage, self.stage_env(stage, pipeline), *inputs
+        )
+
+    def result_key(self, pipeline, source_code: str, file_path: str) -> str:
+        return content_hash(
+            CACHE_VERSION, "result", source_code, os.path.basename(file_path),
+            [self.stage_env(stage, pipeline) for stage in STAGES],
+        )
+
+    # ── Storage ───────────────────────────────────────────────────────────────
+
+    def get(self, key: str) -> Any:
+        return self.store.get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        self.store.set(key, value)
+
+    def clear(self) -> None:
+        self.store.clear()
+
+    def stats(self) -> dict:
+        return self.store.stats()
@@ -2,7 +2,9 @@
 Chain-of-Thought (CoT) Validator — Week 6
 
 Parses and validates the JSON CoT output produced by the LLM.
-Handles responses wrapped in markdown code fences as well as raw JSON.
+Handles responses wrapped in markdown code fences as well as raw JSON,
+including a fence left unterminated because streaming stopped at the
+closing brace of the object.
 """
 
 import json
@@ -130,7 +132,19 @@ class CoTValidator:
                 return parsed
 
         # Fallback: try the entire text as JSON
-        return self._try_parse(text.strip())
+        parsed = self._try_parse(text.strip())
+        if parsed is not None:
+            return parsed
+
+        # Last resort: first object after any prose / unterminated fence
+        start = text.find("{")
+        if start == -1:
+            return None
+        try:
+            data, _ = json.JSONDecoder().raw_decode(text, start)
+        except json.JSONDecodeError:
+            return None
+        return data if isinstance(data, dict) else None
 
     def _try_parse(self, text: str) -> Optional[Dict[str, Any]]:
         try:
@@ -0,0 +1,237 @@
+"""
+cppcheck Runner — Layer 4 of SecurityAgent, batched and cached
+
+cppcheck is discovered once per process (cppcheck_available(), backed by
+the cached `cppcheck --version` banner), not once per SecurityAgent.
+
+Results are keyed by SHA-256 over the cppcheck version, the file suffix
+(.c / .cpp selects the language) and the source text, and stored twice:
+in the in-process FindingCache and on disk under .cache/cppcheck/, so an
+unchanged file never re-invokes the tool, in this process or the next.
+Only completed runs are stored; a timeout or crash is retried next time.
+
+scan_batch() hands every uncached source to ONE cppcheck invocation with
+-j N and splits the XML report back out per file by the first of each
+error's <location>s that is one of the scanned files.  An error no
+location ties to a file (none given, or all in headers) cannot be split
+out of a batch; those files are then rescanned one by one, so a source's
+cached findings never depend on whether it was scanned alone or batched.
+The batch runner uses scan_batch to audit all files of a run up front.
+
+Usage
+-----
+runner = get_cppcheck_runner()
+findings = runner.scan(code, ".cpp")            # None if cppcheck failed
+per_file = runner.scan_batch([(code_a, ".c"), (code_b, ".cpp")], jobs=4)
+"""
+
+import logging
+import math
+import os
+import subprocess
+import tempfile
+import threading
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.cache.disk_cache import DiskCache
+from src.cache.keys import content_hash, tool_version
+from src.security.finding_cache import get_finding_cache
+
+logger = logging.getLogger(__name__)
+
+_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DEFAULT_CPPCHECK_CACHE_DIR = os.path.join(_root, ".cache", "cppcheck")
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024      # 64 MB
+DEFAULT_TIMEOUT = 30.0                    # seconds per file (per -j slot)
+
+CPPCHECK_ARGS = ["--xml", "--xml-version=2", "--enable=warning,error", "--quiet"]
+
+_SEV_MAP = {
+    "error": "high", "warning": "medium",
+    "style": "low", "performance": "low",
+    "portability": "low", "information": "low",
+}
+
+
+def cppcheck_available(binary: str = "cppcheck") -> bool:
+    """Whether binary runs; `--version` is spawned at most once per process."""
+    return tool_version(binary) not in ("missing", "unknown")
+
+
+def suffix_for(file_path: str) -> str:
+    return ".cpp" if str(file_path).endswith(".cpp") else ".c"
+
+
+# ── XML report ────────────────────────────────────────────────────────────
+
+
+def parse_cppcheck_xml(xml_text: str) -> List[Tuple[List[Tuple[str, Optional[int]]], Dict]]:
+    """
+    (locations, finding) for every <error> in a cppcheck --xml-version=2
+    report; locations are the error's (file, line) pairs in report order,
+    and the finding's line is taken from the first of them (None if none).
+    """
+    findings: List[Tuple[List[Tuple[str, Optional[int]]], Dict]] = []
+    try:
+        root = ET.fromstring(xml_text)
+    except ET.ParseError as exc:
+        logger.warning(f"cppcheck: XML parse error — {exc}")
+        return findings
+    for error in root.iter("error"):
+        cwe = error.get("cwe")
+        eid = error.get("id", "unknown")
+        locations: List[Tuple[str, Optional[int]]] = []
+        for loc in error.iter("location"):
+            try:
+                ln = int(loc.get("line", 0)) or None
+            except (ValueError, TypeError):
+                ln = None
+            locations.append((loc.get("file") or "", ln))
+        findings.append((locations, {
+            "type":           f"cppcheck_{eid}",
+            "severity":       _SEV_MAP.get(error.get("severity", "warning"), "low"),
+            "line":           locations[0][1] if locations else None,
+            "description":    error.get("msg", "cppcheck finding"),
+            "cwe_id":         f"CWE-{cwe}" if cwe else None,
+            "recommendation": "Review and fix per cppcheck guidance.",
+            "confidence":     0.85,
+            "source":         "cppcheck",
+        }))
+    return findings
+
+
+# ── Runner ────────────────────────────────────────────────────────────────
+
+
+class CppcheckRunner:
+    """Content-addressed, batching front end to the cppcheck binary."""
+
+    def __init__(self, directory: Optional[str] = DEFAULT_CPPCHECK_CACHE_DIR,
+                 binary: str = "cppcheck", timeout: float = DEFAULT_TIMEOUT,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.binary  = binary
+        self.timeout = timeout
+        self.store   = DiskCache(directory, max_bytes=max_bytes) if directory else None
+        self.memory  = get_finding_cache()
+        self.invocations = 0
+
+    def key(self, code: str, suffix: str) -> str:
+        return content_hash("cppcheck", self.binary, tool_version(self.binary), suffix, code)
+
+    def scan(self, code: str, suffix: str = ".cpp") -> Optional[List[Dict]]:
+        """Findings for one source, or None if cppcheck did not complete."""
+        return self.scan_batch([(code, suffix)], jobs=1)[0]
+
+    def scan_batch(self, sources: Sequence[Tuple[str, str]],
+                   jobs: Optional[int] = None) -> List[Optional[List[Dict]]]:
+        """
+        Findings for each (code, suffix), in order.  Cached sources are not
+        rescanned; the rest (deduplicated) go to a single cppcheck run.
+        Entries are None where cppcheck failed.
+        """
+        keys = [self.key(code, suffix) for code, suffix in sources]
+        found: Dict[str, Tuple[Dict, ...]] = {}
+        pending: Dict[str, Tuple[str, str]] = {}
+        for key, source in zip(keys, sources):
+            if key in found or key in pending:
+                continue
+            cached = self._lookup(key)
+            if cached is not None:
+                found[key] = cached
+            else:
+                pending[key] = source
+
+        if pending:
+            scanned = self._run(list(pending.items()), jobs or os.cpu_count() or 1)
+            for key, findings in scanned.items():
+                if findings is not None:
+                    found[key] = tuple(findings)
+                    self._store(key, found[key])
+
+        return [[dict(f) for f in found[key]] if key in found else None for key in keys]
+
+    # ── Internals ─────────────────────────────────────────────────────────
+
+    def _lookup(self, key: str) -> Optional[Tuple[Dict, ...]]:
+        findings = self.memory.get(key)
+        if findings is None and self.store is not None:
+            findings = self.store.get(key)
+            if findings is not None:
+                self.memory.set(key, findings)
+        return findings
+
+    def _store(self, key: str, findings: Tuple[Dict, ...]) -> None:
+        self.memory.set(key, findings)
+        if self.store is not None:
+            self.store.set(key, findings)
+
+    def _run(self, items: List[Tuple[str, Tuple[str, str]]],
+             jobs: int) -> Dict[str, Optional[List[Dict]]]:
+        """One cppcheck process over every item; findings split back per key."""
+        results: Dict[str, Optional[List[Dict]]] = {key: None for key, _ in items}
+        jobs = max(1, min(jobs, len(items)))
+        with tempfile.TemporaryDirectory(prefix="cppcheck_") as tmp_dir:
+            by_name: Dict[str, str] = {}
+            for i, (key, (code, suffix)) in enumerate(items):
+                name = f"src{i}{suffix}"
+                with open(os.path.join(tmp_dir, name), "w", encoding="utf-8") as fh:
+                    fh.write(code)
+                by_name[name] = key
+
+            cmd = [self.binary] + CPPCHECK_ARGS
+            if jobs > 1:
+                cmd.append(f"-j{jobs}")
+            cmd += [os.path.join(tmp_dir, name) for name in by_name]
+            timeout = self.timeout * math.ceil(len(items) / jobs)
+            self.invocations += 1
+            try:
+                proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                logger.warning(f"cppcheck: timed out ({timeout:g} s, {len(items)} file(s))")
+                return results
+            except FileNotFoundError:
+                logger.warning("cppcheck: binary not found")
+                return results
+            except Exception as exc:
+                logger.warning(f"cppcheck: error — {exc}")
+                return results
+
+        for key in results:
+            results[key] = []
+        if proc.stderr.strip():
+            only = items[0][0] if len(items) == 1 else None
+            for locations, finding in parse_cppcheck_xml(proc.stderr):
+                key = None
+                for path, line in locations:
+                    key = by_name.get(os.path.basename(path))
+                    if key is not None:
+                        finding["line"] = line
+                        break
+                if key is None:
+                    if only is None:
+                        # Belongs to some file of the batch, but which one?
+                        logger.debug("cppcheck: unattributable error in batch, "
+                                     "rescanning files one by one")
+                        for item in items:
+                            results.update(self._run([item], 1))
+                        return results
+                    key = only
+                results[key].append(finding)
+        logger.debug(f"cppcheck: {len(items)} file(s) in one run (-j{jobs})")
+        return results
+
+
+# ── Shared instance ───────────────────────────────────────────────────────
+
+_default_runner: Optional[CppcheckRunner] = None
+_default_lock = threading.Lock()
+
+
+def get_cppcheck_runner() -> CppcheckRunner:
+    """Process-wide CppcheckRunner caching under .cache/cppcheck/."""
+    global _default_runner
+    with _default_lock:
+        if _default_runner is None:
+            _default_runner = CppcheckRunner()
+        return _default_runner
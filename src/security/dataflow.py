@@ -0,0 +1,260 @@
+"""
+Pointer Dataflow — def-use sweep for heap lifetime errors
+
+One forward pass over the token stream of each outermost function tracks,
+per pointer variable, whether it currently holds freed memory:
+
+  • free(p) / delete p / delete[] p   kill   → p is freed (at that line)
+  • p = …                             def    → p is live again
+  • *p   p->x   p[i]                   deref  → use_after_free if p is freed
+  • return p   q = p   f(p)           escape → dangling_pointer if p is freed
+  • freeing p while it is freed                → double_free
+
+A free inside a block that ends in return / throw does not reach the code
+after that block, so the common "if (err) { free(p); return; }" pattern is
+not reported.  One that ends in break / continue skips the rest of the
+loop (or switch) body but is live again after the loop's closing brace;
+goto is followed conservatively — the free stays live.  Each token is
+visited once and every check is a dict lookup, so the cost is linear in
+the size of the source no matter how many pointers are freed.
+
+Usage
+-----
+for issue in analyze_pointers(parsed_source(code)):
+    print(issue.kind, issue.var, issue.line, issue.freed_line)
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from src.parser.lexer import CHAR, IDENT, NUMBER, PUNCT, STRING, TokenStream
+
+USE_AFTER_FREE   = "use_after_free"
+DOUBLE_FREE      = "double_free"
+DANGLING_POINTER = "dangling_pointer"
+
+# identifiers after which '*' is a unary dereference, not a multiplication
+_UNARY_AFTER = frozenset({"return", "case", "throw", "sizeof", "co_return", "co_yield"})
+_JUMPS = frozenset({"return", "break", "continue", "goto", "throw"})
+_LEAVES = frozenset({"return", "throw"})     # jumps out of the function
+_OPERAND_PUNCT = frozenset({")", "]"})
+# first words of a parenthesised type, for telling (int)*p from (n)*p
+_TYPE_WORDS = frozenset({
+    "void", "char", "short", "int", "long", "float", "double", "signed",
+    "unsigned", "bool", "_Bool", "const", "volatile", "struct", "union",
+    "enum", "size_t", "ssize_t", "uintptr_t", "intptr_t", "wchar_t", "auto",
+})
+_CAST_PUNCT = frozenset({"*", "&", "::", "<", ">", ","})
+_LOOP, _SWITCH = "loop", "switch"
+_NOT_CALLS = frozenset({"if", "while", "for", "switch", "return", "sizeof"})
+
+
+@dataclass
+class PointerIssue:
+    kind: str           # USE_AFTER_FREE | DOUBLE_FREE | DANGLING_POINTER
+    var: str
+    line: int           # line of the offending use / second free
+    freed_line: int     # line of the free it refers to
+    token: int = -1     # token index of the offending use
+
+
+@dataclass
+class _Freed:
+    line: int
+    depth: int          # block depth of the free
+    reported: bool = False
+
+
+# ── Event recognition ─────────────────────────────────────────────────────
+
+
+def _freed_operand(ts: TokenStream, i: int, end: int) -> int:
+    """Token index of the pointer released by free(p) / delete p / delete[] p at i, or -1."""
+    texts, kinds = ts.texts, ts.kinds
+    if texts[i] == "free":
+        if (i + 3 <= end and texts[i + 1] == "(" and kinds[i + 2] == IDENT
+                and texts[i + 3] == ")" and (i == 0 or texts[i - 1] not in (".", "->"))):
+            return i + 2
+        return -1
+    # delete
+    j = i + 1
+    if j + 1 <= end and texts[j] == "[" and texts[j + 1] == "]":
+        j += 2
+    return j if j <= end and kinds[j] == IDENT else -1
+
+
+def _unary_star(ts: TokenStream, star: int, start: int) -> bool:
+    if star <= start:
+        return True
+    kind, text = ts.kinds[star - 1], ts.texts[star - 1]
+    if kind == PUNCT:
+        if text == ")":
+            return _is_cast(ts, star - 1, start)
+        return text not in _OPERAND_PUNCT
+    if kind == IDENT:
+        return text in _UNARY_AFTER
+    return kind not in (NUMBER, STRING, CHAR)
+
+
+def _is_cast(ts: TokenStream, close: int, start: int) -> bool:
+    """The parenthesised group ending at `close` is a cast: (int), (char *)."""
+    texts, kinds = ts.texts, ts.kinds
+    open_ = ts.match(close)
+    if open_ < start or open_ + 1 >= close:
+        return False
+    if open_ > start and (kinds[open_ - 1] == IDENT and texts[open_ - 1] not in _UNARY_AFTER
+                          or texts[open_ - 1] in _OPERAND_PUNCT):
+        return False                        # f(x) * p, a[i](x) * p
+    inner = range(open_ + 1, close)
+    if any(kinds[j] != IDENT and texts[j] not in _CAST_PUNCT for j in inner):
+        return False
+    first, last = texts[open_ + 1], texts[close - 1]
+    return first in _TYPE_WORDS or last in ("*", "&") or first.endswith("_t")
+
+
+def _block_kind(ts: TokenStream, brace: int, start: int) -> str:
+    """_LOOP / _SWITCH for the body of a for / while / do / switch, else ''."""
+    texts = ts.texts
+    if brace <= start:
+        return ""
+    prev = texts[brace - 1]
+    if prev == "do":
+        return _LOOP
+    if prev == ")":
+        open_ = ts.match(brace - 1)
+        if open_ > start:
+            head = texts[open_ - 1]
+            if head in ("for", "while"):
+                return _LOOP
+            if head == "switch":
+                return _SWITCH
+    return ""
+
+
+def _jump_target(blocks: List[int], kinds: Dict[int, str], jump: str) -> int:
+    """The open block a break / continue leaves through, or -1 (braceless loop)."""
+    for brace in reversed(blocks):
+        kind = kinds[brace]
+        if kind == _LOOP or (kind == _SWITCH and jump == "break"):
+            return brace
+    return -1
+
+
+def _is_call_argument(ts: TokenStream, i: int, end: int) -> bool:
+    """p is a whole argument of a call: f(…, p, …)."""
+    texts = ts.texts
+    if (i == 0 or i + 1 > end or texts[i - 1] not in ("(", ",")
+            or texts[i + 1] not in (")", ",")):
+        return False
+    j = i - 1
+    while texts[j] != "(":                  # back to the call's open paren
+        j = ts.match(j) - 1 if texts[j] == ")" else j - 1
+        if j < 0:
+            return False
+    return j > 0 and ts.kinds[j - 1] == IDENT and texts[j - 1] not in _NOT_CALLS
+
+
+# ── Sweep ─────────────────────────────────────────────────────────────────
+
+
+def _sweep(ts: TokenStream, start: int, end: int, issues: List[PointerIssue]) -> None:
+    """Analyse tokens start..end (inclusive) as one body."""
+    texts, kinds = ts.texts, ts.kinds
+    freed: Dict[str, _Freed] = {}
+    blocks: List[int] = []                  # open '{' tokens
+    block_kinds: Dict[int, str] = {}        # '{' -> _LOOP / _SWITCH / ''
+    exits: Dict[int, str] = {}              # block -> jump its own statements take
+    parked: Dict[int, Dict[str, _Freed]] = {}   # frees live again after this block
+    consumed = -1                           # operand of the last free/delete
+    i = start
+    while i <= end:
+        kind, text = kinds[i], texts[i]
+        if kind == PUNCT:
+            if text == "{":
+                blocks.append(i)
+                block_kinds[i] = _block_kind(ts, i, start)
+            elif text == "}" and blocks:
+                depth = len(blocks)
+                jump = exits.get(blocks[-1])
+                if jump in _LEAVES:         # frees in here never fall through
+                    for var in [v for v, f in freed.items() if f.depth >= depth]:
+                        del freed[var]
+                elif jump in ("break", "continue"):
+                    # skip the rest of the loop body, resume after the loop
+                    target = _jump_target(blocks, block_kinds, jump)
+                    if target >= 0 and target != blocks[-1]:
+                        for var in [v for v, f in freed.items() if f.depth >= depth]:
+                            parked.setdefault(target, {})[var] = freed.pop(var)
+                closed = blocks.pop()
+                for var, state in parked.pop(closed, {}).items():
+                    state.depth = min(state.depth, len(blocks))
+                    freed.setdefault(var, state)
+            i += 1
+            continue
+        if kind != IDENT:
+            i += 1
+            continue
+
+        if text in _JUMPS and blocks and i > start and texts[i - 1] in (";", "{", "}"):
+            exits.setdefault(blocks[-1], text)  # unconditional: a statement of its own
+        if text in ("free", "delete"):
+            operand = _freed_operand(ts, i, end)
+            if operand >= 0:
+                var, line = texts[operand], ts.line(i)
+                prior = freed.get(var)
+                if prior is not None:
+                    issues.append(PointerIssue(DOUBLE_FREE, var, line, prior.line, i))
+                freed[var] = _Freed(line, len(blocks))
+                consumed = operand
+                i = operand + 1
+                continue
+
+        state = freed.get(text)
+        if state is None or i == consumed:
+            i += 1
+            continue
+        prev = texts[i - 1] if i > start else ""
+        nxt = texts[i + 1] if i < end else ""
+        if prev in (".", "->", "::"):        # a member that shares the name
+            pass
+        elif nxt in ("->", "[") or (prev == "*" and _unary_star(ts, i - 1, start)):
+            if not state.reported:
+                issues.append(PointerIssue(USE_AFTER_FREE, text, ts.line(i), state.line, i))
+                state.reported = True
+        elif nxt == "=":
+            del freed[text]                 # redefined: no longer dangling
+        elif not state.reported and (prev == "return" or (prev == "=" and nxt in (";", ","))
+                                     or _is_call_argument(ts, i, end)):
+            issues.append(PointerIssue(DANGLING_POINTER, text, ts.line(i), state.line, i))
+            state.reported = True
+        i += 1
+
+
+def analyze_pointers(parsed) -> List[PointerIssue]:
+    """
+    Pointer lifetime issues in a ParsedSource, in source order.  Each
+    outermost function is its own body, and so is each stretch of code
+    between functions.
+    """
+    ts = parsed.tokens
+    n = len(ts)
+    if not n:
+        return []
+    bodies: List[Tuple[int, int]] = []
+    pos = 0
+    outside: List[Tuple[int, int]] = []
+    for fn in parsed.scopes.of_kind("function"):
+        if fn.start < pos:
+            continue
+        if fn.start > pos:
+            outside.append((pos, fn.start - 1))
+        bodies.append((fn.start, fn.end))
+        pos = fn.end + 1
+    if pos < n:
+        outside.append((pos, n - 1))
+
+    issues: List[PointerIssue] = []
+    for start, end in bodies + outside:
+        _sweep(ts, start, end, issues)
+    issues.sort(key=lambda issue: issue.token)
+    return issues
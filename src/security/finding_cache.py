@@ -0,0 +1,100 @@
+"""
+Finding Cache — in-process memo of SecurityAgent scan results
+
+Every audit scans the original code as well as the candidate, and when the
+pipeline iterates optimisation candidates against one original the
+baseline scan is the same work every time.  SecurityAgent therefore keys
+each scan result by a content hash of exactly what the scan reads:
+
+  • Layer 1 rule hits       — per region (one top-level function, or the
+                              text between functions) and rule-set
+                              fingerprint, so an unchanged function is never
+                              rescanned even inside a changed file;
+  • pointer dataflow,       — per whole source (Layer 2 correlates
+    Layer 2 heuristics        signals across functions);
+  • Layer 4 cppcheck        — per source, file suffix and cppcheck version;
+                              only completed runs are stored.
+
+Entries are treated as immutable; SecurityAgent hands out copies of the
+finding dicts.  The cache is a bounded LRU shared by every agent in the
+process.
+
+Usage
+-----
+cache = get_finding_cache()
+hits = cache.get_or_compute(content_hash("rules", fp, region), lambda: ...)
+cache.stats()      # {"entries": …, "hits": …, "misses": …}
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+DEFAULT_MAX_ENTRIES = 4096
+
+_MISSING = object()
+
+
+class FindingCache:
+    """Thread-safe LRU of scan results keyed by content hash."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: str, factory: Callable[[], Any]) -> Any:
+        """The cached value for key, computing and storing it on a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits,
+                    "misses": self.misses}
+
+
+# ── Shared instance ───────────────────────────────────────────────────────
+
+_default_cache: Optional[FindingCache] = None
+_default_lock = threading.Lock()
+
+
+def get_finding_cache() -> FindingCache:
+    """Process-wide FindingCache shared by every SecurityAgent."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = FindingCache()
+        return _default_cache
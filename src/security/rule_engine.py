@@ -0,0 +1,241 @@
+"""
+Security Rule Engine — compiled multi-pattern matcher for Layer 1
+
+Signatures live in a declarative JSON file (src/security/rules/layer1.json
+by default) and are compiled once into a single scanner:
+
+  • every rule is anchored on one or more identifiers (given, or inferred
+    from a leading \\bname / \\b(a|b) in its pattern);
+  • all anchors of all rules become one trie-shaped alternation, so one
+    finditer() pass over the buffer finds every candidate position at a
+    per-character cost that depends on the anchor length, not on the
+    number of rules;
+  • at a candidate, only the rules sharing that anchor are tried, with
+    pattern.match() at that offset;
+  • the few rules with no identifier anchor are combined into one
+    alternation of named groups and scanned in a second pass.
+
+So adding hundreds of CWE signatures costs dispatch work only where their
+anchors actually occur.  Rule order in the file is kept: hits come back
+sorted by (rule position, offset).
+
+Usage
+-----
+engine = get_rule_engine()                       # default rule file, cached
+for hit in engine.scan(code_text, line_of=tokens.line_of):
+    findings.append(hit.finding())
+
+engine = RuleEngine.load("my_rules.json")
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.cache.keys import content_hash
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), "rules", "layer1.json")
+
+_RE_ANCHOR_PREFIX = re.compile(r"\\b(?:([A-Za-z_]\w*)|\(((?:[A-Za-z_]\w*\|)*[A-Za-z_]\w*)\))")
+
+
+# ── Rules and hits ────────────────────────────────────────────────────────
+
+
+@dataclass
+class Rule:
+    """One Layer-1 signature, as declared in the rule file."""
+    id: str
+    pattern: str
+    severity: str
+    cwe: str
+    description: str
+    recommendation: str = ""
+    confidence: float = 0.9
+    anchors: List[str] = field(default_factory=list)
+    regex: Optional[re.Pattern] = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.regex = re.compile(self.pattern, re.MULTILINE)
+        if not self.anchors:
+            self.anchors = _infer_anchors(self.pattern)
+
+
+@dataclass
+class RuleHit:
+    rule: Rule
+    start: int
+    end: int
+    line: int
+    groups: Tuple[str, ...] = ()
+
+    def finding(self) -> Dict:
+        """The hit as a SecurityAgent finding dict."""
+        args = (self.rule.id,) + tuple(g or "" for g in self.groups)
+        return {
+            "type":           self.rule.id,
+            "severity":       self.rule.severity,
+            "line":           self.line,
+            "description":    self.rule.description.format(*args),
+            "cwe_id":         self.rule.cwe,
+            "recommendation": self.rule.recommendation.format(*args),
+            "confidence":     self.rule.confidence,
+            "source":         "rule",
+        }
+
+
+def _infer_anchors(pattern: str) -> List[str]:
+    m = _RE_ANCHOR_PREFIX.match(pattern)
+    if not m:
+        return []
+    return [m.group(1)] if m.group(1) else m.group(2).split("|")
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """A regex alternation of words, factored into a prefix trie."""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: Dict) -> str:
+        ends = "" in node
+        branches = [re.escape(ch) + emit(child)
+                    for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        if ends:
+            return "(?:" + "|".join(branches) + ")?"
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return emit(trie)
+
+
+# ── Engine ────────────────────────────────────────────────────────────────
+
+
+class RuleEngine:
+    """All rules of a rule set, compiled into one anchored scanner."""
+
+    def __init__(self, rules: List[Rule]):
+        self.rules = list(rules)
+        self._order = {id(rule): i for i, rule in enumerate(self.rules)}
+        # identifies the rule set in cache keys (same rules → same scans)
+        self.fingerprint = content_hash([
+            [r.id, r.pattern, r.severity, r.cwe, r.description,
+             r.recommendation, r.confidence, r.anchors] for r in self.rules
+        ])
+        self._by_anchor: Dict[str, List[Rule]] = {}
+        unanchored: List[Rule] = []
+        for rule in self.rules:
+            if not rule.anchors:
+                unanchored.append(rule)
+            for anchor in rule.anchors:
+                self._by_anchor.setdefault(anchor, []).append(rule)
+
+        self._anchor_re = (
+            re.compile(r"\b" + _trie_pattern(self._by_anchor) + r"\b")
+            if self._by_anchor else None
+        )
+        self._unanchored = unanchored
+        self._unanchored_re = (
+            re.compile("|".join(f"(?P<_rule{i}>{rule.pattern})"
+                                for i, rule in enumerate(unanchored)), re.MULTILINE)
+            if unanchored else None
+        )
+
+    # ── Loading ───────────────────────────────────────────────────────────
+
+    @classmethod
+    def from_dicts(cls, entries: Iterable[Dict]) -> "RuleEngine":
+        rules = []
+        for entry in entries:
+            try:
+                rules.append(Rule(**entry))
+            except (TypeError, re.error) as exc:
+                raise ValueError(f"Invalid rule {entry.get('id', '?')!r}: {exc}") from exc
+        return cls(rules)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_RULES_PATH) -> "RuleEngine":
+        """Read a rule file: {"version": 1, "rules": [{...}, ...]}."""
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+        engine = cls.from_dicts(data.get("rules", []))
+        logger.debug(f"RuleEngine: {len(engine.rules)} rule(s) from {path} "
+                     f"({len(engine._by_anchor)} anchors, "
+                     f"{len(engine._unanchored)} unanchored)")
+        return engine
+
+    # ── Scanning ──────────────────────────────────────────────────────────
+
+    def scan(self, text: str,
+             line_of: Optional[Callable[[int], int]] = None) -> List[RuleHit]:
+        """
+        Every rule hit in text, at most one per (rule, line, captured groups),
+        sorted by rule position then offset.  line_of maps an offset to a
+        1-based line (default: count newlines).
+        """
+        if line_of is None:
+            line_of = lambda offset: text.count("\n", 0, offset) + 1
+        hits: List[RuleHit] = []
+        if self._anchor_re is not None:
+            by_anchor = self._by_anchor
+            for m in self._anchor_re.finditer(text):
+                for rule in by_anchor[m.group()]:
+                    rm = rule.regex.match(text, m.start())
+                    if rm:
+                        hits.append(self._hit(rule, rm, line_of))
+        if self._unanchored_re is not None:
+            for m in self._unanchored_re.finditer(text):
+                rule = next(r for i, r in enumerate(self._unanchored)
+                            if m.group(f"_rule{i}") is not None)
+                hits.append(self._hit(rule, rule.regex.match(text, m.start()) or m,
+                                      line_of))
+        return self.rank(hits)
+
+    def rank(self, hits: Iterable[RuleHit]) -> List[RuleHit]:
+        """
+        hits sorted by (rule position, offset), keeping the first per
+        (rule, line, captured groups) — scan()'s output order, for callers
+        that merge hits from several scans of one buffer.
+        """
+        hits = sorted(hits, key=lambda h: (self._order[id(h.rule)], h.start))
+        unique, seen = [], set()
+        for hit in hits:
+            key = (hit.rule.id, hit.line, hit.groups)
+            if key not in seen:
+                seen.add(key)
+                unique.append(hit)
+        return unique
+
+    @staticmethod
+    def _hit(rule: Rule, m: re.Match, line_of: Callable[[int], int]) -> RuleHit:
+        groups = m.groups() if m.re is rule.regex else ()
+        return RuleHit(rule, m.start(), m.end(), line_of(m.start()), groups)
+
+
+# ── Shared default ────────────────────────────────────────────────────────
+
+_engines: Dict[str, RuleEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_rule_engine(path: str = DEFAULT_RULES_PATH) -> RuleEngine:
+    """The compiled engine for a rule file, loaded once per process."""
+    path = os.path.abspath(path)
+    with _engines_lock:
+        engine = _engines.get(path)
+        if engine is None:
+            engine = _engines[path] = RuleEngine.load(path)
+        return engine
@@ -0,0 +1,75 @@
+"""
+Async process helpers
+
+asyncio counterparts of the blocking subprocess calls used by the
+verification layers, so one event loop can drive many compiles and test
+runs without an OS thread each.  They keep subprocess.run()'s contract:
+a CompletedProcess with text output is returned, TimeoutExpired is raised
+on timeout (after killing the child) and FileNotFoundError propagates.
+
+run_sync() is the bridge the other way: it runs a coroutine to completion
+from blocking code, which is how the sync pipeline API wraps the async one.
+
+Usage
+-----
+proc = await run_process(["./prog"], input="", timeout=10)
+result = run_sync(pipeline.arun("file.cpp"))
+"""
+
+import asyncio
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+async def run_process(
+    cmd: List[str],
+    input: Optional[str] = None,
+    timeout: Optional[float] = None,
+) -> subprocess.CompletedProcess:
+    """Run cmd to completion without blocking the event loop."""
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=asyncio.subprocess.PIPE if input is not None else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    data = input.encode() if input is not None else None
+    try:
+        out, err = await asyncio.wait_for(proc.communicate(data), timeout)
+    except asyncio.TimeoutError:
+        await _kill(proc)
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    except asyncio.CancelledError:
+        await _kill(proc)
+        raise
+    return subprocess.CompletedProcess(
+        cmd, proc.returncode,
+        out.decode(errors="replace"), err.decode(errors="replace"),
+    )
+
+
+async def _kill(proc) -> None:
+    try:
+        proc.kill()
+    except ProcessLookupError:
+        pass
+    await proc.wait()
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """
+    Run coro to completion from blocking code.
+
+    Uses asyncio.run() normally; when the calling thread already has a
+    running loop (asyncio.run cannot nest) the coroutine gets a private
+    loop on a helper thread instead.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as helper:
+        return helper.submit(asyncio.run, coro).result()
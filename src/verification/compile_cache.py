@@ -0,0 +1,249 @@
+"""
+Compile Cache — ccache-style binary store for the verification layers
+
+Every g++ invocation in the system (DifferentialTester, PerfBenchmarker,
+utils.compiler.CppCompiler) goes through CompileCache.compile().  The key is
+SHA-256 over the exact source bytes handed to the compiler, the compiler
+name and its `--version` banner, and the flag list.  The timing-harness
+variant used by PerfBenchmarker is part of the source bytes, so it never
+collides with the plain -O0 build of the same file.
+
+Headers are covered too.  A miss compiles with -MMD, and the non-system
+headers the build read are recorded under that key (a manifest).  For a
+source with such headers, the binary's key adds the headers' current
+contents, the source's directory and the working directory, so editing
+an included "v.h" or moving between include paths is a miss.
+Self-contained sources (no manifest entries) stay shareable across
+directories.
+
+A hit hard-links (or copies, where links are unsupported) the cached binary
+to the requested output path and skips g++ entirely.  Only successful
+builds are cached; failures always re-run the compiler so the caller gets
+fresh diagnostics.
+
+Storage and LRU/size eviction are handled by src.cache.disk_cache.DiskCache
+under .cache/compile/ (256 MB by default).
+"""
+
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from typing import List, Optional, Tuple
+
+from src.cache.disk_cache import DiskCache
+from src.cache.keys import content_hash, tool_version
+
+logger = logging.getLogger(__name__)
+
+_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DEFAULT_COMPILE_CACHE_DIR = os.path.join(_root, ".cache", "compile")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024     # 256 MB
+
+
+class CompileCache:
+    """
+    Content-addressed cache of compiled binaries.
+
+    Usage
+    -----
+    cache = get_compile_cache()
+    proc = cache.compile("g++", ["-O0", "-w"], "prog.cpp", "prog.exe", timeout=10)
+    if proc.returncode == 0:
+        ...
+
+    compile() has the same contract as subprocess.run(..., text=True): it
+    returns a CompletedProcess and lets TimeoutExpired / FileNotFoundError
+    propagate, so callers keep their existing error handling.
+    """
+
+    def __init__(self, directory: str = DEFAULT_COMPILE_CACHE_DIR,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.store = DiskCache(directory, max_bytes=max_bytes)
+
+    def key(self, compiler: str, flags: List[str], source: bytes) -> str:
+        return content_hash("compile", compiler, tool_version(compiler), flags, source)
+
+    def compile(
+        self,
+        compiler: str,
+        flags: List[str],
+        src_path: str,
+        out_path: str,
+        timeout: Optional[float] = None,
+    ) -> subprocess.CompletedProcess:
+        """Build src_path into out_path, reusing a cached binary when possible."""
+        cmd = [compiler] + list(flags) + [src_path, "-o", out_path]
+        key, hit = self._lookup(compiler, flags, src_path, out_path, cmd)
+        if hit is not None:
+            return hit
+        if key is None:
+            return subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        with tempfile.TemporaryDirectory(prefix="ccdeps_") as tmp:
+            depfile = os.path.join(tmp, "deps.d")
+            proc = subprocess.run(_with_depfile(cmd, depfile),
+                                  capture_output=True, text=True, timeout=timeout)
+            proc.args = cmd
+            self._store(key, proc, src_path, out_path, depfile)
+        return proc
+
+    async def acompile(
+        self,
+        compiler: str,
+        flags: List[str],
+        src_path: str,
+        out_path: str,
+        timeout: Optional[float] = None,
+    ) -> subprocess.CompletedProcess:
+        """compile() for asyncio callers: a miss runs g++ as an async subprocess."""
+        from src.verification.async_exec import run_process
+        cmd = [compiler] + list(flags) + [src_path, "-o", out_path]
+        key, hit = self._lookup(compiler, flags, src_path, out_path, cmd)
+        if hit is not None:
+            return hit
+        if key is None:
+            return await run_process(cmd, timeout=timeout)
+        with tempfile.TemporaryDirectory(prefix="ccdeps_") as tmp:
+            depfile = os.path.join(tmp, "deps.d")
+            proc = await run_process(_with_depfile(cmd, depfile), timeout=timeout)
+            proc.args = cmd
+            self._store(key, proc, src_path, out_path, depfile)
+        return proc
+
+    def clear(self) -> None:
+        self.store.clear()
+
+    def stats(self) -> dict:
+        return self.store.stats()
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    def _lookup(self, compiler, flags, src_path, out_path, cmd):
+        """Return (source key, CompletedProcess on a hit else None)."""
+        try:
+            with open(src_path, "rb") as fh:
+                key = self.key(compiler, list(flags), fh.read())
+        except OSError:
+            return None, None   # let the compiler report the unreadable source
+
+        deps = self.store.get(_deps_key(key))
+        if deps is None:
+            return key, None    # never built (or its header list was evicted)
+        build_key = _build_key(key, src_path, deps)
+        if build_key is None:
+            return key, None    # a recorded header is gone
+        cached = self.store.get_file(build_key)
+        if cached is not None and _materialise(cached, out_path):
+            logger.debug(f"CompileCache: hit {build_key[:12]} → {out_path}")
+            warnings = self.store.get(_stderr_key(build_key), "")
+            return key, subprocess.CompletedProcess(cmd, 0, "", warnings)
+        return key, None
+
+    def _store(self, key, proc, src_path: str, out_path: str, depfile: str) -> None:
+        """Cache a successful build together with the headers it read."""
+        if proc.returncode != 0 or not os.path.isfile(out_path):
+            return
+        deps = _read_depfile(depfile, src_path)
+        if deps is None:
+            return              # no dependency list: cannot tell when it goes stale
+        build_key = _build_key(key, src_path, deps)
+        if build_key is None:
+            return
+        if self.store.set_file(build_key, out_path) is None:
+            return
+        self.store.set(_deps_key(key), deps)
+        if proc.stderr:
+            self.store.set(_stderr_key(build_key), proc.stderr)
+
+
+def _stderr_key(key: str) -> str:
+    return content_hash(key, "stderr")
+
+
+def _deps_key(key: str) -> str:
+    return content_hash(key, "deps")
+
+
+def _build_key(key: str, src_path: str, deps: List[str]) -> Optional[str]:
+    """Key of the binary: the source key, plus the headers' contents and include context."""
+    if not deps:
+        return key
+    contents = []
+    for dep in deps:
+        try:
+            with open(dep, "rb") as fh:
+                contents.append(fh.read())
+        except OSError:
+            return None
+    context = (os.path.dirname(os.path.abspath(src_path)), os.getcwd())
+    return content_hash(key, context, list(zip(deps, contents)))
+
+
+def _with_depfile(cmd: List[str], depfile: str) -> List[str]:
+    """cmd with -MMD -MF depfile, so the compiler lists the headers it reads."""
+    return cmd[:1] + ["-MMD", "-MF", depfile] + cmd[1:]
+
+
+def _read_depfile(depfile: str, src_path: str) -> Optional[List[str]]:
+    """Absolute paths of the headers in a make-style depfile (not the source itself)."""
+    try:
+        with open(depfile, "r", encoding="utf-8", errors="replace") as fh:
+            text = fh.read()
+    except OSError:
+        return None
+    text = text.replace("\\\n", " ")
+    _, sep, rule = text.partition(": ")
+    if not sep:
+        return None
+    words: List[str] = []
+    word = ""
+    escaped = False
+    for ch in rule:
+        if escaped:
+            word += ch
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif ch.isspace():
+            if word:
+                words.append(word)
+            word = ""
+        else:
+            word += ch
+    if word:
+        words.append(word)
+    source = os.path.abspath(src_path)
+    deps = sorted({os.path.abspath(w) for w in words} - {source})
+    return deps
+
+
+def _materialise(cached: str, out_path: str) -> bool:
+    """Hard-link the cached binary to out_path, falling back to a copy."""
+    try:
+        if os.path.lexists(out_path):
+            os.remove(out_path)
+        try:
+            os.link(cached, out_path)
+        except OSError:
+            shutil.copy2(cached, out_path)
+        return True
+    except OSError as exc:
+        logger.debug(f"CompileCache: could not materialise {cached}: {exc}")
+        return False
+
+
+# ── Shared instance ───────────────────────────────────────────────────────────
+
+_default_cache: Optional[CompileCache] = None
+_default_lock = threading.Lock()
+
+
+def get_compile_cache() -> CompileCache:
+    """Process-wide CompileCache under .cache/compile/."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = CompileCache()
+        return _default_cache
@@ -6,15 +6,23 @@ stdout output to verify behavioral equivalence.
 
 Requires g++ to be on the system PATH (MinGW/MSYS on Windows).
 Falls back gracefully if g++ is unavailable.
+
+Builds go through the shared CompileCache, so re-verifying unchanged code
+does not invoke g++ again.
 """
 
+import asyncio
 import logging
 import os
 import subprocess
 import tempfile
+from concurrent.futures import Executor
 from dataclasses import dataclass
 from typing import Optional
 
+from src.verification.async_exec import run_process
+from src.verification.compile_cache import get_compile_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -41,90 +49,183 @@ class DifferentialTester:
     tester = DifferentialTester()
     result = tester.test(original_src, optimized_src)
     print(result.passed)
+
+    result = await tester.atest(original_src, optimized_src)   # asyncio
     """
 
-    def __init__(self, compiler: str = "g++", timeout: int = 10):
+    def __init__(self, compiler: str = "g++", timeout: int = 10,
+                 use_cache: bool = True):
         self.compiler = compiler
         self.timeout  = timeout
+        self.compile_cache = get_compile_cache() if use_cache else None
         self._gpp_available = self._check_compiler()
 
-    def test(self, original_src: str, optimized_src: str) -> DiffTestResult:
+    def test(self, original_src: str, optimized_src: str,
+             pool: Optional[Executor] = None) -> DiffTestResult:
         """
         Compile and run both versions, return comparison result.
 
         If the compiler is not available or compilation fails,
         passed is set to None (unknown) with an informative error.
+        With a pool, both compiles and then both runs happen concurrently.
         """
         if not self._gpp_available:
-            return DiffTestResult(
-                passed=False,
-                skipped=True,
-                original_output="",
-                optimized_output="",
-                error="g++ not found on PATH; differential test skipped.",
-            )
+            return self._skipped()
 
         with tempfile.TemporaryDirectory() as tmpdir:
-            orig_src_path = os.path.join(tmpdir, "original.cpp")
-            opt_src_path  = os.path.join(tmpdir, "optimized.cpp")
-            orig_bin      = os.path.join(tmpdir, "original.exe")
-            opt_bin       = os.path.join(tmpdir, "optimized.exe")
-
-            # Write source files
-            with open(orig_src_path, "w", encoding="utf-8") as f:
-                f.write(original_src)
-            with open(opt_src_path, "w", encoding="utf-8") as f:
-                f.write(optimized_src)
-
-            # Compile original
-            orig_compile_err = self._compile(orig_src_path, orig_bin)
-            if orig_compile_err:
-                return DiffTestResult(
-                    passed=False,
-                    original_output="",
-                    optimized_output="",
-                    compile_error_original=orig_compile_err,
-                    error="Original code failed to compile.",
-                )
+            orig_src_path, opt_src_path, orig_bin, opt_bin = \
+                self._write_sources(tmpdir, original_src, optimized_src)
 
-            # Compile optimized
-            opt_compile_err = self._compile(opt_src_path, opt_bin)
-            if opt_compile_err:
-                return DiffTestResult(
-                    passed=False,
-                    original_output="",
-                    optimized_output="",
-                    compile_error_optimized=opt_compile_err,
-                    error="Optimized code failed to compile.",
+            # Compile original and optimized
+            if pool is not None:
+                orig_compile_err, opt_compile_err = pool.map(
+                    self._compile, (orig_src_path, opt_src_path), (orig_bin, opt_bin)
                 )
+            else:
+                orig_compile_err = self._compile(orig_src_path, orig_bin)
+                opt_compile_err  = None if orig_compile_err else \
+                                   self._compile(opt_src_path, opt_bin)
 
-            # Run original
-            orig_out, orig_err, orig_rc = self._run(orig_bin)
-            # Run optimized
-            opt_out, opt_err, opt_rc = self._run(opt_bin)
+            failed = self._compile_failure(orig_compile_err, opt_compile_err)
+            if failed is not None:
+                return failed
 
-            passed = (orig_out == opt_out)
+            # Run both binaries
+            if pool is not None:
+                (orig_out, orig_err, orig_rc), (opt_out, opt_err, opt_rc) = \
+                    pool.map(self._run, (orig_bin, opt_bin))
+            else:
+                orig_out, orig_err, orig_rc = self._run(orig_bin)
+                opt_out, opt_err, opt_rc = self._run(opt_bin)
 
-            return DiffTestResult(
-                passed=passed,
-                original_output=orig_out,
-                optimized_output=opt_out,
-                runtime_error=(orig_err or opt_err) or None,
-                original_returncode=orig_rc,
-                optimized_returncode=opt_rc,
+            return self._compare(orig_out, orig_err, orig_rc, opt_out, opt_err, opt_rc)
+
+    async def atest(self, original_src: str, optimized_src: str) -> DiffTestResult:
+        """test() for asyncio callers: compiles and runs are async subprocesses."""
+        if not self._gpp_available:
+            return self._skipped()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            orig_src_path, opt_src_path, orig_bin, opt_bin = \
+                self._write_sources(tmpdir, original_src, optimized_src)
+
+            orig_compile_err, opt_compile_err = await asyncio.gather(
+                self._acompile(orig_src_path, orig_bin),
+                self._acompile(opt_src_path, opt_bin),
             )
+            failed = self._compile_failure(orig_compile_err, opt_compile_err)
+            if failed is not None:
+                return failed
+
+            (orig_out, orig_err, orig_rc), (opt_out, opt_err, opt_rc) = \
+                await asyncio.gather(self._arun(orig_bin), self._arun(opt_bin))
+            return self._compare(orig_out, orig_err, orig_rc, opt_out, opt_err, opt_rc)
+
+    async def aprebuild(self, source: str) -> None:
+        """
+        Compile source into the compile cache now, so a later test() with it
+        on either side finds the binary already built.  No-op without a cache.
+        """
+        if not self._gpp_available or self.compile_cache is None:
+            return
+        with tempfile.TemporaryDirectory() as tmpdir:
+            src_path = os.path.join(tmpdir, "original.cpp")
+            with open(src_path, "w", encoding="utf-8") as f:
+                f.write(source)
+            await self._acompile(src_path, os.path.join(tmpdir, "original.exe"))
 
     # ── Internals ─────────────────────────────────────────────────────────────
 
+    @staticmethod
+    def _skipped() -> DiffTestResult:
+        return DiffTestResult(
+            passed=False,
+            skipped=True,
+            original_output="",
+            optimized_output="",
+            error="g++ not found on PATH; differential test skipped.",
+        )
+
+    @staticmethod
+    def _write_sources(tmpdir: str, original_src: str, optimized_src: str):
+        """Write both versions into tmpdir; return (orig_src, opt_src, orig_bin, opt_bin)."""
+        orig_src_path = os.path.join(tmpdir, "original.cpp")
+        opt_src_path  = os.path.join(tmpdir, "optimized.cpp")
+        with open(orig_src_path, "w", encoding="utf-8") as f:
+            f.write(original_src)
+        with open(opt_src_path, "w", encoding="utf-8") as f:
+            f.write(optimized_src)
+        return (orig_src_path, opt_src_path,
+                os.path.join(tmpdir, "original.exe"),
+                os.path.join(tmpdir, "optimized.exe"))
+
+    @staticmethod
+    def _compile_failure(orig_compile_err, opt_compile_err) -> Optional[DiffTestResult]:
+        if orig_compile_err:
+            return DiffTestResult(
+                passed=False,
+                original_output="",
+                optimized_output="",
+                compile_error_original=orig_compile_err,
+                error="Original code failed to compile.",
+            )
+        if opt_compile_err:
+            return DiffTestResult(
+                passed=False,
+                original_output="",
+                optimized_output="",
+                compile_error_optimized=opt_compile_err,
+                error="Optimized code failed to compile.",
+            )
+        return None
+
+    @staticmethod
+    def _compare(orig_out, orig_err, orig_rc, opt_out, opt_err, opt_rc) -> DiffTestResult:
+        return DiffTestResult(
+            passed=(orig_out == opt_out),
+            original_output=orig_out,
+            optimized_output=opt_out,
+            runtime_error=(orig_err or opt_err) or None,
+            original_returncode=orig_rc,
+            optimized_returncode=opt_rc,
+        )
+
     def _compile(self, src_path: str, out_path: str) -> Optional[str]:
         """Return None on success, error string on failure."""
         try:
-            proc = subprocess.run(
-                [self.compiler, src_path, "-o", out_path, "-O0", "-w"],
-                capture_output=True,
-                text=True,
-                timeout=self.timeout,
-            )
+            if self.compile_cache is not None:
+                proc = self.compile_cache.compile(
+                    self.compiler, ["-O0", "-w"], src_path, out_path,
+                    timeout=self.timeout,
+                )
+            else:
+                proc = subprocess.run(
+                    [self.compiler, src_path, "-o", out_path, "-O0", "-w"],
+                    capture_output=True,
+                    text=True,
+                    timeout=self.timeout,
+                )
+            if proc.returncode != 0:
+                return proc.stderr.strip()
+            return None
+        except subprocess.TimeoutExpired:
+            return "Compilation timed out."
+        except FileNotFoundError:
+            self._gpp_available = False
+            return f"Compiler '{self.compiler}' not found."
+
+    async def _acompile(self, src_path: str, out_path: str) -> Optional[str]:
+        try:
+            if self.compile_cache is not None:
+                proc = await self.compile_cache.acompile(
+                    self.compiler, ["-O0", "-w"], src_path, out_path,
+                    timeout=self.timeout,
+                )
+            else:
+                proc = await run_process(
+                    [self.compiler, src_path, "-o", out_path, "-O0", "-w"],
+                    timeout=self.timeout,
+                )
             if proc.returncode != 0:
                 return proc.stderr.strip()
             return None
@@ -134,6 +235,15 @@ class DifferentialTester:
             self._gpp_available = False
             return f"Compiler '{self.compiler}' not found."
 
+    async def _arun(self, binary_path: str):
+        try:
+            proc = await run_process([binary_path], input="", timeout=self.timeout)
+            return proc.stdout.strip(), proc.stderr.strip(), proc.returncode
+        except subprocess.TimeoutExpired:
+            return "", "Execution timed out.", -1
+        except Exception as exc:
+            return "", str(exc), -1
+
     def _run(self, binary_path: str):
         """Return (stdout, stderr, returncode) as strings and int."""
         try:
@@ -10,14 +10,19 @@ main() using std::chrono::high_resolution_clock, so process spawn,
 ELF loading, and OS teardown are excluded from the measurement.
 
 Requires g++ on PATH. Falls back gracefully if unavailable.
+Harness builds are cached in the shared CompileCache.
 """
 
 import logging
 import os
 import subprocess
 import tempfile
+import threading
+from concurrent.futures import Executor
 from dataclasses import dataclass
-from typing import Optional
+from typing import List, Optional, Tuple
+
+from src.verification.compile_cache import get_compile_cache
 
 logger = logging.getLogger(__name__)
 
@@ -32,13 +37,17 @@ _TIMING_PREFIX = "#define main __orig_main__\n"
 # Provides a new main() that wraps __orig_main__ with chrono timing and
 # writes elapsed nanoseconds to stderr (never pollutes stdout, so
 # differential testing output comparison is unaffected).
+# The #undef stops our own main() being renamed too, and the cast lets the
+# wrapper call both `int main()` and `int main(int, char**)`.
 _TIMING_HARNESS = r"""
+#undef main
 #ifdef __cplusplus
 #include <chrono>
 #include <cstdio>
 int main(int argc, char* argv[]) {
+    auto _main = reinterpret_cast<int (*)(int, char**)>(&__orig_main__);
     auto _t0 = std::chrono::high_resolution_clock::now();
-    int  _r  = __orig_main__(argc, argv);
+    int  _r  = _main(argc, argv);
     auto _t1 = std::chrono::high_resolution_clock::now();
     long long _ns = std::chrono::duration_cast<
         std::chrono::nanoseconds>(_t1 - _t0).count();
@@ -85,13 +94,29 @@ class PerfBenchmarker:
     print(result.summary())
     """
 
-    def __init__(self, compiler: str = "g++", timeout: int = 15, runs: int = _RUNS):
+    def __init__(self, compiler: str = "g++", timeout: int = 15, runs: int = _RUNS,
+                 use_cache: bool = True):
         self.compiler = compiler
         self.timeout  = timeout
         self.runs     = runs
+        self.compile_cache = get_compile_cache() if use_cache else None
         self._available = self._check_compiler()
 
-    def benchmark(self, original_src: str, optimized_src: str) -> PerfResult:
+    def benchmark(
+        self,
+        original_src: str,
+        optimized_src: str,
+        pool: Optional[Executor] = None,
+        wait_for: Optional[threading.Event] = None,
+    ) -> PerfResult:
+        """
+        Compile and time both versions.
+
+        With a pool, both binaries are compiled on it concurrently and the
+        timing runs are interleaved (orig, opt, orig, opt, …) so that any
+        drift in machine load hits both sides equally.  wait_for, if given,
+        holds the timing runs back until the caller's other work is done.
+        """
         if not self._available:
             return PerfResult(
                 available=False,
@@ -108,13 +133,25 @@ class PerfBenchmarker:
                 with open(path, "w", encoding="utf-8") as f:
                     f.write(src)
 
-            if not self._compile_timed(orig_cpp, orig_bin):
+            if pool is not None:
+                orig_ok, opt_ok = pool.map(
+                    self._compile_timed, (orig_cpp, opt_cpp), (orig_bin, opt_bin)
+                )
+            else:
+                orig_ok = self._compile_timed(orig_cpp, orig_bin)
+                opt_ok  = orig_ok and self._compile_timed(opt_cpp, opt_bin)
+            if not orig_ok:
                 return PerfResult(available=True, error="Original compilation failed.")
-            if not self._compile_timed(opt_cpp, opt_bin):
+            if not opt_ok:
                 return PerfResult(available=True, error="Optimized compilation failed.")
 
-            orig_ms = self._timed_run_ms(orig_bin)
-            opt_ms  = self._timed_run_ms(opt_bin)
+            if wait_for is not None:
+                wait_for.wait()
+            if pool is not None:
+                orig_ms, opt_ms = self._interleaved_runs_ms(orig_bin, opt_bin)
+            else:
+                orig_ms = self._timed_run_ms(orig_bin)
+                opt_ms  = self._timed_run_ms(opt_bin)
 
             if orig_ms > 0:
                 speedup = (orig_ms - opt_ms) / orig_ms * 100.0
@@ -128,6 +165,20 @@ class PerfBenchmarker:
                 speedup_pct=speedup,
             )
 
+    def prebuild(self, source: str) -> None:
+        """
+        Build source's timing-harness binary into the compile cache now, so
+        benchmark() only has to link it out.  The timing runs themselves stay
+        in benchmark(), interleaved with the other side.  No-op without a cache.
+        """
+        if not self._available or self.compile_cache is None:
+            return
+        with tempfile.TemporaryDirectory() as tmpdir:
+            src_path = os.path.join(tmpdir, "original.cpp")
+            with open(src_path, "w", encoding="utf-8") as f:
+                f.write(source)
+            self._compile_timed(src_path, os.path.join(tmpdir, "original.exe"))
+
     # ── Internals ─────────────────────────────────────────────────────────────
 
     def _compile_timed(self, src_path: str, out_path: str) -> bool:
@@ -142,12 +193,18 @@ class PerfBenchmarker:
             wrapped = _TIMING_PREFIX + original + _TIMING_HARNESS
             with open(src_path, "w", encoding="utf-8") as f:
                 f.write(wrapped)
-            proc = subprocess.run(
-                [self.compiler, src_path, "-o", out_path, "-O0", "-w"],
-                capture_output=True,
-                text=True,
-                timeout=self.timeout,
-            )
+            if self.compile_cache is not None:
+                proc = self.compile_cache.compile(
+                    self.compiler, ["-O0", "-w"], src_path, out_path,
+                    timeout=self.timeout,
+                )
+            else:
+                proc = subprocess.run(
+                    [self.compiler, src_path, "-o", out_path, "-O0", "-w"],
+                    capture_output=True,
+                    text=True,
+                    timeout=self.timeout,
+                )
             return proc.returncode == 0
         except Exception as exc:
             logger.debug(f"PerfBenchmarker compile error: {exc}")
@@ -162,25 +219,39 @@ class PerfBenchmarker:
         adds latency — the minimum is the run where the OS interfered least,
         giving the closest approximation to true execution time.
         """
-        times = []
+        times: List[float] = []
         for _ in range(self.runs):
-            try:
-                proc = subprocess.run(
-                    [binary],
-                    capture_output=True,
-                    text=True,
-                    timeout=self.timeout,
-                    input="",          # immediate EOF for programs using scanf/cin
-                )
-                for line in proc.stderr.splitlines():
-                    if line.startswith("__PERF_NS__:"):
-                        ns = int(line.split(":")[1])
-                        times.append(ns / 1_000_000)   # nanoseconds → milliseconds
-                        break
-            except Exception:
-                pass
+            self._run_once(binary, times)
         return min(times) if times else 0.0
 
+    def _interleaved_runs_ms(self, orig_bin: str, opt_bin: str) -> Tuple[float, float]:
+        """Alternate original / optimized runs; return both minimums in ms."""
+        orig_times: List[float] = []
+        opt_times:  List[float] = []
+        for _ in range(self.runs):
+            self._run_once(orig_bin, orig_times)
+            self._run_once(opt_bin, opt_times)
+        return (min(orig_times) if orig_times else 0.0,
+                min(opt_times) if opt_times else 0.0)
+
+    def _run_once(self, binary: str, times: List[float]) -> None:
+        """Run binary once and append its __PERF_NS__ time (ms) to times."""
+        try:
+            proc = subprocess.run(
+                [binary],
+                capture_output=True,
+                text=True,
+                timeout=self.timeout,
+                input="",          # immediate EOF for programs using scanf/cin
+            )
+            for line in proc.stderr.splitlines():
+                if line.startswith("__PERF_NS__:"):
+                    ns = int(line.split(":")[1])
+                    times.append(ns / 1_000_000)   # nanoseconds → milliseconds
+                    break
+        except Exception:
+            pass
+
     def _check_compiler(self) -> bool:
         try:
             subprocess.run([self.compiler, "--version"], capture_output=True, timeout=5)
@@ -0,0 +1,28 @@
+"""
+Shared fixtures for the pipeline tests
+"""
+
+from src.llm.llm_client import LLMClient
+from src.pipeline.pipeline import CompilerOptimizationPipeline
+
+
+def offline_llm() -> LLMClient:
+    """An LLMClient that returns the offline stub without probing Ollama."""
+    llm = LLMClient()
+    llm._available = False
+    return llm
+
+
+def offline_pipeline(output_dir: str, security: bool = True,
+                     **kwargs) -> CompilerOptimizationPipeline:
+    """
+    A pipeline on the offline LLM that writes OPT_<name> files to output_dir.
+
+    security=False drops Step 4; other keyword arguments (cache,
+    message_passing, …) go to CompilerOptimizationPipeline.
+    """
+    pipeline = CompilerOptimizationPipeline(llm_client=offline_llm(),
+                                            output_dir=output_dir, **kwargs)
+    if not security:
+        pipeline.security_agent = None
+    return pipeline
@@ -5,13 +5,14 @@ Tests the complete agent communication workflow.
 """
 
 import unittest
+import threading
 import time
 import logging
 from typing import Dict, Any, List
 
 from agent_framework import (
-    BaseAgent, AgentRegistry, ContextManager,
-    MessageType, MessagePriority
+    BaseAgent, AgentRegistry, ContextManager, Message,
+    MessageType, MessagePriority, Mailbox, MailboxFull
 )
 
 
@@ -205,5 +206,93 @@ class TestAgentCommunication(unittest.TestCase):
         self.assertEqual(agent.get_state(), "stopped")
 
 
+def _message(n: int, priority: MessagePriority = MessagePriority.MEDIUM) -> Message:
+    return Message.create("a", "b", MessageType.NOTIFICATION, {"n": n}, priority)
+
+
+class TestMailbox(unittest.TestCase):
+    """Test the bounded priority mailbox"""
+    
+    def test_priority_then_arrival_order(self):
+        box = Mailbox(maxsize=10)
+        for n, priority in enumerate([2, 1, 1, 0, 1]):
+            box.put(_message(n), priority)
+        order = [box.get().message.payload["n"] for _ in range(5)]
+        self.assertEqual(order, [3, 1, 2, 4, 0])
+    
+    def test_full_mailbox_blocks_sender_until_room(self):
+        box = Mailbox(maxsize=1)
+        box.put(_message(0), 1)
+        threading.Timer(0.1, box.get).start()
+        t0 = time.perf_counter()
+        box.put(_message(1), 1, timeout=2.0)
+        self.assertGreaterEqual(time.perf_counter() - t0, 0.05)
+        self.assertEqual(box.waits, 1)
+        self.assertEqual(box.get().message.payload["n"], 1)
+    
+    def test_full_mailbox_times_out_instead_of_dropping(self):
+        box = Mailbox(maxsize=1)
+        box.put(_message(0), 1)
+        with self.assertRaises(MailboxFull):
+            box.put(_message(1), 1, timeout=0.05)
+        self.assertEqual(len(box), 1)
+    
+    def test_close_wakes_blocked_get(self):
+        box = Mailbox()
+        threading.Timer(0.05, box.close).start()
+        self.assertIsNone(box.get(timeout=2.0))
+
+
+class TestAgentMessageBus(unittest.TestCase):
+    """Test agents driven through their mailboxes"""
+    
+    def setUp(self):
+        self.ctx = ContextManager()
+        self.registry = AgentRegistry()
+        self.agent = TestAgent("agent_1", self.ctx)
+        self.registry.register(self.agent)
+        self.agent.start()
+    
+    def tearDown(self):
+        self.registry.stop_all()
+    
+    def test_submit_resolves_with_result(self):
+        future = self.agent.submit({"value": 42})
+        result = future.result(timeout=2.0)
+        self.assertEqual(result["input"], {"value": 42})
+        self.assertEqual(self.registry.get_statistics()["total_messages"], 1)
+    
+    def test_submit_propagates_exception(self):
+        def fail(_):
+            raise ValueError("bad input")
+        self.agent.process = fail
+        with self.assertRaises(ValueError):
+            self.agent.submit({}).result(timeout=2.0)
+    
+    def test_equal_priority_burst_is_processed_in_order(self):
+        futures = [self.agent.submit({"n": n}) for n in range(50)]
+        for future in futures:
+            future.result(timeout=2.0)
+        self.assertEqual([m["n"] for m in self.agent.processed_messages], list(range(50)))
+        stats = self.agent.get_statistics()
+        self.assertEqual(stats["processed"], 50)
+        self.assertEqual(stats["queued"], 0)
+    
+    def test_request_runs_in_sender_context_namespace(self):
+        def record(input_data):
+            self.ctx.set("seen", input_data["n"])
+            return {}
+        self.agent.process = record
+        with self.ctx.run_scope():
+            self.agent.submit({"n": 1}).result(timeout=2.0)
+            self.assertEqual(self.ctx.get("seen"), 1)
+        self.assertIsNone(self.ctx.get("seen"))
+    
+    def test_stop_is_prompt(self):
+        t0 = time.perf_counter()
+        self.agent.stop()
+        self.assertLess(time.perf_counter() - t0, 0.05)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,190 @@
+"""
+Unit tests for the asyncio pipeline API (arun / aprocess / async helpers)
+"""
+
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.llm.async_client import AsyncLLMClient
+from src.llm.scheduler import get_llm_scheduler
+from src.verification.async_exec import run_process, run_sync
+from src.verification.diff_tester import DifferentialTester
+from tests.helpers import offline_llm, offline_pipeline
+
+
+PROGRAM = """#include <iostream>
+int main() {
+    int total = 0;
+    for (int i = 0; i < 10; i++) total += i;
+    std::cout << total << std::endl;
+    return 0;
+}
+"""
+
+
+class TestAsyncExec(unittest.TestCase):
+
+    def test_run_process_captures_output(self):
+        proc = asyncio.run(run_process([sys.executable, "-c", "print(input())"],
+                                       input="hello\n", timeout=10))
+        self.assertEqual(proc.returncode, 0)
+        self.assertEqual(proc.stdout.strip(), "hello")
+
+    def test_run_process_timeout_kills_child(self):
+        with self.assertRaises(subprocess.TimeoutExpired):
+            asyncio.run(run_process(
+                [sys.executable, "-c", "import time; time.sleep(30)"], timeout=0.5
+            ))
+
+    def test_run_sync_inside_running_loop(self):
+        async def outer():
+            return run_sync(asyncio.sleep(0, result=42))
+        self.assertEqual(asyncio.run(outer()), 42)
+
+
+class TestAsyncLLMClient(unittest.TestCase):
+
+    def test_falls_back_to_scheduler(self):
+        llm = MagicMock()
+        llm.generate.return_value = "raw"
+        out = asyncio.run(AsyncLLMClient(llm).generate("p", system_prompt="s"))
+        self.assertEqual(out, "raw")
+        llm.generate.assert_called_once_with("p", system_prompt="s")
+
+    def test_identical_prompts_coalesce_in_scheduler(self):
+        release = threading.Event()
+        llm = MagicMock()
+        llm.generate.side_effect = lambda *a, **k: release.wait(5) and "raw"
+
+        async def two_callers():
+            allm = AsyncLLMClient(llm)
+            first, second = allm.submit("same", "s"), allm.submit("same", "s")
+            release.set()
+            return await asyncio.gather(first, second)
+
+        before = get_llm_scheduler().stats()["coalesced"]
+        self.assertEqual(asyncio.run(two_callers()), ["raw", "raw"])
+        self.assertEqual(llm.generate.call_count, 1)
+        self.assertEqual(get_llm_scheduler().stats()["coalesced"], before + 1)
+
+    def test_successive_event_loops_share_the_scheduler(self):
+        llm = MagicMock()
+        llm.generate.return_value = "raw"
+        for _ in range(2):
+            self.assertEqual(run_sync(AsyncLLMClient(llm).generate("p")), "raw")
+        self.assertEqual(llm.generate.call_count, 2)
+
+    def test_offline_client_returns_stub(self):
+        out = asyncio.run(AsyncLLMClient(offline_llm()).generate("analyze this"))
+        self.assertIn("reasoning_steps", out)
+
+
+@unittest.skipUnless(shutil.which("g++"), "g++ not available")
+class TestAsyncDiffTester(unittest.TestCase):
+
+    def test_atest_matches_test(self):
+        tester = DifferentialTester(use_cache=False)
+        broken = PROGRAM.replace("total += i", "total += i + 1")
+        for optimized in (PROGRAM, broken, "int main( {"):
+            sync  = tester.test(PROGRAM, optimized)
+            async_ = asyncio.run(tester.atest(PROGRAM, optimized))
+            # compiler diagnostics name the temp dir, so compare outcomes
+            outcome = lambda r: (r.passed, r.error, r.original_output,
+                                 r.optimized_output, bool(r.compile_error_optimized))
+            self.assertEqual(outcome(sync), outcome(async_))
+
+
+class TestAsyncPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp(prefix="arun_")
+        self.paths = []
+        for i in range(3):
+            path = os.path.join(self.tmpdir, f"prog{i}.cpp")
+            with open(path, "w", encoding="utf-8") as fh:
+                fh.write(PROGRAM.replace("10", str(10 + i)))
+            self.paths.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _pipeline(self):
+        return offline_pipeline(self.tmpdir, security=False)
+
+    def test_one_loop_drives_many_runs(self):
+        async def run_all():
+            return await asyncio.gather(*(self._pipeline().arun(p) for p in self.paths))
+        results = asyncio.run(run_all())
+        self.assertEqual([r.file_path for r in results], self.paths)
+        for r in results:
+            self.assertNotEqual(r.status, "failed")
+            self.assertIsNotNone(r.verification_report)
+
+    def test_one_pipeline_serves_concurrent_runs(self):
+        class Collector:
+            def __init__(self):
+                self.files = set()
+
+            def _on_message(self, msg):
+                if "file_path" in msg.payload:
+                    self.files.add(msg.payload["file_path"])
+
+        pipeline = self._pipeline()
+        collectors = [Collector() for _ in self.paths]
+
+        async def run_all():
+            return await asyncio.gather(*(pipeline.arun(p, message_logger=c)
+                                          for p, c in zip(self.paths, collectors)))
+
+        results = asyncio.run(run_all())
+        for i, (r, c) in enumerate(zip(results, collectors)):
+            self.assertNotEqual(r.status, "failed")
+            self.assertIn(f"i < {10 + i}", r.optimization_report["optimized_code"])
+            self.assertEqual(c.files, {self.paths[i]})
+        self.assertEqual(pipeline.context.active_runs(), [])
+        self.assertIn(pipeline.context.get("source_file"), self.paths)
+
+    def test_same_named_runs_write_to_their_own_output_dir(self):
+        runs = []
+        for i in range(3):
+            run_dir = os.path.join(self.tmpdir, f"run{i}")
+            os.makedirs(run_dir)
+            path = os.path.join(run_dir, "input.cpp")
+            with open(path, "w", encoding="utf-8") as fh:
+                fh.write(PROGRAM.replace("10", str(20 + i)))
+            runs.append((path, run_dir))
+        pipeline = self._pipeline()
+
+        async def run_all():
+            return await asyncio.gather(*(pipeline.arun(p, output_dir=d) for p, d in runs))
+
+        results = asyncio.run(run_all())
+        for i, (r, (_, run_dir)) in enumerate(zip(results, runs)):
+            out = r.optimization_report["output_file"]
+            self.assertEqual(out, os.path.join(run_dir, "OPT_input.cpp"))
+            with open(out, encoding="utf-8") as fh:
+                self.assertIn(f"i < {20 + i}", fh.read())
+
+    def test_sync_run_wraps_arun(self):
+        sync = self._pipeline().run(self.paths[0])
+        async_ = asyncio.run(self._pipeline().arun(self.paths[0]))
+        self.assertEqual(sync.status, async_.status)
+        self.assertEqual(sync.analysis_report["all_findings"],
+                         async_.analysis_report["all_findings"])
+
+    def test_missing_file(self):
+        result = asyncio.run(self._pipeline().arun(os.path.join(self.tmpdir, "nope.cpp")))
+        self.assertEqual(result.status, "failed")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,121 @@
+"""
+Unit tests for the shared compile artifact cache
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.verification.compile_cache import CompileCache
+from src.verification.diff_tester import DifferentialTester
+from src.verification.perf_benchmarker import PerfBenchmarker
+from utils.compiler import CppCompiler
+
+
+PROGRAM = """#include <iostream>
+int main() {
+    std::cout << 7 << std::endl;
+    return 0;
+}
+"""
+
+
+@unittest.skipUnless(shutil.which("g++"), "g++ not available")
+class TestCompileCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp(prefix="compilecache_")
+        self.cache  = CompileCache(os.path.join(self.tmpdir, "store"))
+        self.src    = os.path.join(self.tmpdir, "prog.cpp")
+        with open(self.src, "w", encoding="utf-8") as fh:
+            fh.write(PROGRAM)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _out(self, name):
+        return os.path.join(self.tmpdir, name)
+
+    def _count_compiler_calls(self):
+        return patch("subprocess.run", wraps=subprocess.run)
+
+    def test_second_build_skips_compiler(self):
+        with self._count_compiler_calls() as run:
+            first  = self.cache.compile("g++", ["-O0", "-w"], self.src, self._out("a.exe"))
+            second = self.cache.compile("g++", ["-O0", "-w"], self.src, self._out("b.exe"))
+        self.assertEqual((first.returncode, second.returncode), (0, 0))
+        self.assertEqual(run.call_count, 1)
+        out = subprocess.run([self._out("b.exe")], capture_output=True, text=True)
+        self.assertEqual(out.stdout.strip(), "7")
+
+    def test_flags_are_part_of_the_key(self):
+        self.cache.compile("g++", ["-O0", "-w"], self.src, self._out("a.exe"))
+        with self._count_compiler_calls() as run:
+            self.cache.compile("g++", ["-O2", "-w"], self.src, self._out("b.exe"))
+        self.assertEqual(run.call_count, 1)
+
+    def test_failed_build_is_not_cached(self):
+        with open(self.src, "w", encoding="utf-8") as fh:
+            fh.write("int main( {")
+        first = self.cache.compile("g++", ["-O0"], self.src, self._out("a.exe"))
+        self.assertNotEqual(first.returncode, 0)
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_changed_header_rebuilds(self):
+        header = os.path.join(self.tmpdir, "v.h")
+        with open(self.src, "w", encoding="utf-8") as fh:
+            fh.write('#include <iostream>\n#include "v.h"\n'
+                     'int main() { std::cout << V << std::endl; return 0; }\n')
+        outputs = []
+        for value in (1, 2, 1):
+            with open(header, "w", encoding="utf-8") as fh:
+                fh.write(f"#define V {value}\n")
+            exe = self._out(f"v{len(outputs)}.exe")
+            self.assertEqual(self.cache.compile("g++", ["-O0", "-w"], self.src, exe).returncode, 0)
+            outputs.append(subprocess.run([exe], capture_output=True, text=True).stdout.strip())
+        self.assertEqual(outputs, ["1", "2", "1"])
+
+    def test_unchanged_header_is_a_hit(self):
+        with open(os.path.join(self.tmpdir, "v.h"), "w", encoding="utf-8") as fh:
+            fh.write("#define V 3\n")
+        with open(self.src, "w", encoding="utf-8") as fh:
+            fh.write('#include "v.h"\nint main() { return V - 3; }\n')
+        self.cache.compile("g++", ["-O0"], self.src, self._out("a.exe"))
+        with self._count_compiler_calls() as run:
+            self.cache.compile("g++", ["-O0"], self.src, self._out("b.exe"))
+        self.assertEqual(run.call_count, 0)
+
+    def test_diff_tester_reverification_skips_compiler(self):
+        tester = DifferentialTester()
+        tester.compile_cache = self.cache
+        tester.test(PROGRAM, PROGRAM)
+        with self._count_compiler_calls() as run:
+            self.assertTrue(tester.test(PROGRAM, PROGRAM).passed)
+        compiles = [c for c in run.call_args_list if c.args[0][0] == "g++"]
+        self.assertEqual(compiles, [])
+
+    def test_perf_benchmarker_routes_through_cache(self):
+        bench = PerfBenchmarker(runs=1)
+        bench.compile_cache = self.cache
+        with patch.object(self.cache, "compile", wraps=self.cache.compile) as compile_:
+            bench.benchmark(PROGRAM, PROGRAM)
+        self.assertGreaterEqual(compile_.call_count, 1)
+
+    def test_cpp_compiler_uses_cache(self):
+        compiler = CppCompiler()
+        compiler.compile_cache = self.cache
+        compiler.compile(self.src, self._out("a.exe"))
+        with self._count_compiler_calls() as run:
+            result = compiler.compile(self.src, self._out("b.exe"))
+        self.assertTrue(result.success)
+        self.assertEqual(run.call_count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
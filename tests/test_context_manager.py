@@ -4,9 +4,15 @@ Unit Tests for Context Manager
 Tests the shared context storage with versioning and rollback.
 """
 
+import io
+import json
+import os
+import shutil
+import tempfile
 import unittest
 import threading
 import time
+from agent_framework.blob_store import BlobRef, BlobStore
 from agent_framework.context_manager import ContextManager
 
 
@@ -137,6 +143,218 @@ class TestContextManager(unittest.TestCase):
         # All operations should have succeeded
         self.assertTrue(all(results))
     
+    def test_get_returns_read_only_view(self):
+        """Reads hand out the stored node, which cannot be modified"""
+        self.ctx.set("findings", [{"line": 1}])
+        view = self.ctx.get("findings")
+        
+        self.assertEqual(view, [{"line": 1}])
+        self.assertIs(view, self.ctx.get("findings"))
+        with self.assertRaises(TypeError):
+            view.append({"line": 2})
+        with self.assertRaises(TypeError):
+            view[0]["line"] = 2
+    
+    def test_get_copy_is_mutable(self):
+        """copy=True returns a plain deep copy detached from the context"""
+        self.ctx.set("report", {"items": [1, 2]})
+        copy = self.ctx.get("report", copy=True)
+        copy["items"].append(3)
+        
+        self.assertEqual(type(copy), dict)
+        self.assertEqual(self.ctx.get("report.items"), [1, 2])
+        self.assertEqual(type(self.ctx.get_all(copy=True)), dict)
+    
+    def test_set_isolated_from_caller(self):
+        """Changing a value after set() does not change the context"""
+        value = {"items": [1]}
+        self.ctx.set("report", value)
+        value["items"].append(2)
+        
+        self.assertEqual(self.ctx.get("report.items"), [1])
+    
+    def test_versions_share_unchanged_subtrees(self):
+        """A write copies only the path to the changed key"""
+        self.ctx.set("analysis_results", {"findings": list(range(100))})
+        self.ctx.set("verification_status.status", "PASS")
+        history = self.ctx.get_version_history()
+        before = self.ctx.get_version(history[-2]["version_id"])
+        after = self.ctx.get_version(history[-1]["version_id"])
+        
+        self.assertIsNot(before, after)
+        self.assertIs(before["analysis_results"]["findings"],
+                      after["analysis_results"]["findings"])
+        self.assertEqual(before["verification_status"], {})
+        self.assertEqual(after["verification_status"], {"status": "PASS"})
+    
+    def test_rollback_restores_nested_value(self):
+        """Rollback returns nested values to their earlier state"""
+        self.ctx.set("metadata.run", {"attempt": 1})
+        self.ctx.set("metadata.run.attempt", 2)
+        self.ctx.rollback()
+        
+        self.assertEqual(self.ctx.get("metadata.run.attempt"), 1)
+    
+    def test_frozen_values_copy_and_pickle(self):
+        """deepcopy thaws frozen values; pickling round-trips them"""
+        import copy
+        import pickle
+        self.ctx.set("report", {"items": [1, 2]})
+        view = self.ctx.get("report")
+        
+        thawed = copy.deepcopy(view)
+        thawed["items"].append(3)
+        self.assertEqual(view["items"], [1, 2])
+        self.assertEqual(pickle.loads(pickle.dumps(view)), {"items": [1, 2]})
+    
+    def test_versions_store_deltas(self):
+        """A version records only the key paths it changed"""
+        self.ctx.set("analysis_results", {"code": "x" * 1000, "findings": []})
+        self.ctx.set("analysis_results.findings", [1])
+        latest = self.ctx.namespace()._versions[-1]
+        
+        self.assertEqual([path for path, _, _ in latest.changes],
+                         [("analysis_results", "findings")])
+    
+    def test_rollback_reconstructs_every_version(self):
+        """Every retained version reconstructs exactly, past many checkpoints"""
+        ctx = ContextManager(max_versions=50, checkpoint_interval=4)
+        expected = {}
+        for i in range(40):
+            ctx.set(f"metadata.k{i % 7}", i)
+            if i % 5 == 0:
+                ctx.set(f"extra_{i}", {"n": i})
+            expected[ctx.get_version_history()[-1]["version_id"]] = ctx.get_all(copy=True)
+        
+        for version_id, snapshot in expected.items():
+            self.assertEqual(ctx.get_version(version_id), snapshot)
+        
+        target = min(expected)
+        self.assertTrue(ctx.rollback(target))
+        self.assertEqual(ctx.get_all(), expected[target])
+        self.assertNotIn("extra_35", ctx.get_all())
+    
+    def test_history_bounded_by_max_versions(self):
+        """Old versions age out; asking for them fails cleanly"""
+        ctx = ContextManager(max_versions=5)
+        for i in range(20):
+            ctx.set("counter", i)
+        
+        history = ctx.get_version_history()
+        self.assertEqual(len(history), 5)
+        self.assertIsNone(ctx.get_version(0))
+        self.assertFalse(ctx.rollback(0))
+        self.assertEqual(ctx.get_version(history[0]["version_id"])["counter"], 15)
+    
+    def test_rollback_to_tag(self):
+        """A tag survives the version window and restores its snapshot"""
+        ctx = ContextManager(max_versions=3)
+        ctx.set("original_code", "int main() {}")
+        version_id = ctx.tag("before_optimization")
+        for i in range(10):
+            ctx.set("optimization_suggestions", [i])
+        
+        self.assertEqual(ctx.get_tags(), {"before_optimization": version_id})
+        self.assertTrue(ctx.rollback_to_tag("before_optimization"))
+        self.assertEqual(ctx.get("optimization_suggestions"), [])
+        self.assertEqual(ctx.get("original_code"), "int main() {}")
+        self.assertFalse(ctx.rollback_to_tag("missing"))
+    
+    def test_run_scopes_are_isolated(self):
+        """Concurrent runs write the same keys into separate namespaces"""
+        import asyncio
+        
+        async def run(n):
+            with self.ctx.run_scope() as run_id:
+                self.ctx.set("source_file", f"file{n}.cpp")
+                await asyncio.sleep(0.01)
+                await asyncio.to_thread(self.ctx.set, "metadata.n", n)
+                await asyncio.sleep(0.01)
+                return run_id, self.ctx.get("source_file"), self.ctx.get("metadata.n")
+        
+        async def main():
+            return await asyncio.gather(*(run(n) for n in range(5)))
+        
+        results = asyncio.run(main())
+        for n, (_, source_file, value) in enumerate(results):
+            self.assertEqual(source_file, f"file{n}.cpp")
+            self.assertEqual(value, n)
+        self.assertEqual(len({run_id for run_id, _, _ in results}), 5)
+        self.assertEqual(self.ctx.active_runs(), [])
+        self.assertIsNone(self.ctx.get("source_file"))
+    
+    def test_run_scope_publish_and_handles(self):
+        """publish=True leaves the run's context as the default one"""
+        with self.ctx.run_scope("run-1", publish=True) as run_id:
+            self.ctx.set("source_file", "a.cpp")
+            self.assertEqual(self.ctx.namespace(run_id).get("source_file"), "a.cpp")
+            self.assertIn("run-1", self.ctx.active_runs())
+        
+        self.assertEqual(self.ctx.get("source_file"), "a.cpp")
+        handle = self.ctx.namespace("other")
+        handle.set("source_file", "b.cpp")
+        self.assertEqual(self.ctx.get("source_file"), "a.cpp")
+        self.assertTrue(self.ctx.drop("other"))
+        self.assertFalse(self.ctx.drop("other"))
+    
+    def test_concurrent_appends_and_modify_are_atomic(self):
+        """No append or increment is lost under contention, sharded or not"""
+        for ctx in (ContextManager(), ContextManager(sharded=True)):
+            ctx.set("events", [])
+            
+            def worker(n):
+                for i in range(50):
+                    ctx.append("events", (n, i), save_version=False)
+                    ctx.modify("metadata.count", lambda c: c + 1, default=0,
+                               save_version=False)
+                    ctx.set(f"thread_{n}.last", i, save_version=False)
+            
+            threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            
+            self.assertEqual(len(ctx.get("events")), 200)
+            self.assertEqual(ctx.get("metadata.count"), 200)
+            self.assertEqual([ctx.get(f"thread_{n}.last") for n in range(4)], [49] * 4)
+    
+    def test_sharded_write_survives_root_level_update(self):
+        """A keyed write racing a multi-key update is rebuilt, not lost"""
+        ctx = ContextManager(sharded=True)
+        space = ctx.namespace()
+        ctx.set("metadata.a", 1)
+        
+        def build(child):
+            if not hasattr(build, "raced"):
+                build.raced = True
+                ctx.update({"metadata": {"b": 2}, "source_file": "x.cpp"})
+            return dict(child, c=3)
+        
+        space._write("metadata", build, save_version=True)
+        self.assertEqual(ctx.get("metadata"), {"b": 2, "c": 3})
+        self.assertEqual(ctx.get("source_file"), "x.cpp")
+    
+    def test_reads_do_not_take_the_lock(self):
+        """get() returns while another thread holds the namespace lock"""
+        self.ctx.set("key", "value")
+        held, release = threading.Event(), threading.Event()
+        
+        def holder():
+            with self.ctx.namespace()._lock:
+                held.set()
+                release.wait(5)
+        
+        t = threading.Thread(target=holder)
+        t.start()
+        held.wait(5)
+        try:
+            self.assertEqual(self.ctx.get("key"), "value")
+            self.assertIn("key", self.ctx.get_all())
+        finally:
+            release.set()
+            t.join()
+    
     def test_to_json(self):
         """Test JSON export"""
         self.ctx.set("test_key", "test_value")
@@ -146,5 +364,98 @@ class TestContextManager(unittest.TestCase):
         self.assertIn("test_value", json_str)
 
 
+
+class TestBlobStore(unittest.TestCase):
+    """Test spilling large context values to the blob store"""
+    
+    def setUp(self):
+        """Set up a store with a small threshold"""
+        self.tmpdir = tempfile.mkdtemp(prefix="blobs_")
+        self.store = BlobStore(self.tmpdir, threshold=100)
+        self.ctx = ContextManager(blob_store=self.store)
+        self.big = "int x;\n" * 100
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+    
+    def test_put_is_content_addressed(self):
+        """Equal text is written once and read back intact"""
+        first = self.store.put(self.big)
+        second = self.store.put(str(self.big))
+        
+        self.assertEqual(first, second)
+        self.assertEqual(self.store.writes, 1)
+        cold = BlobStore(self.tmpdir, cache_bytes=0)
+        self.assertEqual(cold.read(first.digest), self.big)
+        self.assertEqual(cold.reads, 1)
+    
+    def test_context_holds_handles(self):
+        """Large strings are stored as handles and loaded on read"""
+        self.ctx.set("original_code", self.big)
+        self.ctx.set("optimization_suggestions", {"optimized_code": self.big, "n": 1})
+        
+        root = self.ctx.namespace()._context
+        self.assertIsInstance(root["original_code"], BlobRef)
+        self.assertIsInstance(root["optimization_suggestions"]["optimized_code"], BlobRef)
+        self.assertEqual(self.ctx.get("original_code"), self.big)
+        self.assertEqual(self.ctx.get("optimization_suggestions.optimized_code"), self.big)
+        self.assertEqual(self.ctx.get_all()["original_code"], self.big)
+        self.assertEqual(self.ctx.get("optimization_suggestions", copy=True),
+                         {"optimized_code": self.big, "n": 1})
+        self.assertEqual(self.store.writes, 1)
+    
+    def test_small_and_blob_free_values_untouched(self):
+        """Short strings stay inline; blob-free reads are zero-copy"""
+        self.ctx.set("source_file", "a.cpp")
+        self.ctx.set("analysis_results", {"findings": [1, 2]})
+        self.ctx.set("original_code", self.big)
+        
+        self.assertEqual(self.ctx.namespace()._context["source_file"], "a.cpp")
+        self.assertIs(self.ctx.get("analysis_results"), self.ctx.get("analysis_results"))
+        self.assertEqual(ContextManager(spill=False).namespace()._blobs, None)
+    
+    def test_versions_and_lists_with_blobs(self):
+        """Rollback, append and modify work with spilled values"""
+        self.ctx.set("original_code", self.big)
+        self.ctx.set("original_code", "short")
+        self.assertTrue(self.ctx.rollback())
+        self.assertEqual(self.ctx.get("original_code"), self.big)
+        
+        self.ctx.append("security_findings", {"snippet": self.big})
+        self.ctx.append("security_findings", {"snippet": "x"})
+        self.assertEqual(self.ctx.get("security_findings"),
+                         [{"snippet": self.big}, {"snippet": "x"}])
+        self.assertEqual(self.ctx.modify("original_code", lambda code: code + "!"),
+                         self.big + "!")
+    
+    def test_unreferenced_blobs_evicted_over_budget(self):
+        """Past max_bytes, released blobs go (oldest first); live ones stay"""
+        store = BlobStore(self.tmpdir, threshold=100, max_bytes=2000)
+        ctx = ContextManager(blob_store=store)
+        with ctx.run_scope():
+            ctx.set("original_code", "a" * 1000)
+            dropped = ctx.namespace()._context["original_code"].digest
+        kept = store.put("b" * 1000)
+        store.put("c" * 1000)               # over budget: the dropped run's blob goes
+        
+        self.assertEqual(store.evictions, 1)
+        self.assertLessEqual(store.stored_bytes, 2000)
+        self.assertFalse(os.path.exists(os.path.join(self.tmpdir, dropped[:2], dropped)))
+        self.assertEqual(kept.load(), "b" * 1000)
+        live = [store.put(ch * 1000) for ch in "def"]
+        self.assertEqual([ref.load() for ref in live], ["d" * 1000, "e" * 1000, "f" * 1000])
+    
+    def test_json_streams_blob_text(self):
+        """write_json streams the same document to_json returns"""
+        self.ctx.set("original_code", self.big)
+        text = self.ctx.to_json()
+        buffer = io.StringIO()
+        self.ctx.write_json(buffer)
+        
+        self.assertEqual(buffer.getvalue(), text)
+        self.assertEqual(json.loads(text)["original_code"], self.big)
+        self.assertGreater(len(list(self.ctx.iter_json())), 1)
+
+
 if __name__ == '__main__':
     unittest.main()
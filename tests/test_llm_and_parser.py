@@ -6,11 +6,14 @@ import json
 import sys
 import os
 import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
 
 # Add project root to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
-from src.llm.llm_client import LLMClient
+from src.llm import llm_client as llm_module
+from src.llm.llm_client import LLMClient, get_llm_client
 from src.llm.prompt_templates import (
     AnalysisPromptTemplate,
     OptimizationPromptTemplate,
@@ -63,6 +66,236 @@ class TestLLMClient(unittest.TestCase):
         self.assertIsInstance(resp, str)
 
 
+class TestLLMClientSharing(unittest.TestCase):
+    """Pooled sessions, cached health probes and the shared-client registry."""
+
+    def setUp(self):
+        session = MagicMock()
+        session.get.return_value = SimpleNamespace(status_code=200)
+        session.post.return_value.json.return_value = {"response": "ok"}
+        self.session = session
+        self.fake_requests = SimpleNamespace(
+            Session=MagicMock(return_value=session),
+            adapters=SimpleNamespace(HTTPAdapter=MagicMock()),
+        )
+        llm_module.reset_shared_state()
+        patcher = patch.object(llm_module, "_try_import_requests",
+                               return_value=self.fake_requests)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(llm_module.reset_shared_state)
+
+    def test_clients_share_one_session_per_base_url(self):
+        a, b = LLMClient(), LLMClient()
+        self.assertIs(a._session, b._session)
+        LLMClient(base_url="http://other:11434")
+        self.assertEqual(self.fake_requests.Session.call_count, 2)
+        a.generate("x")
+        b.generate("y")
+        self.assertEqual(self.session.post.call_count, 2)
+
+    def test_health_probe_is_cached_until_ttl(self):
+        LLMClient()
+        LLMClient()
+        self.assertEqual(self.session.get.call_count, 1)
+        with patch.object(llm_module, "HEALTH_TTL", 0.0):
+            LLMClient()
+        self.assertEqual(self.session.get.call_count, 2)
+
+    def test_health_check_always_reprobes(self):
+        client = LLMClient()
+        client.health_check()
+        self.assertEqual(self.session.get.call_count, 2)
+
+    def test_registry_returns_shared_instance(self):
+        self.assertIs(get_llm_client("ollama"), get_llm_client("ollama"))
+
+
+class TestStreamingGenerate(unittest.TestCase):
+    """Streamed completions stop at the end of the CoT JSON object."""
+
+    COT = ('```json\n{"reasoning_steps": ["Step 1: read \\"x\\"", "Step 2: {braces}"], '
+           '"conclusion": "ok", "confidence": 0.9}')
+    TAIL = "\n```\nHere is some extra rambling the model added afterwards."
+
+    def _client_streaming(self, text, size=7):
+        lines = [json.dumps({"response": text[i:i + size], "done": False}).encode()
+                 for i in range(0, len(text), size)]
+        lines.append(json.dumps({"response": "", "done": True}).encode())
+        consumed = []
+
+        def iter_lines():
+            for line in lines:
+                consumed.append(line)
+                yield line
+
+        resp = MagicMock()
+        resp.__enter__.return_value = resp
+        resp.iter_lines.side_effect = iter_lines
+        session = MagicMock()
+        session.post.return_value = resp
+        client = LLMClient.__new__(LLMClient)
+        client.model, client.base_url, client.timeout = "m", "http://x", 5
+        client.max_retries, client._available = 0, True
+        client._session, client.on_reasoning_step = session, None
+        return client, consumed, len(lines)
+
+    def test_stops_reading_after_closing_brace(self):
+        client, consumed, total = self._client_streaming(self.COT + self.TAIL)
+        steps = []
+        out = client.generate("analyze", on_reasoning_step=steps.append)
+        self.assertTrue(out.endswith('"confidence": 0.9}'))
+        self.assertLess(len(consumed), total)
+        self.assertEqual(steps, ['Step 1: read "x"', "Step 2: {braces}"])
+
+    def test_retry_does_not_repeat_delivered_steps(self):
+        client, _, _ = self._client_streaming(self.COT + self.TAIL)
+        client.max_retries = 1
+        good = client._session.post.return_value.iter_lines.side_effect
+        lines = list(good())
+        broken = MagicMock()
+        broken.__enter__.return_value = broken
+
+        def drop_midway():
+            yield from lines[:len(lines) // 2]      # past the first step
+            raise ConnectionError("connection reset")
+
+        broken.iter_lines.side_effect = drop_midway
+        client._session.post.side_effect = [broken, client._session.post.return_value]
+        steps = []
+        with patch.object(llm_module.time, "sleep"):
+            out = client.generate("analyze", on_reasoning_step=steps.append)
+        self.assertTrue(out.endswith('"confidence": 0.9}'))
+        self.assertEqual(steps, ['Step 1: read "x"', "Step 2: {braces}"])
+
+    def test_truncated_output_still_validates(self):
+        from src.reasoning.cot_validator import CoTValidator
+        client, _, _ = self._client_streaming(self.COT + self.TAIL)
+        cot = CoTValidator().validate(client.generate("analyze"))
+        self.assertTrue(cot.is_valid)
+        self.assertEqual(cot.confidence, 0.9)
+
+    def test_generate_stream_yields_raw_chunks(self):
+        client, _, _ = self._client_streaming("no json here", size=4)
+        self.assertEqual(list(client.generate_stream("hi")), ["no j", "son ", "here"])
+
+
+class TestResponseCache(unittest.TestCase):
+    """Identical prompts are served from the on-disk response cache."""
+
+    def setUp(self):
+        import tempfile
+        self.tmpdir = tempfile.mkdtemp(prefix="llmcache_")
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _cache(self, **kwargs):
+        from src.llm.response_cache import ResponseCache
+        return ResponseCache(self.tmpdir, **kwargs)
+
+    def _client(self, cache):
+        client, _, _ = TestStreamingGenerate()._client_streaming(TestStreamingGenerate.COT)
+        client.response_cache = cache
+        return client
+
+    def test_second_call_skips_backend(self):
+        client = self._client(self._cache())
+        first = client.generate("analyze")
+        steps = []
+        second = client.generate("analyze", on_reasoning_step=steps.append)
+        self.assertEqual(first, second)
+        self.assertEqual(client._session.post.call_count, 1)
+        self.assertEqual(len(steps), 2)          # steps still replayed on a hit
+        self.assertEqual(client.response_cache.hits, 1)
+
+    def test_key_covers_prompt_and_sampling(self):
+        client = self._client(self._cache())
+        client.generate("analyze")
+        client.generate("analyze", temperature=0.7)
+        client.generate("analyze", system_prompt="sys")
+        client.generate("other")
+        self.assertEqual(client._session.post.call_count, 4)
+
+    def test_expired_entries_are_refetched(self):
+        client = self._client(self._cache(ttl=60))
+        client.generate("analyze")
+        with patch("src.llm.response_cache.time.time", return_value=10**12):
+            client.generate("analyze")
+        self.assertEqual(client._session.post.call_count, 2)
+
+    def test_read_only_cache_never_writes(self):
+        client = self._client(self._cache(read_only=True))
+        client.generate("analyze")
+        client.generate("analyze")
+        self.assertEqual(client._session.post.call_count, 2)
+        self.assertEqual(client.response_cache.stats()["entries"], 0)
+
+    def test_read_only_hit_leaves_directory_untouched(self):
+        writer = self._cache()
+        key = writer.key("ollama", "m", "", "analyze", 0.1, 2048)
+        writer.set(key, "cached text")
+        bad = writer.key("ollama", "m", "", "corrupt", 0.1, 2048)
+        writer.set(bad, "x")
+        with open(writer.store._path(bad), "wb") as fh:
+            fh.write(b"not a pickle")
+        paths = [writer.store._path(k) for k in (key, bad)]
+        for path in paths:
+            os.utime(path, (1, 1))
+
+        reader = self._cache(read_only=True)
+        self.assertEqual(reader.get(key), "cached text")
+        self.assertIsNone(reader.get(bad))
+        self.assertEqual([os.path.getmtime(p) for p in paths], [1, 1])
+
+    def test_stub_responses_are_not_cached(self):
+        client = self._client(self._cache())
+        client._available = False
+        client.generate("analyze")
+        self.assertEqual(client.response_cache.stats()["entries"], 0)
+
+
+class TestJSONStreamScanner(unittest.TestCase):
+
+    def test_nested_values_do_not_end_object(self):
+        from src.llm.json_stream import JSONStreamScanner
+        scanner = JSONStreamScanner()
+        text = 'prose {"a": {"b": [1, "}"]}, "reasoning_steps": []} tail'
+        end = None
+        for i in range(0, len(text), 3):
+            end = scanner.feed(text[i:i + 3])
+            if end is not None:
+                end += i
+                break
+        self.assertEqual(text[:end], 'prose {"a": {"b": [1, "}"]}, "reasoning_steps": []}')
+        self.assertEqual(scanner.reasoning_steps, [])
+
+    def test_only_top_level_steps_are_reported(self):
+        from src.llm.json_stream import JSONStreamScanner
+        scanner = JSONStreamScanner()
+        scanner.feed('{"x": {"reasoning_steps": ["inner"]}, "reasoning_steps": ["outer"]}')
+        self.assertEqual(scanner.reasoning_steps, ["outer"])
+        self.assertTrue(scanner.complete)
+
+    def test_braces_before_the_object_are_skipped(self):
+        from src.llm.json_stream import JSONStreamScanner
+        obj = '{"reasoning_steps": ["s1"], "conclusion": "ok"}'
+        for preamble in ('The loop body { x++; } is hot.\n',
+                         'Use a set {"a", "b"} here.\n',
+                         'Empty {} and {"k": } braces.\n'):
+            scanner = JSONStreamScanner()
+            text = preamble + "```json\n" + obj + "\n```"
+            end = None
+            for i in range(0, len(text), 4):
+                end = scanner.feed(text[i:i + 4])
+                if end is not None:
+                    end += i
+                    break
+            self.assertEqual(text[:end], preamble + "```json\n" + obj, preamble)
+            self.assertEqual(scanner.reasoning_steps, ["s1"])
+
+
 # ── Prompt Template tests ────────────────────────────────────────────────────
 
 class TestPromptTemplates(unittest.TestCase):
@@ -99,6 +332,48 @@ class TestPromptTemplates(unittest.TestCase):
 
 # ── Code Parser tests ────────────────────────────────────────────────────────
 
+class TestLexer(unittest.TestCase):
+
+    def test_token_kinds_and_offsets(self):
+        from src.parser.lexer import (CHAR, IDENT, NUMBER, PREPROC, PUNCT,
+                                      STRING, tokenize)
+        src = '#include <x.h>\nint a = 1.5e+3; // note\nc = \'}\' + "{";\nx >>= 2;'
+        ts = tokenize(src)
+        self.assertEqual(list(ts.kinds)[:7], [PREPROC, IDENT, IDENT, PUNCT, NUMBER, PUNCT, IDENT])
+        self.assertIn(CHAR, ts.kinds)
+        self.assertIn(STRING, ts.kinds)
+        self.assertIn(">>=", ts.texts)
+        for i in range(len(ts)):
+            self.assertEqual(src[ts.starts[i]:ts.ends[i]], ts.texts[i])
+        self.assertEqual(ts.line(ts.texts.index("c")), 3)
+
+    def test_code_text_blanks_comments_only(self):
+        from src.parser.lexer import tokenize
+        src = 'a; /* x\ny */ b; // z\ns = "// kept";'
+        clean = tokenize(src).code_text()
+        self.assertEqual(len(clean), len(src))
+        self.assertEqual(clean.count("\n"), src.count("\n"))
+        self.assertNotIn("x", clean)
+        self.assertIn('"// kept"', clean)
+
+    def test_bracket_partners(self):
+        from src.parser.lexer import tokenize
+        ts = tokenize("f(a[i], {1, (2)}) ) }")
+        texts = ts.texts
+        self.assertEqual(texts[ts.match(1)], ")")
+        self.assertEqual(ts.match(ts.match(1)), 1)
+        self.assertEqual(texts[ts.match(texts.index("["))], "]")
+        self.assertEqual(texts[ts.match(texts.index("{"))], "}")
+        self.assertEqual(ts.match(len(ts) - 2), -1)      # stray ')'
+        self.assertEqual(ts.match(len(ts) - 1), -1)      # stray '}'
+
+    def test_lex_is_shared(self):
+        from src.parser.lexer import lex
+        src = "int unique_lex_probe;"
+        self.assertIs(lex(src), lex(src))
+        self.assertIs(CodeParser().parse_string(src).tokens, lex(src))
+
+
 class TestCodeParser(unittest.TestCase):
 
     def setUp(self):
@@ -200,6 +475,155 @@ int main() {
             var_names = [v["variable"] for v in result.uninitialized_vars]
             self.assertIn("x", var_names)
 
+    def test_line_index_matches_newline_count(self):
+        from src.parser.lexer import LineIndex
+        src = "a\n\nbc\n{\n}\n\n"
+        index = LineIndex(src)
+        for offset in range(len(src) + 1):
+            self.assertEqual(index.line_of(offset), src[:offset].count("\n") + 1)
+
+    def test_line_numbers_and_block_ends(self):
+        code = (
+            "int f(int *p) {\n"           # 1
+            "    int a[4];\n"             # 2
+            "    for (int i = 0; i < 4; i++) {\n"   # 3
+            "        a[i] = *p;\n"        # 4
+            "    }\n"                     # 5
+            "    return a[0];\n"          # 6
+            "}\n"                         # 7
+        )
+        result = self.parser.parse_string(code)
+        self.assertEqual((result.functions[0].start_line, result.functions[0].end_line), (1, 7))
+        self.assertEqual([l.line for l in result.loops], [3])
+        self.assertEqual([a["line"] for a in result.array_accesses], [2, 4, 6])
+        self.assertIn(4, [op["line"] for op in result.pointer_ops])
+
+    def test_loop_depth_is_exact(self):
+        code = (
+            "void f(int n) {\n"                             # 1
+            "    for (int i = 0; i < n; i++) {\n"           # 2
+            "        for (int j = 0; j < n; j++)\n"         # 3
+            "            while (n--) { g(i, j); }\n"        # 4
+            "    }\n"                                       # 5
+            "    do {\n"                                    # 6
+            "        n++;\n"                                # 7
+            "    } while (n < 10);\n"                       # 8
+            "    for (;;) if (n) break; else n++;\n"        # 9
+            "    while (n) n--;\n"                          # 10
+            "}\n"
+        )
+        result = self.parser.parse_string(code)
+        self.assertEqual(
+            [(l.loop_type, l.line, l.depth, l.end_line) for l in result.loops],
+            [("for", 2, 1, 5), ("for", 3, 2, 4), ("while", 4, 3, 4),
+             ("do_while", 6, 1, 8), ("for", 9, 1, 9), ("while", 10, 1, 10)],
+        )
+        self.assertEqual(result.max_loop_depth, 3)
+        self.assertTrue(result.has_nested_loops)
+
+    def test_scope_tree(self):
+        code = (
+            "int g;\n"
+            "int f(int n) {\n"
+            "    for (int i = 0; i < n; i++) {\n"
+            "        { n += i; }\n"
+            "    }\n"
+            "    return n;\n"
+            "}\n"
+        )
+        result = self.parser.parse_string(code)
+        tree, ts = result.scopes, result.tokens
+        fn, = tree.of_kind("function")
+        loop, = tree.of_kind("loop")
+        block, = tree.of_kind("block")
+        self.assertEqual((fn.name, fn.start_line, fn.end_line), ("f", 2, 7))
+        self.assertIs(loop.parent, fn)
+        self.assertIs(block.parent, loop)
+        plus_eq = ts.texts.index("+=")
+        self.assertIs(tree.enclosing(plus_eq), block)
+        self.assertIs(tree.enclosing(plus_eq, "function"), fn)
+        self.assertIs(tree.enclosing(ts.texts.index("return")), fn)
+        self.assertIs(tree.enclosing(0), tree.root)
+        self.assertEqual([sc.kind for sc in self.parser.scope_tree(code).scopes],
+                         ["file", "function", "loop", "block"])
+
+    def test_comments_and_strings_are_not_code(self):
+        code = (
+            "// for (int i = 0; i < n; i++) { buf[i] = *p; }\n"
+            "int main() {\n"
+            "    const char *s = \"while (x) { a[i]; malloc(4); }\";\n"
+            "    /* free(p); do { } */\n"
+            "    return 0;\n"
+            "}\n"
+        )
+        result = self.parser.parse_string(code)
+        self.assertEqual([f.name for f in result.functions], ["main"])
+        self.assertEqual(result.loops, [])
+        self.assertEqual(result.array_accesses, [])
+        self.assertEqual((result.malloc_calls, result.free_calls), ([], []))
+        self.assertEqual([op["pointer"] for op in result.pointer_ops], ["s"])
+
+    def test_parse_time_scales_linearly(self):
+        import time
+        from evaluation.bench_parser import synthetic_source
+        from src.parser.lexer import clear_lex_cache
+
+        def best_of(src):
+            best = float("inf")
+            for _ in range(3):
+                clear_lex_cache()
+                t0 = time.perf_counter()
+                self.parser.parse_string(src)
+                best = min(best, time.perf_counter() - t0)
+            return best
+
+        small, large = synthetic_source(1_000), synthetic_source(8_000)
+        # 8x the input: linear ≈ 8x the time, the old quadratic code was ≈ 64x
+        self.assertLess(best_of(large) / best_of(small), 24)
+
+
+class TestParsedSource(unittest.TestCase):
+
+    def test_memoised_in_context(self):
+        from agent_framework import ContextManager
+        from src.parser.parsed_source import parsed_source
+        ctx = ContextManager()
+        code = "int main() { int x; return x; } // done\n"
+        parsed = parsed_source(code, ctx)
+        self.assertIs(parsed_source(code, ctx), parsed)
+        self.assertIsNot(parsed_source(code + " ", ctx), parsed)
+        self.assertEqual(parsed.parse("a.cpp").file_path, "a.cpp")
+        self.assertIs(parsed.parse("a.cpp").scopes, parsed.scopes)
+        self.assertNotIn("done", parsed.code_lines[0])
+        self.assertNotIn("parsed_source", ctx.to_json())
+        ctx.clear()
+        self.assertIsNot(parsed_source(code, ctx), parsed)
+
+    def test_pipeline_lexes_each_source_once(self):
+        from collections import Counter
+        from src.parser import lexer, parsed_source as ps_module
+        from src.pipeline.pipeline import CompilerOptimizationPipeline
+
+        counts = Counter()
+        real_tokenize = lexer.tokenize
+
+        def counting_tokenize(source):
+            counts[source] += 1
+            return real_tokenize(source)
+
+        llm = LLMClient()
+        llm._available = False
+        pipeline = CompilerOptimizationPipeline(llm_client=llm)
+        path = os.path.join(os.path.dirname(__file__), "..", "MicroBenchmarks",
+                            "Testcases", "TC11_buffer_overflow_loop.cpp")
+        lexer.clear_lex_cache()
+        with patch.object(lexer, "tokenize", counting_tokenize), \
+                patch.object(ps_module, "tokenize", counting_tokenize):
+            result = pipeline.run(path)
+        self.assertIsNotNone(result.security_report)
+        self.assertGreaterEqual(len(counts), 2)         # original + rule-fixed
+        self.assertEqual(set(counts.values()), {1})
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
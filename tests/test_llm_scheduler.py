@@ -0,0 +1,148 @@
+"""
+Unit tests for the LLM request scheduler
+"""
+
+import contextvars
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.llm.scheduler import LLMScheduler, get_llm_scheduler
+
+
+class GatedLLM:
+    """Fake client whose generate() blocks until release() is called."""
+
+    _available = True
+
+    def __init__(self):
+        self.gate    = threading.Event()
+        self.calls   = []
+        self.active  = 0
+        self.peak    = 0
+        self._lock   = threading.Lock()
+
+    def generate(self, prompt, system_prompt="", **kwargs):
+        with self._lock:
+            self.calls.append(prompt)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        self.gate.wait(5)
+        with self._lock:
+            self.active -= 1
+        if prompt == "boom":
+            raise RuntimeError("backend down")
+        return f"out:{prompt}"
+
+    def release(self):
+        self.gate.set()
+
+
+class TestLLMScheduler(unittest.TestCase):
+
+    def _wait_running(self, sched, n):
+        deadline = time.time() + 5
+        while sched.stats()["running"] < n and time.time() < deadline:
+            time.sleep(0.01)
+
+    def test_window_bounds_concurrency(self):
+        llm, sched = GatedLLM(), LLMScheduler(max_in_flight=2)
+        futures = [sched.submit(llm, f"p{i}") for i in range(5)]
+        self._wait_running(sched, 2)
+        time.sleep(0.05)
+        self.assertEqual(llm.active, 2)
+        llm.release()
+        self.assertEqual([f.result(5) for f in futures], [f"out:p{i}" for i in range(5)])
+        self.assertEqual(llm.peak, 2)
+
+    def test_priority_order(self):
+        llm, sched = GatedLLM(), LLMScheduler(max_in_flight=1)
+        first = sched.submit(llm, "busy")
+        self._wait_running(sched, 1)
+        late  = sched.submit(llm, "verify",   priority="verification")
+        sec   = sched.submit(llm, "security", priority="security")
+        opt   = sched.submit(llm, "optimize", priority="optimization")
+        llm.release()
+        for f in (first, late, sec, opt):
+            f.result(5)
+        self.assertEqual(llm.calls, ["busy", "optimize", "security", "verify"])
+
+    def test_identical_in_flight_prompts_coalesce(self):
+        llm, sched = GatedLLM(), LLMScheduler(max_in_flight=1)
+        a = sched.submit(llm, "same", system_prompt="sys")
+        b = sched.submit(llm, "same", system_prompt="sys")
+        c = sched.submit(llm, "same", system_prompt="other")
+        self.assertIs(a, b)
+        self.assertIsNot(a, c)
+        llm.release()
+        self.assertEqual(b.result(5), "out:same")
+        c.result(5)
+        self.assertEqual(llm.calls.count("same"), 2)
+        self.assertEqual(sched.stats()["coalesced"], 1)
+
+    def test_exceptions_reach_the_caller(self):
+        llm, sched = GatedLLM(), LLMScheduler()
+        llm.release()
+        with self.assertRaises(RuntimeError):
+            sched.submit(llm, "boom").result(5)
+
+    def test_offline_client_runs_inline(self):
+        llm = MagicMock()
+        llm._available = False
+        llm.generate.return_value = "stub"
+        future = LLMScheduler().submit(llm, "p")
+        self.assertTrue(future.done())
+        self.assertEqual(future.result(), "stub")
+
+    def test_shared_instance(self):
+        self.assertIs(get_llm_scheduler(), get_llm_scheduler())
+
+    def test_request_runs_in_submitter_context(self):
+        var = contextvars.ContextVar("run", default=None)
+        seen = []
+
+        class RecordingLLM:
+            _available = True
+
+            def generate(self, prompt, system_prompt="", **kwargs):
+                seen.append(var.get())
+                return prompt
+
+        sched, llm = LLMScheduler(max_in_flight=1), RecordingLLM()
+        var.set("run-a")
+        first = sched.submit(llm, "a")
+        var.set("run-b")
+        second = sched.submit(llm, "b")
+        self.assertEqual([first.result(5), second.result(5)], ["a", "b"])
+        self.assertEqual(sorted(seen), ["run-a", "run-b"])
+
+    def test_submit_racing_idle_timeout_is_not_stranded(self):
+        llm = GatedLLM()
+        llm.release()
+        sched = LLMScheduler(max_in_flight=1)
+        real_wait, raced = sched._cond.wait, []
+
+        def wait(timeout=None):
+            if not raced:
+                # The idle worker's wait times out just as a submit() gets
+                # the lock: it sees the worker as idle and spawns none.
+                raced.append(sched.submit(llm, "late"))
+                return False
+            return real_wait(timeout)
+
+        sched._cond.wait = wait
+        self.assertEqual(sched.submit(llm, "first").result(5), "out:first")
+        self._wait_running(sched, 0)
+        deadline = time.time() + 5
+        while not raced and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(raced[0].result(5), "out:late")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,102 @@
+"""
+Unit tests for batch (process-pool) pipeline execution
+"""
+
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.pipeline.batch import BatchConfig, run_batch
+from src.pipeline.pipeline import CompilerOptimizationPipeline
+
+
+SIMPLE_PROGRAM = """#include <iostream>
+int main() {
+    int x = 5;
+    std::cout << x << std::endl;
+    return 0;
+}
+"""
+
+
+class TestRunBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp(prefix="batch_")
+        self.config = BatchConfig(use_llm=False, security=False,
+                                  output_dir=self.tmpdir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _write(self, name, code):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(code)
+        return path
+
+    def test_every_file_yields_one_result(self):
+        paths = [self._write(f"batch_{i}.cpp", SIMPLE_PROGRAM) for i in range(3)]
+        items = list(run_batch(paths, workers=2, config=self.config))
+        self.assertEqual(sorted(i.index for i in items), [0, 1, 2])
+        for item in items:
+            self.assertEqual(item.file_path, paths[item.index])
+            self.assertIn(item.result.status, ("success", "partial", "rollback"))
+            self.assertFalse(item.timed_out)
+
+    def test_missing_file_reported_as_failed(self):
+        items = list(run_batch(["/nonexistent/batch.cpp"], workers=1,
+                               config=self.config))
+        self.assertEqual(len(items), 1)
+        self.assertEqual(items[0].result.status, "failed")
+
+    def test_empty_batch_yields_nothing(self):
+        self.assertEqual(list(run_batch([], config=self.config)), [])
+
+    @unittest.skipUnless(multiprocessing.get_start_method() == "fork",
+                         "patched pipeline is only inherited by forked workers")
+    def test_hung_file_times_out_without_stalling_batch(self):
+        real_run = CompilerOptimizationPipeline.run
+
+        def run_or_hang(pipeline, path):
+            if path.endswith("batch_hang.cpp"):
+                time.sleep(600)
+            return real_run(pipeline, path)
+
+        hung = self._write("batch_hang.cpp", SIMPLE_PROGRAM)
+        ok   = self._write("batch_ok.cpp", SIMPLE_PROGRAM)
+        with patch.object(CompilerOptimizationPipeline, "run", run_or_hang):
+            items = {i.file_path: i for i in
+                     run_batch([hung, ok], workers=1, timeout=10.0, config=self.config)}
+        self.assertEqual(len(items), 2)
+        self.assertTrue(items[hung].timed_out)
+        self.assertEqual(items[hung].result.status, "failed")
+        self.assertFalse(items[ok].timed_out)
+
+    @unittest.skipUnless(multiprocessing.get_start_method() == "fork",
+                         "patched builder is only inherited by forked workers")
+    def test_worker_init_failure_fails_files_instead_of_hanging(self):
+        paths = [self._write(f"batch_{i}.cpp", SIMPLE_PROGRAM) for i in range(2)]
+
+        def broken(config):
+            raise RuntimeError("no LLM backend")
+
+        t0 = time.time()
+        with patch("src.pipeline.batch._build_pipeline", broken):
+            items = list(run_batch(paths, workers=1, timeout=5.0, config=self.config))
+        self.assertLess(time.time() - t0, 30)
+        self.assertEqual(sorted(i.index for i in items), [0, 1])
+        for item in items:
+            self.assertEqual(item.result.status, "failed")
+            self.assertIn("no LLM backend", item.result.error)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
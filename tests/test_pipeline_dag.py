@@ -0,0 +1,189 @@
+"""
+Unit tests for the stage DAG scheduler and the overlapped pipeline (arun)
+"""
+
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.pipeline.dag import StageGraph, UpstreamFailed
+from tests.helpers import offline_pipeline
+
+
+PROGRAM = """#include <iostream>
+int main() {
+    int total = 0;
+    for (int i = 0; i < 10; i++) total += i;
+    std::cout << total << std::endl;
+    return 0;
+}
+"""
+
+
+def _value(v, delay=0.0):
+    async def stage(**_):
+        await asyncio.sleep(delay)
+        return v
+    return stage
+
+
+async def _boom(**_):
+    raise RuntimeError("boom")
+
+
+class TestStageGraph(unittest.TestCase):
+
+    def test_order_respects_dependencies(self):
+        graph = (StageGraph()
+                 .add("c", _value(3), deps=("a", "b"))
+                 .add("b", _value(2), deps=("a",))
+                 .add("a", _value(1)))
+        order = graph.order()
+        self.assertLess(order.index("a"), order.index("b"))
+        self.assertLess(order.index("b"), order.index("c"))
+
+    def test_cycle_and_unknown_dependency_rejected(self):
+        cyclic = StageGraph().add("a", _value(1), deps=("b",)).add("b", _value(2), deps=("a",))
+        with self.assertRaises(ValueError):
+            cyclic.order()
+        with self.assertRaises(ValueError):
+            StageGraph().add("a", _value(1), deps=("missing",)).order()
+        with self.assertRaises(ValueError):
+            StageGraph().add("a", _value(1)).add("a", _value(2))
+
+    def test_results_passed_as_keyword_arguments(self):
+        async def total(a, b):
+            return a + b
+        graph = (StageGraph().add("a", _value(1)).add("b", _value(2))
+                 .add("total", total, deps=("a", "b")))
+        run = asyncio.run(graph.run())
+        self.assertEqual(run.results["total"], 3)
+        self.assertFalse(run.errors)
+
+    def test_independent_stages_overlap(self):
+        graph = (StageGraph()
+                 .add("slow", _value(1, delay=0.2))
+                 .add("side", _value(2, delay=0.2))
+                 .add("after", _value(3), deps=("slow",)))
+        t0 = time.perf_counter()
+        run = asyncio.run(graph.run())
+        self.assertLess(time.perf_counter() - t0, 0.35)
+        self.assertLess(run.timings["side"][0], run.timings["slow"][1])
+        self.assertGreaterEqual(run.timings["after"][0], run.timings["slow"][1])
+
+    def test_required_failure_blocks_dependents(self):
+        called = []
+
+        async def after(failing):
+            called.append(failing)
+
+        graph = StageGraph().add("failing", _boom).add("after", after, deps=("failing",))
+        run = asyncio.run(graph.run())
+        self.assertFalse(run.ok("failing"))
+        self.assertIsInstance(run.errors["after"], UpstreamFailed)
+        self.assertEqual(called, [])
+
+    def test_optional_failure_passes_none(self):
+        async def after(warm):
+            return warm
+
+        graph = (StageGraph().add("warm", _boom, optional=True)
+                 .add("after", after, deps=("warm",)))
+        run = asyncio.run(graph.run())
+        self.assertIn("warm", run.errors)
+        self.assertTrue(run.ok("after"))
+        self.assertIsNone(run.results["after"])
+
+
+class TestOverlappedPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp(prefix="dag_")
+        self.path = os.path.join(self.tmpdir, "prog.cpp")
+        with open(self.path, "w", encoding="utf-8") as fh:
+            fh.write(PROGRAM)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _pipeline(self):
+        return offline_pipeline(self.tmpdir)
+
+    def test_original_side_work_overlaps_optimization(self):
+        pipeline = self._pipeline()
+        events = {}
+
+        def spy(name, fn, delay=0.0):
+            async def wrapped(*args, **kwargs):
+                events[name] = [time.perf_counter(), None]
+                if delay:
+                    await asyncio.sleep(delay)
+                result = await fn(*args, **kwargs)
+                events[name][1] = time.perf_counter()
+                return result
+            return wrapped
+
+        pipeline.optimization_agent.aprocess = spy(
+            "optimize", pipeline.optimization_agent.aprocess, delay=0.3)
+        pipeline.security_agent.aprepare = spy(
+            "security_baseline", pipeline.security_agent.aprepare)
+        pipeline.verification_agent.aprepare = spy(
+            "original_build", pipeline.verification_agent.aprepare)
+        pipeline.verification_agent.aprocess = spy(
+            "verify", pipeline.verification_agent.aprocess)
+
+        result = asyncio.run(pipeline.arun(self.path))
+        self.assertNotEqual(result.status, "failed")
+        self.assertIsNotNone(result.security_report)
+        optimize_end = events["optimize"][1]
+        self.assertLess(events["security_baseline"][0], optimize_end)
+        self.assertLess(events["original_build"][0], optimize_end)
+        self.assertGreaterEqual(events["verify"][0], optimize_end)
+
+    def test_failed_preparation_does_not_fail_run(self):
+        pipeline = self._pipeline()
+
+        async def broken(*_):
+            raise RuntimeError("no compiler")
+
+        pipeline.verification_agent.aprepare = broken
+        pipeline.security_agent.aprepare = broken
+        result = asyncio.run(pipeline.arun(self.path))
+        self.assertNotEqual(result.status, "failed")
+        self.assertIsNotNone(result.verification_report)
+        self.assertIsNotNone(result.security_report)
+
+    def test_optimization_failure_is_partial(self):
+        pipeline = self._pipeline()
+
+        async def broken(_):
+            raise RuntimeError("llm down")
+
+        pipeline.optimization_agent.aprocess = broken
+        result = asyncio.run(pipeline.arun(self.path))
+        self.assertEqual(result.status, "partial")
+        self.assertIn("Optimization step failed", result.error)
+        self.assertIsNotNone(result.analysis_report)
+
+    def test_message_passing_runs_agents_on_their_threads(self):
+        pipeline = offline_pipeline(self.tmpdir, message_passing=True)
+        try:
+            result = asyncio.run(pipeline.arun(self.path))
+        finally:
+            pipeline.close()
+        self.assertNotEqual(result.status, "failed")
+        self.assertIsNotNone(pipeline.context.get("analysis_results"))
+        mailboxes = pipeline.registry.get_statistics()["mailboxes"]
+        for agent_id in ("analysis_1", "optimization_1", "verification_1", "security_1"):
+            self.assertEqual(mailboxes[agent_id]["processed"], 1)
+            self.assertEqual(mailboxes[agent_id]["queued"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,173 @@
+"""
+Unit tests for the on-disk pipeline result cache
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.cache.disk_cache import DiskCache
+from src.cache.keys import content_hash, llm_fingerprint
+from src.pipeline.result_cache import PipelineCache
+from tests.helpers import offline_pipeline
+
+
+SIMPLE_PROGRAM = """#include <iostream>
+int main() {
+    int x = 5;
+    std::cout << x << std::endl;
+    return 0;
+}
+"""
+
+
+class TestKeys(unittest.TestCase):
+
+    def test_content_hash_is_stable_and_order_sensitive(self):
+        self.assertEqual(content_hash("a", {"x": 1, "y": 2}),
+                         content_hash("a", {"y": 2, "x": 1}))
+        self.assertNotEqual(content_hash("ab", "c"), content_hash("a", "bc"))
+
+    def test_offline_clients_share_a_fingerprint(self):
+        offline = SimpleNamespace(_available=False, model="qwen")
+        online  = SimpleNamespace(_available=True, model="qwen")
+        self.assertEqual(llm_fingerprint(offline), llm_fingerprint(None))
+        self.assertNotEqual(llm_fingerprint(offline), llm_fingerprint(online))
+
+
+class TestDiskCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp(prefix="diskcache_")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_roundtrip_and_miss(self):
+        cache = DiskCache(self.tmpdir)
+        key = content_hash("k")
+        self.assertIsNone(cache.get(key))
+        cache.set(key, {"status": "PASS"})
+        self.assertEqual(cache.get(key), {"status": "PASS"})
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_lru_eviction_keeps_recently_used(self):
+        cache = DiskCache(self.tmpdir, max_bytes=None, max_entries=3)
+        keys = [content_hash(i) for i in range(3)]
+        for i, key in enumerate(keys):
+            cache.set(key, i)
+            # mtime resolution can be coarse; make the access order explicit
+            os.utime(cache._path(key), (time.time() - 100 + i,) * 2)
+        cache.get(keys[0])                     # keys[1] is now the oldest
+        cache.set(content_hash("new"), "new")
+        self.assertIn(keys[0], cache)
+        self.assertNotIn(keys[1], cache)
+        self.assertLessEqual(cache.stats()["entries"], 3)
+
+    def test_overwrite_is_not_a_new_entry(self):
+        cache = DiskCache(self.tmpdir, max_bytes=None, max_entries=3)
+        keys = [content_hash(i) for i in range(3)]
+        for key in keys:
+            cache.set(key, "x")
+        for _ in range(5):
+            cache.set(keys[0], "x" * 100)
+        self.assertTrue(all(key in cache for key in keys))
+        self.assertEqual(cache._size, cache._measure())
+
+    def test_corrupt_entry_is_a_miss(self):
+        cache = DiskCache(self.tmpdir)
+        key = content_hash("bad")
+        cache.set(key, 1)
+        with open(cache._path(key), "wb") as fh:
+            fh.write(b"not a pickle")
+        self.assertIsNone(cache.get(key))
+        self.assertNotIn(key, cache)
+
+
+class TestPipelineCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp(prefix="pipecache_")
+        self.cache  = PipelineCache(os.path.join(self.tmpdir, "cache"))
+        self.src    = os.path.join(self.tmpdir, "cached.cpp")
+        with open(self.src, "w", encoding="utf-8") as fh:
+            fh.write(SIMPLE_PROGRAM)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _pipeline(self):
+        return offline_pipeline(self.tmpdir, security=False, cache=self.cache)
+
+    def test_second_run_is_served_from_cache(self):
+        first = self._pipeline().run(self.src)
+        self.assertIn(first.status, ("success", "partial", "rollback"))
+
+        pipeline = self._pipeline()
+        with patch.object(pipeline.analysis_agent, "aprocess",
+                          side_effect=AssertionError("analysis re-ran")):
+            t0 = time.time()
+            second = pipeline.run(self.src)
+        self.assertLess(time.time() - t0, 1.0)
+        self.assertEqual(second.status, first.status)
+        self.assertEqual(second.verification_report, first.verification_report)
+        self.assertEqual(pipeline.context.get("source_file"), self.src)
+
+    def test_changed_source_misses(self):
+        self._pipeline().run(self.src)
+        with open(self.src, "a", encoding="utf-8") as fh:
+            fh.write("// edited\n")
+        pipeline = self._pipeline()
+        with patch.object(pipeline.analysis_agent, "aprocess",
+                          wraps=pipeline.analysis_agent.aprocess) as analysis:
+            pipeline.run(self.src)
+        analysis.assert_called_once()
+
+    def test_changed_llm_only_reruns_stages_that_use_it(self):
+        first = self._pipeline().run(self.src)
+
+        pipeline = self._pipeline()
+        pipeline.optimization_agent.llm = SimpleNamespace(_available=True, model="other")
+        with patch.object(pipeline.analysis_agent, "aprocess",
+                          side_effect=AssertionError("analysis re-ran")), \
+             patch.object(pipeline.optimization_agent, "aprocess",
+                          return_value=dict(first.optimization_report)) as opt:
+            result = pipeline.run(self.src)
+        opt.assert_called_once()
+        self.assertEqual(result.analysis_report, first.analysis_report)
+
+    def test_timed_out_security_audit_is_recomputed(self):
+        partial = {"all_vulnerabilities": [], "new_vulnerabilities": [],
+                   "overall_risk": "low", "status": "PASS", "summary": "",
+                   "sources": ["rules"], "timed_out_layers": ["llm"]}
+        for _ in range(2):
+            pipeline = offline_pipeline(self.tmpdir, cache=self.cache)
+            with patch.object(pipeline.security_agent, "aprocess",
+                              return_value=dict(partial)) as audit:
+                result = pipeline.run(self.src)
+            audit.assert_called_once()
+            self.assertEqual(result.security_report["timed_out_layers"], ["llm"])
+
+    def test_failed_security_audit_is_not_cached(self):
+        for _ in range(2):
+            pipeline = offline_pipeline(self.tmpdir, cache=self.cache)
+            with patch.object(pipeline.security_agent, "aprocess",
+                              side_effect=RuntimeError("scanner crashed")) as audit:
+                result = pipeline.run(self.src)
+            audit.assert_called_once()
+            self.assertTrue(result.security_report["error"])
+
+    def test_no_cache_pipeline_writes_nothing(self):
+        offline_pipeline(self.tmpdir, security=False).run(self.src)
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -2,7 +2,7 @@
 test_security_week8.py — Week 8 Security Agent Tests
 
 Covers:
-  - SecurityAgent Layer 1: rule-based detection
+  - SecurityAgent Layer 1: rule-based detection (compiled rule engine)
   - SecurityAgent Layer 2: heuristic detection
   - SecurityPromptTemplate structure
   - New-vulnerability detection and rollback logic
@@ -20,6 +20,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 from src.agents.security_agent import SecurityAgent
 from src.llm.prompt_templates import SecurityPromptTemplate
+from src.security.rule_engine import RuleEngine, _trie_pattern, get_rule_engine
 from agent_framework import ContextManager
 
 # ── Fixtures ──────────────────────────────────────────────────────────────────
@@ -141,6 +142,330 @@ class TestRuleBasedDetection:
         assert len(rule_findings) == 0, f"Unexpected: {rule_findings}"
 
 
+class TestRuleEngine:
+
+    def test_default_rules_anchor_inference(self):
+        engine = get_rule_engine()
+        anchors = {r.id: r.anchors for r in engine.rules}
+        assert anchors["unsafe_gets"] == ["gets"]
+        assert "vsprintf" in anchors["format_string_bug"]
+
+    def test_all_hits_in_one_pass(self):
+        code = (
+            'void f(char *b, char *s) {\n'
+            '    sprintf(b, s);  strcpy(b, s);\n'
+            '    printf(b); printf(s);\n'
+            '    printf("%s", b);\n'
+            '}\n'
+        )
+        hits = [(h.rule.id, h.line, h.groups) for h in get_rule_engine().scan(code)]
+        assert hits == [
+            ("unsafe_strcpy", 2, ()),
+            ("unsafe_sprintf", 2, ()),
+            ("format_string_bug", 2, ("sprintf", "b")),
+            ("format_string_bug", 3, ("printf", "b")),
+            ("format_string_bug", 3, ("printf", "s")),
+        ]
+
+    def test_trie_pattern_matches_exactly_the_words(self):
+        import re
+        words = ["gets", "getsx", "getsxyz", "printf", "sprintf", "snprintf"]
+        rx = re.compile(_trie_pattern(words))
+        for w in words:
+            assert rx.fullmatch(w)
+        for w in ["get", "getsxy", "snprint", "xprintf"]:
+            assert not rx.fullmatch(w)
+
+    def test_unanchored_rule(self):
+        engine = RuleEngine.from_dicts([{
+            "id": "shift_by_32", "pattern": r"<<\s*32\b", "severity": "low",
+            "cwe": "CWE-1335", "description": "Shift by the type width.",
+        }])
+        assert engine.rules[0].anchors == []
+        assert [h.line for h in engine.scan("x = 1;\ny = 1 << 32;\n")] == [2]
+
+    def test_invalid_rule_rejected(self):
+        with pytest.raises(ValueError):
+            RuleEngine.from_dicts([{"id": "bad", "pattern": "(", "severity": "low",
+                                    "cwe": "", "description": ""}])
+
+    def test_many_rules_do_not_slow_the_scan(self):
+        import time
+        base = [dict(r) for r in _default_rule_dicts()]
+        many = base + [{
+            "id": f"synthetic_{i}", "pattern": rf"\bdanger_fn_{i}\s*\(",
+            "severity": "low", "cwe": "CWE-000", "description": "synthetic",
+        } for i in range(600)]
+        code = ("void f(char *b, char *s) { strcpy(b, s); int x = g(b) + h(s); }\n"
+                * 4000)
+
+        def best(engine):
+            times = []
+            for _ in range(3):
+                t0 = time.perf_counter()
+                engine.scan(code)
+                times.append(time.perf_counter() - t0)
+            return min(times)
+
+        small, large = RuleEngine.from_dicts(base), RuleEngine.from_dicts(many)
+        assert len(large.scan(code)) == len(small.scan(code))
+        # 100x the rules; a per-rule scan would be ~100x slower
+        assert best(large) < 5 * best(small)
+
+    def test_agent_accepts_custom_rule_file(self, ctx, mock_llm, tmp_path):
+        import json
+        path = tmp_path / "rules.json"
+        path.write_text(json.dumps({"version": 1, "rules": [{
+            "id": "banned_alloca", "pattern": r"\balloca\s*\(", "severity": "high",
+            "cwe": "CWE-770", "description": "alloca() in {0}.",
+        }]}))
+        agent = SecurityAgent("sec_rules", ctx, llm_client=mock_llm, rules_path=str(path))
+        findings = agent._rule_scan("void f(int n) {\n    char *p = alloca(n);\n}\n")
+        assert [(f["type"], f["line"], f["description"]) for f in findings] == \
+            [("banned_alloca", 2, "alloca() in banned_alloca.")]
+
+
+def _default_rule_dicts():
+    import json
+    from src.security.rule_engine import DEFAULT_RULES_PATH
+    with open(DEFAULT_RULES_PATH, encoding="utf-8") as fh:
+        return json.load(fh)["rules"]
+
+
+class TestFindingCache:
+
+    ORIGINAL = (
+        "#include <stdio.h>\n"
+        "void a(char *d, const char *s) {\n    strcpy(d, s);\n}\n"
+        "int b(int n) {\n    return n * 2;\n}\n"
+        "void c(char *buf) {\n    gets(buf);\n}\n"
+    )
+
+    @pytest.fixture(autouse=True)
+    def fresh_cache(self):
+        from src.security.finding_cache import get_finding_cache
+        get_finding_cache().clear()
+        yield
+        get_finding_cache().clear()
+
+    def _scanned_regions(self, agent):
+        regions = []
+        real_scan = agent.rules.scan
+
+        def spy(text, line_of=None):
+            regions.append(text)
+            return real_scan(text, line_of)
+        return regions, patch.object(agent.rules, "scan", spy)
+
+    def test_repeated_audit_reuses_baseline(self, agent):
+        _run(agent, self.ORIGINAL, self.ORIGINAL.replace("n * 2", "n << 1"))
+        regions, spy = self._scanned_regions(agent)
+        with spy, patch.object(agent, "_heuristics", wraps=agent._heuristics) as heur:
+            _run(agent, self.ORIGINAL, self.ORIGINAL)
+        assert regions == []
+        assert heur.call_count == 0
+
+    def test_only_modified_function_rescanned(self, agent):
+        agent._rule_scan(self.ORIGINAL)
+        optimized = self.ORIGINAL.replace("n * 2", "n << 1").replace(
+            "#include <stdio.h>\n", "#include <stdio.h>\n// moved down a line\n")
+        regions, spy = self._scanned_regions(agent)
+        with spy:
+            findings = agent._rule_scan(optimized)
+        assert len(regions) == 2            # int b() and the header gap
+        assert any("n << 1" in r for r in regions)
+        assert {(f["type"], f["line"]) for f in findings} == \
+            {("unsafe_strcpy", 4), ("unsafe_gets", 10)}
+
+    def test_cached_scan_matches_whole_file_scan(self, agent):
+        from src.parser.parsed_source import parsed_source
+        for code in (self.ORIGINAL, self.ORIGINAL.replace("gets(buf)", "gets(buf); gets(buf)")):
+            parsed = parsed_source(code)
+            expected = [h.finding() for h in agent.rules.scan(parsed.code_text,
+                                                              parsed.tokens.line_of)]
+            assert [h.finding() for h in agent._rule_hits(parsed)] == expected
+
+    def test_callers_get_copies(self, agent):
+        first, _ = agent._heuristic_scan("int *p = malloc(n * m);")
+        first[0]["severity"] = "tampered"
+        again, _ = agent._heuristic_scan("int *p = malloc(n * m);")
+        assert again[0]["severity"] != "tampered"
+
+
+class TestPointerDataflow:
+
+    @staticmethod
+    def _issues(code):
+        from src.parser.parsed_source import parsed_source
+        from src.security.dataflow import analyze_pointers
+        return [(i.kind, i.var, i.line, i.freed_line)
+                for i in analyze_pointers(parsed_source(code))]
+
+    def test_cpp_delete_then_stream_deref(self):
+        code = ("int main() {\n    int* ptr = new int(42);\n    delete ptr;\n"
+                "    std::cout << *ptr << std::endl;\n    return 0;\n}\n")
+        assert self._issues(code) == [("use_after_free", "ptr", 4, 3)]
+
+    def test_delete_array_then_index(self):
+        code = "void f() {\n  int *a = new int[4];\n  delete[] a;\n  a[0] = 1;\n}\n"
+        assert self._issues(code) == [("use_after_free", "a", 4, 3)]
+
+    def test_reassignment_revives_pointer(self):
+        code = ("void f() {\n  int *p = malloc(4);\n  free(p);\n"
+                "  p = malloc(8);\n  *p = 1;\n}\n")
+        assert self._issues(code) == []
+
+    def test_multiplication_and_null_check_are_not_derefs(self):
+        code = ("void f(int n) {\n  int *p = malloc(4);\n  free(p);\n"
+                "  if (p == NULL) {}\n  int k = n * p;\n}\n")
+        assert self._issues(code) == []
+
+    def test_free_on_early_exit_path_does_not_leak_out(self):
+        code = ("void f(int *p, int err) {\n  if (err) {\n    free(p);\n    return;\n  }\n"
+                "  *p = 1;\n}\n")
+        assert self._issues(code) == []
+        conditional = code.replace("    return;", "    if (err > 1) return;")
+        assert self._issues(conditional) == [("use_after_free", "p", 6, 3)]
+
+    def test_free_before_break_reaches_code_after_loop(self):
+        nested = ("void f(int *p, int c) {\n  while (1) {\n    if (c) {\n      free(p);\n"
+                  "      break;\n    }\n  }\n  *p = 1;\n}\n")
+        body = "void f(int *p) {\n  for (;;) {\n    free(p);\n    break;\n  }\n  p->x = 1;\n}\n"
+        assert self._issues(nested) == [("use_after_free", "p", 8, 4)]
+        assert self._issues(body) == [("use_after_free", "p", 6, 3)]
+
+    def test_break_skips_rest_of_loop_body(self):
+        code = ("void f(int *p, int n) {\n  for (int i = 0; i < n; i++) {\n"
+                "    if (i == 3) {\n      free(p);\n      break;\n    }\n    p[i] = i;\n"
+                "  }\n}\n")
+        assert self._issues(code) == []
+
+    def test_free_before_goto_stays_live(self):
+        code = ("void f(int *p, int err) {\n  if (err) {\n    free(p);\n    goto out;\n  }\n"
+                "  p[0] = 1;\nout:\n  *p = 2;\n}\n")
+        assert self._issues(code) == [("use_after_free", "p", 6, 3)]
+
+    def test_code_ending_mid_call(self):
+        assert self._issues("void f(){ int*p; free(p); g(p") == []
+        assert self._issues("void f(){ int*p; free(p); g(1, p") == []
+
+    def test_deref_after_cast(self):
+        code = "void f(int *p) {\n  free(p);\n  int v = (int)*p;\n}\n"
+        assert self._issues(code) == [("use_after_free", "p", 3, 2)]
+        product = "void f(int *p, int n) {\n  free(p);\n  int v = g(n) * p;\n}\n"
+        assert self._issues(product) == []
+
+    def test_state_does_not_cross_functions(self):
+        code = "void a(int *p) {\n  free(p);\n}\nvoid b(int *p) {\n  *p = 1;\n}\n"
+        assert self._issues(code) == []
+
+    def test_double_free(self):
+        code = "void f() {\n  char *p = malloc(4);\n  free(p);\n  free(p);\n}\n"
+        assert self._issues(code) == [("double_free", "p", 4, 3)]
+
+    def test_dangling_pointer_escapes(self):
+        returned = "int *f() {\n  int *p = malloc(4);\n  free(p);\n  return p;\n}\n"
+        passed = "void f() {\n  int *p = malloc(4);\n  free(p);\n  use(1, p);\n}\n"
+        assert self._issues(returned) == [("dangling_pointer", "p", 4, 3)]
+        assert self._issues(passed) == [("dangling_pointer", "p", 4, 3)]
+
+    def test_agent_reports_double_free(self, agent):
+        code = "void f() {\n  char *p = (char*)malloc(4);\n  free(p);\n  free(p);\n}\n"
+        findings = agent._rule_scan(code)
+        assert [(f["type"], f["cwe_id"], f["severity"]) for f in findings] == \
+            [("double_free", "CWE-415", "high")]
+
+    def test_sweep_is_linear_in_freed_pointers(self):
+        import time
+        from src.parser.parsed_source import parsed_source
+        from src.security.dataflow import analyze_pointers
+
+        def source(n):
+            return "void f() {\n" + "".join(
+                f"  int *p{i} = malloc(4);\n  free(p{i});\n" for i in range(n)
+            ) + "".join(f"  *p{i} = {i};\n" for i in range(n)) + "}\n"
+
+        def best(parsed):
+            times = []
+            for _ in range(3):
+                t0 = time.perf_counter()
+                issues = analyze_pointers(parsed)
+                times.append(time.perf_counter() - t0)
+            return min(times), len(issues)
+
+        small, large = parsed_source(source(300)), parsed_source(source(2400))
+        small.scopes, large.scopes
+        (t_small, n_small), (t_large, n_large) = best(small), best(large)
+        assert (n_small, n_large) == (300, 2400)
+        # 8x the pointers and lines; a per-pointer rescan would be ~64x slower
+        assert t_large < 24 * t_small
+
+
+class TestConcurrentLayers:
+
+    CODE = "void f() {\n  char buf[64];\n  gets(buf);\n}\n"
+
+    @staticmethod
+    def _slow_llm(mock_llm, seconds):
+        import time
+        raw = mock_llm.generate.return_value
+
+        def generate(*args, **kwargs):
+            time.sleep(seconds)
+            return raw
+        mock_llm._available = True
+        mock_llm.generate.side_effect = generate
+        return mock_llm
+
+    def test_llm_and_cppcheck_overlap(self, ctx, mock_llm):
+        import time
+        agent = SecurityAgent("sec_conc", ctx, llm_client=self._slow_llm(mock_llm, 0.6),
+                              concurrent=True)
+
+        def slow_cppcheck(code, file_path):
+            time.sleep(0.6)
+            return []
+        with patch.object(agent, "_run_cppcheck", slow_cppcheck):
+            t0 = time.perf_counter()
+            result = _run(agent, self.CODE, self.CODE.replace("buf", "b"))
+            elapsed = time.perf_counter() - t0
+        assert result["timed_out_layers"] == []
+        assert elapsed < 1.1                    # ~max(0.6, 0.6), not the sum
+
+    def test_slow_llm_abandoned_at_deadline(self, ctx, mock_llm):
+        import time
+        agent = SecurityAgent("sec_deadline", ctx, llm_client=self._slow_llm(mock_llm, 3.0),
+                              concurrent=True, deadlines={"llm": 0.3})
+        t0 = time.perf_counter()
+        result = _run(agent, "int main() { return 0; }", self.CODE)
+        assert time.perf_counter() - t0 < 2.0
+        assert result["timed_out_layers"] == ["llm"]
+        assert result["llm_conclusion"] == "LLM analysis abandoned."
+        # the deterministic layers are intact and still drive the decision
+        assert "unsafe_gets" in [v["type"] for v in result["new_vulnerabilities"]]
+        assert result["status"] == "ROLLBACK"
+
+    def test_slow_cppcheck_abandoned_async(self, ctx, mock_llm):
+        import asyncio
+        import time
+        agent = SecurityAgent("sec_async", ctx, llm_client=mock_llm,
+                              concurrent=True, deadlines={"cppcheck": 0.2})
+
+        def slow_cppcheck(code, file_path):
+            time.sleep(1.5)
+            return [{"type": "cppcheck_late"}]
+        with patch.object(agent, "_run_cppcheck", slow_cppcheck):
+            result = asyncio.run(agent.aprocess({"original_code": self.CODE,
+                                                 "optimized_code": self.CODE}))
+        assert result["timed_out_layers"] == ["cppcheck"]
+        assert "cppcheck" not in result["sources"]
+        assert "unsafe_gets" in [v["type"] for v in result["all_vulnerabilities"]]
+
+    def test_sequential_mode_has_no_deadlines(self, agent):
+        assert agent.deadlines == {}
+        assert _run(agent, self.CODE, self.CODE)["timed_out_layers"] == []
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # LAYER 2: Heuristic detection
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -215,6 +540,21 @@ class TestHeuristicDetection:
         types = [v["type"] for v in result["all_vulnerabilities"]]
         assert "unbounded_loop_write" in types
 
+    def test_recursive_large_buffer_detected(self, agent):
+        code = (
+            'int walk(int depth) {\n'
+            '    char scratch[4096];\n'
+            '    if (depth > 0) {\n'
+            '        return walk(depth - 1) + scratch[0];\n'
+            '    }\n'
+            '    return 0;\n'
+            '}\n'
+            'int leaf(int x) { char small[4096]; return x; }\n'
+        )
+        result = _run(agent, code, code)
+        types = [v["type"] for v in result["all_vulnerabilities"]]
+        assert types.count("stack_overflow_risk") == 1
+
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # New vulnerability detection & rollback
@@ -336,6 +676,112 @@ class TestCppcheckIntegration:
             assert "cppcheck_" in f["type"]
 
 
+_FAKE_CPPCHECK = """\
+import os, sys
+if "--version" in sys.argv:
+    print("Cppcheck 2.13.0"); sys.exit(0)
+with open(os.environ["FAKE_CPPCHECK_LOG"], "a") as log:
+    log.write(" ".join(sys.argv[1:]) + "\\n")
+errors = []
+for path in (a for a in sys.argv[1:] if not a.startswith("-")):
+    for n, line in enumerate(open(path), 1):
+        if "*p = 1" in line:
+            errors.append('<error id="nullPointer" severity="error" msg="Null pointer '
+                          'dereference" cwe="476"><location file="%s" line="%d"/></error>'
+                          % (path, n))
+        if "via_header" in line:
+            errors.append('<error id="bufferAccessOutOfBounds" severity="error" msg="x">'
+                          '<location file="/usr/include/string.h" line="7"/>'
+                          '<location file="%s" line="%d"/></error>' % (path, n))
+        if "no_location" in line:
+            errors.append('<error id="syntaxError" severity="error" msg="x"></error>')
+sys.stderr.write('<?xml version="1.0"?><results version="2"><errors>%s</errors></results>'
+                 % "".join(errors))
+"""
+
+
+class TestCppcheckRunner:
+    """Batching and caching, driven by a stand-in cppcheck binary."""
+
+    NULL_DEREF = "void f() {\n    int *p = 0;\n    *p = 1;\n}\n"
+
+    @pytest.fixture
+    def runner(self, tmp_path, monkeypatch):
+        from src.security.cppcheck import CppcheckRunner
+        from src.security.finding_cache import get_finding_cache
+        binary = tmp_path / "cppcheck"
+        binary.write_text(f"#!{sys.executable}\n" + _FAKE_CPPCHECK)
+        binary.chmod(0o755)
+        monkeypatch.setenv("FAKE_CPPCHECK_LOG", str(tmp_path / "calls.log"))
+        get_finding_cache().clear()
+        yield CppcheckRunner(directory=str(tmp_path / "cache"), binary=str(binary))
+        get_finding_cache().clear()
+
+    @staticmethod
+    def _calls(tmp_path):
+        log = tmp_path / "calls.log"
+        return log.read_text().splitlines() if log.exists() else []
+
+    def test_batch_is_one_invocation_split_per_file(self, runner, tmp_path):
+        clean = "int g() { return 0; }\n"
+        results = runner.scan_batch([(clean, ".c"), (self.NULL_DEREF, ".cpp"),
+                                     ("\n" + self.NULL_DEREF, ".cpp")], jobs=2)
+        calls = self._calls(tmp_path)
+        assert len(calls) == 1 and "-j2" in calls[0]
+        assert results[0] == []
+        assert [(f["type"], f["line"], f["cwe_id"]) for f in results[1]] == \
+            [("cppcheck_nullPointer", 3, "CWE-476")]
+        assert [f["line"] for f in results[2]] == [4]
+
+    def test_error_located_in_header_is_attributed_to_source(self, runner, tmp_path):
+        code = "void f() {\n  g(); // via_header\n}\n"
+        results = runner.scan_batch([(code, ".c"), ("int x;\n", ".c")], jobs=2)
+        assert [(f["type"], f["line"]) for f in results[0]] == \
+            [("cppcheck_bufferAccessOutOfBounds", 2)]
+        assert results[1] == []
+
+    def test_unattributable_error_rescans_batch_per_file(self, runner, tmp_path):
+        from src.security.finding_cache import get_finding_cache
+        odd = "int x; // no_location\n"
+        sources = [(odd, ".c"), (self.NULL_DEREF, ".cpp")]
+        batched = runner.scan_batch(sources, jobs=2)
+        assert len(self._calls(tmp_path)) == 3          # the batch, then one per file
+        assert [f["type"] for f in batched[0]] == ["cppcheck_syntaxError"]
+        assert [f["type"] for f in batched[1]] == ["cppcheck_nullPointer"]
+        get_finding_cache().clear()
+        runner.store.clear()
+        assert [runner.scan(code, suffix) for code, suffix in sources] == batched
+
+    def test_unchanged_sources_never_reinvoke(self, runner, tmp_path):
+        from src.security.cppcheck import CppcheckRunner
+        from src.security.finding_cache import get_finding_cache
+        first = runner.scan(self.NULL_DEREF, ".cpp")
+        assert runner.scan_batch([(self.NULL_DEREF, ".cpp")] * 3) == [first] * 3
+        assert len(self._calls(tmp_path)) == 1
+        # a new process (empty memory cache) is served from disk
+        get_finding_cache().clear()
+        fresh = CppcheckRunner(directory=runner.store.directory, binary=runner.binary)
+        assert fresh.scan(self.NULL_DEREF, ".cpp") == first
+        assert len(self._calls(tmp_path)) == 1
+        # only the new source is handed to cppcheck
+        fresh.scan_batch([(self.NULL_DEREF, ".cpp"), ("int x;\n", ".c")])
+        calls = self._calls(tmp_path)
+        assert len(calls) == 2 and calls[1].count("src") == 1
+
+    def test_failed_run_is_not_cached(self, runner, tmp_path):
+        from src.security.cppcheck import CppcheckRunner
+        broken = CppcheckRunner(directory=runner.store.directory,
+                                binary=str(tmp_path / "no-such-cppcheck"))
+        assert broken.scan(self.NULL_DEREF, ".cpp") is None
+        assert broken.scan(self.NULL_DEREF, ".cpp") is None
+        assert broken.invocations == 2
+
+    def test_agent_uses_shared_runner(self, agent, runner):
+        agent.cppcheck = runner
+        findings = agent._cppcheck_scan(self.NULL_DEREF, "x.cpp")
+        assert [f["source"] for f in findings] == ["cppcheck"]
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # Overall risk computation
 # ═══════════════════════════════════════════════════════════════════════════════
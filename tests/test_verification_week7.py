@@ -5,6 +5,7 @@ Unit tests for Verification components and Pipeline — Week 7
 import os
 import sys
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
@@ -71,6 +72,15 @@ class TestDifferentialTester(unittest.TestCase):
         result = self.tester.test(SIMPLE_ORIGINAL, SIMPLE_OPTIMIZED)
         self.assertIsInstance(result.passed, bool)
 
+    def test_pool_gives_same_verdicts(self):
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            same = self.tester.test(SIMPLE_ORIGINAL, SIMPLE_OPTIMIZED, pool=pool)
+            diff = self.tester.test(SIMPLE_ORIGINAL, BROKEN_OPTIMIZED, pool=pool)
+        if same.skipped:
+            self.skipTest("g++ not available")
+        self.assertTrue(same.passed)
+        self.assertFalse(diff.passed)
+
 
 # ── Z3 Verifier ───────────────────────────────────────────────────────────────
 
@@ -130,6 +140,22 @@ class TestPerfBenchmarker(unittest.TestCase):
             self.assertGreaterEqual(result.original_ms, 0)
             self.assertGreaterEqual(result.optimized_ms, 0)
 
+    def test_harness_builds_plain_main(self):
+        result = self.bench.benchmark(SIMPLE_ORIGINAL, SIMPLE_OPTIMIZED)
+        if not result.available:
+            self.skipTest("g++ not available")
+        self.assertIsNone(result.error)
+        self.assertGreater(result.original_ms, 0)
+
+    def test_interleaved_runs_with_pool(self):
+        bench = PerfBenchmarker(runs=3)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            result = bench.benchmark(SIMPLE_ORIGINAL, SIMPLE_OPTIMIZED, pool=pool)
+        if not result.available:
+            self.skipTest("g++ not available")
+        self.assertIsNone(result.error)
+        self.assertGreater(result.optimized_ms, 0)
+
 
 # ── Verification Agent ────────────────────────────────────────────────────────
 
@@ -173,6 +199,16 @@ class TestVerificationAgent(unittest.TestCase):
         result = self.agent.process({})
         self.assertEqual(result.get("status"), "FAIL")
 
+    def test_concurrent_mode_matches_sequential(self):
+        concurrent = VerificationAgent("ver_conc", ContextManager(), concurrent=True)
+        for optimized in (SIMPLE_OPTIMIZED, BROKEN_OPTIMIZED):
+            seq = self.agent.process({"original_code": SIMPLE_ORIGINAL,
+                                      "optimized_code": optimized})
+            par = concurrent.process({"original_code": SIMPLE_ORIGINAL,
+                                      "optimized_code": optimized})
+            for key in ("status", "diff_passed", "z3_status"):
+                self.assertEqual(par[key], seq[key], key)
+
 
 # ── Full Pipeline ─────────────────────────────────────────────────────────────
 
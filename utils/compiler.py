@@ -2,6 +2,8 @@
 C++ Compiler Wrapper
 
 Provides compilation and execution of C++ source files for differential testing.
+Compiles are served from the shared CompileCache when the same source has
+already been built with the same compiler and flags.
 """
 
 import subprocess
@@ -12,6 +14,8 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional, List
 
+from src.verification.compile_cache import get_compile_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -36,8 +40,9 @@ class RunResult:
 class CppCompiler:
     """Wrapper around g++ for compiling and running C++ code"""
 
-    def __init__(self, compiler: str = "g++"):
+    def __init__(self, compiler: str = "g++", use_cache: bool = True):
         self.compiler = compiler
+        self.compile_cache = get_compile_cache() if use_cache else None
 
     def compile(
         self,
@@ -72,12 +77,18 @@ class CppCompiler:
         logger.info(f"Compiling: {' '.join(cmd)}")
 
         try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=timeout,
-            )
+            if self.compile_cache is not None:
+                result = self.compile_cache.compile(
+                    self.compiler, flags, str(source_path), output_path,
+                    timeout=timeout,
+                )
+            else:
+                result = subprocess.run(
+                    cmd,
+                    capture_output=True,
+                    text=True,
+                    timeout=timeout,
+                )
 
             # Separate warnings from errors in stderr
             stderr_lines = result.stderr.strip().split("\n") if result.stderr.strip() else []